@@ -11,13 +11,32 @@ This version generates STUNNING modern websites with:
 ⚡ Lightning-fast performance
 """
 
+import contextvars
+import json
 import os
-from typing import Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
 from state import WebDesignState
+from candidates import pick_best, score_copy, score_page
+from concurrency import limiter_from_env
+from context_budget import fit_context
+from scheduler import current_context, scheduler_from_env
+from singleflight import SingleFlight, prompt_key
+from ingestion import PAGE_BREAK, chunk_pages
+from metrics import metrics
+from output_budgets import budgets_from_env
+from run_history import cached_tokens, record_llm_call
+from semantic_cache import cache_from_env
+from state_store import resolve, store_text, text_length
+from prompts import build_templates
+from template_renderer import DEVELOPER_MODES, missing_blocks, render_from_outputs
 
 # Load environment variables
 load_dotenv()
@@ -32,42 +51,360 @@ llm = ChatOpenAI(
 print("✓ API Key loaded:", os.getenv("OPENAI_API_KEY")[:12] + "..." if os.getenv("OPENAI_API_KEY") else "NOT FOUND")
 print("✓ LLM initialized:", llm.model_name)
 
+# Draft pass (see drafting()): a faster model, small outputs, tight context
+DRAFT_MODEL = os.getenv("DRAFT_MODEL", "gpt-4o-mini")
+DRAFT_MAX_TOKENS = int(os.getenv("DRAFT_MAX_TOKENS", "700"))
+DRAFT_CONTEXT_SCALE = float(os.getenv("DRAFT_CONTEXT_SCALE", "0.25"))
+draft_llm = ChatOpenAI(
+    model=DRAFT_MODEL,
+    temperature=0.7,
+    api_key=os.getenv("OPENAI_API_KEY")
+)
+
+_drafting: ContextVar[bool] = ContextVar("drafting", default=False)
+
+
+@contextmanager
+def drafting() -> Iterator[None]:
+    """
+    Run every agent inside the block as a quick draft.
+    
+    Calls go to DRAFT_MODEL with max_tokens=DRAFT_MAX_TOKENS and no
+    continuations, context budgets shrink by DRAFT_CONTEXT_SCALE, the
+    Designer/Copywriter add their JSON blocks, and the Developer renders
+    the page locally from them (as in DEVELOPER_MODE=template). Draft
+    analyses are not added to the semantic cache.
+    """
+    token = _drafting.set(True)
+    try:
+        yield
+    finally:
+        _drafting.reset(token)
+
+
+def is_drafting() -> bool:
+    return _drafting.get()
+
+
+def _llm() -> ChatOpenAI:
+    return draft_llm if _drafting.get() else llm
+
+# Adaptive (AIMD) limit on in-flight LLM calls, shared by every agent
+llm_limiter = limiter_from_env()
+
+# Priority/fair-queuing scheduler deciding who gets the next free slot
+llm_scheduler = scheduler_from_env(llm_limiter)
+
+# Identical prompts already in flight share one upstream request
+llm_singleflight = SingleFlight()
+
+# How the page is built: "llm", "template" or "template+refine" (see template_renderer.py)
+DEVELOPER_MODE = os.getenv("DEVELOPER_MODE", "llm").strip().lower()
+if DEVELOPER_MODE not in DEVELOPER_MODES:
+    raise ValueError(f"DEVELOPER_MODE must be one of {', '.join(DEVELOPER_MODES)}, not {DEVELOPER_MODE!r}")
+
+# Per-node max_tokens learned from the run history (see output_budgets.py)
+output_budgets = budgets_from_env()
+LLM_MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+
+# Completions sampled per call and scored locally (see candidates.py)
+DEVELOPER_CANDIDATES = max(1, int(os.getenv("DEVELOPER_CANDIDATES", "1")))
+COPYWRITER_CANDIDATES = max(1, int(os.getenv("COPYWRITER_CANDIDATES", "1")))
+
+CONTINUE_PROMPT = (
+    "Your reply was cut off by the length limit. Continue exactly where it stopped, "
+    "without repeating anything and without any preamble."
+)
+
+# Static-prefix / dynamic-suffix prompt templates (see prompts.py). Drafts
+# and multi-page sites always need the Designer/Copywriter JSON blocks
+PROMPTS = build_templates(DEVELOPER_MODE)
+JSON_BLOCK_PROMPTS = build_templates("template")
+
+_json_blocks: ContextVar[bool] = ContextVar("json_blocks", default=False)
+
+
+@contextmanager
+def with_json_blocks() -> Iterator[None]:
+    """Have the Designer/Copywriter append their JSON blocks inside the block."""
+    token = _json_blocks.set(True)
+    try:
+        yield
+    finally:
+        _json_blocks.reset(token)
+
+
+def _prompts() -> Dict:
+    return JSON_BLOCK_PROMPTS if _drafting.get() or _json_blocks.get() else PROMPTS
+
+
+def _fit(node: str, **fields: str) -> Dict[str, str]:
+    return fit_context(node, scale=DRAFT_CONTEXT_SCALE if _drafting.get() else 1.0, **fields)
+
+# Near-duplicate brochure inputs reuse a past analysis (see semantic_cache.py)
+historian_cache = cache_from_env()
+
+# Brochure text longer than this is analyzed map-reduce style: chunks in
+# parallel (at most HISTORIAN_MAP_WORKERS at a time per run), then one merge.
+# Chunks are sized to fill one wave of workers, up to HISTORIAN_CHUNK_CHARS
+HISTORIAN_MAP_THRESHOLD = int(os.getenv("HISTORIAN_MAP_THRESHOLD", "12000"))
+HISTORIAN_CHUNK_CHARS = int(os.getenv("HISTORIAN_CHUNK_CHARS", "16000"))
+HISTORIAN_MAP_WORKERS = int(os.getenv("HISTORIAN_MAP_WORKERS", "4"))
+
+
+def _shared_call(agent_name: str, key: str, fn, record) -> object:
+    """
+    fn() through singleflight and the scheduler. Only the leader records
+    usage (record(result), in the leader's run); followers are counted as
+    singleflight.shared, and an interactive follower promotes a queued
+    bulk leader.
+    """
+    def lead():
+        result = llm_scheduler.run(agent_name, fn, share_key=key)
+        record(result)
+        return result
+
+    return llm_singleflight.do(key, lead, on_follow=lambda: llm_scheduler.promote(key, current_context()))
+
+
+def _invoke(agent_name: str, messages, params: Dict):
+    model = _llm()
+    key = prompt_key(model.model_name, messages, temperature=model.temperature, **params)
+    started = time.time()
+    return _shared_call(
+        agent_name, key,
+        lambda: model.invoke(messages, **params),
+        lambda response: _record(agent_name, started, response),
+    )
+
+
+def _record(agent_name: str, started: float, response, completions: int = 1) -> None:
+    record_llm_call(agent_name, _llm().model_name, started, response, completions)
+    usage = getattr(response, "usage_metadata", None) or {}
+    metrics.inc(f"llm.input_tokens.{agent_name}", int(usage.get("input_tokens") or 0))
+    metrics.inc(f"llm.cached_tokens.{agent_name}", cached_tokens(usage))
+
+
+def _with_output_budget(agent_name: str, params: Dict) -> Dict:
+    if _drafting.get():
+        return {**params, "max_tokens": min(params.get("max_tokens") or DRAFT_MAX_TOKENS, DRAFT_MAX_TOKENS)}
+    if "max_tokens" not in params and output_budgets is not None:
+        limit = output_budgets.max_tokens(agent_name)
+        if limit:
+            return {**params, "max_tokens": limit}
+    return params
+
+
+def _truncated(response) -> bool:
+    return (getattr(response, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+
+def call_llm(agent_name: str, messages, **params):
+    """
+    Single choke point for every agent LLM call.
+    
+    Concurrent calls with a byte-identical prompt are coalesced into one
+    upstream request. Otherwise the call waits its turn in the priority
+    scheduler (interactive before bulk, fair between jobs), then holds a
+    slot from the adaptive concurrency limiter while the request is in
+    flight, so 429s and latency spikes shrink the limit and healthy calls
+    grow it again.
+    
+    Latency and token usage are reported to the run history recorder;
+    input and prompt-cache-hit token totals per node go to the runtime
+    metrics (llm.input_tokens.<node>, llm.cached_tokens.<node>).
+    Extra request parameters (e.g. response_format) are passed through to
+    the model and are part of the deduplication key.
+    
+    Unless max_tokens is given, the node's learned output budget applies.
+    A reply cut off at the limit is continued (up to LLM_MAX_CONTINUATIONS
+    more calls) and returned as one message; structured-output calls are
+    retried once without the limit instead. Drafts keep a cut-off reply.
+    """
+    params = _with_output_budget(agent_name, params)
+    response = _invoke(agent_name, messages, params)
+    if not _truncated(response):
+        return response
+
+    metrics.inc(f"llm.truncated.{agent_name}")
+    limit = params.get("max_tokens")
+    # Without our own cap the reply hit the model's output ceiling
+    limit_text = f"max_tokens={limit:,}" if limit else "the model's output limit"
+    if "response_format" in params:
+        if not limit:
+            return response  # nothing to lift; the caller handles the cut-off JSON
+        print(f"   ✂️  {agent_name}: reply hit {limit_text}; retrying without the limit")
+        params = {k: v for k, v in params.items() if k != "max_tokens"}
+        return _invoke(agent_name, messages, params)
+    if _drafting.get():
+        return response
+
+    parts = [response.content]
+    for attempt in range(LLM_MAX_CONTINUATIONS):
+        print(f"   ✂️  {agent_name}: reply hit {limit_text}; continuing ({attempt + 1})")
+        response = _invoke(
+            agent_name,
+            list(messages) + [AIMessage(content="".join(parts)), HumanMessage(content=CONTINUE_PROMPT)],
+            params,
+        )
+        parts.append(response.content)
+        if not _truncated(response):
+            break
+    else:
+        print(f"   ⚠️  {agent_name}: still truncated after {LLM_MAX_CONTINUATIONS} continuations")
+    return response.model_copy(update={"content": "".join(parts)})
+
+
+def call_llm_candidates(agent_name: str, messages, n: int, **params) -> List[Tuple[str, bool]]:
+    """
+    n completions of one prompt in a single request (the `n` parameter).
+    
+    Goes through the same singleflight, scheduler, limiter and output
+    budget as call_llm(); the prompt is sent and billed once. Returns
+    (text, truncated) per candidate. Cut-off candidates are not continued,
+    the scorer penalizes them instead.
+    """
+    if n <= 1:
+        response = call_llm(agent_name, messages, **params)
+        return [(response.content, False)]
+    params = _with_output_budget(agent_name, params)
+    model = _llm()
+    sampler = model.model_copy(update={"n": n})
+    key = prompt_key(model.model_name, messages, temperature=model.temperature, n=n, **params)
+    started = time.time()
+    # Every generation carries the whole request's usage; record it once,
+    # as n calls so the learned output budget stays per completion
+    result = _shared_call(
+        agent_name, key,
+        lambda: sampler.generate([messages], **params),
+        lambda res: _record(agent_name, started, res.generations[0][0].message, completions=len(res.generations[0])),
+    )
+    generations = result.generations[0]
+    return [
+        (g.message.content, (g.generation_info or {}).get("finish_reason") == "length")
+        for g in generations
+    ]
+
+
+def choose_candidate(agent_name: str, candidates: List[Tuple[str, bool]], scorer) -> str:
+    """The best-scoring candidate's text; prints the scoreboard when there was a choice."""
+    if len(candidates) == 1:
+        return candidates[0][0]
+    best, scores = pick_best(candidates, scorer)
+    for i, score in enumerate(scores):
+        mark = "🏆" if i == best else "  "
+        print(f"   {mark} candidate {i + 1}: score {score['score']:>4} ({score['summary']})")
+    metrics.inc(f"candidates.{agent_name}.generated", len(candidates))
+    metrics.set_gauge(f"candidates.{agent_name}.winner_score", scores[best]["score"])
+    return candidates[best][0]
+
 
 # ============================================================================
 # AGENT 1: HISTORIAN (Same as before)
 # ============================================================================
 
-def historian_agent(state: WebDesignState) -> Dict[str, str]:
-    """THE HISTORIAN - Research Specialist"""
+def historian_messages(state: WebDesignState) -> List[BaseMessage]:
+    """Build the Historian's prompt (shared by live and batch execution)."""
+    text = resolve(state.get("brochure_text") or "").replace(PAGE_BREAK, "\n\n--- next page ---\n\n")
+    return PROMPTS["historian"].messages(
+        brochure_url=state["brochure_url"],
+        brochure_text=f"\n\n### BROCHURE TEXT (extracted):\n{text}" if text else "",
+    )
+
+
+def _historian_cache_input(state: WebDesignState) -> str:
+    # Ingested brochures are matched on their content, not their file path
+    return resolve(state.get("brochure_text") or "") or state["brochure_url"]
+
+
+def _historian_cache_namespace() -> str:
+    # A new model or Historian prompt must not reuse old analyses
+    return f"{llm.model_name}:{PROMPTS['historian'].prefix_hash}"
+
+
+def cached_analysis(state: WebDesignState) -> Optional[Dict[str, str]]:
+    """State update reusing a near-duplicate input's analysis, or None on a miss."""
+    if historian_cache is None:
+        return None
+    hit = historian_cache.lookup(_historian_cache_input(state), _historian_cache_namespace())
+    if hit is None:
+        return None
+    print(f"♻️  HISTORIAN: Reusing the analysis of a near-duplicate input (similarity {hit['similarity']:.2f})")
+    print(f"   Cached from: {hit['input'][:70]}")
+    return {"analysis": store_text(hit["analysis"])}
+
+
+def remember_analysis(state: WebDesignState, analysis: Optional[str] = None) -> None:
+    """Add a fresh analysis (default: the one in state) to the semantic cache."""
+    analysis = resolve(state["analysis"]) if analysis is None else analysis
+    if _drafting.get():
+        return
+    if historian_cache is not None and analysis and not analysis.startswith("Error:"):
+        historian_cache.add(_historian_cache_input(state), analysis, _historian_cache_namespace())
+
+
+def map_reduce_analysis(state: WebDesignState, text: str) -> str:
+    """
+    Analyze a long brochure in chunks, then merge the notes.
     
-    print("🔍 HISTORIAN AGENT: Analyzing 1977 Apple II brochure...")
+    Chunk calls run in parallel on a bounded pool, so latency follows the
+    largest chunk (plus one merge call) rather than the document length.
+    A failed chunk is skipped; the merge fails only if every chunk did.
+    """
+    workers = max(1, HISTORIAN_MAP_WORKERS)
+    # About one chunk per worker, so all chunks run in a single wave unless
+    # that would make them larger than HISTORIAN_CHUNK_CHARS
+    chunks = chunk_pages(text, HISTORIAN_CHUNK_CHARS, target_chars=-(-len(text) // workers))
+    print(f"   📚 Long brochure: {len(chunks)} chunks (largest {max(map(len, chunks)):,} chars), "
+          f"{min(workers, len(chunks))} at a time")
     
-    brochure_url = state["brochure_url"]
+    def analyze_chunk(index: int, chunk: str) -> str:
+        messages = PROMPTS["historian_map"].messages(
+            brochure_url=state["brochure_url"], part=f"{index + 1}/{len(chunks)}", chunk=chunk
+        )
+        return call_llm("historian_map", messages).content
     
-    system_prompt = """You are a design historian specializing in tech product launches 
-from the 1970s and 1980s. Your expertise is in Apple's early design philosophy, 
-Steve Jobs' messaging style, and the cultural context of the personal computing revolution."""
-
-    user_prompt = f"""Analyze this 1977 Apple II product brochure: {brochure_url}
-
-Extract insights about:
-1. Design Philosophy & Visual Language (colors, typography, layout)
-2. Messaging & Tone (Steve Jobs' voice, target audience, themes)
-3. Technical Presentation (how specs were communicated)
-4. Cultural Context (what was revolutionary in 1977)
+    # Each task gets its own copy of the caller's context (priority, recorder)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, analyze_chunk, i, chunk)
+            for i, chunk in enumerate(chunks)
+        ]
+        notes = []
+        for i, future in enumerate(futures):
+            try:
+                notes.append(f"#### Part {i + 1}/{len(chunks)}\n{future.result()}")
+            except Exception as e:
+                print(f"   ⚠️  Chunk {i + 1}/{len(chunks)} failed: {e}")
+    if not notes:
+        raise RuntimeError(f"all {len(chunks)} brochure chunks failed")
+    
+    messages = PROMPTS["historian_reduce"].messages(
+        brochure_url=state["brochure_url"], notes="\n\n".join(notes)
+    )
+    return call_llm("historian", messages).content
 
-Be specific and actionable for a modern design team."""
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ]
+def historian_agent(state: WebDesignState) -> Dict[str, str]:
+    """THE HISTORIAN - Research Specialist"""
+    
+    cached = cached_analysis(state)
+    if cached is not None:
+        return cached
+    
+    print("🔍 HISTORIAN AGENT: Analyzing 1977 Apple II brochure...")
+    
+    text = resolve(state.get("brochure_text") or "")
     
     try:
-        response = llm.invoke(messages)
+        if HISTORIAN_MAP_THRESHOLD and len(text) > HISTORIAN_MAP_THRESHOLD:
+            analysis = map_reduce_analysis(state, text)
+        else:
+            analysis = call_llm("historian", historian_messages(state)).content
         print("✅ HISTORIAN AGENT: Analysis complete!")
-        print(f"   Generated {len(response.content)} characters")
-        return {"analysis": response.content}
+        print(f"   Generated {len(analysis)} characters")
+        remember_analysis(state, analysis)
+        return {"analysis": store_text(analysis)}
     except Exception as e:
         print(f"❌ HISTORIAN AGENT: Error - {e}")
         return {"analysis": f"Error: {str(e)}"}
@@ -77,40 +414,23 @@ Be specific and actionable for a modern design team."""
 # AGENT 2: DESIGNER (Same as before)
 # ============================================================================
 
+def designer_messages(state: WebDesignState) -> List[BaseMessage]:
+    """Build the Designer's prompt (shared by live and batch execution)."""
+    return _prompts()["designer"].messages(**_fit("designer", analysis=resolve(state["analysis"])))
+
+
 def designer_agent(state: WebDesignState) -> Dict[str, str]:
     """THE DESIGNER - Visual Design Specialist"""
     
     print("🎨 DESIGNER AGENT: Creating design specifications...")
     
-    analysis = state["analysis"]
-    
-    system_prompt = """You are a senior product designer specializing in retro-modern aesthetics.
-Create detailed specifications for colors, typography, spacing, and layout."""
-
-    user_prompt = f"""Based on this analysis:
-
-{analysis}
-
-Create a comprehensive design specification with:
-- Exact hex color codes for warm, retro palette
-- Typography system (fonts, sizes in rem)
-- Spacing system (in rem units)
-- Layout specifications (Grid, Flexbox)
-- Animation guidelines
-- Responsive breakpoints
-
-Be extremely specific. A developer should be able to implement this pixel-perfect."""
-
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ]
+    messages = designer_messages(state)
     
     try:
-        response = llm.invoke(messages)
+        response = call_llm("designer", messages)
         print("✅ DESIGNER AGENT: Design complete!")
         print(f"   Generated {len(response.content)} characters")
-        return {"design_mockup": response.content}
+        return {"design_mockup": store_text(response.content)}
     except Exception as e:
         print(f"❌ DESIGNER AGENT: Error - {e}")
         return {"design_mockup": f"Error: {str(e)}"}
@@ -120,48 +440,195 @@ Be extremely specific. A developer should be able to implement this pixel-perfec
 # AGENT 3: COPYWRITER (Same as before)
 # ============================================================================
 
+def copywriter_messages(state: WebDesignState) -> List[BaseMessage]:
+    """Build the Copywriter's prompt (shared by live and batch execution)."""
+    return _prompts()["copywriter"].messages(**_fit("copywriter", analysis=resolve(state["analysis"])))
+
+
 def copywriter_agent(state: WebDesignState) -> Dict[str, str]:
     """THE COPYWRITER - Content Specialist"""
     
     print("✍️  COPYWRITER AGENT: Writing copy in Jobs' voice...")
     
-    analysis = state["analysis"]
+    messages = copywriter_messages(state)
     
-    system_prompt = """You are a master copywriter channeling Steve Jobs circa 1977.
-Write copy that is simple, revolutionary, empowering, and human."""
+    try:
+        candidates = call_llm_candidates(
+            "copywriter", messages, 1 if _drafting.get() else COPYWRITER_CANDIDATES
+        )
+        copy = choose_candidate("copywriter", candidates, score_copy)
+        print("✅ COPYWRITER AGENT: Copy complete!")
+        print(f"   Generated {len(copy)} characters")
+        return {"copy": store_text(copy)}
+    except Exception as e:
+        print(f"❌ COPYWRITER AGENT: Error - {e}")
+        return {"copy": f"Error: {str(e)}"}
 
-    user_prompt = f"""Based on this analysis:
 
-{analysis}
+# ============================================================================
+# AGENT 2+3: CREATIVE (Designer + Copywriter in one call, WORKFLOW_TOPOLOGY=merged)
+# ============================================================================
 
-Write complete website copy including:
-1. Hero headline and subheadline
-2. 3-4 features (headline + description)
-3. 2-3 benefits (headline + description)
-4. Technical specs (5-7 specs)
-5. Final CTA section
+# Structured output: the reply must be exactly these two strings
+CREATIVE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "creative_brief",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "design_mockup": {"type": "string"},
+                "copy": {"type": "string"},
+            },
+            "required": ["design_mockup", "copy"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def creative_messages(state: WebDesignState) -> List[BaseMessage]:
+    """
+    One prompt for both the design spec and the copy.
+    
+    The Historian's analysis is sent once instead of once per agent.
+    """
+    return _prompts()["creative"].messages(**_fit("creative", analysis=resolve(state["analysis"])))
 
-Sound like 1977 Steve Jobs - revolutionary yet accessible."""
 
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ]
+def parse_creative_output(content: str) -> Dict[str, str]:
+    """
+    Validate the Creative reply against CREATIVE_RESPONSE_FORMAT.
     
+    The API enforces the schema, but batch results and non-OpenAI backends
+    are checked here too. Raises ValueError on anything else.
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
     try:
-        response = llm.invoke(messages)
-        print("✅ COPYWRITER AGENT: Copy complete!")
-        print(f"   Generated {len(response.content)} characters")
-        return {"copy": response.content}
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Creative reply is not JSON: {e}") from None
+    if not isinstance(data, dict) or set(data) != {"design_mockup", "copy"}:
+        raise ValueError("Creative reply must have exactly the keys design_mockup and copy")
+    for key, value in data.items():
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Creative reply field {key!r} must be a non-empty string")
+    return data
+
+
+def creative_agent(state: WebDesignState) -> Dict[str, str]:
+    """THE CREATIVE TEAM - Designer + Copywriter as one structured call"""
+    
+    print("🎨 CREATIVE AGENT: Creating design specifications and copy...")
+    
+    messages = creative_messages(state)
+    
+    try:
+        response = call_llm("creative", messages, response_format=CREATIVE_RESPONSE_FORMAT)
+        output = parse_creative_output(response.content)
+        print("✅ CREATIVE AGENT: Design and copy complete!")
+        print(f"   Generated {len(output['design_mockup'])} + {len(output['copy'])} characters")
+        return {field: store_text(text) for field, text in output.items()}
     except Exception as e:
-        print(f"❌ COPYWRITER AGENT: Error - {e}")
-        return {"copy": f"Error: {str(e)}"}
+        print(f"❌ CREATIVE AGENT: Error - {e}")
+        return {"design_mockup": f"Error: {str(e)}", "copy": f"Error: {str(e)}"}
 
 
 # ============================================================================
 # AGENT 4: DEVELOPER - ULTRA-ENHANCED 2025 VERSION 🚀🚀🚀
 # ============================================================================
 
+def developer_messages(state: WebDesignState) -> List[BaseMessage]:
+    """Build the Developer's prompt (shared by live and batch execution)."""
+    fields = _fit(
+        "developer",
+        design_mockup=resolve(state["design_mockup"]),
+        copy=resolve(state["copy"]),
+        analysis=resolve(state["analysis"]),
+    )
+    return _prompts()["developer"].messages(
+        design_mockup=fields["design_mockup"],
+        copy=fields["copy"],
+        context=fields["analysis"],
+    )
+
+
+def render_template_page(state: WebDesignState) -> str:
+    """The page rendered locally from the Designer's tokens and the Copywriter's copy."""
+    design_mockup = resolve(state["design_mockup"])
+    copy = resolve(state["copy"])
+    for agent in missing_blocks(design_mockup, copy):
+        print(f"   ⚠️  No JSON block from {agent}; using template defaults")
+    return render_from_outputs(design_mockup, copy)
+
+
+def developer_refine_messages(state: WebDesignState) -> List[BaseMessage]:
+    """Prompt for DEVELOPER_MODE=template+refine: polish the locally rendered page."""
+    fields = _fit("developer_refine", design_mockup=resolve(state["design_mockup"]))
+    return _prompts()["developer_refine"].messages(
+        design_mockup=fields["design_mockup"],
+        draft=render_template_page(state),
+    )
+
+
+def site_page_messages(state: WebDesignState, page_file: str, page_brief: str, nav: str) -> List[BaseMessage]:
+    """Prompt for one page of a multi-page site (see site_builder.py)."""
+    fields = _fit(
+        "site_page",
+        design_mockup=resolve(state["design_mockup"]),
+        copy=resolve(state["copy"]),
+    )
+    return _prompts()["site_page"].messages(
+        page_file=page_file,
+        page_brief=page_brief,
+        nav=nav,
+        design_mockup=fields["design_mockup"],
+        copy=fields["copy"],
+    )
+
+
+def clean_developer_output(code: str) -> str:
+    """Strip markdown fences from the Developer's reply and ensure a DOCTYPE."""
+    # Clean up markdown if present
+    if "```html" in code:
+        code = code.split("```html")[1].split("```")[0].strip()
+    elif "```" in code:
+        code = code.split("```")[1].split("```")[0].strip()
+    
+    # Ensure DOCTYPE
+    if not code.strip().startswith("<!DOCTYPE"):
+        code = "<!DOCTYPE html>\n" + code
+    
+    return code
+
+
+# (check, label when present, warning when missing)
+CODE_CHECKS = [
+    (lambda c: "IntersectionObserver" in c, "Scroll animations (IntersectionObserver)", "Missing scroll animations!"),
+    (lambda c: "transform:" in c and "transition:" in c, "CSS animations", "Missing CSS transitions!"),
+    (lambda c: "linear-gradient" in c or "radial-gradient" in c, "Gradients", "Missing gradients!"),
+    (lambda c: "box-shadow" in c, "Box shadows", "Missing box shadows!"),
+    (lambda c: ":hover" in c, "Hover effects", "Missing hover effects!"),
+    (lambda c: "@media" in c, "Responsive design", "Missing media queries!"),
+]
+
+
+def validate_code(code: str) -> List[Tuple[bool, str]]:
+    """
+    Check generated code for the mandatory modern-website features.
+    
+    Returns:
+        List of (passed, message) tuples, one per check in CODE_CHECKS
+    """
+    return [
+        (True, label) if check(code) else (False, warning)
+        for check, label, warning in CODE_CHECKS
+    ]
+
+
 def developer_agent(state: WebDesignState) -> Dict[str, str]:
     """
     THE DEVELOPER - ULTRA-ENHANCED 2025 VERSION
@@ -175,230 +642,125 @@ def developer_agent(state: WebDesignState) -> Dict[str, str]:
     ⚡ Buttery smooth 60fps animations
     """
     
-    print("💻 DEVELOPER AGENT: Generating STUNNING 2025 production code...")
-    
-    analysis = state["analysis"]
-    design_mockup = state["design_mockup"]
-    copy = state["copy"]
-    
-    system_prompt = """You are an ELITE front-end developer at Vercel/Linear/Stripe in 2025.
-
-Your websites are STUNNING with modern animations and interactions that make users say "WOW!"
-
-MANDATORY REQUIREMENTS - YOU MUST INCLUDE ALL OF THESE:
-
-1. ✨ SCROLL ANIMATIONS (CRITICAL!)
-   ```javascript
-   const observer = new IntersectionObserver((entries) => {
-       entries.forEach(entry => {
-           if (entry.isIntersecting) {
-               entry.target.classList.add('fade-in-up');
-           }
-       });
-   }, { threshold: 0.1 });
-   
-   document.querySelectorAll('.animate-on-scroll').forEach(el => observer.observe(el));
-   ```
-   
-   ```css
-   .animate-on-scroll {
-       opacity: 0;
-       transform: translateY(30px);
-       transition: opacity 0.8s cubic-bezier(0.4, 0, 0.2, 1),
-                   transform 0.8s cubic-bezier(0.4, 0, 0.2, 1);
-   }
-   .fade-in-up {
-       opacity: 1;
-       transform: translateY(0);
-   }
-   ```
-
-2. 🎨 MODERN CSS FEATURES (CRITICAL!)
-   - Gradients on hero: `background: linear-gradient(135deg, #f5e6d3 0%, #d4c4a8 100%);`
-   - Box shadows: `box-shadow: 0 10px 40px rgba(0,0,0,0.1);`
-   - Backdrop blur: `backdrop-filter: blur(10px);`
-   - CSS Grid: `display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));`
-
-3. 💫 BUTTON HOVER EFFECTS (CRITICAL!)
-   ```css
-   .btn {
-       transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-   }
-   .btn:hover {
-       transform: translateY(-2px);
-       box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-   }
-   ```
-
-4. 🎭 CARD HOVER EFFECTS (CRITICAL!)
-   ```css
-   .card {
-       transition: all 0.3s ease;
-   }
-   .card:hover {
-       transform: translateY(-5px);
-       box-shadow: 0 20px 40px rgba(0,0,0,0.15);
-   }
-   ```
-
-5. 📱 PERFECT RESPONSIVE DESIGN
-   - Mobile-first approach
-   - Breakpoints: 640px, 768px, 1024px, 1280px
-   - Touch-friendly (44px minimum tap targets)
-
-6. ⚡ SMOOTH SCROLL
-   ```javascript
-   document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-       anchor.addEventListener('click', function (e) {
-           e.preventDefault();
-           document.querySelector(this.getAttribute('href')).scrollIntoView({
-               behavior: 'smooth'
-           });
-       });
-   });
-   ```
-
-7. 🎨 MODERN DESIGN ELEMENTS
-   - Hero section with gradient background
-   - Floating cards with shadows
-   - Subtle animations everywhere
-   - Beautiful typography hierarchy
-   - Generous whitespace
-
-QUALITY CHECKLIST - VERIFY YOU INCLUDED:
-✅ IntersectionObserver for scroll animations
-✅ Fade-in-up animations on all sections
-✅ Hover effects on buttons (lift + shadow)
-✅ Hover effects on cards (lift + shadow)
-✅ Gradient background on hero
-✅ Box shadows on cards
-✅ Smooth scroll JavaScript
-✅ CSS Grid for features
-✅ Responsive design (mobile-first)
-✅ Modern typography (system fonts)
-✅ Transitions on all interactive elements
-✅ Loading animations (optional but nice)
-
-CODE STRUCTURE:
-- Single HTML file with embedded CSS and JS
-- CSS organized: Variables → Reset → Typography → Layout → Components → Animations → Responsive
-- JavaScript at bottom for performance
-- Clean, commented, production-ready
-
-OUTPUT FORMAT:
-- Start with <!DOCTYPE html>
-- NO markdown code blocks
-- NO explanations
-- ONLY the complete HTML code"""
-
-    user_prompt = f"""Create a STUNNING, MODERN 2025 website that would make Stripe/Linear/Vercel designers jealous.
-
-### DESIGN SPECIFICATIONS:
-{design_mockup}
-
-### WEBSITE COPY:
-{copy}
-
-### HISTORICAL CONTEXT:
-{analysis[:500]}...
-
-CRITICAL REMINDERS:
-1. MUST include scroll-triggered fade-in animations using IntersectionObserver
-2. MUST include hover effects on ALL buttons and cards
-3. MUST include gradient backgrounds
-4. MUST include box shadows for depth
-5. MUST be responsive and beautiful on mobile
-6. MUST have smooth, modern animations everywhere
-
-This should look like a 2025 Stripe/Linear landing page with 1977 Apple aesthetics.
-
-Output ONLY the complete HTML code. Start immediately with <!DOCTYPE html>"""
-
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_prompt)
-    ]
+    if DEVELOPER_MODE == "template" or _drafting.get():
+        print("💻 DEVELOPER (TEMPLATE): Rendering page locally...")
+        code = render_template_page(state)
+        print(f"✅ DEVELOPER (TEMPLATE): Rendered {len(code)} characters (~{code.count(chr(10))} lines)")
+        return {"code": store_text(code)}
+    
+    if DEVELOPER_MODE == "template+refine":
+        print("💻 DEVELOPER AGENT: Refining the locally rendered page...")
+        messages = developer_refine_messages(state)
+    else:
+        print("💻 DEVELOPER AGENT: Generating STUNNING 2025 production code...")
+        messages = developer_messages(state)
     
     try:
-        response = llm.invoke(messages)
-        code = response.content
-        
-        # Clean up markdown if present
-        if "```html" in code:
-            code = code.split("```html")[1].split("```")[0].strip()
-        elif "```" in code:
-            code = code.split("```")[1].split("```")[0].strip()
-        
-        # Ensure DOCTYPE
-        if not code.strip().startswith("<!DOCTYPE"):
-            code = "<!DOCTYPE html>\n" + code
+        candidates = [
+            (clean_developer_output(text), truncated)
+            for text, truncated in call_llm_candidates("developer", messages, 1 if _drafting.get() else DEVELOPER_CANDIDATES)
+        ]
+        code = choose_candidate("developer", candidates, score_page)
         
         print("✅ DEVELOPER AGENT: Code generation complete!")
         print(f"   Generated {len(code)} characters (~{code.count(chr(10))} lines)")
         
         # Validation
-        validations = []
-        if "IntersectionObserver" in code:
-            validations.append("✓ Scroll animations (IntersectionObserver)")
-        else:
-            validations.append("⚠️  Missing scroll animations!")
-            
-        if "transform:" in code and "transition:" in code:
-            validations.append("✓ CSS animations")
-        else:
-            validations.append("⚠️  Missing CSS transitions!")
-            
-        if "linear-gradient" in code or "radial-gradient" in code:
-            validations.append("✓ Gradients")
-        else:
-            validations.append("⚠️  Missing gradients!")
-            
-        if "box-shadow" in code:
-            validations.append("✓ Box shadows")
-        else:
-            validations.append("⚠️  Missing box shadows!")
-            
-        if ":hover" in code:
-            validations.append("✓ Hover effects")
-        else:
-            validations.append("⚠️  Missing hover effects!")
-            
-        if "@media" in code:
-            validations.append("✓ Responsive design")
-        else:
-            validations.append("⚠️  Missing media queries!")
+        for passed, message in validate_code(code):
+            print(f"   {'✓' if passed else '⚠️ '} {message}")
         
-        for validation in validations:
-            print(f"   {validation}")
-        
-        return {"code": code}
+        return {"code": store_text(code)}
         
     except Exception as e:
         print(f"❌ DEVELOPER AGENT: Error - {e}")
         return {"code": f"<!-- Error: {str(e)} -->"}
 
 
+# ============================================================================
+# AGENT REGISTRY (used by the batch and pipeline execution modes)
+# ============================================================================
+
+# Prompt builder for each workflow node (in template mode the Developer
+# needs no LLM, so batch mode runs it locally like the other prompt-less nodes)
+AGENT_PROMPTS = {
+    "historian": historian_messages,
+    "designer": designer_messages,
+    "copywriter": copywriter_messages,
+    "creative": creative_messages,
+}
+if DEVELOPER_MODE == "llm":
+    AGENT_PROMPTS["developer"] = developer_messages
+elif DEVELOPER_MODE == "template+refine":
+    AGENT_PROMPTS["developer"] = developer_refine_messages
+
+# Checked before a node's batch request is built: fn(state) -> update or None
+# (None means the request is still needed)
+AGENT_SHORTCUTS = {
+    "historian": cached_analysis,
+}
+
+# Called with the run's state after a batch result has been written into it
+AGENT_RESULT_HOOKS = {
+    "historian": remember_analysis,
+}
+
+# Extra request parameters per node (sent with live and batch calls alike)
+AGENT_REQUEST_PARAMS = {
+    "creative": {"response_format": CREATIVE_RESPONSE_FORMAT},
+}
+
+
+def request_params(agent_name: str) -> Dict:
+    """A node's extra body fields as call_llm() sends them: AGENT_REQUEST_PARAMS plus the learned max_tokens."""
+    return _with_output_budget(agent_name, dict(AGENT_REQUEST_PARAMS.get(agent_name) or {}))
+
+# Applied to a node's raw reply before it is written into state; a dict
+# result is {field: text} for nodes that write several fields
+AGENT_POSTPROCESSORS = {
+    "developer": clean_developer_output,
+    "creative": parse_creative_output,
+}
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def save_website(state: WebDesignState, filename: str = "apple_ii_website_2025.html") -> str:
-    """Save the generated website."""
+def save_website(state: WebDesignState, filename: str = "apple_ii_website_2025.html", deploy: bool = False) -> str:
+    """
+    Save the generated website (and archive it when ARTIFACT_STORE is set).
+    
+    With deploy=True, also writes a minified, precompressed bundle to
+    output/deploy/<name>/ (see deploy_bundle.py).
+    """
     import os
+    from artifact_store import archive_site, store_from_env
     
     output_dir = "output"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
     filepath = os.path.join(output_dir, filename)
+    code = resolve(state["code"])
     
     with open(filepath, "w", encoding="utf-8") as f:
-        f.write(state["code"])
+        f.write(code)
     
     print(f"\n💾 Website saved to: {filepath}")
-    print(f"📏 File size: {len(state['code'])} bytes (~{state['code'].count(chr(10))} lines)")
+    print(f"📏 File size: {len(code)} bytes (~{code.count(chr(10))} lines)")
     print(f"📍 Absolute path: {os.path.abspath(filepath)}")
     
+    artifacts = store_from_env()
+    if artifacts:
+        archived = archive_site(artifacts, state["brochure_url"], code, filename)
+        print(f"📦 Archived as {archived['kind']} {archived['sha256'][:12]} ({archived['stored']} bytes stored)")
+    
+    if deploy:
+        from deploy_bundle import build_bundle, print_size_report
+        bundle_dir = os.path.join(output_dir, "deploy", os.path.splitext(filename)[0])
+        print_size_report({filename: build_bundle(code, bundle_dir)})
+        print(f"🚀 Deploy bundle: {bundle_dir}/")
+    
     return filepath
 
 
@@ -420,28 +782,28 @@ def test_ultra_enhanced_workflow():
     # Run all four agents
     print("⏳ Step 1/4: Running Historian...")
     state.update(historian_agent(state))
-    print(f"   ✅ Complete: {len(state['analysis'])} chars\n")
+    print(f"   ✅ Complete: {text_length(state['analysis'])} chars\n")
     
     print("⏳ Step 2/4: Running Designer...")
     state.update(designer_agent(state))
-    print(f"   ✅ Complete: {len(state['design_mockup'])} chars\n")
+    print(f"   ✅ Complete: {text_length(state['design_mockup'])} chars\n")
     
     print("⏳ Step 3/4: Running Copywriter...")
     state.update(copywriter_agent(state))
-    print(f"   ✅ Complete: {len(state['copy'])} chars\n")
+    print(f"   ✅ Complete: {text_length(state['copy'])} chars\n")
     
     print("⏳ Step 4/4: Running ULTRA-ENHANCED Developer (2025 MODERN CODE)...")
     state.update(developer_agent(state))
-    print(f"   ✅ Complete: {len(state['code'])} chars (~{state['code'].count(chr(10))} lines)\n")
+    print(f"   ✅ Complete: {text_length(state['code'])} chars (~{resolve(state['code']).count(chr(10))} lines)\n")
     
     print("\n" + "="*70)
     print("🎉 ULTRA-ENHANCED WORKFLOW COMPLETE!")
     print("="*70)
     print(f"\n📊 Final State Summary:")
-    print(f"   Historian:   {len(state['analysis'])} chars")
-    print(f"   Designer:    {len(state['design_mockup'])} chars")
-    print(f"   Copywriter:  {len(state['copy'])} chars")
-    print(f"   Developer:   {len(state['code'])} chars (~{state['code'].count(chr(10))} lines)")
+    print(f"   Historian:   {text_length(state['analysis'])} chars")
+    print(f"   Designer:    {text_length(state['design_mockup'])} chars")
+    print(f"   Copywriter:  {text_length(state['copy'])} chars")
+    print(f"   Developer:   {text_length(state['code'])} chars (~{resolve(state['code']).count(chr(10))} lines)")
     
     # Save
     print("\n💾 Saving ULTRA-ENHANCED 2025 website...")
@@ -0,0 +1,382 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Animation Performance Linter
+
+The Developer prompt insists on `transition: all`, animated box-shadows,
+backdrop blur and scroll handlers. Taken literally, these produce janky
+pages. This node runs between the Developer and the page budget check. It
+lints the inline CSS/JS and fixes what can be fixed without changing what
+the page does:
+
+    rule                  finds                                        auto-fix
+    transition-all        transition: all ...                          ✓ lists the properties the
+                                                                         element's :hover/.state rules
+                                                                         actually change
+    layout-animation      transitions/@keyframes on width, top,        -
+                          margin, ... (layout on every frame)
+    paint-animation       transitioned box-shadow / filter /           -
+                          backdrop-filter (repaint on every frame)
+    passive-listener      scroll/touch/wheel listeners that aren't     ✓ adds { passive: true } when the
+                          passive                                        handler never calls preventDefault
+    scroll-handler        scroll listeners without                     -
+                          requestAnimationFrame
+    observer-unobserve    IntersectionObservers that never             ✓ unobserves after a one-shot
+                          unobserve                                      classList.add reveal
+    reduced-motion        motion without a prefers-reduced-motion      ✓ appends the standard
+                          fallback                                       reduced-motion block
+
+Results are stored in state["lint_report"] (findings + counts).
+
+Configuration (.env):
+    ANIMATION_LINT_FIX=1      # 0 = report only, never rewrite the page
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from state import WebDesignState
+from state_store import resolve, store_text
+
+# Animating these forces layout on every frame
+LAYOUT_PROPERTIES = {
+    "width", "height", "min-width", "min-height", "max-width", "max-height",
+    "top", "right", "bottom", "left", "inset",
+    "margin", "margin-top", "margin-right", "margin-bottom", "margin-left",
+    "padding", "padding-top", "padding-right", "padding-bottom", "padding-left",
+    "border-width", "font-size", "line-height", "letter-spacing",
+}
+
+# Animating these repaints on every frame (transform/opacity only composite)
+PAINT_PROPERTIES = {"box-shadow", "filter", "backdrop-filter", "-webkit-backdrop-filter"}
+
+# Declarations that never need a transition
+NOT_ANIMATED = {"transition", "cursor", "content", "pointer-events", "will-change", "display", "animation"}
+
+PASSIVE_EVENTS = ("scroll", "wheel", "mousewheel", "touchstart", "touchmove")
+
+REDUCED_MOTION_CSS = """
+/* Respect users who ask for less motion */
+@media (prefers-reduced-motion: reduce) {
+    *, *::before, *::after {
+        animation-duration: 0.01ms !important;
+        animation-iteration-count: 1 !important;
+        transition-duration: 0.01ms !important;
+        scroll-behavior: auto !important;
+    }
+}
+"""
+
+_BLOCK = re.compile(r"(<(style|script)\b[^>]*>)(.*?)(</\2\s*>)", re.I | re.S)
+
+
+def _finding(rule: str, message: str, fixed: bool = False, severity: str = "warning") -> Dict:
+    return {"rule": rule, "severity": severity, "message": message, "fixed": fixed}
+
+
+# ============================================================================
+# CSS
+# ============================================================================
+
+def _css_rules(css: str) -> List[Tuple[str, int, int, Optional[str]]]:
+    """
+    Every style rule as (selector, body_start, body_end, enclosing at-rule),
+    descending into @media/@supports. Offsets index into `css`.
+    """
+    rules = []
+
+    def scan(start: int, end: int, at_rule: Optional[str]) -> None:
+        i = start
+        while i < end:
+            brace = css.find("{", i, end)
+            if brace < 0:
+                return
+            prelude = re.sub(r"/\*.*?\*/", "", css[i:brace], flags=re.S).strip()
+            # @import etc. before the brace end with ';'
+            prelude = prelude.rsplit(";", 1)[-1].strip()
+            depth, j = 1, brace + 1
+            while j < end and depth:
+                depth += {"{": 1, "}": -1}.get(css[j], 0)
+                j += 1
+            if prelude.startswith(("@media", "@supports")):
+                scan(brace + 1, j - 1, prelude)
+            else:
+                rules.append((prelude, brace + 1, j - 1, at_rule))
+            i = j
+
+    scan(0, len(css), None)
+    return rules
+
+
+def _declarations(body: str) -> List[Tuple[str, str]]:
+    decls = []
+    for part in re.sub(r"/\*.*?\*/", "", body, flags=re.S).split(";"):
+        if ":" in part:
+            name, value = part.split(":", 1)
+            decls.append((name.strip().lower(), value.strip()))
+    return decls
+
+
+def _split_top_level(value: str) -> List[str]:
+    """Split on commas outside brackets and quotes (cubic-bezier(...), JS args)."""
+    parts, depth, quote, current = [], 0, None, ""
+    for ch in value:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "\"'`":
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _state_properties(selector: str, rules, css: str) -> List[str]:
+    """Properties set by state variants of `selector` (:hover, .visible, ...)."""
+    found: List[str] = []
+    for other, start, end, _ in rules:
+        for candidate in other.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith(selector) and candidate[len(selector):len(selector) + 1] in (":", ".", "["):
+                for name, _ in _declarations(css[start:end]):
+                    if name not in NOT_ANIMATED and name not in found:
+                        found.append(name)
+    return found
+
+
+def lint_css(css: str, fix: bool, js_sets_styles: bool) -> Tuple[str, List[Dict]]:
+    findings: List[Dict] = []
+    rules = _css_rules(css)
+    edits: List[Tuple[int, int, str]] = []
+
+    for selector, start, end, _ in rules:
+        body = css[start:end]
+
+        if selector.startswith("@keyframes") or selector.startswith("@-webkit-keyframes"):
+            animated = {name for name, _ in _declarations(re.sub(r"[^{}]*\{|\}", ";", body))}
+            for prop in sorted(animated & LAYOUT_PROPERTIES):
+                findings.append(_finding("layout-animation", f"{selector} animates '{prop}' (use transform)"))
+            for prop in sorted(animated & PAINT_PROPERTIES):
+                findings.append(_finding("paint-animation", f"{selector} animates '{prop}'", severity="info"))
+            continue
+        if selector.startswith("@"):
+            continue
+
+        for m in re.finditer(r"(?<![\w-])(transition(?:-property)?)\s*:\s*([^;}]+)", body):
+            prop_name, value = m.group(1), m.group(2).strip()
+            items = _split_top_level(value)
+            listed = [item.split()[0].lower() for item in items if item.split()]
+
+            for prop in listed:
+                if prop in LAYOUT_PROPERTIES:
+                    findings.append(_finding("layout-animation", f"{selector} transitions '{prop}' (use transform)"))
+                elif prop in PAINT_PROPERTIES:
+                    findings.append(_finding(
+                        "paint-animation", f"{selector} transitions '{prop}' (repaints every frame)", severity="info"
+                    ))
+
+            if "all" not in listed:
+                continue
+            targets = []
+            for single in selector.split(","):
+                for prop in _state_properties(single.strip(), rules, css):
+                    if prop not in targets:
+                        targets.append(prop)
+            can_fix = fix and targets and not js_sets_styles and prop_name == "transition"
+            message = f"{selector} uses 'transition: all'"
+            if targets:
+                message += f" but only {', '.join(targets)} change"
+            findings.append(_finding("transition-all", message, fixed=bool(can_fix)))
+            for prop in targets:
+                if prop in LAYOUT_PROPERTIES:
+                    findings.append(_finding("layout-animation", f"{selector} animates '{prop}' on state change"))
+                elif prop in PAINT_PROPERTIES:
+                    findings.append(_finding("paint-animation", f"{selector} animates '{prop}' on state change", severity="info"))
+            if can_fix:
+                new_items = []
+                for item in items:
+                    words = item.split(None, 1)
+                    if words[0].lower() == "all":
+                        timing = words[1] if len(words) > 1 else ""
+                        new_items.extend(f"{prop} {timing}".strip() for prop in targets)
+                    else:
+                        new_items.append(item)
+                value_start = start + m.start(2)
+                edits.append((value_start, value_start + len(m.group(2).rstrip()), ", ".join(new_items)))
+
+    for a, b, replacement in sorted(edits, reverse=True):
+        css = css[:a] + replacement + css[b:]
+    return css, findings
+
+
+# ============================================================================
+# JAVASCRIPT
+# ============================================================================
+
+def _call_end(js: str, open_paren: int) -> int:
+    """Index of the ')' closing the call whose '(' is at open_paren (-1 if none)."""
+    depth, i, n = 0, open_paren, len(js)
+    while i < n:
+        ch = js[i]
+        if ch in "\"'`":
+            quote, i = ch, i + 1
+            while i < n and js[i] != quote:
+                i += 2 if js[i] == "\\" else 1
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def lint_js(js: str, fix: bool) -> Tuple[str, List[Dict]]:
+    findings: List[Dict] = []
+    edits: List[Tuple[int, int, str]] = []
+
+    # Non-passive scroll/touch/wheel listeners
+    for m in re.finditer(r"addEventListener\s*\(\s*(['\"])(\w+)\1", js):
+        event = m.group(2)
+        if event not in PASSIVE_EVENTS:
+            continue
+        open_paren = js.index("(", m.start())
+        close = _call_end(js, open_paren)
+        if close < 0:
+            continue
+        args = _split_top_level(js[open_paren + 1:close])
+        if len(args) > 2 and "passive" in args[2]:
+            continue
+        handler = args[1] if len(args) > 1 else ""
+        # A handler that can call preventDefault must stay non-passive
+        if re.fullmatch(r"[\w$.]+", handler):
+            may_prevent = "preventDefault" in js
+        else:
+            may_prevent = "preventDefault" in handler
+        can_fix = fix and not may_prevent and (len(args) == 2 or args[2] in ("false", "{}"))
+        findings.append(_finding("passive-listener", f"'{event}' listener is not passive", fixed=can_fix))
+        if can_fix:
+            if len(args) == 2:
+                edits.append((close, close, ", { passive: true }"))
+            else:
+                third = js.rindex(args[2], open_paren, close)
+                edits.append((third, third + len(args[2]), "{ passive: true }"))
+
+        if event == "scroll" and "requestAnimationFrame" not in handler and "requestAnimationFrame" not in js:
+            findings.append(_finding(
+                "scroll-handler", "scroll handler does work on every event (throttle with requestAnimationFrame)"
+            ))
+
+    # IntersectionObservers that keep watching revealed elements
+    for m in re.finditer(r"(?:(?:const|let|var)\s+([\w$]+)\s*=\s*)?new\s+IntersectionObserver\s*\(", js):
+        close = _call_end(js, m.end() - 1)
+        if close < 0:
+            continue
+        call = js[m.end():close]
+        if "unobserve" in call or "disconnect" in call:
+            continue
+        observer_name = m.group(1)
+        params = re.match(r"\s*(?:function\s*)?\(?\s*([\w$]+)\s*(?:,\s*([\w$]+))?", call)
+        if params and params.group(2):
+            observer_name = params.group(2)
+        reveal = re.search(r"if\s*\(\s*([\w$]+)\.isIntersecting\s*\)\s*\{", call)
+        one_shot = reveal and "classList.remove" not in call and "classList.toggle" not in call
+        can_fix = bool(fix and observer_name and one_shot)
+        findings.append(_finding(
+            "observer-unobserve",
+            "IntersectionObserver never unobserves revealed elements (keeps firing on every scroll)",
+            fixed=can_fix,
+        ))
+        if can_fix:
+            at = m.end() + reveal.end()
+            indent = re.match(r"\r?\n([ \t]*)", js[at:])
+            prefix = f"\n{indent.group(1)}" if indent else " "
+            edits.append((at, at, f"{prefix}{observer_name}.unobserve({reveal.group(1)}.target);"))
+
+    for a, b, replacement in sorted(edits, reverse=True):
+        js = js[:a] + replacement + js[b:]
+    return js, findings
+
+
+# ============================================================================
+# PAGE
+# ============================================================================
+
+_MOTION = re.compile(r"\b(transition|animation)\s*:|@keyframes|scroll-behavior\s*:\s*smooth|behavior\s*:\s*['\"]smooth", re.I)
+
+
+def lint_page(html: str, fix: bool = True) -> Tuple[str, List[Dict]]:
+    """Lint (and optionally fix) every inline <style>/<script>. Returns (html, findings)."""
+    findings: List[Dict] = []
+    scripts = " ".join(m.group(3) for m in _BLOCK.finditer(html) if m.group(2).lower() == "script")
+    js_sets_styles = bool(re.search(r"\.style\.[\w-]+\s*=|\.style\.setProperty|\.animate\(", scripts))
+
+    out, pos, last_style_end = [], 0, None
+    for m in _BLOCK.finditer(html):
+        out.append(html[pos:m.start()])
+        open_tag, kind, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if kind == "style":
+            body, found = lint_css(body, fix, js_sets_styles)
+        elif "src=" not in open_tag.lower():
+            body, found = lint_js(body, fix)
+        else:
+            found = []
+        findings.extend(found)
+        out.append(open_tag + body)
+        if kind == "style":
+            last_style_end = len("".join(out))
+        out.append(close_tag)
+        pos = m.end()
+    out.append(html[pos:])
+    result = "".join(out)
+
+    if _MOTION.search(html) and "prefers-reduced-motion" not in html:
+        can_fix = fix and last_style_end is not None
+        findings.append(_finding("reduced-motion", "motion without a prefers-reduced-motion fallback", fixed=can_fix))
+        if can_fix:
+            result = result[:last_style_end] + REDUCED_MOTION_CSS + result[last_style_end:]
+
+    return result, findings
+
+
+def summarize(findings: List[Dict]) -> Dict[str, int]:
+    counts: Dict[str, int] = {"total": len(findings), "fixed": sum(f["fixed"] for f in findings)}
+    for f in findings:
+        counts[f["rule"]] = counts.get(f["rule"], 0) + 1
+    return counts
+
+
+# ============================================================================
+# WORKFLOW NODE
+# ============================================================================
+
+def animation_lint_node(state: WebDesignState) -> Dict:
+    """
+    THE ANIMATION LINTER - runs after the Developer, no LLM involved.
+
+    Stores findings in state["lint_report"] and, unless
+    ANIMATION_LINT_FIX=0, the fixed page in state["code"].
+    """
+    print("🎞️  ANIMATION LINT: Checking animations for jank...")
+    code = resolve(state["code"])
+    fix = os.getenv("ANIMATION_LINT_FIX", "1").lower() not in ("0", "false", "no")
+
+    fixed_code, findings = lint_page(code, fix)
+    report = {"findings": findings, "counts": summarize(findings)}
+    update: Dict = {"lint_report": report}
+    if fixed_code != code:
+        update["code"] = store_text(fixed_code)
+
+    counts = report["counts"]
+    print(f"✅ ANIMATION LINT: {counts['total']} findings, {counts['fixed']} fixed automatically")
+    for f in findings:
+        if not f["fixed"] and f["severity"] == "warning":
+            print(f"   ⚠️  {f['rule']}: {f['message']}")
+    return update
@@ -0,0 +1,372 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Artifact Store
+
+Regenerating the same brochure produces near-identical multi-hundred-KB
+HTML files. Writing each one in full makes output/ grow without bound.
+This store keeps every generated site ONCE, by content hash, and encodes
+each new version as a line delta against the previous version of the
+same brochure:
+
+    root/objects/<aa>/<sha256>    zlib-compressed full text or delta
+    root/index.db                 SQLite index:
+        artifacts  sha256 → kind (full|delta), base, chain depth, sizes
+        versions   brochure key + run_id → sha256, in creation order
+
+- Identical output → no new object, just a new version row (dedup)
+- Delta = difflib line opcodes ("copy lines i..j of base" / "insert these
+  lines"), kept only when clearly smaller than a full copy
+- Delta chains are capped (MAX_CHAIN), so a read never replays more than
+  MAX_CHAIN deltas
+- prune() applies retention (keep last N per brochure, max age). A delta
+  whose base is being deleted is rewritten as a full copy first
+
+Usage:
+    python3 artifact_store.py list [brochure_url]
+    python3 artifact_store.py get <run_id|sha256> [out.html]
+    python3 artifact_store.py prune --keep 10 --max-age 30d
+    python3 artifact_store.py stats
+
+Configuration (.env):
+    ARTIFACT_STORE=output/artifacts       # empty to disable
+    ARTIFACT_KEEP_VERSIONS=20             # per brochure, applied on save (0 = all)
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+# Longest delta chain before a version is stored in full again
+MAX_CHAIN = 8
+
+# A delta must be at most this fraction of the full compressed size
+DELTA_MAX_RATIO = 0.7
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_delta(base: str, target: str) -> List:
+    """Line-level delta: [["c", i1, i2], ["i", [lines...]], ...]."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append(["i", target_lines[j1:j2]])
+        # "delete": nothing from the base is copied
+    return ops
+
+
+def apply_delta(base: str, ops: List) -> str:
+    base_lines = base.splitlines(keepends=True)
+    out = []
+    for op in ops:
+        if op[0] == "c":
+            out.extend(base_lines[op[1]:op[2]])
+        else:
+            out.extend(op[1])
+    return "".join(out)
+
+
+class ArtifactStore:
+    """Content-addressed, delta-compressed store for generated sites."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                sha256 TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                base TEXT,
+                depth INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                stored INTEGER NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS versions (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                sha256 TEXT NOT NULL REFERENCES artifacts(sha256),
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS versions_key ON versions (key, id);
+            CREATE INDEX IF NOT EXISTS versions_run ON versions (run_id);
+            CREATE INDEX IF NOT EXISTS artifacts_base ON artifacts (base);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], sha)
+
+    def _write_object(self, sha: str, data: bytes) -> None:
+        path = self._path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _encode(self, text: str, base_sha: Optional[str], base_depth: int) -> Dict:
+        """Pick the smaller of a full copy and a delta against `base_sha`."""
+        full = zlib.compress(text.encode("utf-8"), 9)
+        best = {"kind": "full", "base": None, "depth": 0, "data": full}
+        if base_sha and base_depth < MAX_CHAIN:
+            ops = make_delta(self.get(base_sha), text)
+            delta = zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"), 9)
+            if len(delta) <= len(full) * DELTA_MAX_RATIO:
+                best = {"kind": "delta", "base": base_sha, "depth": base_depth + 1, "data": delta}
+        return best
+
+    # ------------------------------------------------------------------
+    # Write / read
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, text: str, run_id: str) -> Dict:
+        """
+        Record `text` as the newest version of `key` (e.g. the brochure URL).
+
+        Returns {"sha256", "kind": full|delta|dedup, "size", "stored"}.
+        """
+        sha = _sha256(text)
+        conn = self._conn()
+        with self._lock:
+            existing = conn.execute("SELECT kind, stored FROM artifacts WHERE sha256 = ?", (sha,)).fetchone()
+            if existing:
+                result = {"sha256": sha, "kind": "dedup", "size": len(text), "stored": 0}
+            else:
+                previous = conn.execute(
+                    "SELECT a.sha256, a.depth FROM versions v JOIN artifacts a ON a.sha256 = v.sha256"
+                    " WHERE v.key = ? ORDER BY v.id DESC LIMIT 1",
+                    (key,),
+                ).fetchone()
+                encoded = self._encode(text, *(previous or (None, 0)))
+                self._write_object(sha, encoded["data"])
+                with conn:
+                    conn.execute(
+                        "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (sha, encoded["kind"], encoded["base"], encoded["depth"],
+                         len(text), len(encoded["data"]), time.time()),
+                    )
+                result = {"sha256": sha, "kind": encoded["kind"], "size": len(text), "stored": len(encoded["data"])}
+            with conn:
+                conn.execute(
+                    "INSERT INTO versions (key, run_id, sha256, created) VALUES (?, ?, ?, ?)",
+                    (key, run_id, sha, time.time()),
+                )
+        return result
+
+    def get(self, sha: str) -> str:
+        """Full text of an artifact, replaying its delta chain if needed."""
+        row = self._conn().execute("SELECT kind, base FROM artifacts WHERE sha256 = ?", (sha,)).fetchone()
+        if row is None:
+            raise KeyError(f"No artifact {sha}")
+        with open(self._path(sha), "rb") as f:
+            data = zlib.decompress(f.read())
+        kind, base = row
+        if kind == "full":
+            return data.decode("utf-8")
+        return apply_delta(self.get(base), json.loads(data))
+
+    def resolve_ref(self, ref: str) -> str:
+        """sha256 for a run_id, a full sha256 or a unique sha256 prefix."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT sha256 FROM versions WHERE run_id = ? ORDER BY id DESC LIMIT 1", (ref,)
+        ).fetchone()
+        if row:
+            return row[0]
+        rows = conn.execute("SELECT sha256 FROM artifacts WHERE sha256 LIKE ?", (ref + "%",)).fetchall()
+        if len(rows) != 1:
+            raise KeyError(f"{ref!r} matches {len(rows)} artifacts")
+        return rows[0][0]
+
+    def versions(self, key: Optional[str] = None) -> List[Dict]:
+        sql = ("SELECT v.key, v.run_id, v.sha256, v.created, a.kind, a.size, a.stored"
+               " FROM versions v JOIN artifacts a ON a.sha256 = v.sha256")
+        rows = self._conn().execute(
+            sql + (" WHERE v.key = ? ORDER BY v.id" if key else " ORDER BY v.id"),
+            (key,) if key else (),
+        ).fetchall()
+        names = ("key", "run_id", "sha256", "created", "kind", "size", "stored")
+        return [dict(zip(names, row)) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        versions, logical = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(a.size), 0) FROM versions v JOIN artifacts a ON a.sha256 = v.sha256"
+        ).fetchone()
+        artifacts, stored, deltas = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stored), 0), COALESCE(SUM(kind = 'delta'), 0) FROM artifacts"
+        ).fetchone()
+        return {"versions": versions, "artifacts": artifacts, "deltas": deltas,
+                "logical_bytes": logical, "stored_bytes": stored}
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def prune(self, keep_last: int = 0, max_age_seconds: float = 0, key: Optional[str] = None) -> Dict[str, int]:
+        """
+        Drop old versions, then delete artifacts no version references.
+
+        Args:
+            keep_last: Keep at most this many versions per key (0 = no limit)
+            max_age_seconds: Drop versions older than this (0 = no limit);
+                the newest version of each key is always kept
+            key: Only prune this key
+
+        Returns:
+            {"versions": removed version rows, "artifacts": deleted objects,
+             "rebased": deltas rewritten as full copies}
+        """
+        conn = self._conn()
+        with self._lock:
+            doomed = []
+            keys = [key] if key else [r[0] for r in conn.execute("SELECT DISTINCT key FROM versions")]
+            cutoff = time.time() - max_age_seconds if max_age_seconds else None
+            for k in keys:
+                rows = conn.execute(
+                    "SELECT id, created FROM versions WHERE key = ? ORDER BY id DESC", (k,)
+                ).fetchall()
+                for position, (version_id, created) in enumerate(rows):
+                    if position == 0:
+                        continue
+                    if (keep_last and position >= keep_last) or (cutoff and created < cutoff):
+                        doomed.append(version_id)
+            with conn:
+                conn.executemany("DELETE FROM versions WHERE id = ?", [(v,) for v in doomed])
+
+            # Artifacts to keep: referenced ones. Everything else goes, but
+            # first any kept delta built on a departing base becomes full.
+            live = {r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM versions")}
+            dead = {r[0] for r in conn.execute("SELECT sha256 FROM artifacts")} - live
+            rebased = 0
+            # Oldest first, so a rebased base is already full when its
+            # own dependents are looked at
+            for sha, base in conn.execute(
+                "SELECT sha256, base FROM artifacts WHERE kind = 'delta' ORDER BY created"
+            ).fetchall():
+                if sha in live and base in dead:
+                    text = self.get(sha)
+                    data = zlib.compress(text.encode("utf-8"), 9)
+                    self._write_object(sha, data)
+                    with conn:
+                        conn.execute(
+                            "UPDATE artifacts SET kind = 'full', base = NULL, depth = 0, stored = ? WHERE sha256 = ?",
+                            (len(data), sha),
+                        )
+                    rebased += 1
+            # Depths of deltas above a rebased artifact are now smaller;
+            # leaving them overstated only makes future chains shorter
+
+            with conn:
+                conn.executemany("DELETE FROM artifacts WHERE sha256 = ?", [(s,) for s in dead])
+            for sha in dead:
+                try:
+                    os.remove(self._path(sha))
+                except FileNotFoundError:
+                    pass
+        return {"versions": len(doomed), "artifacts": len(dead), "rebased": rebased}
+
+
+def store_from_env() -> Optional[ArtifactStore]:
+    """ArtifactStore at ARTIFACT_STORE, or None when it is disabled."""
+    root = os.getenv("ARTIFACT_STORE", "").strip()
+    return ArtifactStore(root) if root else None
+
+
+def archive_site(store: ArtifactStore, key: str, code: str, run_id: str) -> Dict:
+    """put() plus the ARTIFACT_KEEP_VERSIONS retention for that key."""
+    result = store.put(key, code, run_id)
+    keep = int(os.getenv("ARTIFACT_KEEP_VERSIONS", "20") or 0)
+    if keep:
+        store.prune(keep_last=keep, key=key)
+    return result
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_age(text: str) -> float:
+    """'30d', '12h', '2w' → seconds."""
+    if not text:
+        return 0
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+    if text[-1] not in units:
+        raise ValueError(f"Use an age like 12h, 30d or 2w, not {text!r}")
+    return float(text[:-1]) * units[text[-1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune stored website versions")
+    parser.add_argument("--root", default=os.getenv("ARTIFACT_STORE") or "output/artifacts")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listing = commands.add_parser("list", help="Versions, optionally for one brochure")
+    listing.add_argument("key", nargs="?")
+
+    get = commands.add_parser("get", help="Materialize one version")
+    get.add_argument("ref", help="run_id, sha256 or sha256 prefix")
+    get.add_argument("out", nargs="?", help="Output file (default: stdout)")
+
+    prune = commands.add_parser("prune", help="Apply a retention policy")
+    prune.add_argument("--keep", type=int, default=0, help="Versions to keep per brochure")
+    prune.add_argument("--max-age", default="", help="Drop versions older than e.g. 30d")
+    prune.add_argument("--key", help="Only prune this brochure")
+
+    commands.add_parser("stats", help="Logical vs stored size")
+
+    args = parser.parse_args()
+    store = ArtifactStore(args.root)
+
+    if args.command == "list":
+        for v in store.versions(args.key):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(v["created"]))
+            print(f"{v['sha256'][:12]}  {when}  {v['kind']:<5}  {v['size']:>8,} → {v['stored']:>7,} B  "
+                  f"{v['run_id']:<16}  {v['key']}")
+    elif args.command == "get":
+        text = store.get(store.resolve_ref(args.ref))
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"💾 Wrote {len(text):,} characters to {args.out}")
+        else:
+            sys.stdout.write(text)
+    elif args.command == "prune":
+        removed = store.prune(args.keep, parse_age(args.max_age), args.key)
+        print(f"🧹 Removed {removed['versions']} versions and {removed['artifacts']} artifacts "
+              f"({removed['rebased']} deltas rewritten as full copies)")
+    else:
+        s = store.stats()
+        ratio = s["logical_bytes"] / s["stored_bytes"] if s["stored_bytes"] else 0
+        print(f"📦 {s['versions']} versions in {s['artifacts']} artifacts ({s['deltas']} deltas)")
+        print(f"   {s['logical_bytes']:,} B logical → {s['stored_bytes']:,} B on disk ({ratio:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,574 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Offline Bulk Mode (Batch API)
+
+For overnight regeneration we don't need interactive latency, and the
+provider's Batch API is much cheaper with far higher throughput. This mode
+runs a whole MANIFEST of brochures stage by stage:
+
+    Stage 1: one batch with every Historian call
+    Stage 2: one batch with every Designer + Copywriter call
+    Stage 3: one batch with every Developer call
+
+The stages come straight from the create_workflow() DAG (see
+workflow.get_workflow_stages), and the prompts come from the same builders
+the live agents use, so bulk output matches an interactive run. Requests
+carry the same learned max_tokens as live calls (agents.request_params);
+replies cut off at that limit are continued in follow-up batches like
+call_llm() does, and fail if they are still cut off.
+
+Backends:
+- OpenAIBatchBackend: uploads the JSONL file and polls the real Batch API
+- LocalBatchBackend: a file-based stand-in that answers requests locally,
+  for tests and offline demos (no network, no cost)
+
+Manifest format (either):
+- Plain text: one brochure URL/path per line (# comments allowed)
+- JSONL: {"id": "apple-ii", "brochure_url": "https://..."} per line
+
+Usage:
+    python3 batch_mode.py manifest.txt              # real Batch API
+    python3 batch_mode.py manifest.txt --local      # local stand-in
+    python3 batch_mode.py manifest.txt --timeout 7200   # cancel a stage's batch after 2h
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from run_history import RunRecorder, record_run
+from state import WebDesignState, create_initial_state, node_output_fields
+from state_store import RunSpiller, store_text
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Terminal statuses that can still carry results for the requests that finished
+PARTIAL_STATUSES = {"expired", "cancelled"}
+
+# Wait a little longer than the 24h completion window before giving up
+DEFAULT_TIMEOUT = 25 * 3600
+
+# LangChain message type -> OpenAI chat role
+ROLE_NAMES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+# ============================================================================
+# MANIFEST + REQUEST FILES
+# ============================================================================
+
+def load_manifest(path: str) -> List[Dict[str, str]]:
+    """
+    Read a manifest of brochures to generate.
+
+    Returns:
+        List of {"id": ..., "brochure_url": ...} entries
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+            else:
+                entry = {"brochure_url": line}
+            entry.setdefault("id", f"run-{len(entries) + 1:04d}")
+            entries.append(entry)
+
+    ids = [e["id"] for e in entries]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate ids in manifest: {path}")
+    return entries
+
+
+def to_openai_messages(messages) -> List[Dict[str, str]]:
+    """Convert LangChain messages to the chat-completions wire format."""
+    return [{"role": ROLE_NAMES.get(m.type, m.type), "content": m.content} for m in messages]
+
+
+def make_custom_id(run_id: str, node: str) -> str:
+    return f"{run_id}::{node}"
+
+
+def split_custom_id(custom_id: str) -> Tuple[str, str]:
+    run_id, node = custom_id.rsplit("::", 1)
+    return run_id, node
+
+
+def build_batch_requests(
+    node: str,
+    states: Dict[str, WebDesignState],
+    prompt_builder: Callable,
+    model: str,
+    temperature: float,
+    params: Optional[Dict] = None,
+) -> List[Dict]:
+    """One Batch API request line per run for `node` (params: extra body fields)."""
+    return [
+        {
+            "custom_id": make_custom_id(run_id, node),
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model,
+                "temperature": temperature,
+                "messages": to_openai_messages(prompt_builder(state)),
+                **(params or {}),
+            },
+        }
+        for run_id, state in states.items()
+    ]
+
+
+def write_jsonl(rows: List[Dict], path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_batch_output(path: str) -> Dict[str, Tuple[Optional[str], Optional[str], bool]]:
+    """
+    Read a Batch API output (or error) file.
+
+    Returns:
+        {custom_id: (content, error, truncated)} - exactly one of content
+        and error is None; truncated is True when the reply stopped at
+        max_tokens (finish_reason == "length")
+    """
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            error = row.get("error")
+            if error:
+                results[row["custom_id"]] = (None, error.get("message", str(error)), False)
+            elif response.get("status_code") != 200:
+                results[row["custom_id"]] = (None, f"HTTP {response.get('status_code')}", False)
+            else:
+                choice = response["body"]["choices"][0]
+                truncated = choice.get("finish_reason") == "length"
+                results[row["custom_id"]] = (choice["message"]["content"], None, truncated)
+    return results
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+def placeholder_responder(custom_id: str, body: Dict) -> str:
+    """Default local answer: deterministic text, no model involved."""
+    run_id, node = split_custom_id(custom_id)
+    prompt_chars = sum(len(m["content"]) for m in body["messages"])
+    text = f"[local batch] {node} output for {run_id} ({prompt_chars} prompt chars)"
+    # Structured-output requests get one placeholder per required field
+    schema = body.get("response_format", {}).get("json_schema", {}).get("schema")
+    if schema:
+        return json.dumps({field: f"{text}: {field}" for field in schema["required"]})
+    return text
+
+
+class LocalBatchBackend:
+    """
+    File-based stand-in for the Batch API endpoint.
+
+    Each submitted batch gets a directory under `root` holding input.jsonl,
+    status.json and (once polled) output.jsonl in the real API's format.
+
+    Args:
+        root: Directory that plays the role of the remote endpoint
+        responder: fn(custom_id, request_body) -> reply text, or
+            (reply text, finish_reason) to simulate e.g. a cut-off reply
+    """
+
+    def __init__(self, root: str = "output/batches", responder: Callable[[str, Dict], str] = None):
+        self.root = root
+        self.responder = responder or placeholder_responder
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.root, batch_id, name)
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.root, batch_id))
+        shutil.copyfile(input_path, self._path(batch_id, "input.jsonl"))
+        self._set_status(batch_id, "validating")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        with open(self._path(batch_id, "status.json"), "r", encoding="utf-8") as f:
+            status = json.load(f)["status"]
+        if status == "validating":
+            self._process(batch_id)
+            status = "completed"
+        return status
+
+    def download(self, batch_id: str, dest: str) -> str:
+        output = self._path(batch_id, "output.jsonl")
+        if os.path.exists(output):
+            shutil.copyfile(output, dest)
+        else:
+            # Cancelled before it ran: no results, like the real API's missing output file
+            open(dest, "w", encoding="utf-8").close()
+        return dest
+
+    def cancel(self, batch_id: str) -> None:
+        self._set_status(batch_id, "cancelled")
+
+    def _set_status(self, batch_id: str, status: str) -> None:
+        with open(self._path(batch_id, "status.json"), "w", encoding="utf-8") as f:
+            json.dump({"id": batch_id, "status": status}, f)
+
+    def _process(self, batch_id: str) -> None:
+        rows = []
+        with open(self._path(batch_id, "input.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                row = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+                try:
+                    content = self.responder(request["custom_id"], request["body"])
+                    content, finish_reason = content if isinstance(content, tuple) else (content, "stop")
+                    row["response"] = {
+                        "status_code": 200,
+                        "body": {
+                            "object": "chat.completion",
+                            "model": request["body"]["model"],
+                            "choices": [{
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": finish_reason,
+                            }],
+                        },
+                    }
+                    row["error"] = None
+                except Exception as e:
+                    row["response"] = None
+                    row["error"] = {"code": "local_error", "message": str(e)}
+                rows.append(row)
+        write_jsonl(rows, self._path(batch_id, "output.jsonl"))
+        self._set_status(batch_id, "completed")
+
+
+class OpenAIBatchBackend:
+    """Submits request files to the OpenAI Batch API and polls for results."""
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.batches.cancel(batch_id)
+
+    def download(self, batch_id: str, dest: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        with open(dest, "w", encoding="utf-8") as f:
+            # Failed requests land in a separate error file; merge both
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(self.client.files.content(file_id).text.rstrip("\n") + "\n")
+        return dest
+
+
+# ============================================================================
+# STAGE-BY-STAGE EXECUTION
+# ============================================================================
+
+def wait_for_batch(backend, batch_id: str, poll_interval: float, timeout: Optional[float] = None) -> str:
+    """
+    Poll until the batch reaches a terminal status.
+
+    Raises:
+        TimeoutError: the batch is still running after `timeout` seconds
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = backend.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still '{status}' after {timeout:.0f}s")
+        print(f"   ⏳ {batch_id}: {status}...")
+        time.sleep(poll_interval if deadline is None else max(0.0, min(poll_interval, deadline - time.monotonic())))
+
+
+def run_batch(backend, requests: List[Dict], prefix: str, poll_interval: float,
+              timeout: Optional[float]) -> Tuple[Dict[str, Tuple[Optional[str], Optional[str], bool]], str]:
+    """
+    Submit `requests` as one batch (files at <prefix>_input/_output.jsonl)
+    and wait for it.
+
+    Returns:
+        (parse_batch_output() results, error for requests without a result)
+    """
+    batch_id = backend.submit(write_jsonl(requests, f"{prefix}_input.jsonl"))
+    print(f"   📤 Submitted {len(requests)} requests as {batch_id}")
+
+    try:
+        status = wait_for_batch(backend, batch_id, poll_interval, timeout)
+    except TimeoutError as e:
+        print(f"   ⏰ {e}; cancelling")
+        backend.cancel(batch_id)
+        status, missing = "timeout", f"batch timed out after {timeout:.0f}s"
+    else:
+        missing = "missing from batch output" if status == "completed" else f"batch {status}"
+
+    results = {}
+    if status == "completed" or status in PARTIAL_STATUSES:
+        results = parse_batch_output(backend.download(batch_id, f"{prefix}_output.jsonl"))
+    if status != "completed":
+        print(f"   ⚠️  Batch {batch_id} ended '{status}' with {len(results)}/{len(requests)} results")
+    return results, missing
+
+
+def continuation_request(request: Dict, partial: str, continue_prompt: str) -> Optional[Dict]:
+    """
+    Follow-up for a reply cut off at max_tokens, as call_llm() does live:
+    structured output is re-requested without the limit, text is continued
+    from where it stopped. None when there is no limit left to lift.
+    """
+    body = request["body"]
+    if "response_format" in body:
+        if "max_tokens" not in body:
+            return None
+        return {**request, "body": {k: v for k, v in body.items() if k != "max_tokens"}}
+    messages = body["messages"] + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": continue_prompt},
+    ]
+    return {**request, "body": {**body, "messages": messages}}
+
+
+def continue_truncated(backend, requests: List[Dict], results: Dict, prefix: str, poll_interval: float,
+                       timeout: Optional[float], rounds: int, continue_prompt: str) -> Dict:
+    """
+    Re-batch replies that hit max_tokens (up to `rounds` more batches) and
+    join the parts. A reply still cut off afterwards becomes an error, so
+    truncated HTML/JSON never reaches a run's state.
+    """
+    originals = {r["custom_id"]: r for r in requests}
+    results = dict(results)
+    for round_number in range(1, rounds + 1):
+        follow_ups = {}
+        for custom_id, (content, error, truncated) in results.items():
+            if truncated and custom_id in originals:
+                follow_up = continuation_request(originals[custom_id], content, continue_prompt)
+                if follow_up is not None:
+                    follow_ups[custom_id] = follow_up
+        if not follow_ups:
+            break
+        print(f"   ✂️  {len(follow_ups)} replies hit max_tokens; continuing (round {round_number})")
+        more, missing = run_batch(backend, list(follow_ups.values()), f"{prefix}_continue{round_number}",
+                                  poll_interval, timeout)
+        for custom_id, follow_up in follow_ups.items():
+            content, error, truncated = more.get(custom_id, (None, missing, False))
+            if error is not None:
+                results[custom_id] = (None, error, False)
+            elif "response_format" in follow_up["body"]:
+                # A structured reply is replaced whole, and can't be lifted twice
+                results[custom_id] = (content, None, truncated)
+                originals[custom_id] = follow_up
+            else:
+                results[custom_id] = (results[custom_id][0] + content, None, truncated)
+
+    return {
+        custom_id: (None, "reply cut off at max_tokens (finish_reason=length)", False) if truncated
+        else (content, error, False)
+        for custom_id, (content, error, truncated) in results.items()
+    }
+
+
+def error_value(node: str, message: str) -> str:
+    """Same shape of error text the live agents put into state."""
+    if node == "developer":
+        return f"<!-- Error: {message} -->"
+    return f"Error: {message}"
+
+
+def run_bulk(
+    manifest: List[Dict[str, str]],
+    backend,
+    workdir: str = "output/bulk",
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> Dict[str, WebDesignState]:
+    """
+    Run every manifest entry through the workflow, one batch per stage.
+
+    Args:
+        manifest: Entries from load_manifest()
+        backend: LocalBatchBackend or OpenAIBatchBackend
+        workdir: Where request/response files and generated sites go
+        poll_interval: Seconds between status polls
+        timeout: Seconds to wait for each stage's batch (None = no limit).
+            A batch that runs over is cancelled.
+
+    A batch that ends failed, expired or cancelled (or times out) does not
+    stop the run: its requests without a result get an error value, like a
+    failed live call, and the later stages carry on.
+
+    Returns:
+        Final state for each run, keyed by manifest id
+    """
+    from agents import (
+        AGENT_POSTPROCESSORS,
+        AGENT_PROMPTS,
+        AGENT_RESULT_HOOKS,
+        AGENT_SHORTCUTS,
+        CONTINUE_PROMPT,
+        LLM_MAX_CONTINUATIONS,
+        llm,
+        request_params,
+    )
+    from workflow import AGENT_NODES, get_workflow_stages, run_outcome
+
+    states = {entry["id"]: create_initial_state(entry["brochure_url"]) for entry in manifest}
+    stages = get_workflow_stages()
+    recorder, started = RunRecorder(), time.time()
+
+    for number, stage in enumerate(stages, 1):
+        print(f"\n📦 STAGE {number}/{len(stages)}: {', '.join(stage)} ({len(states)} runs)")
+
+        # Nodes without a prompt (e.g. page_budget) are cheap local steps
+        for node in [n for n in stage if n not in AGENT_PROMPTS]:
+            for state in states.values():
+                state.update(AGENT_NODES[node](state))
+        stage = [n for n in stage if n in AGENT_PROMPTS]
+        if not stage:
+            continue
+
+        # Runs a shortcut already answered (e.g. a semantic cache hit) need no request
+        pending = {}
+        for node in stage:
+            shortcut = AGENT_SHORTCUTS.get(node)
+            pending[node] = {}
+            for run_id, state in states.items():
+                update = shortcut(state) if shortcut else None
+                if update is None:
+                    pending[node][run_id] = state
+                else:
+                    state.update(update)
+            if len(pending[node]) < len(states):
+                print(f"   ♻️  {node}: {len(states) - len(pending[node])} runs answered from cache")
+
+        requests = []
+        for node in stage:
+            requests.extend(build_batch_requests(
+                node, pending[node], AGENT_PROMPTS[node], llm.model_name, llm.temperature,
+                request_params(node),
+            ))
+        if not requests:
+            continue
+
+        prefix = os.path.join(workdir, f"stage{number}")
+        results, missing = run_batch(backend, requests, prefix, poll_interval, timeout)
+        results = continue_truncated(backend, requests, results, prefix, poll_interval, timeout,
+                                     LLM_MAX_CONTINUATIONS, CONTINUE_PROMPT)
+
+        # Fan results back into each run's state
+        failures = 0
+        for node in stage:
+            for run_id, state in pending[node].items():
+                content, error, _ = results.get(make_custom_id(run_id, node), (None, missing, False))
+                postprocess = AGENT_POSTPROCESSORS.get(node)
+                if error is None and postprocess:
+                    try:
+                        content = postprocess(content)
+                    except ValueError as e:
+                        error = str(e)
+                if error is not None:
+                    failures += 1
+                    for field in node_output_fields(node):
+                        state[field] = error_value(node, error)
+                    continue
+                # Merged nodes return {field: text}; the others one text
+                outputs = content if isinstance(content, dict) else {node_output_fields(node)[0]: content}
+                for field, text in outputs.items():
+                    state[field] = store_text(text)
+                if node in AGENT_RESULT_HOOKS:
+                    AGENT_RESULT_HOOKS[node](state)
+
+        print(f"   ✅ Stage complete ({len(requests) - failures} ok, {failures} failed)")
+
+    # Batch requests don't go through call_llm, so these runs have no
+    # per-node rows (a batch's turnaround is not a node latency)
+    for run_id, state in states.items():
+        record_run(state, recorder, duration_s=time.time() - started, outcome=run_outcome,
+                   stats={"mode": "batch"}, run_id=f"{run_id}-{int(started)}")
+    return states
+
+
+def save_bulk_results(states: Dict[str, WebDesignState], workdir: str = "output/bulk") -> str:
+    """Write one HTML file per run plus a results.jsonl with every final state."""
+    spiller = RunSpiller(workdir)
+    for run_id, state in states.items():
+        spiller.spill(run_id, state)
+    return spiller.results_path
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate many brochure websites via the Batch API")
+    parser.add_argument("manifest", help="Text or JSONL file listing brochures")
+    parser.add_argument("--local", action="store_true", help="Use the local file-based batch stand-in")
+    parser.add_argument("--workdir", default="output/bulk", help="Where batch files and sites are written")
+    parser.add_argument("--poll", type=float, default=30.0, help="Seconds between status polls")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds to wait for each stage's batch before cancelling it (0 = no limit)")
+    parser.add_argument("--deploy", action="store_true", help="Also build minified, precompressed deploy bundles")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    backend = (
+        LocalBatchBackend(os.path.join(args.workdir, "local_endpoint"))
+        if args.local else OpenAIBatchBackend()
+    )
+
+    print(f"📋 Manifest: {len(manifest)} brochures ({'local stand-in' if args.local else 'OpenAI Batch API'})")
+    states = run_bulk(manifest, backend, workdir=args.workdir, poll_interval=args.poll,
+                      timeout=args.timeout or None)
+    results_path = save_bulk_results(states, args.workdir)
+
+    print(f"\n💾 Sites saved to: {os.path.join(args.workdir, 'sites')}/")
+    print(f"📄 Results: {results_path}\n")
+
+    if args.deploy:
+        from deploy_bundle import build_bundles, print_size_report
+        sites_dir = os.path.join(args.workdir, "sites")
+        deploy_dir = os.path.join(args.workdir, "deploy")
+        print_size_report(build_bundles(
+            [os.path.join(sites_dir, f"{run_id}.html") for run_id in states], deploy_dir
+        ))
+        print(f"\n🚀 Deploy bundles: {deploy_dir}/\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Topology Benchmark
+
+The default graph fans out to a Designer and a Copywriter call, and each one
+sends the Historian's full analysis. WORKFLOW_TOPOLOGY=merged replaces both
+with one Creative call that returns the design spec and the copy as
+schema-validated JSON. That sends the analysis once, but the two outputs are
+generated back to back instead of in parallel.
+
+This script runs the same brochures through both topologies and compares
+them. It reports two scopes:
+
+    creative stage  designer + copywriter (fanout) vs. creative (merged);
+                    latency is the stage's wall-clock span
+    whole run       every LLM call in the run, end-to-end latency
+
+For each scope it prints mean input/output tokens, mean cost, and p50/p95
+latency. It ends with a recommendation: merged is cheaper per run, and
+fanout is usually faster.
+
+Usage:
+    python3 benchmark_topology.py                         # 3 runs per topology
+    python3 benchmark_topology.py --runs 5 --topologies fanout,merged
+    python3 benchmark_topology.py brochures.txt --json output/topology_benchmark.json
+
+Runs make real LLM calls (2 x runs x brochures workflows), priced with
+run_history.PRICING_PER_1M.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from run_history import percentile, recording
+from state import create_initial_state
+
+DEFAULT_BROCHURE = "https://archive.org/details/1977-intro-apple-ii-2/"
+
+# Nodes making up the "creative stage" in each topology
+CREATIVE_STAGE = {
+    "fanout": ("designer", "copywriter"),
+    "merged": ("creative",),
+}
+
+
+def _usage(nodes: Dict[str, Dict], names) -> Dict[str, float]:
+    """Summed tokens/cost and wall-clock span of the given recorder nodes."""
+    entries = [nodes[n] for n in names if n in nodes]
+    if not entries:
+        return {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "seconds": 0.0}
+    return {
+        "input_tokens": sum(e["input_tokens"] for e in entries),
+        "output_tokens": sum(e["output_tokens"] for e in entries),
+        "cost_usd": sum(e["cost_usd"] for e in entries),
+        "seconds": max(e["ended_at"] for e in entries) - min(e["started_at"] for e in entries),
+    }
+
+
+def run_once(topology: str, brochure_url: str) -> Dict[str, Dict]:
+    """One workflow run; returns {"stage": usage, "run": usage}."""
+    from workflow import get_compiled_workflow
+
+    app = get_compiled_workflow(topology)
+    started = time.time()
+    with recording() as recorder:
+        app.invoke(create_initial_state(brochure_url))
+    run = _usage(recorder.nodes, recorder.nodes)
+    run["seconds"] = time.time() - started
+    return {"stage": _usage(recorder.nodes, CREATIVE_STAGE[topology]), "run": run}
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    """Mean tokens/cost and p50/p95 latency over samples from one scope."""
+    latencies = sorted(s["seconds"] for s in samples)
+    return {
+        "input_tokens": statistics.mean(s["input_tokens"] for s in samples),
+        "output_tokens": statistics.mean(s["output_tokens"] for s in samples),
+        "cost_usd": statistics.mean(s["cost_usd"] for s in samples),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+    }
+
+
+def benchmark(brochures: List[str], topologies: List[str], runs: int) -> Dict[str, Dict]:
+    """{topology: {"stage": summary, "run": summary, "samples": n}}."""
+    results = {}
+    for topology in topologies:
+        samples = []
+        for url in brochures:
+            for i in range(runs):
+                print(f"⏱️  {topology}: {url} (run {i + 1}/{runs})")
+                samples.append(run_once(topology, url))
+        results[topology] = {
+            "stage": summarize([s["stage"] for s in samples]),
+            "run": summarize([s["run"] for s in samples]),
+            "samples": len(samples),
+        }
+    return results
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    for scope, title in (("stage", "CREATIVE STAGE"), ("run", "WHOLE RUN")):
+        print(f"\n📊 {title}")
+        print(f"   {'topology':<8} {'in tok':>8} {'out tok':>8} {'cost':>9} {'p50':>7} {'p95':>7}")
+        for topology, result in results.items():
+            r = result[scope]
+            print(f"   {topology:<8} {r['input_tokens']:>8,.0f} {r['output_tokens']:>8,.0f} "
+                  f"${r['cost_usd']:>8.4f} {r['p50_s']:>6.1f}s {r['p95_s']:>6.1f}s")
+
+    if {"fanout", "merged"} <= results.keys():
+        fan, merged = results["fanout"]["run"], results["merged"]["run"]
+        saved = fan["cost_usd"] - merged["cost_usd"]
+        slower = merged["p50_s"] - fan["p50_s"]
+        print("\n💡 Recommendation:")
+        if saved > 0 and slower > 0:
+            print(f"   merged saves ${saved:.4f}/run ({saved / fan['cost_usd']:.0%}) "
+                  f"and is {slower:.1f}s slower at p50:")
+            print("   use WORKFLOW_TOPOLOGY=merged for bulk/batch work, fanout for interactive runs")
+        elif saved > 0:
+            print(f"   merged is cheaper (${saved:.4f}/run) and no slower: WORKFLOW_TOPOLOGY=merged")
+        else:
+            print("   merged saves nothing here: keep WORKFLOW_TOPOLOGY=fanout")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fanout and merged workflow topologies")
+    parser.add_argument("brochures", nargs="?", help="Text file with one brochure URL per line")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per brochure per topology")
+    parser.add_argument("--topologies", default="fanout,merged", help="Comma-separated topologies")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    from workflow import TOPOLOGIES
+
+    topologies = [t.strip() for t in args.topologies.split(",") if t.strip()]
+    for topology in topologies:
+        if topology not in TOPOLOGIES:
+            parser.error(f"unknown topology {topology!r} (known: {', '.join(TOPOLOGIES)})")
+
+    brochures = [DEFAULT_BROCHURE]
+    if args.brochures:
+        with open(args.brochures, "r", encoding="utf-8") as f:
+            brochures = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    results = benchmark(brochures, topologies, args.runs)
+    print_report(results)
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Candidate Scoring
+
+Getting a good site used to mean re-running the whole pipeline and
+comparing pages by eye. With DEVELOPER_CANDIDATES=N (and optionally
+COPYWRITER_CANDIDATES=N) the agent asks for N completions of the same
+prompt in one request (the API's `n` parameter). The prompt is sent and
+billed once, and latency is about that of a single call. The candidates
+are then scored locally, and only the winner goes into the state:
+
+    page (Developer)    +10 per passed validate_code() check
+                        -5 per page-budget violation (page_budget.py)
+                        -1 per animation-lint finding it cannot auto-fix
+                        -100 if the reply was cut off (finish_reason=length)
+    copy (Copywriter)   +2 per top-level copy field in the ```json block,
+                        else +1 per markdown section; -100 if cut off
+
+Ties go to the earlier candidate.
+
+Configuration (.env):
+    DEVELOPER_CANDIDATES=1    # 1 = single completion (default)
+    COPYWRITER_CANDIDATES=1
+"""
+
+import re
+from typing import Callable, Dict, List, Tuple
+
+from animation_lint import lint_page
+from page_budget import analyze_page, budgets_from_env, check_budgets
+from template_renderer import DEFAULT_COPY, extract_json_block
+
+TRUNCATED_PENALTY = 100
+
+_SECTION = re.compile(r"^#{1,4}\s+\S", re.M)
+
+
+def score_page(html: str, truncated: bool = False) -> Dict:
+    """Local quality score of one generated page (higher is better)."""
+    from agents import validate_code  # agents uses this module
+
+    checks = validate_code(html)
+    passed = sum(ok for ok, _ in checks)
+    violations = check_budgets(analyze_page(html), budgets_from_env())
+    _, findings = lint_page(html, fix=True)
+    unfixed = sum(not f["fixed"] for f in findings)
+    score = 10 * passed - 5 * len(violations) - unfixed - (TRUNCATED_PENALTY if truncated else 0)
+    return {
+        "score": score,
+        "summary": f"checks {passed}/{len(checks)}, {len(violations)} over budget, {unfixed} lint",
+    }
+
+
+def score_copy(text: str, truncated: bool = False) -> Dict:
+    """Local quality score of one Copywriter reply (higher is better)."""
+    block = extract_json_block(text)
+    if block is not None:
+        fields = sum(1 for key in DEFAULT_COPY if block.get(key))
+        score, summary = 2 * fields, f"{fields}/{len(DEFAULT_COPY)} copy fields"
+    else:
+        sections = len(_SECTION.findall(text))
+        score, summary = sections, f"{sections} sections"
+    return {"score": score - (TRUNCATED_PENALTY if truncated else 0), "summary": summary}
+
+
+def pick_best(
+    candidates: List[Tuple[str, bool]],
+    scorer: Callable[[str, bool], Dict],
+) -> Tuple[int, List[Dict]]:
+    """
+    Score (text, truncated) candidates.
+
+    Returns (index of the winner, one score dict per candidate).
+    """
+    scores = [scorer(text, truncated) for text, truncated in candidates]
+    best = max(range(len(scores)), key=lambda i: (scores[i]["score"], -i))
+    return best, scores
@@ -0,0 +1,56 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Thin Client
+
+Drop-in for `python3 run_creative_team.py [--draft] [URL]` that hands the run to the
+warm daemon (daemon.py) over a Unix socket and streams its output back.
+
+Deliberately imports ONLY the standard library modules below, so it starts
+in tens of milliseconds. If no daemon is running it falls back to running
+run_creative_team.py directly.
+
+Usage:
+    python3 client.py [--draft] [brochure_url]
+"""
+
+import json
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.getenv(
+    "CREATIVE_TEAM_SOCKET",
+    os.path.join(os.getenv("XDG_RUNTIME_DIR", "/tmp"), "pillar3-creative-team.sock"),
+)
+
+
+def run_via_daemon(argv) -> int:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(SOCKET_PATH)
+        request = {"command": "run", "argv": argv, "cwd": os.getcwd()}
+        s.sendall((json.dumps(request) + "\n").encode("utf-8"))
+
+        with s.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                message = json.loads(line)
+                if "out" in message:
+                    out = sys.stderr if message.get("stream") == "stderr" else sys.stdout
+                    out.write(message["out"])
+                    out.flush()
+                if "exit" in message:
+                    return message["exit"]
+    return 1  # connection dropped before the daemon reported an exit code
+
+
+def main() -> int:
+    try:
+        return run_via_daemon(sys.argv[1:])
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.stderr.write("(no warm daemon running - start one with: python3 daemon.py start)\n")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_creative_team.py")
+        os.execv(sys.executable, [sys.executable, script] + sys.argv[1:])
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
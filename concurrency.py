@@ -0,0 +1,265 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Adaptive Concurrency Control
+
+Every agent LLM call passes through an AIMD (Additive Increase,
+Multiplicative Decrease) limiter - the same idea TCP uses for congestion
+control:
+
+- While calls come back healthy, the in-flight limit grows by ~1 per
+  "window" of completed calls (additive increase)
+- When the provider throttles us (HTTP 429) or latency spikes well above
+  the usual for that agent, the limit is cut in half (multiplicative decrease)
+
+The result: bulk workloads settle near the maximum sustainable throughput
+without anyone hand-tuning a worker count.
+
+Latency is judged PER AGENT, because a 40s Developer call is normal while a
+40s Historian call means the provider is struggling.
+
+Configuration (.env):
+    LLM_INITIAL_CONCURRENCY=4
+    LLM_MIN_CONCURRENCY=1
+    LLM_MAX_CONCURRENCY=32
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from metrics import MetricsRegistry, metrics as default_metrics
+
+# "Error code: 429", "HTTP 429", "status 429" - not any 429 in the text
+# (a token count or a URL in the message must not halve the limit)
+_THROTTLE_MESSAGE = re.compile(r"\b(?:status|code|http)\D{0,3}429\b|rate limit|too many requests", re.I)
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """
+    Detect a provider rate-limit error without importing the OpenAI SDK.
+
+    Works for openai.RateLimitError, httpx status errors and anything
+    else that carries a 429 status code.
+    """
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    if type(error).__name__ == "RateLimitError":
+        return True
+    return bool(_THROTTLE_MESSAGE.search(str(error)))
+
+
+class AIMDLimiter:
+    """
+    Adaptive limit on the number of in-flight LLM calls.
+
+    Usage:
+        with limiter.slot("historian"):
+            response = llm.invoke(messages)
+
+    Or, for callers that manage the slot themselves (e.g. a scheduler):
+        if limiter.try_acquire():
+            ...
+            limiter.release("historian", latency, throttled=False)
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        spike_ratio: float = 2.0,
+        ewma_alpha: float = 0.2,
+        warmup_samples: int = 3,
+        cooldown_seconds: float = 5.0,
+        registry: Optional[MetricsRegistry] = None,
+        name: str = "llm.concurrency",
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.spike_ratio = spike_ratio
+        self.ewma_alpha = ewma_alpha
+        self.warmup_samples = warmup_samples
+        self.cooldown_seconds = cooldown_seconds
+        self.metrics = registry or default_metrics
+        self.name = name
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        # Per-agent latency baselines: {key: (ewma_seconds, samples)}
+        self._baselines: Dict[str, tuple] = {}
+        self._cond = threading.Condition()
+        self._listeners = []
+
+        self._publish()
+
+    # ------------------------------------------------------------------
+    # Slot management
+    # ------------------------------------------------------------------
+
+    @property
+    def limit(self) -> int:
+        """Current whole-number in-flight limit."""
+        return max(int(self._limit), int(self.min_limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without blocking."""
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                self._publish()
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a slot is free (or `timeout` seconds pass)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight >= self.limit:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._in_flight += 1
+            self._publish()
+            return True
+
+    def release(self, key: str, latency: float, throttled: bool = False) -> None:
+        """
+        Return a slot and feed the outcome of the call into the controller.
+
+        Args:
+            key: Which agent made the call (latency baselines are per agent)
+            latency: Wall-clock seconds the call took
+            throttled: True if the provider answered with a 429
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            saturated = self._in_flight + 1 >= self.limit
+
+            if throttled:
+                self._decrease(key, "throttled", latency)
+            elif self._is_spike(key, latency):
+                self._decrease(key, "latency_spike", latency)
+            else:
+                self._observe_latency(key, latency)
+                # Only grow when we actually used the whole window;
+                # an idle limiter shouldn't inflate its limit
+                if saturated:
+                    self._grow(key, latency)
+
+            self._publish()
+            self._cond.notify_all()
+
+        for listener in list(self._listeners):
+            listener()
+
+    def add_release_listener(self, callback) -> None:
+        """Call `callback()` after every release (used by the scheduler)."""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        """Hold a slot for the duration of one LLM call."""
+        self.acquire()
+        start = time.monotonic()
+        throttled = False
+        try:
+            yield
+        except BaseException as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.release(key, time.monotonic() - start, throttled)
+
+    # ------------------------------------------------------------------
+    # AIMD decisions (called with the lock held)
+    # ------------------------------------------------------------------
+
+    def _is_spike(self, key: str, latency: float) -> bool:
+        baseline, samples = self._baselines.get(key, (None, 0))
+        if baseline is None or samples < self.warmup_samples:
+            return False
+        return latency > baseline * self.spike_ratio
+
+    def _observe_latency(self, key: str, latency: float) -> None:
+        baseline, samples = self._baselines.get(key, (None, 0))
+        if baseline is None:
+            baseline = latency
+        else:
+            baseline = (1 - self.ewma_alpha) * baseline + self.ewma_alpha * latency
+        self._baselines[key] = (baseline, samples + 1)
+
+    def _grow(self, key: str, latency: float) -> None:
+        old = self._limit
+        # +increase per full window of successful calls
+        self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1))
+        if int(self._limit) != int(old):
+            self._decide("increase", key, old, latency)
+
+    def _decrease(self, key: str, reason: str, latency: float) -> None:
+        now = time.monotonic()
+        # One burst of 429s should only halve the limit once
+        if now - self._last_decrease < self.cooldown_seconds:
+            self.metrics.inc(f"{self.name}.decrease_suppressed")
+            return
+        old = self._limit
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        self._last_decrease = now
+        self._decide("decrease", key, old, latency, reason)
+
+    def _decide(self, action: str, key: str, old: float, latency: float, reason: str = "healthy") -> None:
+        self.metrics.inc(f"{self.name}.{action}")
+        if reason != "healthy":
+            self.metrics.inc(f"{self.name}.{reason}")
+        self.metrics.record_event(
+            f"{self.name}.decision",
+            action=action,
+            reason=reason,
+            agent=key,
+            latency=round(latency, 3),
+            old_limit=round(old, 2),
+            new_limit=round(self._limit, 2),
+        )
+
+    def _publish(self) -> None:
+        self.metrics.set_gauge(f"{self.name}.limit", self.limit)
+        self.metrics.set_gauge(f"{self.name}.in_flight", self._in_flight)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, object]:
+        """Current limit, in-flight count and per-agent latency baselines."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "raw_limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "increases": self.metrics.counter(f"{self.name}.increase"),
+                "decreases": self.metrics.counter(f"{self.name}.decrease"),
+                "baselines": {k: round(v[0], 2) for k, v in self._baselines.items()},
+            }
+
+
+def limiter_from_env() -> AIMDLimiter:
+    """Build the shared limiter from LLM_*_CONCURRENCY environment variables."""
+    return AIMDLimiter(
+        initial_limit=float(os.getenv("LLM_INITIAL_CONCURRENCY", "4")),
+        min_limit=float(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+        max_limit=float(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+    )
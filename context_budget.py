@@ -0,0 +1,238 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Context Budgets
+
+Prompt size drove run-to-run latency swings. The Designer and Copywriter got
+the full, unbounded analysis, while the Developer got a blind
+`analysis[:500]` that could stop mid-word. Now each agent has a token
+budget per input field:
+
+    designer / copywriter / creative   analysis
+    developer                          design_mockup, copy, analysis
+    developer_refine                   design_mockup
+    site_page                          design_mockup, copy
+
+A field within budget is passed through untouched. An oversized field is
+compressed by extractive selection: the text is cut into units (lines,
+and sentences of long lines), and each unit is scored TF-IDF style, so
+units with rare, specific terms (hex codes, sizes, product names, quotes)
+beat generic filler. The best units are kept in their original order
+until the budget is used. Headings of kept units stay. Other ```fenced```
+blocks are units of their own, kept whole or dropped. Only the last
+```json block (the tokens/copy block the renderer reads) is always kept; it
+counts against the budget like everything else.
+
+Token counts use a fast local estimate (word pieces + punctuation, no
+tokenizer download). The tokens actually sent per node are published as
+metrics (context.tokens.<node>). Each compression is printed.
+
+Configuration (.env):
+    CONTEXT_BUDGETS=developer.analysis=400,designer.analysis=2000   # 0 = unlimited
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from metrics import metrics
+
+DEFAULT_BUDGETS: Dict[str, Dict[str, int]] = {
+    "designer": {"analysis": 1500},
+    "copywriter": {"analysis": 1500},
+    "creative": {"analysis": 1500},
+    "developer": {"design_mockup": 2500, "copy": 2000, "analysis": 300},
+    "developer_refine": {"design_mockup": 2000},
+    "site_page": {"design_mockup": 1500, "copy": 2000},
+}
+
+
+def budgets_from_env() -> Dict[str, Dict[str, int]]:
+    """DEFAULT_BUDGETS with overrides from CONTEXT_BUDGETS ("node.field=tokens,...")."""
+    budgets = {node: dict(fields) for node, fields in DEFAULT_BUDGETS.items()}
+    for part in os.getenv("CONTEXT_BUDGETS", "").split(","):
+        if "=" not in part:
+            continue
+        key, value = part.split("=", 1)
+        node, _, field = key.strip().partition(".")
+        if node not in budgets or not field:
+            raise ValueError(f"Unknown context budget {key.strip()!r} (use node.field, nodes: {', '.join(budgets)})")
+        budgets[node][field] = int(value)
+    return budgets
+
+
+# ============================================================================
+# TOKEN ESTIMATE
+# ============================================================================
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast BPE-like token estimate: ~1 token per 4 letters of a word, per 3
+    digits of a number, and per punctuation/symbol character.
+    """
+    count = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isalpha():
+            count += 1 + (len(piece) - 1) // 4
+        elif piece[0].isdigit():
+            count += 1 + (len(piece) - 1) // 3
+        else:
+            count += 1
+    return count
+
+
+# ============================================================================
+# EXTRACTIVE COMPRESSION
+# ============================================================================
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_TERM = re.compile(r"#[0-9a-fA-F]{3,8}\b|\d+(?:\.\d+)?(?:px|rem|em|%|k|kb|mhz)?|[a-zA-Z][a-zA-Z'-]{2,}")
+_HEADING = re.compile(r"^(#{1,6}\s|\*\*[^*]+\*\*:?$|[A-Z][^.!?]{0,60}:$|\d+\.\s+\*\*)")
+_FENCE = re.compile(r"```.*?```", re.S)
+_JSON_FENCE = re.compile(r"```json\s*\n")
+
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were you your our their its has have had not but all any can "
+    "will into onto over under more most such than then them they there these those what when where which "
+    "while who whom why how also each other some very just like make made using use used".split()
+)
+
+# Units longer than this are split into sentences before scoring
+_LONG_UNIT_CHARS = 300
+
+
+def _units(text: str) -> List[Tuple[str, bool]]:
+    """
+    (unit text, is_protected) in original order. Fenced blocks are single
+    units; only the last ```json block (the one the renderer reads) is
+    protected.
+    """
+    units: List[Tuple[str, bool]] = []
+    fences = list(_FENCE.finditer(text))
+    json_fences = [f for f in fences if _JSON_FENCE.match(f.group(0))]
+    pos = 0
+    for fence in fences:
+        units.extend(_plain_units(text[pos:fence.start()]))
+        units.append((fence.group(0), bool(json_fences) and fence is json_fences[-1]))
+        pos = fence.end()
+    units.extend(_plain_units(text[pos:]))
+    return units
+
+
+def _plain_units(text: str) -> List[Tuple[str, bool]]:
+    units = []
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        if len(line) > _LONG_UNIT_CHARS:
+            units.extend((sentence, False) for sentence in _SENTENCE_END.split(line) if sentence.strip())
+        else:
+            units.append((line, False))
+    return units
+
+
+def _terms(unit: str) -> List[str]:
+    return [t.lower() for t in _TERM.findall(unit) if t.lower() not in _STOPWORDS]
+
+
+def compress(text: str, budget: int) -> str:
+    """
+    At most ~budget tokens of `text`, chosen by extractive TF-IDF selection.
+
+    Units are whole lines, sentences or fenced blocks, never cut mid-word;
+    the kept ones stay in document order. The last ```json block is
+    always kept, so the result only exceeds the budget when that block
+    alone does.
+    """
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+
+    units = _units(text)
+    terms = [_terms(u) for u, _ in units]
+    doc_freq = Counter(t for unit_terms in terms for t in set(unit_terms))
+    n = len(units)
+
+    # Which heading (if any) each unit sits under
+    heading_of, current = [], None
+    for i, (unit, _) in enumerate(units):
+        is_heading = bool(_HEADING.match(unit.strip()))
+        heading_of.append(None if is_heading else current)
+        if is_heading:
+            current = i
+
+    scores = []
+    for i, unit_terms in enumerate(terms):
+        if not unit_terms:
+            scores.append(0.0)
+            continue
+        tf = Counter(unit_terms)
+        weight = sum(count * math.log(1 + n / doc_freq[t]) for t, count in tf.items())
+        # Normalize by length so long units don't win on size alone
+        scores.append(weight / math.sqrt(len(unit_terms)))
+
+    costs = [estimate_tokens(u) + 1 for u, _ in units]
+    keep = {i for i, (_, protected) in enumerate(units) if protected}
+    used = sum(costs[i] for i in keep)
+
+    # Best value per token first
+    for i in sorted(range(n), key=lambda i: scores[i] / costs[i], reverse=True):
+        if i in keep or scores[i] == 0.0:
+            continue
+        extra = costs[i]
+        heading = heading_of[i]
+        if heading is not None and heading not in keep:
+            extra += costs[heading]
+        if used + extra > budget:
+            continue
+        keep.add(i)
+        if heading is not None:
+            keep.add(heading)
+        used += extra
+
+    plain = [i for i in range(n) if not units[i][1]]
+    if not any(i in keep for i in plain) and any(scores[i] for i in plain):
+        # No whole unit fits: keep the best one up to the last word that does
+        best = max(plain, key=lambda i: scores[i])
+        unit = units[best][0]
+        # A cut fenced block gets its closing fence back
+        closing = "\n```" if _FENCE.fullmatch(unit) else ""
+        words, room = unit.split(" "), budget - used - estimate_tokens(closing)
+        while words and estimate_tokens(" ".join(words)) > room:
+            words.pop()
+        if words:
+            keep.add(best)
+            units[best] = (" ".join(words) + closing, False)
+
+    return "\n".join(units[i][0] for i in sorted(keep))
+
+
+# ============================================================================
+# PER-AGENT FITTING
+# ============================================================================
+
+def fit_context(node: str, scale: float = 1.0, **fields: str) -> Dict[str, str]:
+    """
+    Fit each field into the node's budget times `scale` (fields without a
+    budget pass through).
+
+    Publishes context.tokens.<node> (estimated tokens sent across the
+    fields) and prints any compression.
+    """
+    budgets = budgets_from_env().get(node, {})
+    fitted, sent, notes = {}, 0, []
+    for name, text in fields.items():
+        before = estimate_tokens(text)
+        budget = int(budgets.get(name, 0) * scale)
+        fitted[name] = compress(text, budget) if budget and before > budget else text
+        after = estimate_tokens(fitted[name]) if fitted[name] is not text else before
+        sent += after
+        if after < before:
+            notes.append(f"{name} {before:,}→{after:,}")
+            metrics.inc(f"context.tokens_saved.{node}", before - after)
+    metrics.set_gauge(f"context.tokens.{node}", sent)
+    if notes:
+        print(f"   📐 {node} context compressed to budget: {', '.join(notes)} tokens (est.)")
+    return fitted
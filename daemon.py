@@ -0,0 +1,257 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Warm Daemon
+
+Every `python3 run_creative_team.py` re-imports LangGraph, LangChain and the
+OpenAI SDK and re-creates ChatOpenAI - seconds of work before the first
+request even leaves. The daemon does that ONCE and then serves runs over a
+Unix socket; client.py is the tiny front end that talks to it.
+
+    python3 daemon.py start      # keep running in a spare terminal
+    python3 client.py [URL]      # same output as run_creative_team.py, instantly
+    python3 client.py --draft    # any run_creative_team.py option works
+    python3 daemon.py status
+    python3 daemon.py stop
+
+Protocol (one request per connection, newline-delimited JSON):
+    client → {"command": "run", "argv": [...], "cwd": "/where/client/runs"}
+    daemon → {"out": "...text..."}   (repeated, streamed as it is printed)
+    daemon → {"exit": 0}
+
+Output routing:
+sys.stdout is replaced by a router that writes to the stream stored in a
+ContextVar. Each connection sets its own socket stream, and because
+LangGraph copies the context into its worker threads, even the agents'
+prints reach the right client - several clients can run at once.
+
+The socket path comes from CREATIVE_TEAM_SOCKET (default below).
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+DEFAULT_SOCKET = os.getenv(
+    "CREATIVE_TEAM_SOCKET",
+    os.path.join(os.getenv("XDG_RUNTIME_DIR", "/tmp"), "pillar3-creative-team.sock"),
+)
+
+
+# ============================================================================
+# OUTPUT ROUTING
+# ============================================================================
+
+class _SocketStream:
+    """File-like object that frames everything written as {"out": ...} lines."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def send(self, payload: dict) -> None:
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                # Client went away (e.g. Ctrl-C); keep the run going quietly
+                self.closed = True
+
+    def write(self, text: str) -> int:
+        if text:
+            self.send({"out": text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return True  # clients are terminals; keep the ANSI colors
+
+
+_current_stream: ContextVar[Optional[_SocketStream]] = ContextVar("daemon_stream", default=None)
+
+
+class _RoutedStdout:
+    """sys.stdout replacement: per-connection stream, else the daemon's own."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def _target(self):
+        return _current_stream.get() or self.fallback
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class Daemon:
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        self.socket_path = socket_path
+        self.server: Optional[socket.socket] = None
+        self.active_runs = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def warm_up(self) -> None:
+        """Pay every import and client construction cost up front."""
+        import run_creative_team  # noqa: F401 - imports workflow + agents (ChatOpenAI)
+        from workflow import get_compiled_workflow
+        get_compiled_workflow()
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.socket_path):
+            if _ping(self.socket_path):
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket from a crashed daemon
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.server.listen(16)
+        # Wake up periodically so stop() from a handler thread is noticed
+        self.server.settimeout(1.0)
+
+        sys.stdout = _RoutedStdout(sys.stdout)
+        print(f"🔥 Creative team daemon warm and listening on {self.socket_path}")
+
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = self.server.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break  # socket closed by stop()
+                conn.settimeout(None)
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self.server:
+            self.server.close()
+
+    def _handle(self, conn: socket.socket) -> None:
+        stream = _SocketStream(conn)
+        try:
+            with conn, conn.makefile("r", encoding="utf-8") as reader:
+                request = json.loads(reader.readline() or "{}")
+                command = request.get("command")
+
+                if command == "ping":
+                    stream.send({"ok": True, "pid": os.getpid(), "active_runs": self.active_runs})
+                elif command == "shutdown":
+                    stream.send({"ok": True})
+                    self.stop()
+                elif command == "run":
+                    stream.send({"exit": self._run(stream, request)})
+                else:
+                    stream.send({"out": f"Unknown command: {command!r}\n", "stream": "stderr"})
+                    stream.send({"exit": 2})
+        except Exception as e:
+            stream.send({"out": f"Daemon error: {e}\n", "stream": "stderr"})
+            stream.send({"exit": 1})
+
+    def _run(self, stream: _SocketStream, request: dict) -> int:
+        from run_creative_team import build_arg_parser, run_cli
+
+        argv = [str(a) for a in request.get("argv") or []]
+        cwd = request.get("cwd") or os.getcwd()
+
+        with self._lock:
+            self.active_runs += 1
+        token = _current_stream.set(stream)
+        try:
+            # Same options as run_creative_team.py (--draft, URL, --help)
+            return run_cli(argv, output_dir=os.path.join(cwd, "output"))
+        except SystemExit as e:
+            # argparse: --help was printed to the routed stdout; usage errors
+            # went to the daemon's stderr, so repeat them to the client
+            if e.code:
+                usage = build_arg_parser().format_usage()
+                stream.send({"out": f"Invalid arguments: {' '.join(argv)}\n{usage}", "stream": "stderr"})
+            return e.code if isinstance(e.code, int) else 2
+        finally:
+            _current_stream.reset(token)
+            with self._lock:
+                self.active_runs -= 1
+
+
+# ============================================================================
+# CONTROL
+# ============================================================================
+
+def _request(socket_path: str, payload: dict, timeout: float = 2.0) -> Optional[dict]:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path)
+            s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            with s.makefile("r", encoding="utf-8") as reader:
+                line = reader.readline()
+                return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+def _ping(socket_path: str) -> Optional[dict]:
+    return _request(socket_path, {"command": "ping"})
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "start"
+    socket_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOCKET
+
+    if command == "start":
+        daemon = Daemon(socket_path)
+        print("⏳ Warming up (imports, LLM client, compiled graph)...")
+        daemon.warm_up()
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            daemon.stop()
+            print("\n🛑 Daemon stopped")
+    elif command == "status":
+        info = _ping(socket_path)
+        if info:
+            print(f"✓ Daemon running (pid {info['pid']}, {info['active_runs']} active runs) on {socket_path}")
+        else:
+            print(f"✗ No daemon on {socket_path}")
+            return 1
+    elif command == "stop":
+        if _request(socket_path, {"command": "shutdown"}):
+            print("🛑 Daemon stopping")
+        else:
+            print(f"✗ No daemon on {socket_path}")
+            return 1
+    else:
+        print("Usage: python3 daemon.py [start|status|stop] [socket_path]")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Deploy Bundles
+
+The Developer writes one verbose, commented HTML file. This module turns
+it into what a web server should actually send:
+
+    <bundle>/index.html        minified HTML with inline CSS/JS minified
+    <bundle>/index.html.gz     gzip -9 (mtime 0, so identical input → identical bytes)
+    <bundle>/index.html.br     brotli (only if the optional `brotli` package is installed)
+    <bundle>/manifest.json     sha256, ETag, sizes and content type per file
+
+Minification is deliberately conservative. It only removes things that
+cannot change behaviour:
+- HTML: comments (not conditional comments) and whitespace runs in text,
+  collapsed to one space/newline. Tags and attributes, <pre> and
+  <textarea> are left untouched
+- CSS: comments, whitespace around { } ; , > and the last ; in a block.
+  Strings are kept verbatim, and spaces inside calc() etc. are kept
+- JS: comments and indentation. Line breaks are kept (no ASI surprises).
+  String, template and regex literals are copied verbatim
+
+Batches (e.g. output/bulk/sites/*.html) are processed in a process pool.
+
+Usage:
+    python3 deploy_bundle.py output/bulk/sites --out output/deploy [--workers 4]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants are skipped without it
+    brotli = None
+
+_WS = " \t\r\n\f\v"
+
+
+def _collapse(ws: str) -> str:
+    return "\n" if "\n" in ws else " "
+
+
+# ============================================================================
+# JAVASCRIPT
+# ============================================================================
+
+_REGEX_AFTER_KEYWORD = re.compile(
+    r"(?<![\w$])(?:return|typeof|case|do|else|in|of|void|yield|await|delete|throw|new)$"
+)
+
+
+def _scan_string(src: str, i: int) -> int:
+    quote, j, n = src[i], i + 1, len(src)
+    while j < n:
+        if src[j] == "\\":
+            j += 2
+        elif src[j] == quote:
+            return j + 1
+        elif src[j] == "\n":
+            return j
+        else:
+            j += 1
+    return n
+
+
+def _scan_template(src: str, i: int) -> int:
+    j, n = i + 1, len(src)
+    while j < n:
+        ch = src[j]
+        if ch == "\\":
+            j += 2
+        elif ch == "`":
+            return j + 1
+        elif src.startswith("${", j):
+            j, depth = j + 2, 1
+            while j < n and depth:
+                ch = src[j]
+                if ch in "\"'":
+                    j = _scan_string(src, j)
+                elif ch == "`":
+                    j = _scan_template(src, j)
+                else:
+                    depth += {"{": 1, "}": -1}.get(ch, 0)
+                    j += 1
+        else:
+            j += 1
+    return n
+
+
+def _scan_regex(src: str, i: int) -> int:
+    j, n, in_class = i + 1, len(src), False
+    while j < n:
+        ch = src[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "\n":
+            return j
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            j += 1
+            while j < n and (src[j].isalnum() or src[j] == "_"):
+                j += 1
+            return j
+        j += 1
+    return n
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch in "_$" or ord(ch) > 127
+
+
+def minify_js(src: str) -> str:
+    """Strip comments and indentation; keep every line break and literal."""
+    out: List[str] = []
+    last = ""        # last significant character written
+    pending = ""     # whitespace seen since then ("", " " or "\n")
+    i, n = 0, len(src)
+    while i < n:
+        ch = src[i]
+        if ch in _WS:
+            j = i
+            while j < n and src[j] in _WS:
+                j += 1
+            pending = "\n" if pending == "\n" else _collapse(src[i:j])
+            i = j
+            continue
+        if src.startswith("//", i):
+            j = src.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if src.startswith("/*", i):
+            j = src.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            pending = "\n" if pending == "\n" else _collapse(src[i:j])
+            i = j
+            continue
+
+        if pending and out:
+            if pending == "\n":
+                out.append("\n")
+            elif (_is_word(last) and _is_word(ch)) or (last in "+-" and ch in "+-"):
+                out.append(" ")
+        pending = ""
+
+        if ch in "\"'":
+            j = _scan_string(src, i)
+        elif ch == "`":
+            j = _scan_template(src, i)
+        elif ch == "/" and (
+            not last or last in "(,=:[!&|?{};+-*%<>~^\n"
+            or _REGEX_AFTER_KEYWORD.search("".join(out[-12:]))
+        ):
+            j = _scan_regex(src, i)
+        else:
+            j = i + 1
+        out.append(src[i:j])
+        last = src[j - 1]
+        i = j
+    return "".join(out).strip()
+
+
+# ============================================================================
+# CSS
+# ============================================================================
+
+_CSS_TIGHT = "{};,>"
+
+
+def minify_css(src: str) -> str:
+    """Strip comments and whitespace that never matters in CSS."""
+    out: List[str] = []
+    pending = False
+    i, n = 0, len(src)
+    while i < n:
+        ch = src[i]
+        if ch in _WS:
+            pending = True
+            i += 1
+            continue
+        if src.startswith("/*", i):
+            j = src.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            pending = True
+            continue
+
+        if ch == "}" and out and out[-1] == ";":
+            out.pop()  # last declaration needs no semicolon
+        if pending and out and out[-1][-1] not in _CSS_TIGHT and ch not in _CSS_TIGHT:
+            out.append(" ")
+        pending = False
+
+        j = _scan_string(src, i) if ch in "\"'" else i + 1
+        out.append(src[i:j])
+        i = j
+    return "".join(out).strip()
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+_RAW_BLOCKS = re.compile(
+    r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL
+)
+_COMMENT = re.compile(r"<!--(?!\[if|<!|>)[\s\S]*?-->")
+_TAG = re.compile(r"(<[^>]*>)")
+_SCRIPT_TYPE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+_JS_TYPES = {"module", "text/javascript", "application/javascript", "text/ecmascript", "application/ecmascript"}
+
+
+def _is_inline_js(open_tag: str) -> bool:
+    if re.search(r"\bsrc\s*=", open_tag, re.IGNORECASE):
+        return False
+    m = _SCRIPT_TYPE.search(open_tag)
+    return not m or m.group(1).lower() in _JS_TYPES
+
+
+def _minify_text(html: str) -> str:
+    parts = _TAG.split(_COMMENT.sub("", html))
+    # Even indexes are text between tags; tags themselves stay untouched
+    for k in range(0, len(parts), 2):
+        parts[k] = re.sub(r"\s+", lambda m: _collapse(m.group()), parts[k])
+    return "".join(parts)
+
+
+def minify_html(html: str) -> str:
+    """Minify an HTML document, including its inline <style> and <script>."""
+    out, pos = [], 0
+    for m in _RAW_BLOCKS.finditer(html):
+        out.append(_minify_text(html[pos:m.start()]))
+        open_tag, name, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if name == "style":
+            body = minify_css(body)
+        elif name == "script" and _is_inline_js(open_tag):
+            body = minify_js(body)
+        out.append(open_tag + body + close_tag)
+        pos = m.end()
+    out.append(_minify_text(html[pos:]))
+    return "".join(out).strip() + "\n"
+
+
+# ============================================================================
+# BUNDLES
+# ============================================================================
+
+def _etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:20] + '"'
+
+
+def build_bundle(html: str, out_dir: str) -> Dict:
+    """
+    Write a deploy bundle for one page to `out_dir`.
+
+    Returns the manifest (also written to out_dir/manifest.json), with a
+    "report" entry comparing raw, minified and compressed sizes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    raw = html.encode("utf-8")
+    minified = minify_html(html).encode("utf-8")
+
+    variants: List[Tuple[str, Optional[str], bytes]] = [
+        ("index.html", None, minified),
+        ("index.html.gz", "gzip", gzip.compress(minified, compresslevel=9, mtime=0)),
+    ]
+    if brotli is not None:
+        variants.append(("index.html.br", "br", brotli.compress(minified, quality=11)))
+
+    files = {}
+    for name, encoding, data in variants:
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(data)
+        files[name] = {
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            # Each encoding is a different representation → its own strong ETag
+            "etag": _etag(data),
+            "content_type": "text/html; charset=utf-8",
+            "content_encoding": encoding,
+        }
+
+    manifest = {
+        "files": files,
+        "report": {
+            "raw_bytes": len(raw),
+            "minified_bytes": len(minified),
+            "gzip_bytes": files["index.html.gz"]["bytes"],
+            "brotli_bytes": files["index.html.br"]["bytes"] if "index.html.br" in files else None,
+            "raw_gzip_bytes": len(gzip.compress(raw, compresslevel=9, mtime=0)),
+        },
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _bundle_file(args: Tuple[str, str]) -> Tuple[str, Dict]:
+    path, out_dir = args
+    with open(path, encoding="utf-8") as f:
+        return path, build_bundle(f.read(), out_dir)
+
+
+def build_bundles(paths: List[str], out_root: str, workers: Optional[int] = None) -> Dict[str, Dict]:
+    """Bundle many HTML files (out_root/<file stem>/...) in a process pool."""
+    jobs = [(p, os.path.join(out_root, os.path.splitext(os.path.basename(p))[0])) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_bundle_file, jobs, chunksize=4))
+
+
+def print_size_report(manifests: Dict[str, Dict]) -> None:
+    print("\n📦 Deploy Bundle Sizes:")
+    print(f"   {'page':<28}{'raw':>10}{'minified':>10}{'gzip':>9}{'brotli':>9}{'raw+gzip':>10}")
+    totals = {"raw_bytes": 0, "minified_bytes": 0, "gzip_bytes": 0, "brotli_bytes": 0, "raw_gzip_bytes": 0}
+    for name, manifest in manifests.items():
+        r = manifest["report"]
+        br = f"{r['brotli_bytes']:,}" if r["brotli_bytes"] is not None else "-"
+        print(f"   {os.path.basename(name)[:27]:<28}{r['raw_bytes']:>10,}{r['minified_bytes']:>10,}"
+              f"{r['gzip_bytes']:>9,}{br:>9}{r['raw_gzip_bytes']:>10,}")
+        for key in totals:
+            totals[key] += r[key] or 0
+    if len(manifests) > 1:
+        br = f"{totals['brotli_bytes']:,}" if brotli is not None else "-"
+        print(f"   {'TOTAL':<28}{totals['raw_bytes']:>10,}{totals['minified_bytes']:>10,}"
+              f"{totals['gzip_bytes']:>9,}{br:>9}{totals['raw_gzip_bytes']:>10,}")
+    if totals["raw_bytes"]:
+        print(f"   Sent over the wire: {totals['gzip_bytes'] / totals['raw_bytes']:.0%} of raw (gzip)")
+    if brotli is None:
+        print("   (install `brotli` for .br variants)")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify and precompress generated websites")
+    parser.add_argument("inputs", nargs="+", help="HTML files or directories of them")
+    parser.add_argument("--out", default="output/deploy", help="Bundle root (one subdirectory per page)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = []
+    for item in args.inputs:
+        if os.path.isdir(item):
+            paths += sorted(os.path.join(item, f) for f in os.listdir(item) if f.endswith(".html"))
+        else:
+            paths.append(item)
+    if not paths:
+        print("✗ No HTML files found")
+        return 1
+
+    manifests = build_bundles(paths, args.out, args.workers)
+    print_size_report(manifests)
+    print(f"\n💾 Bundles written to: {args.out}/\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
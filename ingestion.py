@@ -0,0 +1,485 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Brochure Ingestion
+
+Until now the Historian only saw `brochure_url` interpolated into its
+prompt; the brochure itself never reached the model. This node runs before
+the Historian. When the input names a local file or folder, it extracts the
+brochure's text into state["brochure_text"].
+
+Supported inputs (a folder means every supported file in it, by name):
+    .pdf                  text layer via pypdf (optional extra), one page per
+                          form feed so later steps can split by page
+    .png .jpg .tif ...    OCR text sidecar next to the scan: page1.png.txt
+                          or page1.txt (this project runs no OCR engine)
+    .txt .md              read as UTF-8
+    .html .htm            visible text (scripts/styles dropped)
+Anything else (http URLs, free-text descriptions) passes through unchanged.
+
+Local paths are resolved under INGEST_ROOT; absolute paths, ".." and
+symlinks leading outside it are refused. The HTTP service and queue workers
+take brochure_url from remote callers, so they turn local ingestion off
+unless INGEST_LOCAL=on is set explicitly.
+
+Performance:
+- Files are read through mmap, so the OS pages them in on demand and
+  no extra copy of the file is made
+- Extractions are cached by SHA-256 of the file bytes in INGEST_CACHE_DIR
+- A (path, size, mtime) index maps unchanged files straight to their hash,
+  so a re-run neither re-parses nor re-hashes them
+
+Only text useful to the Historian is passed on: whitespace and hyphenation
+are normalized, and page numbers, repeated running headers/footers and OCR
+noise lines are dropped. The result is capped at INGEST_MAX_CHARS, cut at a
+page boundary.
+
+Usage:
+    python3 ingestion.py brochures/apple_ii.pdf     # extract + show stats
+
+Configuration (.env):
+    INGEST_ROOT=.                     # local brochure paths must lie under this folder
+    INGEST_LOCAL=on                   # off in service.py / worker.py unless set
+    INGEST_CACHE_DIR=output/ingest_cache
+    INGEST_MAX_CHARS=60000
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from state import WebDesignState
+from state_store import store_text
+
+# Bump when extraction/normalization changes so cached text is rebuilt
+EXTRACTOR_VERSION = 1
+
+PAGE_BREAK = "\f"
+
+PDF_EXTENSIONS = {".pdf"}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".gif", ".webp", ".bmp"}
+TEXT_EXTENSIONS = {".txt", ".md"}
+HTML_EXTENSIONS = {".html", ".htm"}
+SUPPORTED_EXTENSIONS = PDF_EXTENSIONS | IMAGE_EXTENSIONS | TEXT_EXTENSIONS | HTML_EXTENSIONS
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Buffer]:
+    """Read-only memory map of a file (b"" for empty files, which can't be mapped)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+class _TextExtractor(HTMLParser):
+    BLOCKS = {"p", "div", "section", "article", "li", "tr", "br", "h1", "h2", "h3", "h4", "h5", "h6",
+              "header", "footer", "blockquote", "pre", "table", "ul", "ol", "hr"}
+    SKIP = {"script", "style", "noscript", "template", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def _decode(data: Buffer) -> str:
+    return str(data, "utf-8", errors="replace")
+
+
+def extract_pdf(data: Buffer) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF ingestion needs pypdf: pip install pypdf") from None
+    # PdfReader seeks around the memory map directly; pages are read on demand
+    reader = PdfReader(data if isinstance(data, mmap.mmap) else io.BytesIO(data))
+    return PAGE_BREAK.join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_html(data: Buffer) -> str:
+    parser = _TextExtractor()
+    parser.feed(_decode(data))
+    parser.close()
+    return "".join(parser.parts)
+
+
+def ocr_sidecar(path: str) -> Optional[str]:
+    """The OCR text file that belongs to a scanned image, if there is one."""
+    stem, _ = os.path.splitext(path)
+    for candidate in (path + ".txt", stem + ".txt", stem + ".ocr.txt"):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+# ============================================================================
+# NORMALIZATION + RELEVANCE FILTER
+# ============================================================================
+
+_CONTROL = re.compile(r"[^\S\n\f]+")
+_HYPHEN_BREAK = re.compile(r"([a-z])-\n([a-z])")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,4}(\s*(/|of)\s*\d{1,4})?$", re.I)
+
+
+def _is_noise(line: str) -> bool:
+    """OCR debris: mostly non-alphanumeric, or a lone character."""
+    if len(line) < 2:
+        return True
+    alnum = sum(ch.isalnum() for ch in line)
+    return alnum / len(line) < 0.4
+
+
+def normalize_text(text: str) -> str:
+    """
+    Unicode-normalize, fix hyphenation and whitespace, and drop what the
+    Historian can't use: page numbers, running headers/footers repeated on
+    most pages, and OCR noise lines. Pages stay separated by form feeds.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    pages = [[_CONTROL.sub(" ", line).strip() for line in page.split("\n")] for page in text.split(PAGE_BREAK)]
+
+    # Top/bottom lines repeated on more than half of the pages (3+) are
+    # running headers/footers
+    repeated = set()
+    if len(pages) >= 3:
+        edges = Counter()
+        for page in pages:
+            lines = [line for line in page if line]
+            edges.update({line.lower() for line in lines[:2] + lines[-2:]})
+        repeated = {line for line, n in edges.items() if n > len(pages) / 2}
+
+    cleaned = []
+    for page in pages:
+        lines = [
+            line for line in page
+            if not line or not (_PAGE_NUMBER.match(line) or _is_noise(line) or line.lower() in repeated)
+        ]
+        cleaned.append(re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip())
+    return PAGE_BREAK.join(page for page in cleaned if page)
+
+
+def cap_text(text: str, max_chars: int) -> str:
+    """At most max_chars, cut after the last whole page that fits (0 = no cap)."""
+    if not max_chars or len(text) <= max_chars:
+        return text
+    cut = text.rfind(PAGE_BREAK, 0, max_chars)
+    return text[:cut] if cut > 0 else text[:max_chars]
+
+
+def chunk_pages(text: str, max_chars: int, target_chars: Optional[int] = None) -> List[str]:
+    """
+    Split extracted text into chunks of at most max_chars.
+
+    Consecutive pages are packed together until a chunk reaches
+    target_chars (default: until the next page would not fit); a page that
+    is too long on its own is split at paragraph breaks, then lines, then
+    hard-cut.
+    """
+    pieces: List[str] = []
+    for page in text.split(PAGE_BREAK):
+        if len(page) <= max_chars:
+            pieces.append(page)
+            continue
+        for separator in ("\n\n", "\n"):
+            if separator in page:
+                parts = page.split(separator)
+                break
+        else:
+            parts = [page[i:i + max_chars] for i in range(0, len(page), max_chars)]
+        buffer = ""
+        for part in parts:
+            while len(part) > max_chars:
+                if buffer:
+                    pieces.append(buffer)
+                    buffer = ""
+                pieces.append(part[:max_chars])
+                part = part[max_chars:]
+            if buffer and len(buffer) + 1 + len(part) > max_chars:
+                pieces.append(buffer)
+                buffer = part
+            else:
+                buffer = f"{buffer}\n{part}" if buffer else part
+        if buffer:
+            pieces.append(buffer)
+
+    target = target_chars or max_chars
+    chunks: List[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) < target and len(chunks[-1]) + 2 + len(piece) <= max_chars:
+            chunks[-1] += "\n\n" + piece
+        else:
+            chunks.append(piece)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class IngestCache:
+    """
+    Extracted text keyed by file content hash, plus a (path, size, mtime)
+    index so unchanged files are recognized without hashing them.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._local = threading.local()
+        os.makedirs(root, exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _text_path(self, digest: str) -> str:
+        return os.path.join(self.root, f"{digest}.v{EXTRACTOR_VERSION}.txt")
+
+    def known_hash(self, path: str, st: os.stat_result) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    def remember_hash(self, path: str, st: os.stat_result, digest: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, digest),
+            )
+
+    def get(self, digest: str) -> Optional[str]:
+        try:
+            with open(self._text_path(digest), "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, digest: str, text: str) -> None:
+        path = self._text_path(digest)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+def cache_from_env() -> IngestCache:
+    return IngestCache(os.getenv("INGEST_CACHE_DIR", "output/ingest_cache"))
+
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+def local_ingestion_enabled() -> bool:
+    return os.getenv("INGEST_LOCAL", "on").strip().lower() not in ("off", "0", "false", "no")
+
+
+def ingest_root() -> str:
+    return os.path.realpath(os.getenv("INGEST_ROOT", "."))
+
+
+def _within(root: str, path: str) -> bool:
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def local_path(brochure_url: str, root: Optional[str] = None) -> Optional[str]:
+    """
+    The local file/folder under INGEST_ROOT a brochure input refers to, or
+    None (not local, local ingestion off, or outside the root).
+    """
+    if not local_ingestion_enabled():
+        return None
+    candidate = brochure_url.strip()
+    if candidate.startswith("file://"):
+        candidate = candidate[len("file://"):]
+    if not candidate or "://" in candidate:
+        return None
+    root = os.path.realpath(root) if root else ingest_root()
+    if os.path.isabs(candidate) or ".." in candidate.replace("\\", "/").split("/"):
+        if os.path.exists(candidate):
+            print(f"   ⚠️  Not ingesting {candidate!r}: only relative paths under INGEST_ROOT are read")
+        return None
+    path = os.path.join(root, candidate)
+    if not os.path.exists(path):
+        return None
+    if not _within(root, path):
+        print(f"   ⚠️  Not ingesting {candidate!r}: it resolves outside INGEST_ROOT")
+        return None
+    return os.path.realpath(path)
+
+
+def source_files(path: str) -> List[str]:
+    """Supported files for an input path (a folder contributes every supported file in it)."""
+    if os.path.isdir(path):
+        names = sorted(os.listdir(path))
+        files = [os.path.join(path, n) for n in names if os.path.splitext(n)[1].lower() in SUPPORTED_EXTENSIONS]
+        # OCR sidecars are read through their image, not on their own
+        sidecars = {
+            ocr_sidecar(f) for f in files if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+        }
+        return [f for f in files if f not in sidecars]
+    return [path]
+
+
+def _extract(path: str, data: Buffer) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        return extract_pdf(data)
+    if ext in HTML_EXTENSIONS:
+        return extract_html(data)
+    return _decode(data)
+
+
+def extract_file(path: str, cache: IngestCache) -> Tuple[str, bool]:
+    """
+    Normalized text of one file. Returns (text, served from cache).
+
+    Images are read through their OCR sidecar; the sidecar is what gets
+    hashed and cached.
+    """
+    if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+        sidecar = ocr_sidecar(path)
+        if sidecar is None:
+            print(f"   ⚠️  No OCR text sidecar for {os.path.basename(path)} (expected {os.path.basename(path)}.txt)")
+            return "", False
+        path = sidecar
+
+    st = os.stat(path)
+    digest = cache.known_hash(path, st)
+    if digest is not None:
+        cached = cache.get(digest)
+        if cached is not None:
+            return cached, True
+
+    with _mapped(path) as data:
+        digest = hashlib.sha256(data).hexdigest()
+        cached = cache.get(digest)
+        from_cache = cached is not None  # same bytes seen before under another path/mtime
+        if cached is None:
+            cached = normalize_text(_extract(path, data))
+            cache.put(digest, cached)
+    cache.remember_hash(path, st, digest)
+    return cached, from_cache
+
+
+def ingest(brochure_url: str, cache: Optional[IngestCache] = None,
+           max_chars: Optional[int] = None) -> Optional[Dict]:
+    """
+    Extract the brochure text for a local input.
+
+    Returns {"text", "files", "cached", "seconds"} or None when the input
+    is not a local file or folder.
+    """
+    root = ingest_root()
+    path = local_path(brochure_url, root)
+    if path is None:
+        return None
+    cache = cache or cache_from_env()
+    max_chars = int(os.getenv("INGEST_MAX_CHARS", "60000")) if max_chars is None else max_chars
+
+    started = time.perf_counter()
+    texts, cached = [], 0
+    # A folder may hold symlinks pointing elsewhere; those are skipped too
+    files = [f for f in source_files(path) if _within(root, f)]
+    for file in files:
+        text, hit = extract_file(file, cache)
+        cached += hit
+        if text:
+            texts.append(text)
+    return {
+        "text": cap_text(PAGE_BREAK.join(texts), max_chars),
+        "files": len(files),
+        "cached": cached,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+# ============================================================================
+# WORKFLOW NODE
+# ============================================================================
+
+def ingest_node(state: WebDesignState) -> Dict:
+    """
+    THE INGESTION STEP - runs before the Historian, no LLM involved.
+
+    Local brochure files become state["brochure_text"]; other inputs get an
+    empty brochure_text and the Historian works from the URL as before, as
+    they do when extraction fails (missing pypdf, corrupt file, no access).
+    """
+    try:
+        result = ingest(state["brochure_url"])
+    except Exception as e:
+        print(f"⚠️  INGEST failed, continuing without brochure text: {e}")
+        return {"brochure_text": ""}
+    if result is None:
+        return {"brochure_text": ""}
+
+    print(f"📄 INGEST: {result['files']} file(s), {len(result['text']):,} chars "
+          f"({result['cached']} from cache) in {result['seconds'] * 1000:.0f} ms")
+    return {"brochure_text": store_text(result["text"])}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 ingestion.py <file-or-folder> [...]")
+        sys.exit(1)
+    for arg in sys.argv[1:]:
+        result = ingest(arg)
+        if result is None:
+            print(f"✗ Not a local file or folder under INGEST_ROOT: {arg}")
+            continue
+        pages = result["text"].count(PAGE_BREAK) + 1 if result["text"] else 0
+        print(f"📄 {arg}: {result['files']} file(s), {pages} page(s), {len(result['text']):,} chars, "
+              f"{result['cached']} cached, {result['seconds'] * 1000:.1f} ms")
+        print(result["text"][:500].replace(PAGE_BREAK, "\n--- page ---\n"))
@@ -0,0 +1,87 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Runtime Metrics
+
+A tiny in-process metrics registry shared by every component that wants to
+report what it is doing (concurrency limits, queue depths, cache hits...).
+
+Why not Prometheus/StatsD?
+- Zero extra dependencies: this is a demo project that runs from a laptop
+- Everything we need is a snapshot we can print at the end of a run
+- Components stay decoupled: they only call metrics.inc()/set_gauge()
+
+Three kinds of values are kept:
+- Counters: monotonically increasing totals ("llm.calls")
+- Gauges: the latest value of something ("llm.concurrency.limit")
+- Events: a bounded log of recent decisions, for explaining behavior
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class MetricsRegistry:
+    """Thread-safe store for counters, gauges and recent events."""
+
+    def __init__(self, max_events: int = 200):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+
+    def inc(self, name: str, amount: float = 1) -> None:
+        """Increase a counter by `amount`."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Record the current value of a gauge."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def record_event(self, name: str, **fields: Any) -> None:
+        """Append a structured event (e.g. a limiter decision) to the log."""
+        event = {"name": name, "time": time.time(), **fields}
+        with self._lock:
+            self._events.append(event)
+
+    def counter(self, name: str) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name: str) -> Optional[float]:
+        """Current value of a gauge (None if never set)."""
+        with self._lock:
+            return self._gauges.get(name)
+
+    def events(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recent events, optionally filtered by name."""
+        with self._lock:
+            return [dict(e) for e in self._events if name is None or e["name"] == name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Point-in-time copy of everything recorded so far.
+
+        Returns:
+            Dictionary with "counters", "gauges" and "events" keys
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "events": [dict(e) for e in self._events],
+            }
+
+    def reset(self) -> None:
+        """Forget everything (useful between benchmark runs)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._events.clear()
+
+
+# The process-wide registry every module reports into
+metrics = MetricsRegistry()
@@ -0,0 +1,145 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Adaptive Output Budgets
+
+No agent set max_tokens, so output length (and with it latency) had no
+bound. This module sets a per-node max_tokens from the run history:
+
+    budget = p95 of the node's recent completion lengths × headroom
+
+Completion lengths are output tokens per LLM call, so multi-call nodes
+(map-reduce, continuations) are not inflated. A node with fewer than
+OUTPUT_BUDGET_MIN_SAMPLES recorded runs stays unbounded. Budgets are
+recomputed whenever a new run lands in the history, so they follow the
+workload as runs accumulate.
+
+call_llm() applies the budget. If a reply still ends with
+finish_reason == "length", it asks the model to continue where it stopped
+(up to LLM_MAX_CONTINUATIONS times) and joins the parts. Structured-output
+calls are re-issued without the cap instead, since a JSON fragment cannot
+be continued.
+
+The same history gives each node's expected p50/p95 latency, printed
+before a run starts.
+
+Usage:
+    python3 output_budgets.py            # current budgets and expected latency
+
+Configuration (.env):
+    OUTPUT_BUDGETS=on                  # off: never set max_tokens
+    OUTPUT_BUDGET_PERCENTILE=95
+    OUTPUT_BUDGET_HEADROOM=1.25
+    OUTPUT_BUDGET_MIN_SAMPLES=5
+    OUTPUT_BUDGET_WINDOW=200           # most recent runs per node
+    LLM_MAX_CONTINUATIONS=2
+"""
+
+import math
+import os
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+
+from run_history import RunHistory, history_from_env, percentile
+
+# Bounds on a learned budget, whatever the history says
+MIN_BUDGET = 256
+MAX_BUDGET = 16384
+
+
+class OutputBudgets:
+    """
+    Per-node max_tokens learned from a RunHistory. Thread-safe.
+
+    Args:
+        history: Run history to learn from
+        pct: Percentile of past completion lengths
+        headroom: Multiplier on that percentile
+        min_samples: Runs needed before a node gets a budget
+        window: Most recent runs per node considered
+    """
+
+    def __init__(self, history: RunHistory, pct: float = 95, headroom: float = 1.25,
+                 min_samples: int = 5, window: int = 200):
+        self.history = history
+        self.pct = pct
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self._lock = threading.Lock()
+        self._seen_run = -1
+        self._budgets: Dict[str, int] = {}
+
+    def budgets(self) -> Dict[str, int]:
+        """{node: max_tokens}, recomputed when the history gained a run."""
+        with self._lock:
+            last = self.history.last_run_id()
+            if last != self._seen_run:
+                self._budgets = {}
+                for node, values in self.history.completion_tokens(self.window).items():
+                    if len(values) >= self.min_samples:
+                        budget = math.ceil(percentile(values, self.pct) * self.headroom)
+                        self._budgets[node] = min(MAX_BUDGET, max(MIN_BUDGET, budget))
+                self._seen_run = last
+            return dict(self._budgets)
+
+    def max_tokens(self, node: str) -> Optional[int]:
+        """The node's budget, or None while it has too little history."""
+        return self.budgets().get(node)
+
+    def expected_latency(self) -> Dict[str, Tuple[float, float]]:
+        """{node: (p50 seconds, p95 seconds)} from the recorded runs."""
+        return {
+            row["group"]: (row["p50_ms"] / 1000, row["p95_ms"] / 1000)
+            for row in self.history.node_stats()
+            if row["count"] >= self.min_samples
+        }
+
+
+def budgets_from_env() -> Optional[OutputBudgets]:
+    """OutputBudgets over RUN_HISTORY_DB, or None when disabled or there is no history."""
+    if os.getenv("OUTPUT_BUDGETS", "on").strip().lower() in ("off", "0", "false", "no"):
+        return None
+    history = history_from_env()
+    if history is None:
+        return None
+    return OutputBudgets(
+        history,
+        pct=float(os.getenv("OUTPUT_BUDGET_PERCENTILE", "95")),
+        headroom=float(os.getenv("OUTPUT_BUDGET_HEADROOM", "1.25")),
+        min_samples=int(os.getenv("OUTPUT_BUDGET_MIN_SAMPLES", "5")),
+        window=int(os.getenv("OUTPUT_BUDGET_WINDOW", "200")),
+    )
+
+
+def print_forecast(budgets: Optional[OutputBudgets], nodes=None) -> None:
+    """Expected per-node latency and max_tokens, before a run starts."""
+    if budgets is None:
+        return
+    latency, limits = budgets.expected_latency(), budgets.budgets()
+    rows = [n for n in (nodes or latency) if n in latency or n in limits]
+    if not rows:
+        print("⏳ Expected latency: not enough run history yet\n")
+        return
+    print("⏳ Expected latency (run history p50 / p95, max_tokens):")
+    for node in rows:
+        p50, p95 = latency.get(node, (0.0, 0.0))
+        limit = limits.get(node)
+        print(f"   {node:<16} {p50:>6.1f}s / {p95:>6.1f}s   {f'{limit:,}' if limit else 'unbounded':>9}")
+    print()
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    budgets = budgets_from_env()
+    if budgets is None:
+        print("✗ Output budgets are off (OUTPUT_BUDGETS=off or RUN_HISTORY_DB empty)")
+        return 1
+    print_forecast(budgets)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
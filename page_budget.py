@@ -0,0 +1,308 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Page Budget Analyzer
+
+The Developer prompt asks for lots of effects; nothing checked whether the
+result is still fast to load. This node runs right after the Developer,
+entirely offline (html.parser, no browser), and records a `page_report`:
+
+    metrics     total bytes, inline CSS/JS bytes, DOM nodes and depth,
+                render-blocking resources, external font requests,
+                images without dimensions (layout shift)
+    budgets     the limits they were checked against
+    violations  [{"metric", "value", "budget"}, ...]
+    passed      True when every metric is within budget
+
+Critical CSS (PAGE_CRITICAL_CSS=1):
+The inline stylesheet is split in two. Rules whose selectors only reference
+tags/classes/ids seen in the first PAGE_FOLD_NODES elements of <body> (plus
+html/body/:root/*) stay in <head>. Everything else (including
+@font-face/@keyframes) moves to a <style> just before </body>, so the
+first paint doesn't wait for below-the-fold styling.
+
+Configuration (.env):
+    PAGE_BUDGETS=total_bytes=150000,dom_nodes=1500   # override any default
+    PAGE_CRITICAL_CSS=0
+    PAGE_FOLD_NODES=60
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Set, Tuple
+
+from deploy_bundle import minify_css
+from state import WebDesignState
+from state_store import resolve, store_text
+
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "total_bytes": 150_000,
+    "inline_css_bytes": 50_000,
+    "inline_js_bytes": 50_000,
+    "dom_nodes": 1_500,
+    "dom_depth": 32,
+    "render_blocking": 1,
+    "font_requests": 2,
+    "images_without_dimensions": 0,
+}
+
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+_FONT_URL = re.compile(r"fonts\.(googleapis|gstatic)\.com|use\.typekit\.net|\.(woff2?|ttf|otf|eot)\b", re.I)
+_CSS_URL = re.compile(r"""(?:@import\s+(?:url\()?|url\()\s*["']?([^"')\s;]+)""", re.I)
+
+
+def budgets_from_env() -> Dict[str, int]:
+    """DEFAULT_BUDGETS with overrides from PAGE_BUDGETS ("name=value,...")."""
+    budgets = dict(DEFAULT_BUDGETS)
+    for part in os.getenv("PAGE_BUDGETS", "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            if name.strip() not in budgets:
+                raise ValueError(f"Unknown page budget {name.strip()!r} (known: {', '.join(budgets)})")
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+# ============================================================================
+# ANALYSIS
+# ============================================================================
+
+class _PageParser(HTMLParser):
+    def __init__(self, fold_nodes: int):
+        super().__init__(convert_charrefs=True)
+        self.fold_nodes = fold_nodes
+        self.stack: List[str] = []
+        self.dom_nodes = 0
+        self.dom_depth = 0
+        self.body_nodes = 0
+        self.in_body = False
+        self.in_head = False
+        self.inline_css: List[str] = []
+        self.inline_js_bytes = 0
+        self.render_blocking: List[str] = []
+        self.font_requests: Set[str] = set()
+        self.images_without_dimensions = 0
+        self.above_fold: Set[str] = {"html", "body", ":root", "*"}
+        self._raw_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        a = {k: (v or "") for k, v in attrs}
+        self.dom_nodes += 1
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head, self.in_body = False, True
+        elif self.in_body:
+            self.body_nodes += 1
+            if self.body_nodes <= self.fold_nodes:
+                self.above_fold.add(tag)
+                self.above_fold.update("." + c for c in a.get("class", "").split())
+                if a.get("id"):
+                    self.above_fold.add("#" + a["id"])
+
+        if tag == "link":
+            rel = a.get("rel", "").lower()
+            href = a.get("href", "")
+            if "stylesheet" in rel and a.get("media", "all") in ("", "all", "screen"):
+                self.render_blocking.append(href)
+            if _FONT_URL.search(href) and ("stylesheet" in rel or "preload" in rel):
+                self.font_requests.add(href)
+        elif tag == "script":
+            if "src" in a and self.in_head and not ({"async", "defer"} & a.keys()) and a.get("type") != "module":
+                self.render_blocking.append(a["src"])
+            self._raw_tag = tag
+        elif tag == "style":
+            self._raw_tag = tag
+        elif tag == "img" and not ("width" in a and "height" in a):
+            self.images_without_dimensions += 1
+
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+            self.dom_depth = max(self.dom_depth, len(self.stack))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1] == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in self.stack:
+            while self.stack and self.stack.pop() != tag:
+                pass
+        if tag == self._raw_tag:
+            self._raw_tag = None
+        if tag == "head":
+            self.in_head = False
+
+    def handle_data(self, data):
+        if self._raw_tag == "style":
+            self.inline_css.append(data)
+            for url in _CSS_URL.findall(data):
+                if _FONT_URL.search(url):
+                    self.font_requests.add(url)
+        elif self._raw_tag == "script":
+            self.inline_js_bytes += len(data.encode("utf-8"))
+
+
+def analyze_page(html: str, fold_nodes: int = 60) -> Dict:
+    """Offline page-weight metrics for one HTML document."""
+    parser = _PageParser(fold_nodes)
+    parser.feed(html)
+    parser.close()
+    return {
+        "total_bytes": len(html.encode("utf-8")),
+        "inline_css_bytes": sum(len(css.encode("utf-8")) for css in parser.inline_css),
+        "inline_js_bytes": parser.inline_js_bytes,
+        "dom_nodes": parser.dom_nodes,
+        "dom_depth": parser.dom_depth,
+        "render_blocking": len(parser.render_blocking),
+        "font_requests": len(parser.font_requests),
+        "images_without_dimensions": parser.images_without_dimensions,
+        "render_blocking_urls": parser.render_blocking,
+        "font_urls": sorted(parser.font_requests),
+        "above_fold_selectors": sorted(parser.above_fold),
+    }
+
+
+def check_budgets(metrics: Dict, budgets: Dict[str, int]) -> List[Dict]:
+    """Every metric over its budget, as {"metric", "value", "budget"}."""
+    return [
+        {"metric": name, "value": metrics[name], "budget": limit}
+        for name, limit in budgets.items()
+        if metrics.get(name, 0) > limit
+    ]
+
+
+# ============================================================================
+# CRITICAL CSS
+# ============================================================================
+
+def _split_rules(css: str) -> List[Tuple[str, str]]:
+    """Top-level (prelude, body) pairs of minified CSS; "@import ...;" has body ""."""
+    rules, i, n = [], 0, len(css)
+    while i < n:
+        brace = css.find("{", i)
+        semi = css.find(";", i)
+        if brace < 0:
+            break
+        if 0 <= semi < brace:  # @import/@charset statement
+            rules.append((css[i:semi + 1], ""))
+            i = semi + 1
+            continue
+        depth, j = 1, brace + 1
+        while j < n and depth:
+            if css[j] in "\"'":
+                quote = css[j]
+                j = css.find(quote, j + 1) + 1 or n
+                continue
+            depth += {"{": 1, "}": -1}.get(css[j], 0)
+            j += 1
+        rules.append((css[i:brace], css[brace + 1:j - 1]))
+        i = j
+    return rules
+
+
+_SELECTOR_TOKENS = re.compile(r"([.#]?-?[_a-zA-Z][\w-]*)|(:root)|(\*)")
+
+
+def _selector_is_critical(selector: str, above_fold: Set[str]) -> bool:
+    # Drop pseudo-classes/elements and attribute selectors before matching
+    simplified = re.sub(r"::?[\w-]+(\([^)]*\))?|\[[^\]]*\]", " ", selector)
+    tokens = [m.group(0) for m in _SELECTOR_TOKENS.finditer(simplified)]
+    if selector.strip().startswith(":root"):
+        return True
+    return bool(tokens) and all(t in above_fold for t in tokens)
+
+
+def split_css(css: str, above_fold: Set[str]) -> Tuple[str, str]:
+    """(critical, deferred) CSS for the given above-the-fold selector tokens."""
+    critical, deferred = [], []
+    for prelude, body in _split_rules(minify_css(css)):
+        if prelude.startswith("@media") or prelude.startswith("@supports"):
+            inner_critical, inner_deferred = split_css(body, above_fold)
+            if inner_critical:
+                critical.append(f"{prelude}{{{inner_critical}}}")
+            if inner_deferred:
+                deferred.append(f"{prelude}{{{inner_deferred}}}")
+        elif prelude.startswith("@"):
+            # @import must stay first; @font-face/@keyframes can wait
+            (critical if prelude.startswith(("@import", "@charset")) else deferred).append(
+                prelude if not body else f"{prelude}{{{body}}}"
+            )
+        elif any(_selector_is_critical(s, above_fold) for s in prelude.split(",")):
+            critical.append(f"{prelude}{{{body}}}")
+        else:
+            deferred.append(f"{prelude}{{{body}}}")
+    return "".join(critical), "".join(deferred)
+
+
+_STYLE_BLOCK = re.compile(r"<style\b([^>]*)>(.*?)</style\s*>", re.I | re.S)
+
+
+def inline_critical_css(html: str, above_fold: Set[str]) -> Tuple[str, Dict[str, int]]:
+    """
+    Keep critical CSS in <head> and move the rest to the end of <body>.
+
+    Returns (new html, {"critical_css_bytes", "deferred_css_bytes"}).
+    Pages without a </body> or inline <style> are returned unchanged.
+    """
+    blocks = [m for m in _STYLE_BLOCK.finditer(html) if "media=" not in m.group(1)]
+    body_end = html.lower().rfind("</body>")
+    if not blocks or body_end < 0:
+        return html, {"critical_css_bytes": 0, "deferred_css_bytes": 0}
+
+    critical, deferred = split_css("".join(m.group(2) for m in blocks), above_fold)
+    pieces, pos = [], 0
+    for k, m in enumerate(blocks):
+        pieces.append(html[pos:m.start()])
+        if k == 0:
+            pieces.append(f"<style>{critical}</style>")
+        pos = m.end()
+    rest = html[pos:]
+    body_end = rest.lower().rfind("</body>")
+    pieces.append(rest[:body_end] + f"<style>{deferred}</style>\n" + rest[body_end:])
+    return "".join(pieces), {
+        "critical_css_bytes": len(critical.encode("utf-8")),
+        "deferred_css_bytes": len(deferred.encode("utf-8")),
+    }
+
+
+# ============================================================================
+# WORKFLOW NODE
+# ============================================================================
+
+def page_budget_node(state: WebDesignState) -> Dict:
+    """
+    THE PAGE BUDGET CHECK - runs after the Developer, no LLM involved.
+
+    Stores the analysis in state["page_report"]; with PAGE_CRITICAL_CSS=1
+    also rewrites state["code"] with critical CSS inlined.
+    """
+    print("📏 PAGE BUDGET: Measuring page weight...")
+    code = resolve(state["code"])
+    fold_nodes = int(os.getenv("PAGE_FOLD_NODES", "60"))
+    budgets = budgets_from_env()
+
+    metrics = analyze_page(code, fold_nodes)
+    update: Dict = {}
+    report = {"metrics": metrics, "budgets": budgets}
+
+    if os.getenv("PAGE_CRITICAL_CSS", "0").lower() in ("1", "true", "yes"):
+        new_code, css_split = inline_critical_css(code, set(metrics["above_fold_selectors"]))
+        report["critical_css"] = css_split
+        if new_code != code:
+            update["code"] = store_text(new_code)
+
+    report["violations"] = check_budgets(metrics, budgets)
+    report["passed"] = not report["violations"]
+    update["page_report"] = report
+
+    if report["passed"]:
+        print(f"✅ PAGE BUDGET: Within budget ({metrics['total_bytes']:,} bytes, {metrics['dom_nodes']} nodes)")
+    else:
+        for v in report["violations"]:
+            print(f"⚠️  PAGE BUDGET: {v['metric']} = {v['value']:,} (budget {v['budget']:,})")
+    return update
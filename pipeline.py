@@ -0,0 +1,389 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Stage-Pipelined Multi-Run Engine
+
+Running many brochures through run_workflow() means many independent
+whole-graph executions: every run holds a thread for ~60s, and there is no
+way to give the slow, heavy Developer more workers than the Historian.
+
+This engine turns the workflow graph into an assembly line:
+
+    [historian queue] → historian workers ─┬→ [designer queue]   → designer workers   ─┐
+                                           └→ [copywriter queue] → copywriter workers ─┴→ [developer queue] → developer workers
+
+- Every node has its OWN bounded queue and worker pool
+- Run B's Historian proceeds while run A's Developer is still working
+- BACKPRESSURE: when a downstream queue is full, upstream workers block
+  instead of piling up unbounded in-memory state
+- Per-stage utilization, queue depth and blocked time land in metrics
+
+The graph shape comes from workflow.get_node_dependencies(), so the
+pipeline always matches create_workflow().
+
+Usage:
+    python3 pipeline.py manifest.txt --workers developer=6 --workers historian=2
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from metrics import MetricsRegistry, metrics as default_metrics
+from run_history import RunRecorder, record_run, recording
+from scheduler import BULK, run_context
+from state import WebDesignState, create_initial_state
+from state_store import blob_scope, release_blobs
+
+_STOP = object()
+
+# Developer calls are ~3x longer than Historian calls, so it gets more hands
+DEFAULT_WORKERS = {"ingest": 2, "historian": 2, "designer": 2, "copywriter": 2, "creative": 2, "developer": 6, "animation_lint": 1, "page_budget": 1}
+
+
+def parse_worker_counts(specs: Iterable[str]) -> Dict[str, int]:
+    """Parse ["developer=6", "historian=2"] (or one comma-separated string)."""
+    counts = {}
+    for spec in specs:
+        for part in spec.split(","):
+            if part.strip():
+                node, count = part.split("=")
+                counts[node.strip()] = int(count)
+    return counts
+
+
+class _Run:
+    def __init__(self, run_id: str, state: WebDesignState, dependencies: Dict[str, List[str]]):
+        self.run_id = run_id
+        self.state = state
+        self.lock = threading.Lock()
+        self.waiting_on = {node: len(parents) for node, parents in dependencies.items()}
+        self.remaining = len(dependencies)
+        # Every stage's LLM calls for this run, for the run history
+        self.recorder = RunRecorder()
+        self.submitted_at = time.time()
+        # Blob handles the run's stages stored (see state_store.blob_scope)
+        self.blobs: Set[str] = set()
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable, workers: int, queue_size: int):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+
+
+class StagePipeline:
+    """
+    Assembly-line executor for many runs of the workflow graph.
+
+    Args:
+        nodes: {node name: agent function}
+        dependencies: {node name: [nodes it waits for]}
+        workers: Worker threads per node (missing nodes get 1)
+        queue_size: Max queued runs per stage before upstream blocks
+        job: Scheduler job name; all calls run at "bulk" priority
+        on_complete: Called as fn(run_id, final_state) when a run finishes;
+            an exception there is logged and kept in completion_errors, and
+            the run is still reported by results()
+        outcome: Judges a finished run for the run history as
+            fn(state) -> (ok, validation), e.g. workflow.run_outcome;
+            None = don't record runs
+        release_finished: Give a run's blobs back to the blob store right
+            after on_complete (for callers that persist runs there and
+            don't read the states results() reports)
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[str, Callable],
+        dependencies: Dict[str, List[str]],
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: int = 8,
+        job: str = "pipeline",
+        on_complete: Optional[Callable[[str, WebDesignState], None]] = None,
+        registry: Optional[MetricsRegistry] = None,
+        outcome: Optional[Callable[[WebDesignState], Tuple[bool, List[Tuple[bool, str]]]]] = None,
+        release_finished: bool = False,
+    ):
+        workers = workers or {}
+        self.dependencies = dependencies
+        self.children: Dict[str, List[str]] = defaultdict(list)
+        for node, parents in dependencies.items():
+            for parent in parents:
+                self.children[parent].append(node)
+        self.entry_nodes = [n for n, parents in dependencies.items() if not parents]
+
+        self.stages = {
+            name: _Stage(name, nodes[name], max(1, workers.get(name, 1)), queue_size)
+            for name in dependencies
+        }
+        self.job = job
+        self.on_complete = on_complete
+        self.outcome = outcome
+        self.release_finished = release_finished
+        self.metrics = registry or default_metrics
+
+        self._runs: Dict[str, _Run] = {}
+        self._runs_lock = threading.Lock()
+        self._finished: "queue.Queue[Tuple[str, WebDesignState]]" = queue.Queue()
+        # run_id -> error raised by on_complete for that run
+        self.completion_errors: Dict[str, str] = {}
+        self._started_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        for stage in self.stages.values():
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(stage,), name=f"{stage.name}-{i}", daemon=True)
+                t.start()
+                stage.threads.append(t)
+
+    def stop(self) -> None:
+        for stage in self.stages.values():
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+        for stage in self.stages.values():
+            for t in stage.threads:
+                t.join()
+
+    def submit(self, run_id: str, state: WebDesignState) -> None:
+        """Queue a run at the entry stage(s); blocks while the entry queue is full."""
+        run = _Run(run_id, state, self.dependencies)
+        with self._runs_lock:
+            if run_id in self._runs:
+                raise ValueError(f"Run {run_id!r} is already in the pipeline")
+            self._runs[run_id] = run
+        for node in self.entry_nodes:
+            self._enqueue(self.stages[node], run, blocker=None)
+
+    def results(self, count: int) -> Iterable[Tuple[str, WebDesignState]]:
+        """Yield (run_id, final_state) for the next `count` runs to finish."""
+        for _ in range(count):
+            yield self._finished.get()
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, stage: _Stage, run: _Run, blocker: Optional[_Stage]) -> None:
+        start = time.monotonic()
+        stage.queue.put((run, time.monotonic()))
+        blocked = time.monotonic() - start
+        if blocker is not None and blocked > 0.001:
+            with blocker.lock:
+                blocker.blocked_seconds += blocked
+        depth = stage.queue.qsize()
+        with stage.lock:
+            stage.max_depth = max(stage.max_depth, depth)
+        self.metrics.set_gauge(f"pipeline.{stage.name}.queue_depth", depth)
+
+    def _worker(self, stage: _Stage) -> None:
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            run, enqueued_at = item
+            started = time.monotonic()
+
+            with run.lock:
+                snapshot = dict(run.state)
+            try:
+                with run_context(priority=BULK, job=self.job), recording(run.recorder), blob_scope(run.blobs):
+                    update = stage.fn(snapshot) or {}
+            except Exception as e:
+                # Agents handle their own errors; this only guards the engine
+                print(f"❌ PIPELINE {stage.name.upper()} ({run.run_id}): {e}")
+                update = {}
+
+            finished = time.monotonic()
+            with stage.lock:
+                stage.processed += 1
+                stage.busy_seconds += finished - started
+                stage.wait_seconds += started - enqueued_at
+            self.metrics.inc(f"pipeline.{stage.name}.processed")
+            self.metrics.set_gauge(f"pipeline.{stage.name}.queue_depth", stage.queue.qsize())
+
+            ready = []
+            with run.lock:
+                run.state.update(update)
+                run.remaining -= 1
+                for child in self.children[stage.name]:
+                    run.waiting_on[child] -= 1
+                    if run.waiting_on[child] == 0:
+                        ready.append(child)
+                done = run.remaining == 0
+
+            # Blocks here if the next stage is saturated (backpressure)
+            for child in ready:
+                self._enqueue(self.stages[child], run, blocker=stage)
+
+            if done:
+                with self._runs_lock:
+                    del self._runs[run.run_id]
+                self._complete(run)
+
+    def _complete(self, run: _Run) -> None:
+        """Hand a finished run to on_complete and results(), whatever the callback does."""
+        try:
+            if self.outcome:
+                record_run(run.state, run.recorder, duration_s=time.time() - run.submitted_at,
+                           outcome=self.outcome, run_id=f"{run.run_id}-{int(run.submitted_at)}")
+            if self.on_complete:
+                self.on_complete(run.run_id, run.state)
+        except Exception as e:
+            # e.g. RunSpiller.spill on a full disk: the run still counts as
+            # finished, or results() would wait for it forever
+            print(f"❌ PIPELINE on_complete ({run.run_id}): {e}")
+            self.metrics.inc("pipeline.on_complete_errors")
+            with self._runs_lock:
+                self.completion_errors[run.run_id] = str(e)
+        finally:
+            if self.release_finished:
+                release_blobs(run.blobs)
+            self._finished.put((run.run_id, run.state))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage workers, throughput, utilization, queue wait and blocked time."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        stats = {}
+        for name, stage in self.stages.items():
+            with stage.lock:
+                utilization = stage.busy_seconds / (stage.workers * elapsed) if elapsed else 0.0
+                stats[name] = {
+                    "workers": stage.workers,
+                    "processed": stage.processed,
+                    "utilization": round(utilization, 3),
+                    "avg_busy_seconds": round(stage.busy_seconds / stage.processed, 2) if stage.processed else 0.0,
+                    "avg_queue_wait_seconds": round(stage.wait_seconds / stage.processed, 2) if stage.processed else 0.0,
+                    "blocked_seconds": round(stage.blocked_seconds, 2),
+                    "queue_depth": stage.queue.qsize(),
+                    "max_queue_depth": stage.max_depth,
+                }
+            self.metrics.set_gauge(f"pipeline.{name}.utilization", stats[name]["utilization"])
+        return stats
+
+
+def run_pipelined(
+    brochures: List[Tuple[str, str]],
+    workers: Optional[Dict[str, int]] = None,
+    queue_size: int = 8,
+    on_complete: Optional[Callable[[str, WebDesignState], None]] = None,
+    keep_states: bool = True,
+) -> Tuple[Dict[str, WebDesignState], Dict[str, Dict[str, float]]]:
+    """
+    Run many brochures through the workflow as a pipeline.
+
+    Args:
+        brochures: (run_id, brochure_url) pairs
+        workers: Worker threads per node (defaults to DEFAULT_WORKERS)
+        queue_size: Per-stage queue bound (backpressure threshold)
+        on_complete: Optional per-run completion callback
+        keep_states: Set False when on_complete persists each run (e.g.
+            RunSpiller.spill) so finished states and their blobs are not
+            held in memory
+
+    Returns:
+        (final states keyed by run_id - empty if keep_states is False, per-stage stats)
+    """
+    from workflow import AGENT_NODES, get_node_dependencies, run_outcome
+
+    pipeline = StagePipeline(
+        AGENT_NODES,
+        get_node_dependencies(),
+        workers={**DEFAULT_WORKERS, **(workers or {})},
+        queue_size=queue_size,
+        on_complete=on_complete,
+        outcome=run_outcome,
+        release_finished=not keep_states,
+    )
+    pipeline.start()
+
+    # Feed from a separate thread so backpressure on submit can't stall collection
+    feeder = threading.Thread(
+        target=lambda: [pipeline.submit(run_id, create_initial_state(url)) for run_id, url in brochures],
+        daemon=True,
+    )
+    feeder.start()
+
+    states = {}
+    for done, (run_id, state) in enumerate(pipeline.results(len(brochures)), start=1):
+        if keep_states:
+            states[run_id] = state
+        if run_id in pipeline.completion_errors:
+            print(f"⚠️  PIPELINE: {run_id} complete, but on_complete failed ({done}/{len(brochures)})")
+        else:
+            print(f"✅ PIPELINE: {run_id} complete ({done}/{len(brochures)})")
+
+    feeder.join()
+    stats = pipeline.stage_stats()
+    pipeline.stop()
+    return states, stats
+
+
+def print_stage_stats(stats: Dict[str, Dict[str, float]]) -> None:
+    print("\n📊 Stage Utilization:")
+    print(f"   {'stage':<12}{'workers':>8}{'done':>6}{'util':>7}{'avg s':>8}{'wait s':>8}{'blocked s':>11}{'max q':>7}")
+    for name, s in stats.items():
+        print(
+            f"   {name:<12}{s['workers']:>8}{s['processed']:>6}{s['utilization']:>7.0%}"
+            f"{s['avg_busy_seconds']:>8.1f}{s['avg_queue_wait_seconds']:>8.1f}"
+            f"{s['blocked_seconds']:>11.1f}{s['max_queue_depth']:>7}"
+        )
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    from batch_mode import load_manifest
+    from state_store import RunSpiller
+
+    parser = argparse.ArgumentParser(description="Generate many brochure websites as a stage pipeline")
+    parser.add_argument("manifest", help="Text or JSONL file listing brochures")
+    parser.add_argument("--workers", action="append", default=[os.getenv("PIPELINE_WORKERS", "")],
+                        help="Per-stage worker counts, e.g. developer=6 (repeatable)")
+    parser.add_argument("--queue-size", type=int, default=int(os.getenv("PIPELINE_QUEUE_SIZE", "8")))
+    parser.add_argument("--workdir", default="output/pipeline")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    workers = parse_worker_counts(args.workers)
+
+    # Each run is written out the moment it finishes, then dropped
+    spiller = RunSpiller(args.workdir)
+
+    print(f"🏭 Pipelining {len(manifest)} brochures")
+    _, stats = run_pipelined(
+        [(e["id"], e["brochure_url"]) for e in manifest],
+        workers=workers,
+        queue_size=args.queue_size,
+        on_complete=spiller.spill,
+        keep_states=False,
+    )
+    print_stage_stats(stats)
+
+    print(f"\n💾 Results: {spiller.results_path}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Prompt Templates
+
+Every agent's prompt is split in two:
+
+    static prefix   the system message: role, instructions, output format.
+                    Never formatted with run data, so it is byte-identical
+                    on every run (for a given DEVELOPER_MODE)
+    dynamic suffix  the user message: only this run's inputs (brochure,
+                    analysis, design spec, copy) plus a short closing line
+
+OpenAI caches prompt prefixes automatically (1024+ tokens, 128-token
+steps), and a cache hit is billed at a lower input price and arrives
+sooner. Before this split, the per-run analysis came before the long
+instructions, so nothing after it could be cached. Now the whole system
+message is a stable prefix. Only prefixes past the provider's minimum are
+cached (the Developer's is the one near it; run this file for the sizes);
+the shorter ones are kept stable too, so they hit once they grow.
+
+Cached-token counts (usage_metadata input_token_details.cache_read) are
+recorded per node in the run history and the runtime metrics.
+
+Usage:
+    python3 prompts.py            # prefix hash, size and cacheability per template
+    python3 prompts.py --check    # exit 1 if any prefix changes with run data
+"""
+
+import argparse
+import hashlib
+import sys
+from string import Template
+from typing import Dict, List
+
+from langchain.schema import BaseMessage, SystemMessage, HumanMessage
+from context_budget import estimate_tokens
+from template_renderer import COPY_INSTRUCTIONS, DEVELOPER_MODES, TOKENS_INSTRUCTIONS
+
+# Providers only cache prompts at least this long
+PREFIX_CACHE_MIN_TOKENS = 1024
+
+
+class PromptTemplate:
+    """
+    A static system-message prefix plus a $placeholder user-message suffix.
+
+    Args:
+        name: Node the template belongs to
+        prefix: System message, used verbatim
+        suffix: User message as a string.Template ($name placeholders)
+    """
+
+    def __init__(self, name: str, prefix: str, suffix: str):
+        self.name = name
+        self.prefix = prefix
+        self.suffix = Template(suffix)
+        self.prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+        self.fields = sorted(
+            m.group("named") or m.group("braced")
+            for m in Template.pattern.finditer(suffix)
+            if m.group("named") or m.group("braced")
+        )
+
+    def messages(self, **values: str) -> List[BaseMessage]:
+        """[SystemMessage(prefix), HumanMessage(suffix with values)]; every field is required."""
+        return [
+            SystemMessage(content=self.prefix),
+            HumanMessage(content=self.suffix.substitute(values)),
+        ]
+
+    @property
+    def prefix_tokens(self) -> int:
+        return estimate_tokens(self.prefix)
+
+
+# ============================================================================
+# STATIC PREFIXES
+# ============================================================================
+
+HISTORIAN_PREFIX = """You are a design historian specializing in tech product launches
+from the 1970s and 1980s. Your expertise is in Apple's early design philosophy,
+Steve Jobs' messaging style, and the cultural context of the personal computing revolution.
+
+For the brochure you are given (its text, when included, is the primary
+source), extract insights about:
+1. Design Philosophy & Visual Language (colors, typography, layout)
+2. Messaging & Tone (Steve Jobs' voice, target audience, themes)
+3. Technical Presentation (how specs were communicated)
+4. Cultural Context (what was revolutionary in 1977)
+
+Be specific and actionable for a modern design team."""
+
+HISTORIAN_MAP_PREFIX = """You are a design historian specializing in tech product launches
+from the 1970s and 1980s. You are reading ONE PART of a longer product brochure;
+other parts are analyzed separately and merged afterwards.
+
+From this part only, note concisely (max 250 words, bullet points):
+- Visual language: colors, typography, layout, imagery described or implied
+- Messaging & tone: headlines, claims, voice, target audience
+- Technical specs and how they are presented
+- Anything culturally revolutionary for 1977
+
+Quote short memorable phrases verbatim. Skip anything not in this part."""
+
+HISTORIAN_REDUCE_PREFIX = """You are a design historian specializing in tech product launches
+from the 1970s and 1980s. Your expertise is in Apple's early design philosophy,
+Steve Jobs' messaging style, and the cultural context of the personal computing revolution.
+
+You receive notes taken part by part from one long brochure. Merge them into a
+single analysis (remove duplicates, keep the strongest quotes) covering:
+1. Design Philosophy & Visual Language (colors, typography, layout)
+2. Messaging & Tone (Steve Jobs' voice, target audience, themes)
+3. Technical Presentation (how specs were communicated)
+4. Cultural Context (what was revolutionary in 1977)
+
+Be specific and actionable for a modern design team."""
+
+DESIGN_TASK = """Create a comprehensive design specification with:
+- Exact hex color codes for warm, retro palette
+- Typography system (fonts, sizes in rem)
+- Spacing system (in rem units)
+- Layout specifications (Grid, Flexbox)
+- Animation guidelines
+- Responsive breakpoints
+
+Be extremely specific. A developer should be able to implement this pixel-perfect."""
+
+COPY_TASK = """Write complete website copy including:
+1. Hero headline and subheadline
+2. 3-4 features (headline + description)
+3. 2-3 benefits (headline + description)
+4. Technical specs (5-7 specs)
+5. Final CTA section
+
+Sound like 1977 Steve Jobs - revolutionary yet accessible."""
+
+DESIGNER_ROLE = """You are a senior product designer specializing in retro-modern aesthetics.
+Create detailed specifications for colors, typography, spacing, and layout."""
+
+COPYWRITER_ROLE = """You are a master copywriter channeling Steve Jobs circa 1977.
+Write copy that is simple, revolutionary, empowering, and human."""
+
+CREATIVE_ROLE = """You are a two-person creative team:
+- a senior product designer specializing in retro-modern aesthetics, who writes
+  detailed specifications for colors, typography, spacing, and layout
+- a master copywriter channeling Steve Jobs circa 1977, whose copy is simple,
+  revolutionary, empowering, and human
+
+Reply with a JSON object holding both deliverables as strings:
+{"design_mockup": "...", "copy": "..."}"""
+
+DEVELOPER_PREFIX = """You are an ELITE front-end developer at Vercel/Linear/Stripe in 2025.
+
+Your websites are STUNNING with modern animations and interactions that make users say "WOW!"
+
+MANDATORY REQUIREMENTS - YOU MUST INCLUDE ALL OF THESE:
+
+1. ✨ SCROLL ANIMATIONS (CRITICAL!)
+   ```javascript
+   const observer = new IntersectionObserver((entries) => {
+       entries.forEach(entry => {
+           if (entry.isIntersecting) {
+               entry.target.classList.add('fade-in-up');
+           }
+       });
+   }, { threshold: 0.1 });
+   
+   document.querySelectorAll('.animate-on-scroll').forEach(el => observer.observe(el));
+   ```
+   
+   ```css
+   .animate-on-scroll {
+       opacity: 0;
+       transform: translateY(30px);
+       transition: opacity 0.8s cubic-bezier(0.4, 0, 0.2, 1),
+                   transform 0.8s cubic-bezier(0.4, 0, 0.2, 1);
+   }
+   .fade-in-up {
+       opacity: 1;
+       transform: translateY(0);
+   }
+   ```
+
+2. 🎨 MODERN CSS FEATURES (CRITICAL!)
+   - Gradients on hero: `background: linear-gradient(135deg, #f5e6d3 0%, #d4c4a8 100%);`
+   - Box shadows: `box-shadow: 0 10px 40px rgba(0,0,0,0.1);`
+   - Backdrop blur: `backdrop-filter: blur(10px);`
+   - CSS Grid: `display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));`
+
+3. 💫 BUTTON HOVER EFFECTS (CRITICAL!)
+   ```css
+   .btn {
+       transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
+   }
+   .btn:hover {
+       transform: translateY(-2px);
+       box-shadow: 0 10px 25px rgba(0,0,0,0.2);
+   }
+   ```
+
+4. 🎭 CARD HOVER EFFECTS (CRITICAL!)
+   ```css
+   .card {
+       transition: all 0.3s ease;
+   }
+   .card:hover {
+       transform: translateY(-5px);
+       box-shadow: 0 20px 40px rgba(0,0,0,0.15);
+   }
+   ```
+
+5. 📱 PERFECT RESPONSIVE DESIGN
+   - Mobile-first approach
+   - Breakpoints: 640px, 768px, 1024px, 1280px
+   - Touch-friendly (44px minimum tap targets)
+
+6. ⚡ SMOOTH SCROLL
+   ```javascript
+   document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+       anchor.addEventListener('click', function (e) {
+           e.preventDefault();
+           document.querySelector(this.getAttribute('href')).scrollIntoView({
+               behavior: 'smooth'
+           });
+       });
+   });
+   ```
+
+7. 🎨 MODERN DESIGN ELEMENTS
+   - Hero section with gradient background
+   - Floating cards with shadows
+   - Subtle animations everywhere
+   - Beautiful typography hierarchy
+   - Generous whitespace
+
+QUALITY CHECKLIST - VERIFY YOU INCLUDED:
+✅ IntersectionObserver for scroll animations
+✅ Fade-in-up animations on all sections
+✅ Hover effects on buttons (lift + shadow)
+✅ Hover effects on cards (lift + shadow)
+✅ Gradient background on hero
+✅ Box shadows on cards
+✅ Smooth scroll JavaScript
+✅ CSS Grid for features
+✅ Responsive design (mobile-first)
+✅ Modern typography (system fonts)
+✅ Transitions on all interactive elements
+✅ Loading animations (optional but nice)
+
+CODE STRUCTURE:
+- Single HTML file with embedded CSS and JS
+- CSS organized: Variables → Reset → Typography → Layout → Components → Animations → Responsive
+- JavaScript at bottom for performance
+- Clean, commented, production-ready
+
+OUTPUT FORMAT:
+- Start with <!DOCTYPE html>
+- NO markdown code blocks
+- NO explanations
+- ONLY the complete HTML code
+
+CRITICAL REMINDERS:
+1. MUST include scroll-triggered fade-in animations using IntersectionObserver
+2. MUST include hover effects on ALL buttons and cards
+3. MUST include gradient backgrounds
+4. MUST include box shadows for depth
+5. MUST be responsive and beautiful on mobile
+6. MUST have smooth, modern animations everywhere
+
+Create a STUNNING, MODERN 2025 website that would make Stripe/Linear/Vercel designers jealous.
+This should look like a 2025 Stripe/Linear landing page with 1977 Apple aesthetics."""
+
+DEVELOPER_REFINE_PREFIX = """You are an ELITE front-end developer at Vercel/Linear/Stripe in 2025.
+You receive a complete, working single-file website and refine it.
+
+Keep EVERYTHING that already works: the IntersectionObserver reveal script,
+smooth scrolling, the reduced-motion block, the section structure and all copy.
+Improve visual polish only: spacing, typography scale, color use, hover details,
+and anything from the design specification the page does not reflect yet.
+Animate only transform and opacity.
+
+OUTPUT FORMAT:
+- Start with <!DOCTYPE html>
+- NO markdown code blocks
+- NO explanations
+- ONLY the complete HTML code"""
+
+
+SITE_PAGE_PREFIX = """You are an ELITE front-end developer at Vercel/Linear/Stripe in 2025.
+You build ONE page of a multi-page website. Every page shares one stylesheet and
+one script, which already exist:
+
+<link rel="stylesheet" href="assets/site.css">
+<script src="assets/site.js" defer></script>
+
+Put exactly these two tags in <head>. Do NOT write any <style> block, style
+attribute or inline <script>: everything visual comes from the shared classes.
+
+SHARED CLASSES (use these, invent no others):
+- Layout: .container (centered, max width), section, .section-title
+- Navigation: nav.nav > .container > a.brand + ul.nav-links > li > a
+- Hero: header.hero > .container > h1 + p + a.btn
+- Cards: .grid > .card > h3 + p (hover lift built in)
+- Specs: section.specs > .container > dl.spec-list > .spec > dt + dd
+- Quote: blockquote with a <cite>
+- Call to action: section.cta > .container > h2 + p + a.btn
+- Footer: footer > .container
+- Scroll reveal: add .fade-in-up to any element that should fade in
+
+The navigation links to every page of the site by file name and marks the
+current one with aria-current="page".
+
+OUTPUT FORMAT:
+- Start with <!DOCTYPE html>
+- NO markdown code blocks
+- NO explanations
+- ONLY the complete HTML code"""
+
+# ============================================================================
+# TEMPLATES
+# ============================================================================
+
+def build_templates(developer_mode: str = "llm") -> Dict[str, PromptTemplate]:
+    """
+    Every agent's template for one DEVELOPER_MODE.
+
+    In the template modes the Designer/Copywriter prefixes also ask for the
+    JSON blocks the local renderer reads; that is fixed per mode, not per run.
+    """
+    tokens = TOKENS_INSTRUCTIONS if developer_mode != "llm" else ""
+    copy_json = COPY_INSTRUCTIONS if developer_mode != "llm" else ""
+    return {
+        "historian": PromptTemplate(
+            "historian",
+            HISTORIAN_PREFIX,
+            "Analyze this 1977 Apple II product brochure: $brochure_url$brochure_text",
+        ),
+        "historian_map": PromptTemplate(
+            "historian_map",
+            HISTORIAN_MAP_PREFIX,
+            "Brochure: $brochure_url (part $part)\n\n### BROCHURE TEXT:\n$chunk",
+        ),
+        "historian_reduce": PromptTemplate(
+            "historian_reduce",
+            HISTORIAN_REDUCE_PREFIX,
+            "Brochure: $brochure_url\n\n### NOTES BY PART:\n$notes",
+        ),
+        "designer": PromptTemplate(
+            "designer",
+            f"{DESIGNER_ROLE}\n\n{DESIGN_TASK}{tokens}",
+            "Based on this analysis:\n\n$analysis",
+        ),
+        "copywriter": PromptTemplate(
+            "copywriter",
+            f"{COPYWRITER_ROLE}\n\n{COPY_TASK}{copy_json}",
+            "Based on this analysis:\n\n$analysis",
+        ),
+        "creative": PromptTemplate(
+            "creative",
+            f"{CREATIVE_ROLE}\n\n### design_mockup\n{DESIGN_TASK}{tokens}\n\n### copy\n{COPY_TASK}{copy_json}",
+            "Based on this analysis:\n\n$analysis\n\nReturn only the JSON object with both fields.",
+        ),
+        "developer": PromptTemplate(
+            "developer",
+            DEVELOPER_PREFIX,
+            "### DESIGN SPECIFICATIONS:\n$design_mockup\n\n"
+            "### WEBSITE COPY:\n$copy\n\n"
+            "### HISTORICAL CONTEXT:\n$context\n\n"
+            "Output ONLY the complete HTML code. Start immediately with <!DOCTYPE html>",
+        ),
+        "developer_refine": PromptTemplate(
+            "developer_refine",
+            DEVELOPER_REFINE_PREFIX,
+            "### DESIGN SPECIFICATIONS:\n$design_mockup\n\n"
+            "### CURRENT PAGE:\n$draft\n\n"
+            "Output ONLY the refined complete HTML code. Start immediately with <!DOCTYPE html>",
+        ),
+        "site_page": PromptTemplate(
+            "site_page",
+            SITE_PAGE_PREFIX,
+            "### THIS PAGE: $page_file\n$page_brief\n\n"
+            "### SITE PAGES (navigation):\n$nav\n\n"
+            "### DESIGN SPECIFICATIONS:\n$design_mockup\n\n"
+            "### WEBSITE COPY:\n$copy\n\n"
+            "Output ONLY the complete HTML code. Start immediately with <!DOCTYPE html>",
+        ),
+    }
+
+
+def check_prefix_stability(templates: Dict[str, PromptTemplate]) -> List[str]:
+    """
+    Render each template with two different sets of run data and report
+    any whose system message differs (an empty list means all stable).
+    """
+    problems = []
+    for name, template in templates.items():
+        first = template.messages(**{f: f"run A {f}" for f in template.fields})
+        second = template.messages(**{f: f"run B {f} " * 3 for f in template.fields})
+        if first[0].content != second[0].content or first[0].content != template.prefix:
+            problems.append(f"{name}: system message depends on run data")
+    return problems
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the static prompt prefixes")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any prefix is not byte-stable")
+    args = parser.parse_args()
+
+    problems = []
+    for mode in DEVELOPER_MODES:
+        templates = build_templates(mode)
+        print(f"\n🧩 DEVELOPER_MODE={mode}")
+        print(f"   {'template':<18}{'prefix hash':<18}{'~tokens':>8}  cacheable")
+        for name, template in templates.items():
+            cacheable = "yes" if template.prefix_tokens >= PREFIX_CACHE_MIN_TOKENS else "no (too short)"
+            print(f"   {name:<18}{template.prefix_hash:<18}{template.prefix_tokens:>8}  {cacheable}")
+        problems.extend(f"[{mode}] {p}" for p in check_prefix_stability(templates))
+
+    if problems:
+        print("\n❌ Unstable prefixes:")
+        for problem in problems:
+            print(f"   {problem}")
+    else:
+        print("\n✅ All prefixes are byte-stable across runs")
+    return 1 if problems and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,16 +13,30 @@ Features:
 
 Usage:
     python3 run_creative_team.py
+    python3 run_creative_team.py --draft    # quick draft page first, then the full run replaces it
 """
 
+import argparse
+import contextvars
 import os
 import sys
+import threading
 import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 
-from state import WebDesignState
-from workflow import run_workflow_streaming, get_workflow_stats, validate_state
+from agents import drafting, output_budgets
+from artifact_store import archive_site, store_from_env
+from context_budget import DEFAULT_BUDGETS
+from metrics import metrics
+from output_budgets import print_forecast
+from run_history import history_path, record_run, recording
+from scheduler import INTERACTIVE, run_context
+from state import WebDesignState, node_output_fields
+from state_store import resolve, text_length
+from workflow import run_workflow, run_workflow_streaming, get_workflow_stats, run_outcome, validate_state
 
 
 # ============================================================================
@@ -60,10 +74,14 @@ def print_section(title: str):
 def print_agent_start(agent_name: str, description: str):
     """Print when an agent starts"""
     icons = {
+        "ingest": "📄",
         "historian": "🔍",
         "designer": "🎨",
         "copywriter": "✍️",
-        "developer": "💻"
+        "creative": "🎨",
+        "developer": "💻",
+        "animation_lint": "🎞️",
+        "page_budget": "📏"
     }
     icon = icons.get(agent_name, "⚙️")
     
@@ -98,6 +116,8 @@ class ProgressTracker:
         self.agent_times = {}
         self.current_agent = None
         self.current_agent_start = None
+        self.phase_times = {}
+        self._phase_starts = {}
     
     def start_agent(self, agent_name: str):
         """Mark when an agent starts"""
@@ -112,40 +132,71 @@ class ProgressTracker:
             return duration
         return 0.0
     
+    def start_phase(self, phase: str):
+        """Mark when a whole pass (e.g. "draft", "refine") starts"""
+        self._phase_starts[phase] = time.time()
+    
+    def complete_phase(self, phase: str):
+        """Mark when a pass completes; returns its duration"""
+        duration = time.time() - self._phase_starts.get(phase, self.start_time)
+        self.phase_times[phase] = duration
+        return duration
+    
     def get_total_time(self):
         """Get total elapsed time"""
         return time.time() - self.start_time
 
 
+def write_atomic(filepath: str, content: str):
+    """Write via a temp file + os.replace, so readers never see a partial page"""
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, filepath)
+
+
 # ============================================================================
 # WORKFLOW EXECUTION
 # ============================================================================
 
-def run_creative_team(brochure_url: str = "https://archive.org/details/1977-intro-apple-ii-2/"):
+def run_creative_team(brochure_url: str = "https://archive.org/details/1977-intro-apple-ii-2/",
+                      output_dir: str = "output", publish_path: Optional[str] = None,
+                      show_header: bool = True):
     """
     Run the complete creative team workflow with beautiful CLI output.
     
     Args:
         brochure_url: URL of the brochure to analyze
+        output_dir: Where the generated website is saved
+        publish_path: Save the page to this exact file (e.g. over a draft)
+        show_header: Print the banner (off when a draft pass already did)
     """
     
     # Print header
-    print_header()
+    if show_header:
+        print_header()
     
     # Show input
     print(f"{Colors.BOLD}Input:{Colors.END}")
     print(f"  📄 Brochure: {brochure_url}")
     print(f"  🎯 Goal: Generate a complete website\n")
     
+    # What the run history predicts for each node
+    print_forecast(output_budgets)
+    
     # Initialize progress tracker
     tracker = ProgressTracker()
     
     # Phase tracking
     phase_descriptions = {
+        "ingest": "Extracting text from local brochure files",
         "historian": "Analyzing 1977 Apple II brochure for design insights",
         "designer": "Creating visual design specifications",
         "copywriter": "Writing website copy in Steve Jobs' voice",
-        "developer": "Synthesizing into production-ready HTML/CSS/JS"
+        "creative": "Design specifications and copy in one structured call",
+        "developer": "Synthesizing into production-ready HTML/CSS/JS",
+        "animation_lint": "Linting animations for jank (and fixing what is safe)",
+        "page_budget": "Checking page weight against performance budgets"
     }
     
     # Track state - initialize with full structure
@@ -161,33 +212,49 @@ def run_creative_team(brochure_url: str = "https://archive.org/details/1977-intr
         # Run workflow with streaming
         print_section("⏳ PHASE 1: HISTORICAL ANALYSIS")
         
-        for agent_name, updated_state in run_workflow_streaming(brochure_url):
-            # Start tracking
-            if agent_name not in tracker.agent_times:
-                if agent_name == "designer":
-                    print_section("⏳ PHASE 2: PARALLEL CREATIVE WORK")
-                elif agent_name == "developer":
-                    print_section("⏳ PHASE 3: CODE GENERATION")
+        # Interactive priority: this run jumps ahead of queued bulk work;
+        # every LLM call inside is recorded for the run history
+        with run_context(priority=INTERACTIVE, job="cli"), recording() as recorder:
+            for agent_name, updated_state in run_workflow_streaming(brochure_url):
+                # Start tracking
+                if agent_name not in tracker.agent_times:
+                    if agent_name == "designer":
+                        print_section("⏳ PHASE 2: PARALLEL CREATIVE WORK")
+                    elif agent_name == "creative":
+                        print_section("⏳ PHASE 2: MERGED CREATIVE WORK")
+                    elif agent_name == "developer":
+                        print_section("⏳ PHASE 3: CODE GENERATION")
                 
-                description = phase_descriptions.get(agent_name, "Processing...")
-                print_agent_start(agent_name, description)
-                tracker.start_agent(agent_name)
+                    description = phase_descriptions.get(agent_name, "Processing...")
+                    print_agent_start(agent_name, description)
+                    tracker.start_agent(agent_name)
             
-            # Accumulate state - merge updates into current state
-            current_state.update(updated_state)
+                # Accumulate state - merge updates into current state
+                current_state.update(updated_state)
             
-            # Determine output length based on what this agent produces
-            output_field = {
-                "historian": "analysis",
-                "designer": "design_mockup",
-                "copywriter": "copy",
-                "developer": "code"
-            }.get(agent_name)
+                # Determine output length based on what this agent produces
+                output_fields = node_output_fields(agent_name)
             
-            if output_field and output_field in current_state:
-                chars = len(current_state.get(output_field, ""))
-                duration = tracker.complete_agent(agent_name)
-                print_agent_complete(agent_name, chars, duration)
+                if output_fields:
+                    chars = sum(text_length(current_state.get(field, "")) for field in output_fields)
+                    duration = tracker.complete_agent(agent_name)
+                    print_agent_complete(agent_name, chars, duration)
+                elif agent_name == "ingest":
+                    duration = tracker.complete_agent(agent_name)
+                    chars = text_length(updated_state.get("brochure_text"))
+                    detail = f"Extracted {chars:,} chars" if chars else "No local file; using the URL"
+                    print(f"\r   {Colors.GREEN}✓ Complete{Colors.END} - {detail} in {duration:.1f}s")
+                elif "lint_report" in updated_state:
+                    duration = tracker.complete_agent(agent_name)
+                    counts = updated_state["lint_report"]["counts"]
+                    print(f"\r   {Colors.GREEN}✓ Complete{Colors.END} - "
+                          f"{counts['total']} findings, {counts['fixed']} fixed in {duration:.1f}s")
+                elif "page_report" in updated_state:
+                    duration = tracker.complete_agent(agent_name)
+                    report = updated_state["page_report"]
+                    status = "within budget" if report["passed"] else f"{len(report['violations'])} budget violations"
+                    print(f"\r   {Colors.GREEN}✓ Complete{Colors.END} - "
+                          f"{report['metrics']['total_bytes']:,} bytes, {status} in {duration:.1f}s")
         
         # Workflow complete!
         # Print results
@@ -196,40 +263,94 @@ def run_creative_team(brochure_url: str = "https://archive.org/details/1977-intr
         stats = get_workflow_stats(current_state)
         
         print(f"{Colors.BOLD}📊 Content Generated:{Colors.END}")
+        if stats["brochure_chars"]:
+            print(f"   Brochure:    {stats['brochure_chars']:>6,} characters (extracted)")
         print(f"   Historian:   {stats['analysis_chars']:>6,} characters")
         print(f"   Designer:    {stats['design_chars']:>6,} characters")
         print(f"   Copywriter:  {stats['copy_chars']:>6,} characters")
         print(f"   Developer:   {stats['code_chars']:>6,} characters (~{stats['code_lines']:,} lines)")
         
+        if "lint_findings" in stats:
+            print(f"\n{Colors.BOLD}🎞️  Animation Lint:{Colors.END}")
+            print(f"   Findings:    {stats['lint_findings']:>8} ({stats['lint_fixed']} fixed automatically)")
+            for f in current_state["lint_report"]["findings"]:
+                if not f["fixed"] and f["severity"] == "warning":
+                    print(f"   {Colors.YELLOW}⚠ {f['rule']}: {f['message']}{Colors.END}")
+        
+        report = current_state.get("page_report")
+        if report:
+            page = report["metrics"]
+            print(f"\n{Colors.BOLD}📏 Page Budget:{Colors.END}")
+            print(f"   Page weight: {page['total_bytes']:>8,} bytes "
+                  f"(CSS {page['inline_css_bytes']:,} / JS {page['inline_js_bytes']:,})")
+            print(f"   DOM nodes:   {page['dom_nodes']:>8,} (depth {page['dom_depth']})")
+            print(f"   Blocking:    {page['render_blocking']:>8} render-blocking, "
+                  f"{page['font_requests']} font requests")
+            for v in report["violations"]:
+                print(f"   {Colors.YELLOW}⚠ {v['metric']}: {v['value']:,} > {v['budget']:,}{Colors.END}")
+        
         print(f"\n{Colors.BOLD}⏱️  Performance:{Colors.END}")
         total_time = tracker.get_total_time()
         print(f"   Total time:  {total_time:.1f} seconds")
         print(f"   Avg/agent:   {total_time/4:.1f} seconds")
+        print(f"   LLM concurrency limit: {int(metrics.gauge('llm.concurrency.limit') or 0)} "
+              f"(↑{int(metrics.counter('llm.concurrency.increase'))} "
+              f"↓{int(metrics.counter('llm.concurrency.decrease'))} adjustments)")
+        saved = int(metrics.counter("singleflight.shared"))
+        if saved:
+            print(f"   Deduplicated calls: {saved} (shared an identical in-flight request)")
+        cached_nodes = {n: u for n, u in recorder.nodes.items() if u["input_tokens"]}
+        if cached_nodes:
+            print(f"   Prompt cache (cached / input tokens):")
+            for node, usage in cached_nodes.items():
+                print(f"     {node:<12} {usage['cached_tokens']:>6,} / {usage['input_tokens']:>6,} "
+                      f"({usage['cached_tokens'] / usage['input_tokens']:.0%})")
+        context_sent = {n: metrics.gauge(f"context.tokens.{n}") for n in DEFAULT_BUDGETS}
+        context_sent = {n: int(t) for n, t in context_sent.items() if t is not None}
+        if context_sent:
+            print("   Context sent (est. tokens): " + " · ".join(f"{n} {t:,}" for n, t in context_sent.items()))
         
         # Validate
-        if not validate_state(current_state):
+        state_ok = validate_state(current_state)
+        
+        # Append to the run history (inputs, per-node usage, validation, hashes)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = f"{timestamp}-{uuid.uuid4().hex[:6]}"
+        if record_run(current_state, recorder, duration_s=total_time, outcome=run_outcome, stats=stats, run_id=run_id):
+            print(f"   History:     run {run_id} → {history_path()}")
+        
+        if not state_ok:
             print_error("Some agents may have incomplete output")
             return None
         
         # Save output
         print(f"\n{Colors.BOLD}💾 Saving Output:{Colors.END}")
         
-        output_dir = "output"
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
             print(f"   Created directory: {output_dir}/")
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"apple_ii_website_{timestamp}.html"
-        filepath = os.path.join(output_dir, filename)
+        code = resolve(current_state["code"])
+        artifacts = store_from_env()
+        
+        if artifacts:
+            # Every version lives in the artifact store (deduplicated,
+            # delta-compressed); only the latest is written out in full
+            archived = archive_site(artifacts, brochure_url, code, run_id)
+            filepath = os.path.join(output_dir, "apple_ii_website_latest.html")
+        else:
+            # Generate filename with timestamp
+            filepath = os.path.join(output_dir, f"apple_ii_website_{timestamp}.html")
+        filepath = publish_path or filepath
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(current_state["code"])
+        write_atomic(filepath, code)
         
-        file_size = len(current_state["code"])
+        file_size = len(code)
         print(f"   Saved to: {Colors.GREEN}{filepath}{Colors.END}")
         print(f"   File size: {file_size:,} bytes")
+        if artifacts:
+            print(f"   Archived: {archived['sha256'][:12]} as {archived['kind']} "
+                  f"({archived['stored']:,} bytes stored) → {artifacts.root}")
         
         # Success message
         print("\n" + "="*70)
@@ -258,24 +379,87 @@ def run_creative_team(brochure_url: str = "https://archive.org/details/1977-intr
         return None
 
 
+def run_progressive(brochure_url: str = "https://archive.org/details/1977-intro-apple-ii-2/",
+                    output_dir: str = "output") -> Tuple[bool, Future]:
+    """
+    Draft-then-refine: a usable page within seconds, the full one later.
+    
+    The draft pass runs every agent under agents.drafting() (faster model,
+    small outputs, tight context, locally rendered page) and publishes to
+    apple_ii_website_latest.html. It returns as soon as the draft is on disk:
+    (draft published, future of the refine pass). The refine pass runs the
+    full pipeline in a background thread and atomically replaces the draft
+    with its result; the future yields its final state.
+    """
+    tracker = ProgressTracker()
+    filepath = os.path.join(output_dir, "apple_ii_website_latest.html")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    print_header()
+    print_section("⚡ DRAFT PASS")
+    tracker.start_phase("draft")
+    try:
+        with run_context(priority=INTERACTIVE, job="cli-draft"), drafting():
+            draft = resolve(run_workflow(brochure_url).get("code") or "")
+    except Exception as e:
+        draft = ""
+        print_error(f"Draft failed: {e}")
+    draft_time = tracker.complete_phase("draft")
+    published = bool(draft) and not draft.startswith("<!-- Error")
+    if published:
+        write_atomic(filepath, draft)
+        print(f"\n{Colors.GREEN}{Colors.BOLD}⚡ Draft ready in {draft_time:.1f}s:{Colors.END} "
+              f"{Colors.CYAN}{filepath}{Colors.END}")
+        print("   Open it now; the full pass will replace it when done.")
+    
+    def refine():
+        tracker.start_phase("refine")
+        state = run_creative_team(brochure_url, output_dir, publish_path=filepath, show_header=False)
+        tracker.complete_phase("refine")
+        print(f"{Colors.BOLD}⏱️  Progressive timings:{Colors.END}")
+        print(f"   Draft:       {tracker.phase_times['draft']:>6.1f} seconds to first page")
+        print(f"   Refine:      {tracker.phase_times['refine']:>6.1f} seconds (full pipeline)")
+        print(f"   Total:       {tracker.get_total_time():>6.1f} seconds to final page\n")
+        return state
+    
+    # The full pipeline keeps going after we return; the copied context
+    # carries run-scoped settings (e.g. the daemon's output stream) along.
+    # Executor threads are joined at interpreter exit, so the CLI never
+    # exits before the refined page is written.
+    refiner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refine")
+    refined = refiner.submit(contextvars.copy_context().run, refine)
+    refiner.shutdown(wait=False)
+    return published, refined
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Command-line options, shared with the warm daemon (daemon.py)."""
+    parser = argparse.ArgumentParser(prog="run_creative_team.py",
+                                     description="Run the multi-agent creative team on one brochure")
+    parser.add_argument("brochure_url", nargs="?", default="https://archive.org/details/1977-intro-apple-ii-2/",
+                        help="Brochure URL, local file/folder, or description")
+    parser.add_argument("--draft", action="store_true",
+                        help="Publish a quick draft page first; the full run replaces it")
+    return parser
+
+
+def run_cli(argv: Optional[List[str]] = None, output_dir: str = "output") -> int:
+    """Run what the command line asks for. Returns the process exit code."""
+    args = build_arg_parser().parse_args(argv)
+    if args.draft:
+        _, refined = run_progressive(args.brochure_url, output_dir)
+        # Nothing else to do meanwhile: the process ends with the refine pass
+        return 0 if refined.result() else 1
+    return 0 if run_creative_team(args.brochure_url, output_dir) else 1
+
+
 def main():
     """Main entry point"""
-    
-    # Check for custom brochure URL
-    brochure_url = "https://archive.org/details/1977-intro-apple-ii-2/"
-    
-    if len(sys.argv) > 1:
-        brochure_url = sys.argv[1]
-    
-    # Run the workflow
-    result = run_creative_team(brochure_url)
-    
-    # Exit with appropriate code
-    sys.exit(0 if result else 1)
+    sys.exit(run_cli())
 
 
 if __name__ == "__main__":
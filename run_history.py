@@ -0,0 +1,541 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Run History
+
+Every run appends one compact record to a local SQLite history so runs
+can be compared over time instead of disappearing into output/*.html.
+The CLI, site builder, service jobs, queue workers, pipelined runs and
+Batch API runs all record through record_run().
+
+Layout (narrow, typed columns for the analytics, one compressed blob for
+everything else):
+
+    runs        one row per run: when, how long, model, total tokens/cost,
+                validation score, hash of the generated site, and a
+                zlib-compressed JSON payload (inputs, validation results,
+                output hashes and lengths, workflow stats)
+    node_runs   one row per node per run: model, latency, LLM calls,
+                input/output tokens, cached (prefix-cache hit) input
+                tokens, cost, output hash and length
+
+Indexes on (node, started_at) and (model, started_at) keep filtered
+aggregates fast at 100k+ rows; percentiles are computed from one ordered
+index scan of the matching latencies.
+
+Per-node numbers come from call_llm(): inside `with recording() as rec:`
+every LLM call reports its model, latency and usage_metadata to the run's
+recorder (a ContextVar, so it reaches LangGraph's worker threads).
+
+Usage:
+    python3 run_history.py stats                          # all nodes, all time
+    python3 run_history.py stats --node developer --since 7d --by model
+    python3 run_history.py recent [N]
+
+Configuration (.env):
+    RUN_HISTORY_DB=output/history.db     # empty to disable recording
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from state import NODE_OUTPUT_FIELDS
+from state_store import content_hash, text_length
+
+DEFAULT_DB = "output/history.db"
+
+# USD per 1M tokens (input, output). Longest matching prefix wins, so dated
+# snapshots such as "gpt-4o-2024-08-06" use their family's price.
+PRICING_PER_1M: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+# USD per 1M input tokens served from the provider's prompt (prefix) cache
+CACHED_INPUT_PER_1M: Dict[str, float] = {
+    "gpt-4o": 1.25,
+    "gpt-4o-mini": 0.075,
+    "gpt-4.1": 0.50,
+    "gpt-4.1-mini": 0.10,
+    "gpt-4.1-nano": 0.025,
+}
+
+
+def cost_usd(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """
+    Estimated cost of a call; 0.0 for models missing from PRICING_PER_1M.
+
+    cached_tokens is the part of input_tokens that hit the prompt cache.
+    """
+    matches = [name for name in PRICING_PER_1M if model.startswith(name)]
+    if not matches:
+        return 0.0
+    family = max(matches, key=len)
+    price_in, price_out = PRICING_PER_1M[family]
+    price_cached = CACHED_INPUT_PER_1M.get(family, price_in)
+    return (
+        (input_tokens - cached_tokens) * price_in + cached_tokens * price_cached + output_tokens * price_out
+    ) / 1_000_000
+
+
+def cached_tokens(usage: Dict) -> int:
+    """Prompt-cache hits in a LangChain usage_metadata dict (0 when not reported)."""
+    return int((usage.get("input_token_details") or {}).get("cache_read") or 0)
+
+
+# ============================================================================
+# PER-RUN RECORDER
+# ============================================================================
+
+class RunRecorder:
+    """Collects per-node LLM usage for one run. Thread-safe."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.nodes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, node: str, model: str, started: float, ended: float, usage: Dict,
+                    completions: int = 1) -> None:
+        """
+        One request's usage. A request sampling several completions (the
+        API's `n`) counts as that many calls, so per-call output stays the
+        length of one completion.
+        """
+        input_tokens = int(usage.get("input_tokens") or 0)
+        output_tokens = int(usage.get("output_tokens") or 0)
+        cached = cached_tokens(usage)
+        with self._lock:
+            entry = self.nodes.setdefault(node, {
+                "model": model, "started_at": started, "ended_at": ended,
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+            })
+            # Wall-clock span across the node's calls (they may overlap)
+            entry["started_at"] = min(entry["started_at"], started)
+            entry["ended_at"] = max(entry["ended_at"], ended)
+            entry["calls"] += completions
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cached_tokens"] += cached
+            entry["cost_usd"] += cost_usd(model, input_tokens, output_tokens, cached)
+
+
+_recorder: ContextVar[Optional[RunRecorder]] = ContextVar("run_recorder", default=None)
+
+
+@contextmanager
+def recording(recorder: Optional[RunRecorder] = None) -> Iterator[RunRecorder]:
+    """
+    Attach a RunRecorder (a fresh one by default) to every LLM call made
+    inside the block. Pass the same recorder to several blocks to collect
+    a run whose nodes execute on different threads.
+    """
+    recorder = recorder or RunRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def record_llm_call(node: str, model: str, started: float, response, completions: int = 1) -> None:
+    """Report one finished LLM call to the current run's recorder, if any."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        recorder.record_call(node, model, started, time.time(), usage, completions)
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+def _compress(payload: Dict) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decompress(blob: bytes) -> Dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+class RunHistory:
+    """Append-only SQLite history of runs and their per-node records."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL UNIQUE,
+                started_at REAL NOT NULL,
+                duration_s REAL NOT NULL,
+                model TEXT NOT NULL,
+                ok INTEGER NOT NULL,
+                checks_passed INTEGER NOT NULL,
+                checks_total INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                code_sha256 TEXT,
+                payload BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS node_runs (
+                run INTEGER NOT NULL REFERENCES runs(id),
+                node TEXT NOT NULL,
+                model TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                latency_ms REAL NOT NULL,
+                calls INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                output_sha256 TEXT,
+                output_chars INTEGER NOT NULL,
+                cached_tokens INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+            CREATE INDEX IF NOT EXISTS node_runs_node ON node_runs (node, started_at, latency_ms);
+            CREATE INDEX IF NOT EXISTS node_runs_model ON node_runs (model, started_at, latency_ms);
+            CREATE INDEX IF NOT EXISTS node_runs_recent ON node_runs (node, run);
+        """)
+        # Histories written before cached tokens were tracked
+        columns = {row[1] for row in self._conn().execute("PRAGMA table_info(node_runs)")}
+        if "cached_tokens" not in columns:
+            self._conn().execute("ALTER TABLE node_runs ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def append(
+        self,
+        state: Dict,
+        recorder: RunRecorder,
+        validation: List[Tuple[bool, str]],
+        duration_s: float,
+        ok: bool,
+        stats: Optional[Dict] = None,
+        run_id: Optional[str] = None,
+    ) -> str:
+        """
+        Store one finished run. Returns its run_id.
+
+        Appending to a run_id that is already stored adds to it: a
+        distributed run is recorded one task at a time, so its node rows,
+        tokens, cost and busy time (duration_s) accumulate, and the
+        outcome (ok, validation, outputs) comes from the most complete
+        state seen so far.
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        outputs = {
+            node: {"sha256": content_hash(state.get(field)), "chars": text_length(state.get(field))}
+            for node, field in NODE_OUTPUT_FIELDS.items()
+        }
+        nodes = recorder.nodes
+        models = sorted({n["model"] for n in nodes.values()})
+        payload = {
+            "inputs": {"brochure_url": state.get("brochure_url")},
+            "validation": [{"passed": passed, "message": message} for passed, message in validation],
+            "outputs": outputs,
+            "stats": stats or {},
+        }
+        checks_passed = sum(1 for passed, _ in validation if passed)
+        total_tokens = sum(n["input_tokens"] + n["output_tokens"] for n in nodes.values())
+        total_cost = sum(n["cost_usd"] for n in nodes.values())
+        code_sha256 = outputs.get("developer", {}).get("sha256")
+
+        conn = self._conn()
+        with conn:
+            # Insert first so the write lock is held before the existing row is read
+            cursor = conn.execute(
+                "INSERT INTO runs (run_id, started_at, duration_s, model, ok, checks_passed, checks_total,"
+                " total_tokens, cost_usd, code_sha256, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (run_id) DO NOTHING",
+                (
+                    run_id, recorder.started_at, duration_s, ",".join(models) or "-", int(ok),
+                    checks_passed, len(validation), total_tokens, total_cost, code_sha256, _compress(payload),
+                ),
+            )
+            if cursor.rowcount:
+                row_id = cursor.lastrowid
+            else:
+                row_id, stored_model, stored_ok, stored_passed = conn.execute(
+                    "SELECT id, model, ok, checks_passed FROM runs WHERE run_id = ?", (run_id,)
+                ).fetchone()
+                merged_models = sorted((set(stored_model.split(",")) | set(models)) - {"-"})
+                conn.execute(
+                    "UPDATE runs SET started_at = MIN(started_at, ?), duration_s = duration_s + ?, model = ?,"
+                    " total_tokens = total_tokens + ?, cost_usd = cost_usd + ? WHERE id = ?",
+                    (recorder.started_at, duration_s, ",".join(merged_models) or "-",
+                     total_tokens, total_cost, row_id),
+                )
+                if (int(ok), checks_passed) >= (stored_ok, stored_passed):
+                    conn.execute(
+                        "UPDATE runs SET ok = ?, checks_passed = ?, checks_total = ?, code_sha256 = ?,"
+                        " payload = ? WHERE id = ?",
+                        (int(ok), checks_passed, len(validation), code_sha256, _compress(payload), row_id),
+                    )
+            conn.executemany(
+                "INSERT INTO node_runs (run, node, model, started_at, latency_ms, calls, input_tokens,"
+                " output_tokens, cost_usd, output_sha256, output_chars, cached_tokens)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row_id, node, n["model"], n["started_at"],
+                        (n["ended_at"] - n["started_at"]) * 1000, n["calls"],
+                        n["input_tokens"], n["output_tokens"], n["cost_usd"],
+                        outputs.get(node, {}).get("sha256"), outputs.get(node, {}).get("chars", 0),
+                        n.get("cached_tokens", 0),
+                    )
+                    for node, n in nodes.items()
+                ],
+            )
+        return run_id
+
+    def node_stats(
+        self,
+        node: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[float] = None,
+        by: str = "node",
+    ) -> List[Dict]:
+        """
+        Aggregate node_runs grouped by `by` ("node", "model" or "node,model").
+
+        Returns one dict per group: count, p50/p95/max latency (ms),
+        mean tokens, prompt-cache hit rate (cached / input tokens) and
+        total cost.
+        """
+        group_cols = [c.strip() for c in by.split(",")]
+        if any(c not in ("node", "model") for c in group_cols):
+            raise ValueError(f"Can only group by node and/or model, not {by!r}")
+
+        where, params = [], []
+        if node:
+            where.append("node = ?")
+            params.append(node)
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        if since:
+            where.append("started_at >= ?")
+            params.append(since)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        group_sql = ", ".join(group_cols)
+
+        conn = self._conn()
+        totals = conn.execute(
+            f"SELECT {group_sql}, COUNT(*), AVG(input_tokens), AVG(output_tokens), SUM(cost_usd),"
+            f" SUM(cached_tokens), SUM(input_tokens)"
+            f" FROM node_runs {where_sql} GROUP BY {group_sql} ORDER BY {group_sql}",
+            params,
+        ).fetchall()
+
+        # One ordered pass over latencies serves every group's percentiles
+        latencies: Dict[Tuple, List[float]] = {}
+        for row in conn.execute(
+            f"SELECT {group_sql}, latency_ms FROM node_runs {where_sql} ORDER BY {group_sql}, latency_ms",
+            params,
+        ):
+            latencies.setdefault(tuple(row[:-1]), []).append(row[-1])
+
+        results = []
+        for row in totals:
+            key = tuple(row[:len(group_cols)])
+            count, avg_in, avg_out, cost, cached, total_in = row[len(group_cols):]
+            values = latencies.get(key, [])
+            results.append({
+                "group": "/".join(key),
+                "count": count,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "max_ms": values[-1] if values else 0.0,
+                "avg_input_tokens": avg_in or 0.0,
+                "avg_output_tokens": avg_out or 0.0,
+                "cache_hit_rate": (cached or 0) / total_in if total_in else 0.0,
+                "cost_usd": cost or 0.0,
+            })
+        return results
+
+    def completion_tokens(self, window: int = 200) -> Dict[str, List[float]]:
+        """
+        Output tokens per LLM call for each node's `window` most recent runs,
+        sorted ascending (for percentiles).
+
+        Walks the (node, run) index: one seek per node to find the next
+        node name and one bounded read of its newest rows, so the cost
+        grows with nodes x window, not with the size of the history.
+        """
+        db = self._conn()
+        samples: Dict[str, List[float]] = {}
+        node = db.execute("SELECT MIN(node) FROM node_runs").fetchone()[0]
+        while node is not None:
+            rows = db.execute(
+                "SELECT output_tokens * 1.0 / calls FROM node_runs"
+                " WHERE node = ? AND calls > 0 ORDER BY run DESC LIMIT ?",
+                (node, window),
+            ).fetchall()
+            if rows:
+                samples[node] = sorted(tokens for (tokens,) in rows)
+            node = db.execute("SELECT MIN(node) FROM node_runs WHERE node > ?", (node,)).fetchone()[0]
+        return samples
+
+    def last_run_id(self) -> int:
+        """Row id of the newest run (0 when empty); changes whenever a run is appended."""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM runs").fetchone()[0]
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT run_id, started_at, duration_s, model, ok, checks_passed, checks_total,"
+            " total_tokens, cost_usd, payload FROM runs ORDER BY started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {
+                "run_id": r[0], "started_at": r[1], "duration_s": r[2], "model": r[3], "ok": bool(r[4]),
+                "checks": f"{r[5]}/{r[6]}", "total_tokens": r[7], "cost_usd": r[8], **_decompress(r[9]),
+            }
+            for r in rows
+        ]
+
+
+def history_path() -> str:
+    """RUN_HISTORY_DB ("" when recording is disabled)."""
+    return os.getenv("RUN_HISTORY_DB", DEFAULT_DB).strip()
+
+
+def history_from_env() -> Optional[RunHistory]:
+    """RunHistory at RUN_HISTORY_DB, or None when recording is disabled."""
+    path = history_path()
+    return RunHistory(path) if path else None
+
+
+# One RunHistory per database for record_run (it is called once per job or task)
+_histories: Dict[str, RunHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def record_run(
+    state: Dict,
+    recorder: RunRecorder,
+    duration_s: float,
+    outcome: Callable[[Dict], Tuple[bool, List[Tuple[bool, str]]]],
+    failed: bool = False,
+    stats: Optional[Dict] = None,
+    run_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Append a finished run to the history at RUN_HISTORY_DB.
+
+    The one place every entry point (CLI, site builder, service, workers,
+    pipeline, batch) records its runs. `outcome(state)` judges the run as
+    (ok, validation results), e.g. workflow.run_outcome; `failed` marks a
+    run that crashed as not ok whatever its state says. Nothing here is
+    raised: a run must not fail because its history could not be written.
+
+    Returns:
+        The run_id, or None when recording is disabled or the write failed
+    """
+    path = history_path()
+    if not path:
+        return None
+    try:
+        ok, validation = outcome(state)
+        with _histories_lock:
+            history = _histories.get(path) or _histories.setdefault(path, RunHistory(path))
+        return history.append(state, recorder, validation, duration_s=duration_s, ok=ok and not failed,
+                              stats=stats, run_id=run_id)
+    except Exception as e:
+        print(f"⚠️  Run history not written ({path}): {e}")
+        return None
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_since(text: str) -> Optional[float]:
+    """'7d', '12h', '30m' → epoch seconds that long ago."""
+    if not text:
+        return None
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+    if text[-1] not in units:
+        raise ValueError(f"Use a duration like 30m, 12h, 7d or 2w, not {text!r}")
+    return time.time() - float(text[:-1]) * units[text[-1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the run history")
+    parser.add_argument("--db", default=os.getenv("RUN_HISTORY_DB") or DEFAULT_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", help="Latency/token/cost aggregates per node or model")
+    stats.add_argument("--node", help="Only this node, e.g. developer")
+    stats.add_argument("--model", help="Only this model, e.g. gpt-4o")
+    stats.add_argument("--since", default="", help="Time window, e.g. 7d or 12h")
+    stats.add_argument("--by", default="node", help="node, model or node,model")
+
+    recent = commands.add_parser("recent", help="Most recent runs")
+    recent.add_argument("limit", nargs="?", type=int, default=10)
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"✗ No run history at {args.db}")
+        return 1
+    history = RunHistory(args.db)
+
+    if args.command == "stats":
+        started = time.perf_counter()
+        rows = history.node_stats(args.node, args.model, parse_since(args.since), args.by)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"\n📊 Node stats by {args.by}" + (f" (last {args.since})" if args.since else ""))
+        print(f"   {'group':<24}{'runs':>7}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'in tok':>9}{'cached':>8}{'out tok':>9}{'cost $':>10}")
+        for r in rows:
+            print(
+                f"   {r['group']:<24}{r['count']:>7}{r['p50_ms'] / 1000:>8.1f}{r['p95_ms'] / 1000:>8.1f}"
+                f"{r['max_ms'] / 1000:>8.1f}{r['avg_input_tokens']:>9.0f}{r['cache_hit_rate']:>8.0%}"
+                f"{r['avg_output_tokens']:>9.0f}"
+                f"{r['cost_usd']:>10.2f}"
+            )
+        if not rows:
+            print("   (no matching runs)")
+        print(f"\n   ⚡ Query took {elapsed_ms:.0f} ms\n")
+    else:
+        for r in history.recent(args.limit):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started_at"]))
+            status = "✅" if r["ok"] else "❌"
+            print(
+                f"{status} {r['run_id']}  {when}  {r['duration_s']:>6.1f}s  {r['model']:<12} "
+                f"checks {r['checks']}  {r['total_tokens']:>6} tok  ${r['cost_usd']:.3f}  "
+                f"{r['inputs'].get('brochure_url')}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Priority-Aware Call Scheduler
+
+Every agent LLM call passes through this scheduler before it is allowed to
+take a slot from the adaptive concurrency limiter (concurrency.py).
+
+Why?
+When a bulk regeneration has hundreds of calls queued, an interactive demo
+run (run_creative_team.py) should NOT wait behind all of them.
+
+How calls are ordered:
+1. PRIORITY CLASSES - "interactive" calls always go before "bulk" calls
+2. WEIGHTED FAIR QUEUING - inside a class, jobs/tenants share capacity in
+   proportion to their weight, so one giant batch can't starve a small one
+3. STARVATION PROTECTION - a bulk call that has waited longer than
+   `max_wait_seconds` is served next, even if interactive work is queued
+
+Which class/job a call belongs to comes from the current run context:
+
+    with run_context(priority="bulk", job="nightly-regen"):
+        run_workflow(url)
+
+The context is a ContextVar, so it follows LangGraph into the worker
+threads it uses for the parallel Designer/Copywriter nodes.
+
+Shared calls: when single-flight makes one queued call serve several
+callers, a higher-priority caller joining it promotes the queued call to
+its class (promote()), so an interactive run never waits at bulk priority
+behind a bulk leader.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, Iterator, Optional, Set, Tuple, TypeVar
+
+from concurrency import AIMDLimiter, is_throttle_error
+from metrics import MetricsRegistry, metrics as default_metrics
+
+T = TypeVar("T")
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Lower number = served first
+PRIORITY_CLASSES = {INTERACTIVE: 0, BULK: 1}
+
+
+# ============================================================================
+# RUN CONTEXT
+# ============================================================================
+
+@dataclass(frozen=True)
+class RunContext:
+    """Who a call belongs to: its priority class, job/tenant and WFQ weight."""
+    priority: str = INTERACTIVE
+    job: str = "default"
+    weight: float = 1.0
+
+
+_current_context: ContextVar[RunContext] = ContextVar(
+    "run_context",
+    default=RunContext(priority=os.getenv("RUN_PRIORITY", INTERACTIVE)),
+)
+
+
+def current_context() -> RunContext:
+    """The run context for calls made from the current thread/task."""
+    return _current_context.get()
+
+
+@contextmanager
+def run_context(priority: str = INTERACTIVE, job: str = "default", weight: float = 1.0) -> Iterator[RunContext]:
+    """
+    Tag every agent call made inside this block with a priority and job.
+
+    Args:
+        priority: "interactive" or "bulk"
+        job: Job or tenant name used for fair queuing within the class
+        weight: Relative share of capacity for this job (default 1.0)
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority!r} (use one of {list(PRIORITY_CLASSES)})")
+    if weight <= 0:
+        raise ValueError("weight must be positive")
+    ctx = RunContext(priority=priority, job=job, weight=weight)
+    token = _current_context.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current_context.reset(token)
+
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+@dataclass
+class _Ticket:
+    context: RunContext
+    finish_tag: float
+    seq: int
+    enqueued: float = field(default_factory=time.monotonic)
+    ready: threading.Event = field(default_factory=threading.Event)
+    share_key: Optional[str] = None
+
+
+class FairScheduler:
+    """
+    Decides which queued call gets the next free limiter slot.
+
+    Usage:
+        scheduler = FairScheduler(limiter)
+        response = scheduler.run("historian", lambda: llm.invoke(messages))
+    """
+
+    def __init__(
+        self,
+        limiter: AIMDLimiter,
+        max_wait_seconds: float = 30.0,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self.limiter = limiter
+        self.max_wait_seconds = max_wait_seconds
+        self.metrics = registry or default_metrics
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        # {priority: {job: deque[_Ticket]}}
+        self._queues: Dict[str, Dict[str, Deque[_Ticket]]] = {p: {} for p in PRIORITY_CLASSES}
+        # Weighted fair queuing bookkeeping, per priority class
+        self._virtual_time: Dict[str, float] = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._last_finish: Dict[str, Dict[str, float]] = {p: {} for p in PRIORITY_CLASSES}
+        # Queued shared calls by share key, and promotions that arrived
+        # before their call was queued: {share_key: (RunContext, when)}
+        self._shared: Dict[str, _Ticket] = {}
+        self._running_shared: Set[str] = set()
+        self._early_promotions: Dict[str, Tuple[RunContext, float]] = {}
+
+        # A slot freed anywhere should wake the next queued call
+        limiter.add_release_listener(self._dispatch)
+
+    def run(self, key: str, fn: Callable[[], T], share_key: Optional[str] = None) -> T:
+        """
+        Wait for this call's turn, then execute `fn` holding a limiter slot.
+
+        Args:
+            key: Agent name (used for per-agent latency baselines)
+            fn: The actual LLM call
+            share_key: Identifies a call other callers may join (see promote())
+        """
+        ticket = self._enqueue(current_context(), share_key)
+        self._dispatch()
+        ticket.ready.wait()
+
+        waited = time.monotonic() - ticket.enqueued
+        priority = ticket.context.priority
+        self.metrics.inc(f"scheduler.dispatched.{priority}")
+        self.metrics.inc(f"scheduler.wait_seconds_total.{priority}", waited)
+        self.metrics.set_gauge(f"scheduler.last_wait_seconds.{priority}", round(waited, 3))
+
+        start = time.monotonic()
+        throttled = False
+        try:
+            return fn()
+        except BaseException as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            if share_key:
+                with self._lock:
+                    self._running_shared.discard(share_key)
+                    self._early_promotions.pop(share_key, None)
+            self.limiter.release(key, time.monotonic() - start, throttled)
+
+    def _enqueue(self, ctx: RunContext, share_key: Optional[str] = None) -> _Ticket:
+        with self._lock:
+            early = self._early_promotions.pop(share_key, None) if share_key else None
+            if early is not None and PRIORITY_CLASSES[early[0].priority] < PRIORITY_CLASSES[ctx.priority]:
+                ctx = replace(ctx, priority=early[0].priority)
+                self.metrics.inc("scheduler.shared_promotions")
+            ticket = _Ticket(context=ctx, finish_tag=0.0, seq=next(self._seq), share_key=share_key)
+            self._append(ticket)
+            if share_key:
+                self._shared[share_key] = ticket
+            self._publish()
+            return ticket
+
+    def _append(self, ticket: _Ticket) -> None:
+        """Queue a ticket in its class, tagged for weighted fair queuing."""
+        ctx = ticket.context
+        p = ctx.priority
+        start_tag = max(self._virtual_time[p], self._last_finish[p].get(ctx.job, 0.0))
+        ticket.finish_tag = start_tag + 1.0 / ctx.weight
+        self._last_finish[p][ctx.job] = ticket.finish_tag
+        self._queues[p].setdefault(ctx.job, deque()).append(ticket)
+
+    def promote(self, share_key: str, ctx: RunContext) -> None:
+        """
+        A caller with context `ctx` joined the shared call `share_key`: move
+        that call to ctx's priority class if it is higher and still queued.
+        """
+        with self._lock:
+            ticket = self._shared.get(share_key)
+            if ticket is None:
+                # Not queued yet (or already running): remember it for _enqueue,
+                # dropping leftovers nobody claimed
+                now = time.monotonic()
+                self._early_promotions = {
+                    k: v for k, v in self._early_promotions.items() if now - v[1] < self.max_wait_seconds
+                }
+                if share_key not in self._running_shared:
+                    self._early_promotions[share_key] = (ctx, now)
+                return
+            if PRIORITY_CLASSES[ctx.priority] >= PRIORITY_CLASSES[ticket.context.priority]:
+                return
+            self._remove(ticket.context.priority, ticket)
+            ticket.context = replace(ticket.context, priority=ctx.priority)
+            self._append(ticket)
+            self.metrics.inc("scheduler.shared_promotions")
+            self._publish()
+
+    def _dispatch(self) -> None:
+        """Hand free limiter slots to the best queued tickets."""
+        with self._lock:
+            while self._has_waiting() and self.limiter.try_acquire():
+                ticket = self._pop_next()
+                ticket.ready.set()
+            self._publish()
+
+    def _has_waiting(self) -> bool:
+        return any(q for jobs in self._queues.values() for q in jobs.values())
+
+    def _pop_next(self) -> _Ticket:
+        now = time.monotonic()
+        ordered = sorted(PRIORITY_CLASSES, key=PRIORITY_CLASSES.get)
+
+        # Starvation protection: a lower class that waited too long jumps the line
+        for p in reversed(ordered[1:]):
+            oldest = self._oldest_head(p)
+            if oldest is not None and now - oldest.enqueued > self.max_wait_seconds:
+                self.metrics.inc("scheduler.starvation_promotions")
+                return self._take(p, oldest)
+
+        for p in ordered:
+            best = None
+            for q in self._queues[p].values():
+                if q and (best is None or (q[0].finish_tag, q[0].seq) < (best.finish_tag, best.seq)):
+                    best = q[0]
+            if best is not None:
+                self._virtual_time[p] = max(self._virtual_time[p], best.finish_tag - 1.0 / best.context.weight)
+                return self._take(p, best)
+
+        raise RuntimeError("No queued tickets")  # guarded by _has_waiting()
+
+    def _oldest_head(self, priority: str) -> Optional[_Ticket]:
+        heads = [q[0] for q in self._queues[priority].values() if q]
+        return min(heads, key=lambda t: t.enqueued) if heads else None
+
+    def _take(self, priority: str, ticket: _Ticket) -> _Ticket:
+        self._remove(priority, ticket)
+        if ticket.share_key:
+            del self._shared[ticket.share_key]
+            self._running_shared.add(ticket.share_key)
+        return ticket
+
+    def _remove(self, priority: str, ticket: _Ticket) -> None:
+        jobs = self._queues[priority]
+        jobs[ticket.context.job].remove(ticket)
+        if not jobs[ticket.context.job]:
+            del jobs[ticket.context.job]
+
+    def _publish(self) -> None:
+        for p, jobs in self._queues.items():
+            self.metrics.set_gauge(f"scheduler.queued.{p}", sum(len(q) for q in jobs.values()))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth, dispatch count and mean wait per priority class."""
+        result = {}
+        with self._lock:
+            depths = {p: sum(len(q) for q in jobs.values()) for p, jobs in self._queues.items()}
+        for p in PRIORITY_CLASSES:
+            dispatched = self.metrics.counter(f"scheduler.dispatched.{p}")
+            total_wait = self.metrics.counter(f"scheduler.wait_seconds_total.{p}")
+            result[p] = {
+                "queued": depths[p],
+                "dispatched": dispatched,
+                "avg_wait_seconds": round(total_wait / dispatched, 3) if dispatched else 0.0,
+            }
+        return result
+
+
+def scheduler_from_env(limiter: AIMDLimiter) -> FairScheduler:
+    """Build the shared scheduler (SCHEDULER_MAX_WAIT_SECONDS configures aging)."""
+    return FairScheduler(limiter, max_wait_seconds=float(os.getenv("SCHEDULER_MAX_WAIT_SECONDS", "30")))
@@ -0,0 +1,305 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Semantic Historian Cache
+
+Many brochure inputs are the same source under another name: a mirror, a
+different archive.org URL, a slightly reworded description. An exact match
+on brochure_url never reuses anything, so every variant pays for a fresh
+Historian analysis.
+
+This cache keeps past analyses in a local vector index:
+
+    embedding   hashed character n-grams (3-5) plus whole words (weighted
+                higher, so "apple ii" vs "apple iii" still differ) of the
+                normalized input, signed into a fixed-size vector and
+                L2-normalized. Offline, deterministic, no model download
+    search      cosine similarity against every stored vector
+                (one NumPy matrix-vector product)
+    reuse       best match >= SEMANTIC_CACHE_THRESHOLD returns its analysis
+                instead of calling the Historian
+
+Entries are namespaced by model and Historian prompt prefix hash. Changing
+either starts a fresh namespace instead of reusing analyses written for a
+different prompt.
+
+Lookups, hits and per-entry reuse counts are persisted, and they are also
+reported to the runtime metrics (semantic_cache.*).
+
+Usage:
+    python3 semantic_cache.py stats
+    python3 semantic_cache.py query "archive.org/details/apple-ii-1977-brochure"
+    python3 semantic_cache.py clear
+
+Configuration (.env):
+    SEMANTIC_CACHE_DB=output/semantic_cache.db   # empty (default) disables
+    SEMANTIC_CACHE_THRESHOLD=0.92
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from metrics import MetricsRegistry, metrics as default_metrics
+
+try:
+    import numpy as np
+except ImportError:  # only needed when the cache is enabled
+    np = None
+
+DIMENSIONS = 4096
+NGRAM_SIZES = (3, 4, 5)
+WORD_WEIGHT = 4.0
+DEFAULT_THRESHOLD = 0.92
+
+# Longer inputs (e.g. extracted brochure text) are embedded from their start
+MAX_EMBED_CHARS = 20_000
+
+
+# ============================================================================
+# EMBEDDING
+# ============================================================================
+
+_WAYBACK = re.compile(r"^(https?://)?web\.archive\.org/web/[0-9a-z_*]+/")
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://(www\d*\.)?")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase, unwrap Wayback Machine URLs, drop URL scheme/www, collapse
+    punctuation to single spaces.
+    """
+    text = _WAYBACK.sub("", text.strip().lower())
+    text = _SCHEME.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def embed(text: str, dimensions: int = DIMENSIONS) -> "np.ndarray":
+    """Unit-length float32 vector of signed, hashed character n-grams and words."""
+    padded = f" {normalize_text(text[:MAX_EMBED_CHARS])} "
+    features = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    words = padded.split()
+    hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+    hashes += [zlib.crc32(f"w:{w}".encode("utf-8")) for w in words]
+    weights = [1.0] * len(features) + [WORD_WEIGHT] * len(words)
+    vector = np.zeros(dimensions, dtype=np.float32)
+    if hashes:
+        h = np.array(hashes, dtype=np.uint32)
+        # The top bit picks the sign so colliding features tend to cancel out
+        signs = np.where(h >> 31, -1.0, 1.0).astype(np.float32) * np.array(weights, dtype=np.float32)
+        np.add.at(vector, h % dimensions, signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class SemanticCache:
+    """
+    SQLite-backed vector index of past Historian analyses. Thread-safe.
+
+    Args:
+        path: SQLite file
+        threshold: Minimum cosine similarity for a hit
+    """
+
+    def __init__(self, path: str, threshold: float = DEFAULT_THRESHOLD,
+                 metrics: MetricsRegistry = default_metrics):
+        if np is None:
+            raise RuntimeError("The semantic cache needs NumPy: pip install numpy")
+        self.path = path
+        self.threshold = threshold
+        self.metrics = metrics
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[List[int], "np.ndarray"]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                input TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_hit_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS entries_namespace ON entries (namespace);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, namespace: str) -> Tuple[List[int], "np.ndarray"]:
+        """(row ids, unit vectors matrix) for a namespace, read once per process."""
+        if namespace not in self._index:
+            ids, vectors = [], []
+            for row_id, blob in self._conn().execute(
+                "SELECT id, vector FROM entries WHERE namespace = ? ORDER BY id", (namespace,)
+            ):
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if vector.shape[0] == DIMENSIONS:
+                    ids.append(row_id)
+                    vectors.append(vector)
+            matrix = np.vstack(vectors) if vectors else np.zeros((0, DIMENSIONS), dtype=np.float32)
+            self._index[namespace] = (ids, matrix)
+        return self._index[namespace]
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def nearest(self, text: str, namespace: str, k: int = 1) -> List[Dict]:
+        """The k most similar stored entries: [{"id", "similarity", "input"}]."""
+        query = embed(text)
+        with self._lock:
+            ids, matrix = self._load(namespace)
+            if not ids:
+                return []
+            scores = matrix @ query
+        best = np.argsort(-scores)[:k]
+        rows = []
+        for i in best:
+            (stored,) = self._conn().execute("SELECT input FROM entries WHERE id = ?", (ids[i],)).fetchone()
+            rows.append({"id": ids[i], "similarity": float(scores[i]), "input": stored})
+        return rows
+
+    def lookup(self, text: str, namespace: str) -> Optional[Dict]:
+        """
+        Cached analysis for a near-duplicate input, or None.
+
+        Returns {"analysis", "similarity", "input"} on a hit.
+        """
+        match = next(iter(self.nearest(text, namespace)), None)
+        hit = match is not None and match["similarity"] >= self.threshold
+        conn = self._conn()
+        with conn:
+            self._count(conn, "lookups")
+            if hit:
+                self._count(conn, "hits")
+                conn.execute(
+                    "UPDATE entries SET hits = hits + 1, last_hit_at = ? WHERE id = ?",
+                    (time.time(), match["id"]),
+                )
+        self.metrics.inc("semantic_cache.lookups")
+        self.metrics.inc("semantic_cache.hits" if hit else "semantic_cache.misses")
+        lookups = self.metrics.counter("semantic_cache.lookups")
+        self.metrics.set_gauge("semantic_cache.hit_rate", round(self.metrics.counter("semantic_cache.hits") / lookups, 3))
+        if match is not None:
+            self.metrics.set_gauge("semantic_cache.last_similarity", round(match["similarity"], 3))
+        if not hit:
+            return None
+        (analysis,) = conn.execute("SELECT analysis FROM entries WHERE id = ?", (match["id"],)).fetchone()
+        return {"analysis": analysis, "similarity": match["similarity"], "input": match["input"]}
+
+    def add(self, text: str, analysis: str, namespace: str) -> int:
+        """Store an analysis under its input. Returns the entry id."""
+        vector = embed(text)
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO entries (namespace, input, analysis, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, text, analysis, vector.tobytes(), time.time()),
+            )
+        with self._lock:
+            if namespace in self._index:
+                ids, matrix = self._index[namespace]
+                self._index[namespace] = (ids + [cursor.lastrowid], np.vstack([matrix, vector]))
+        return cursor.lastrowid
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        lookups, hits = counters.get("lookups", 0), counters.get("hits", 0)
+        return {
+            "entries": conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+            "namespaces": conn.execute("SELECT COUNT(DISTINCT namespace) FROM entries").fetchone()[0],
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "top": [
+                {"input": row[0], "hits": row[1]}
+                for row in conn.execute("SELECT input, hits FROM entries WHERE hits > 0 ORDER BY hits DESC LIMIT 5")
+            ],
+        }
+
+    def clear(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM counters")
+        with self._lock:
+            self._index.clear()
+
+
+def cache_from_env() -> Optional[SemanticCache]:
+    """SemanticCache at SEMANTIC_CACHE_DB, or None when the cache is disabled."""
+    path = os.getenv("SEMANTIC_CACHE_DB", "").strip()
+    if not path:
+        return None
+    return SemanticCache(path, float(os.getenv("SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_THRESHOLD))))
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the semantic Historian cache")
+    parser.add_argument("--db", default=os.getenv("SEMANTIC_CACHE_DB") or "output/semantic_cache.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Entries, lookups and hit rate")
+    query = commands.add_parser("query", help="Nearest stored inputs for a text")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    commands.add_parser("clear", help="Delete every entry and counter")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"✗ No semantic cache at {args.db}")
+        return 1
+    cache = SemanticCache(args.db, float(os.getenv("SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_THRESHOLD))))
+
+    if args.command == "stats":
+        s = cache.stats()
+        print(f"\n🧠 Semantic cache: {args.db}")
+        print(f"   Entries:   {s['entries']:>8,} ({s['namespaces']} namespaces)")
+        print(f"   Lookups:   {s['lookups']:>8,}")
+        print(f"   Hits:      {s['hits']:>8,} ({s['hit_rate']:.0%} hit rate)")
+        for row in s["top"]:
+            print(f"   ♻️  {row['hits']:>4}× {row['input'][:70]}")
+    elif args.command == "query":
+        namespaces = [row[0] for row in cache._conn().execute("SELECT DISTINCT namespace FROM entries")]
+        for namespace in namespaces:
+            print(f"\n🔎 {namespace}")
+            for row in cache.nearest(args.text, namespace, args.k):
+                mark = "✓" if row["similarity"] >= cache.threshold else " "
+                print(f"   {mark} {row['similarity']:.3f}  {row['input'][:70]}")
+    else:
+        cache.clear()
+        print(f"🗑️  Cleared {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
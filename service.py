@@ -0,0 +1,404 @@
+"""
+Pillar 3: Multi-Agent Creative Team - HTTP Service Mode
+
+Internal tools used to shell out to run_creative_team.py, paying Python
+startup + LangChain imports + graph compilation on every request. This
+long-running service keeps all of that WARM and accepts jobs over HTTP.
+
+Endpoints:
+    POST /jobs                {"brochure_url": "...", "priority": "interactive"}
+                              → 202 {"job_id": "...", "events": "/jobs/<id>/events"}
+    GET  /jobs                list of jobs and their status
+    GET  /jobs/<id>           status, per-node timings and stats
+    GET  /jobs/<id>/events    Server-Sent Events: one "node" event per agent
+                              as it completes, then "done" (or "error")
+    GET  /jobs/<id>/html      the generated website (once done)
+    GET  /health              liveness
+    GET  /metrics             metrics registry snapshot (limiter, scheduler...)
+
+Everything HTTP happens on ONE asyncio event loop, so thousands of idle SSE
+subscribers cost almost nothing. The agents themselves are synchronous
+LangChain calls, so each job's workflow runs in a worker thread and posts
+its progress back to the loop.
+
+brochure_url is client input, so local brochure files on the server are not
+read (ingestion.py) unless INGEST_LOCAL=on is set.
+
+Usage:
+    python3 service.py --port 8077
+    curl -N -X POST localhost:8077/jobs -d '{"brochure_url": "https://..."}'
+    curl -N localhost:8077/jobs/<id>/events
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from metrics import metrics
+from run_history import RunRecorder, record_run, recording
+from scheduler import INTERACTIVE, PRIORITY_CLASSES, run_context
+from state import NODE_OUTPUT_FIELDS, create_initial_state, node_output_fields
+from state_store import blob_scope, release_blobs, resolve, text_length
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_URL_CHARS = 2048
+KEEPALIVE_SECONDS = 15.0
+
+STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+}
+
+
+# ============================================================================
+# JOBS
+# ============================================================================
+
+class Job:
+    """One submitted workflow run and everything observed about it."""
+
+    def __init__(self, brochure_url: str, priority: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.brochure_url = brochure_url
+        self.priority = priority
+        self.status = "queued"
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.state = create_initial_state(brochure_url)
+        self.node_seconds: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        # Blob handles this job stored (see state_store.blob_scope)
+        self.blobs: Set[str] = set()
+        # Full event history, so late subscribers can replay it
+        self.events: List[Tuple[str, Dict]] = []
+        self.subscribers: List[asyncio.Queue] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    def summary(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "brochure_url": self.brochure_url,
+            "priority": self.priority,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+            "node_seconds": self.node_seconds,
+            "chars": {node: text_length(self.state.get(field)) for node, field in NODE_OUTPUT_FIELDS.items()},
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs in worker threads and fans their progress out to subscribers.
+
+    Args:
+        max_concurrent_jobs: Workflows executing at once (LLM calls are
+            additionally governed by the shared limiter/scheduler)
+        max_stored_jobs: Finished jobs kept in memory for /html and replay;
+            an evicted job's blobs go back to the blob store
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_concurrent_jobs: int = 16, max_stored_jobs: int = 200):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="job")
+        self.max_stored_jobs = max_stored_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(self, brochure_url: str, priority: str) -> Job:
+        job = Job(brochure_url, priority)
+        self.jobs[job.id] = job
+        self._evict()
+        metrics.inc("service.jobs_submitted")
+        self.loop.run_in_executor(self.executor, self._run, job)
+        return job
+
+    def _evict(self) -> None:
+        # `finished` is set once the worker thread is completely done with the job
+        finished = [j for j in self.jobs.values() if j.finished is not None]
+        for job in finished[: max(0, len(self.jobs) - self.max_stored_jobs)]:
+            del self.jobs[job.id]
+            release_blobs(job.blobs)
+
+    def _publish(self, job: Job, event: str, data: Dict) -> None:
+        """Runs on the event loop thread."""
+        job.events.append((event, data))
+        for queue in job.subscribers:
+            queue.put_nowait((event, data))
+
+    def _emit(self, job: Job, event: str, data: Dict) -> None:
+        """Called from worker threads."""
+        self.loop.call_soon_threadsafe(self._publish, job, event, data)
+
+    def _run(self, job: Job) -> None:
+        from workflow import run_outcome, run_workflow_streaming
+
+        job.status = "running"
+        self._emit(job, "status", {"status": "running"})
+        started = last = time.monotonic()
+        recorder = RunRecorder()
+        try:
+            with run_context(priority=job.priority, job=job.id), recording(recorder), blob_scope(job.blobs):
+                for node, update in run_workflow_streaming(job.brochure_url):
+                    now = time.monotonic()
+                    job.state.update(update)
+                    job.node_seconds[node] = round(now - last, 2)
+                    last = now
+                    self._emit(job, "node", {
+                        "node": node,
+                        "chars": sum(text_length(update.get(field)) for field in node_output_fields(node)),
+                        "seconds": job.node_seconds[node],
+                        "elapsed": round(now - started, 2),
+                    })
+            job.status = "done"
+            metrics.inc("service.jobs_done")
+            self._emit(job, "done", {"status": "done", "html": f"/jobs/{job.id}/html",
+                                     "elapsed": round(time.monotonic() - started, 2)})
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            metrics.inc("service.jobs_failed")
+            self._emit(job, "error", {"status": "error", "error": str(e)})
+        finally:
+            try:
+                # A finished job is judged by its state like a CLI run; a crashed one failed
+                record_run(job.state, recorder, duration_s=time.monotonic() - started,
+                           outcome=run_outcome, failed=job.status != "done", run_id=job.id)
+            finally:
+                # Only now may _evict() drop the job and release its blobs
+                job.finished = time.time()
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+class Request:
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0") or 0)
+    except ValueError:
+        raise HttpError(400, "Malformed Content-Length header")
+    if length < 0:
+        raise HttpError(400, "Malformed Content-Length header")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Request body too large (max {MAX_BODY_BYTES:,} bytes)")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def response_bytes(status: int, body: bytes, content_type: str, extra_headers: Dict[str, str] = None) -> bytes:
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "close",
+        **(extra_headers or {}),
+    }
+    head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+def json_response(status: int, payload) -> bytes:
+    return response_bytes(status, json.dumps(payload, indent=2).encode("utf-8"), "application/json")
+
+
+def sse_frame(event: str, data: Dict, event_id: int) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+class Service:
+    """Routes HTTP requests to the JobManager."""
+
+    def __init__(self, jobs: JobManager):
+        self.jobs = jobs
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            if request.method == "GET" and request.path.endswith("/events"):
+                await self.stream_events(request, writer)
+            else:
+                writer.write(self.route(request))
+        except HttpError as e:
+            writer.write(json_response(e.status, {"error": str(e)}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _job(self, job_id: str) -> Job:
+        job = self.jobs.jobs.get(job_id)
+        if job is None:
+            raise HttpError(404, f"No such job: {job_id}")
+        return job
+
+    def route(self, request: Request) -> bytes:
+        parts = [p for p in request.path.split("/") if p]
+
+        if parts == ["health"]:
+            return json_response(200, {"status": "ok", "jobs": len(self.jobs.jobs)})
+        if parts == ["metrics"]:
+            return json_response(200, metrics.snapshot())
+
+        if parts == ["jobs"]:
+            if request.method == "POST":
+                return self.create_job(request)
+            if request.method == "GET":
+                return json_response(200, [j.summary() for j in self.jobs.jobs.values()])
+            raise HttpError(405, "Use GET or POST")
+
+        if len(parts) == 2 and parts[0] == "jobs" and request.method == "GET":
+            return json_response(200, self._job(parts[1]).summary())
+
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "html" and request.method == "GET":
+            job = self._job(parts[1])
+            if job.status != "done":
+                raise HttpError(409, f"Job is {job.status}")
+            return response_bytes(200, resolve(job.state["code"]).encode("utf-8"), "text/html; charset=utf-8")
+
+        raise HttpError(404, f"No route for {request.method} {request.path}")
+
+    def create_job(self, request: Request) -> bytes:
+        try:
+            payload = json.loads(request.body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise HttpError(400, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        brochure_url = payload.get("brochure_url")
+        if not brochure_url:
+            raise HttpError(400, "brochure_url is required")
+        if not isinstance(brochure_url, str):
+            raise HttpError(400, "brochure_url must be a string")
+        if len(brochure_url) > MAX_URL_CHARS:
+            raise HttpError(400, f"brochure_url is longer than {MAX_URL_CHARS:,} characters")
+        priority = payload.get("priority", INTERACTIVE)
+        if not isinstance(priority, str) or priority not in PRIORITY_CLASSES:
+            raise HttpError(400, f"priority must be one of {list(PRIORITY_CLASSES)}")
+
+        job = self.jobs.submit(brochure_url, priority)
+        return json_response(202, {
+            "job_id": job.id,
+            "status": f"/jobs/{job.id}",
+            "events": f"/jobs/{job.id}/events",
+            "html": f"/jobs/{job.id}/html",
+        })
+
+    async def stream_events(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        parts = [p for p in request.path.split("/") if p]
+        if len(parts) != 3 or parts[0] != "jobs":
+            raise HttpError(404, f"No route for {request.path}")
+        job = self._job(parts[1])
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+
+        # Events are only published on this loop thread, so subscribing and
+        # snapshotting the history with no await in between loses nothing
+        queue: asyncio.Queue = asyncio.Queue()
+        job.subscribers.append(queue)
+        history = list(job.events)
+        ids = itertools.count(1)
+        try:
+            for event, data in history:
+                writer.write(sse_frame(event, data, next(ids)))
+            await writer.drain()
+
+            finished = any(e in ("done", "error") for e, _ in history)
+            while not finished:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    writer.write(sse_frame(event, data, next(ids)))
+                    finished = event in ("done", "error")
+                await writer.drain()
+        finally:
+            job.subscribers.remove(queue)
+
+
+async def serve(host: str, port: int, max_concurrent_jobs: int) -> None:
+    # Warm everything up front: imports, ChatOpenAI client, compiled graph
+    from workflow import get_compiled_workflow
+    get_compiled_workflow()
+
+    jobs = JobManager(asyncio.get_running_loop(), max_concurrent_jobs=max_concurrent_jobs)
+    service = Service(jobs)
+    server = await asyncio.start_server(service.handle, host, port)
+
+    print(f"🌐 Creative team service listening on http://{host}:{port}")
+    print(f"   POST /jobs  ·  GET /jobs/<id>/events (SSE)  ·  GET /jobs/<id>/html")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running HTTP service for the creative team")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8077")))
+    parser.add_argument("--max-jobs", type=int, default=int(os.getenv("SERVICE_MAX_JOBS", "16")),
+                        help="Workflows executing concurrently")
+    args = parser.parse_args()
+
+    # brochure_url comes from HTTP clients: never read server files unless asked to
+    os.environ.setdefault("INGEST_LOCAL", "off")
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_jobs))
+    except KeyboardInterrupt:
+        print("\n🛑 Service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Single-Flight Call Deduplication
+
+When several runs target the same brochure at the same time (duplicates in a
+batch, or several people requesting the same page), each of them would send
+an IDENTICAL Historian prompt. Single-flight coalesces them:
+
+- The first caller for a prompt becomes the "leader" and makes the request
+- Everyone arriving while it is in flight waits for the leader's result
+- Once the call finishes, the key is forgotten (this is NOT a cache -
+  a later, non-overlapping call goes upstream again)
+
+The key is a hash of the exact prompt (model, sampling params and every
+message), so only byte-identical requests are ever shared.
+
+Only the leader's call has a cost: callers record token usage inside the
+leader's function, and followers are counted as `singleflight.shared`.
+A follower can react to joining through `on_follow` (agents.py uses it to
+promote a bulk leader's queued call when an interactive run joins).
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
+from metrics import MetricsRegistry, metrics as default_metrics
+
+T = TypeVar("T")
+
+
+def prompt_key(model: str, messages: Iterable[Any], **params: Any) -> str:
+    """
+    Stable hash of an exact LLM request.
+
+    Args:
+        model: Model name
+        messages: LangChain messages (anything with .type and .content)
+        **params: Sampling parameters that change the answer (temperature...)
+    """
+    payload = {
+        "model": model,
+        "params": params,
+        "messages": [[getattr(m, "type", type(m).__name__), getattr(m, "content", str(m))] for m in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share the same key.
+
+    Usage:
+        flight = SingleFlight()
+        response = flight.do(prompt_key(model, messages), lambda: llm.invoke(messages))
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, name: str = "singleflight"):
+        self.metrics = registry or default_metrics
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T], on_follow: Optional[Callable[[], None]] = None) -> T:
+        """
+        Run `fn` unless an identical call is already in flight.
+
+        Followers receive the leader's result, or re-raise the leader's error.
+        `on_follow` runs in a follower's thread before it starts waiting.
+        """
+        with self._lock:
+            self.metrics.inc(f"{self.name}.calls")
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+            self.metrics.set_gauge(f"{self.name}.in_flight", len(self._calls))
+
+        if not leader:
+            self.metrics.inc(f"{self.name}.shared")
+            if on_follow is not None:
+                on_follow()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.metrics.inc(f"{self.name}.upstream")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.metrics.set_gauge(f"{self.name}.in_flight", len(self._calls))
+            call.done.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Calls seen, calls sent upstream, and calls saved by sharing."""
+        calls = self.metrics.counter(f"{self.name}.calls")
+        shared = self.metrics.counter(f"{self.name}.shared")
+        return {
+            "calls": calls,
+            "upstream": self.metrics.counter(f"{self.name}.upstream"),
+            "saved": shared,
+            "saved_ratio": round(shared / calls, 3) if calls else 0.0,
+        }
@@ -0,0 +1,306 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Multi-Page Sites
+
+The single-page workflow puts the whole site into one HTML file. Building
+more pages that way would embed the full CSS and JS in every page. This
+mode builds a site directory instead:
+
+    Historian → Designer + Copywriter (or Creative)
+        ↓
+    [SITE ASSETS]   the Designer's tokens compiled once (no LLM) into
+                    assets/site.css + assets/site.js
+        ↓
+    [PAGE HOME] [PAGE SPECS] [PAGE HISTORY] [PAGE ORDER]   ← in PARALLEL
+        ↓          each one Developer call that links the shared assets;
+        ↓          any <style>/inline <script> it still writes is removed
+    [SITE CHECK]    page weights, shared bytes, duplicated CSS (0)
+
+Each page node adds its file to the state's `pages` dict (merged by the
+merge_pages reducer). The page stage takes about as long as the slowest
+page, not the sum of all pages.
+
+Output:
+    output/site_<timestamp>/index.html, specs.html, history.html, order.html
+    output/site_<timestamp>/assets/site.css, assets/site.js
+(written to a temp directory first, then renamed into place)
+
+Usage:
+    python3 site_builder.py
+    python3 site_builder.py "https://archive.org/details/1977-intro-apple-ii-2/" --pages home,specs
+
+Configuration (.env):
+    SITE_PAGES=home,specs,history,order
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import textwrap
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from langgraph.graph import StateGraph, END
+
+from agents import call_llm, clean_developer_output, site_page_messages, validate_code, with_json_blocks
+from metrics import metrics
+from page_budget import analyze_page
+from run_history import record_run, recording
+from scheduler import INTERACTIVE, run_context
+from state import WebDesignState, create_initial_state
+from state_store import resolve, store_text
+from template_renderer import SITE_SCRIPT, extract_json_block, render_stylesheet
+from workflow import AGENT_NODES, TOPOLOGIES, default_topology
+
+# name -> (file, nav label, what goes on the page)
+SITE_PAGES: Dict[str, Tuple[str, str, str]] = {
+    "home": (
+        "index.html", "Home",
+        "The landing page: hero, 3-6 feature cards, a quote and a call to action that links to order.html.",
+    ),
+    "specs": (
+        "specs.html", "Specs",
+        "Full technical specifications as a spec list, then cards on expansion and peripherals.",
+    ),
+    "history": (
+        "history.html", "History",
+        "The 1977 story as a sequence of cards (garage, West Coast Computer Faire, launch), "
+        "drawn from the design specification and copy.",
+    ),
+    "order": (
+        "order.html", "Order",
+        "Configurations and prices as cards, what is in the box, and a call to action with contact details. "
+        "No working form.",
+    ),
+}
+
+ASSET_LINKS = (
+    '    <link rel="stylesheet" href="assets/site.css">\n'
+    '    <script src="assets/site.js" defer></script>\n'
+)
+
+# Multi-page additions to the shared stylesheet
+SITE_EXTRA_CSS = """
+/* Current page in the navigation */
+.nav-links a[aria-current="page"] { color: var(--accent); }
+"""
+
+_STYLE_BLOCK = re.compile(r"<style\b[^>]*>.*?</style\s*>\s*", re.I | re.S)
+_INLINE_SCRIPT = re.compile(r"<script\b(?![^>]*\bsrc=)[^>]*>.*?</script\s*>\s*", re.I | re.S)
+_ASSET_TAG = re.compile(r"<(link|script)\b[^>]*assets/site\.(css|js)[^>]*>(\s*</script>)?\s*", re.I)
+
+
+def pages_from_env() -> List[str]:
+    """SITE_PAGES from the environment (every page if unset)."""
+    names = [p.strip() for p in os.getenv("SITE_PAGES", ",".join(SITE_PAGES)).split(",") if p.strip()]
+    for name in names:
+        if name not in SITE_PAGES:
+            raise ValueError(f"Unknown site page {name!r} (known: {', '.join(SITE_PAGES)})")
+    return names
+
+
+# ============================================================================
+# NODES
+# ============================================================================
+
+def site_assets_node(state: WebDesignState) -> Dict:
+    """Compile the Designer's tokens into the shared stylesheet and script (no LLM)."""
+    tokens = extract_json_block(resolve(state["design_mockup"]))
+    if tokens is None:
+        print("   ⚠️  No JSON block from designer; using template defaults")
+    css = textwrap.dedent(render_stylesheet(tokens)) + SITE_EXTRA_CSS
+    js = textwrap.dedent(SITE_SCRIPT)
+    print(f"✅ SITE ASSETS: site.css {len(css):,} bytes, site.js {len(js):,} bytes")
+    return {"site_assets": {"site.css": store_text(css), "site.js": store_text(js)}}
+
+
+def link_shared_assets(html: str) -> Tuple[str, int]:
+    """
+    Make a page use only the shared assets.
+
+    Removes <style> blocks and inline scripts, and puts exactly one link
+    to assets/site.css and assets/site.js in <head>. Returns
+    (html, bytes of inline CSS/JS removed).
+    """
+    removed = sum(len(m.group(0).encode("utf-8")) for m in _STYLE_BLOCK.finditer(html))
+    removed += sum(len(m.group(0).encode("utf-8")) for m in _INLINE_SCRIPT.finditer(html))
+    html = _ASSET_TAG.sub("", _INLINE_SCRIPT.sub("", _STYLE_BLOCK.sub("", html)))
+    head_end = re.search(r"</head\s*>", html, re.I)
+    if head_end:
+        html = html[:head_end.start()] + ASSET_LINKS + html[head_end.start():]
+    else:
+        html = html.replace("<body", f"<head>\n{ASSET_LINKS}</head>\n<body", 1)
+    return html, removed
+
+
+def make_page_node(name: str, pages: List[str]):
+    """The Developer node for one page of the site."""
+    file, label, brief = SITE_PAGES[name]
+    nav = "\n".join(f"- {SITE_PAGES[p][1]}: {SITE_PAGES[p][0]}" for p in pages)
+
+    def page_node(state: WebDesignState) -> Dict:
+        print(f"💻 PAGE {label.upper()}: Building {file}...")
+        try:
+            response = call_llm(f"page_{name}", site_page_messages(state, file, brief, nav))
+            html, removed = link_shared_assets(clean_developer_output(response.content))
+            if removed:
+                metrics.inc("site.inline_bytes_removed", removed)
+                print(f"   ✂️  {file}: removed {removed:,} bytes of inline CSS/JS")
+            print(f"✅ PAGE {label.upper()}: {len(html):,} characters")
+            return {"pages": {file: store_text(html)}}
+        except Exception as e:
+            print(f"❌ PAGE {label.upper()}: Error - {e}")
+            return {"pages": {file: f"<!-- Error: {str(e)} -->"}}
+
+    page_node.__name__ = f"page_{name}"
+    return page_node
+
+
+def site_check_node(state: WebDesignState) -> Dict:
+    """
+    Measure the site: per-page bytes, shared asset bytes and the inline
+    CSS still duplicated across pages (0 when every page links the
+    shared stylesheet). The home page becomes `code`, so single-page
+    tooling (stats, run history) keeps working.
+    """
+    assets = {name: resolve(handle) for name, handle in state["site_assets"].items()}
+    pages = {file: resolve(handle) for file, handle in state["pages"].items()}
+    metrics_by_page = {file: analyze_page(html) for file, html in pages.items()}
+    shared = sum(len(text.encode("utf-8")) for text in assets.values())
+    page_bytes = {file: m["total_bytes"] for file, m in metrics_by_page.items()}
+    report = {
+        "pages": page_bytes,
+        "shared_bytes": shared,
+        "duplicated_css_bytes": sum(m["inline_css_bytes"] for m in metrics_by_page.values()),
+        # What the same pages would weigh with the assets embedded in each one
+        "embedded_bytes": sum(page_bytes.values()) + shared * len(pages),
+        "total_bytes": sum(page_bytes.values()) + shared,
+        "errors": sorted(f for f, html in pages.items() if html.startswith("<!-- Error")),
+    }
+    home = pages.get(SITE_PAGES["home"][0]) or next(iter(pages.values()), "")
+    print(f"✅ SITE CHECK: {len(pages)} pages, {report['total_bytes']:,} bytes, "
+          f"{report['duplicated_css_bytes']:,} bytes of duplicated CSS")
+    return {"site_report": report, "code": store_text(home)}
+
+
+# ============================================================================
+# WORKFLOW
+# ============================================================================
+
+def create_site_workflow(topology: Optional[str] = None, pages: Optional[List[str]] = None) -> StateGraph:
+    """
+    The multi-page graph: the usual front half, then shared assets, one
+    parallel Developer node per page and a site check.
+    """
+    topology = topology or default_topology()
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {topology!r} (known: {', '.join(TOPOLOGIES)})")
+    pages = pages or pages_from_env()
+
+    workflow = StateGraph(WebDesignState)
+    front = ["ingest", "historian"] + (["creative"] if topology == "merged" else ["designer", "copywriter"])
+    for name in front:
+        workflow.add_node(name, AGENT_NODES[name])
+    workflow.add_node("compile_assets", site_assets_node)
+    workflow.add_node("site_check", site_check_node)
+
+    workflow.set_entry_point("ingest")
+    workflow.add_edge("ingest", "historian")
+    for name in front[2:]:
+        workflow.add_edge("historian", name)
+        workflow.add_edge(name, "compile_assets")
+
+    # Every page only needs the assets (which waited for design + copy)
+    for name in pages:
+        workflow.add_node(f"page_{name}", make_page_node(name, pages))
+        workflow.add_edge("compile_assets", f"page_{name}")
+        workflow.add_edge(f"page_{name}", "site_check")
+
+    workflow.add_edge("site_check", END)
+    return workflow
+
+
+def write_site(state: WebDesignState, site_dir: str) -> str:
+    """Write pages and assets to a temp directory, then rename it to site_dir."""
+    tmp_dir = f"{site_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, "assets"))
+    for name, handle in state["site_assets"].items():
+        with open(os.path.join(tmp_dir, "assets", name), "w", encoding="utf-8") as f:
+            f.write(resolve(handle))
+    for file, handle in state["pages"].items():
+        with open(os.path.join(tmp_dir, file), "w", encoding="utf-8") as f:
+            f.write(resolve(handle))
+    os.replace(tmp_dir, site_dir)
+    return site_dir
+
+
+def run_site(brochure_url: str, output_dir: str = "output", topology: Optional[str] = None,
+             pages: Optional[List[str]] = None) -> Optional[WebDesignState]:
+    """Build one multi-page site and write it to output/site_<timestamp>/."""
+    pages = pages or pages_from_env()
+    app = create_site_workflow(topology, pages).compile()
+    state = dict(create_initial_state(brochure_url))
+    started = time.time()
+
+    print(f"\n🌐 Building a {len(pages)}-page site for: {brochure_url}\n")
+    with run_context(priority=INTERACTIVE, job="site"), with_json_blocks(), recording() as recorder:
+        # The graph applies the 'pages' reducer to the parallel page updates
+        state = app.invoke(state)
+    total = time.time() - started
+
+    report = state.get("site_report")
+    if not report or report["errors"]:
+        print(f"❌ Site build failed: {', '.join(report['errors']) if report else 'no site report'}")
+        return None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    site_dir = write_site(state, os.path.join(output_dir, f"site_{timestamp}"))
+
+    page_nodes = {n: u for n, u in recorder.nodes.items() if n.startswith("page_")}
+    if page_nodes:
+        stage = max(u["ended_at"] for u in page_nodes.values()) - min(u["started_at"] for u in page_nodes.values())
+        serial = sum(u["ended_at"] - u["started_at"] for u in page_nodes.values())
+        print(f"\n⚡ Page stage: {stage:.1f}s for {len(page_nodes)} pages "
+              f"({serial:.1f}s if built one after another)")
+    print("\n📏 Site weight:")
+    for file, size in report["pages"].items():
+        print(f"   {file:<14} {size:>8,} bytes")
+    print(f"   {'assets/':<14} {report['shared_bytes']:>8,} bytes (shared, cached after the first page)")
+    print(f"   Duplicated CSS: {report['duplicated_css_bytes']:,} bytes "
+          f"(embedding the assets in every page: {report['embedded_bytes']:,} bytes total)")
+
+    def outcome(state):
+        # Validate the home page together with the assets it links
+        combined = "".join(resolve(h) for h in state["site_assets"].values()) + resolve(state["code"])
+        return True, validate_code(combined)
+
+    record_run(state, recorder, duration_s=total, outcome=outcome, stats={"site_report": report})
+
+    print(f"\n💾 Site saved to: {site_dir}/ ({total:.1f}s)\n")
+    return state
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a multi-page site with shared CSS/JS")
+    parser.add_argument("brochure", nargs="?", default="https://archive.org/details/1977-intro-apple-ii-2/")
+    parser.add_argument("--pages", help=f"Comma-separated pages (default SITE_PAGES or {','.join(SITE_PAGES)})")
+    parser.add_argument("--topology", choices=TOPOLOGIES, help="fanout or merged (default WORKFLOW_TOPOLOGY)")
+    parser.add_argument("--output", default="output", help="Parent directory of the site directory")
+    args = parser.parse_args()
+
+    pages = [p.strip() for p in args.pages.split(",") if p.strip()] if args.pages else None
+    for name in pages or []:
+        if name not in SITE_PAGES:
+            parser.error(f"unknown page {name!r} (known: {', '.join(SITE_PAGES)})")
+    return 0 if run_site(args.brochure, args.output, args.topology, pages) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
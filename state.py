@@ -12,14 +12,27 @@ Why TypedDict?
 
 The State Flow:
 1. Starts with only 'brochure_url' filled
+   (ingestion adds 'brochure_text' when that names a local file/folder)
 2. Historian adds 'analysis'
 3. Designer adds 'design_mockup' (parallel with Copywriter)
 4. Copywriter adds 'copy' (parallel with Designer)
+   (with WORKFLOW_TOPOLOGY=merged, one Creative call adds both)
 5. Developer adds 'code' (waits for both Designer + Copywriter)
-6. Final state has all fields filled
+6. Animation linter adds 'lint_report' (and may fix 'code')
+7. Page budget check adds 'page_report' (page weight vs. budgets)
+8. Final state has all fields filled
+
+Multi-page sites (site_builder.py) replace steps 5-7: the Designer's tokens
+are compiled into 'site_assets', parallel page Developers each add one entry
+to 'pages' (merged by merge_pages), and the site check adds 'site_report'.
 """
 
-from typing import TypedDict
+from typing import Annotated, Dict, NotRequired, Tuple, TypedDict
+
+
+def merge_pages(current: Dict[str, str], update: Dict[str, str]) -> Dict[str, str]:
+    """Reducer for 'pages': parallel page nodes each add their own file."""
+    return {**(current or {}), **(update or {})}
 
 
 class WebDesignState(TypedDict):
@@ -31,20 +44,76 @@ class WebDesignState(TypedDict):
     
     Fields:
         brochure_url: Input - URL or path to the 1977 Apple brochure
+        brochure_text: Output from ingestion - extracted text of a local
+            brochure, "" for URLs/descriptions (absent until that node has run)
         analysis: Output from Historian - key themes, tone, specs
         design_mockup: Output from Designer - text description of website design
         copy: Output from Copywriter - actual website copy in Jobs' voice
         code: Output from Developer - final HTML/CSS/JS code
+        lint_report: Output from the animation linter - findings and counts
+            (absent until that node has run)
+        page_report: Output from the page budget check - metrics, budgets,
+            violations (absent until that node has run)
+        site_assets: Multi-page sites only - shared files compiled from the
+            Designer's tokens, {"site.css": ..., "site.js": ...}
+        pages: Multi-page sites only - {file name: HTML}, one entry per
+            page node
+        site_report: Multi-page sites only - per-page bytes, shared asset
+            bytes, inline CSS removed
     """
     
     # INPUT: What we start with
     brochure_url: str
+    brochure_text: NotRequired[str]  # Extracted local brochure text (not an LLM output)
     
     # OUTPUTS: What agents add (initially empty strings)
     analysis: str          # Historian's output
     design_mockup: str     # Designer's output
     copy: str             # Copywriter's output
     code: str             # Developer's output
+    lint_report: NotRequired[dict]  # Animation lint findings (not an LLM output)
+    page_report: NotRequired[dict]  # Page budget analysis (not an LLM output)
+    
+    # MULTI-PAGE SITES (site_builder.py); parallel page nodes merge into
+    # 'pages', so it carries a reducer. It is never set for single pages;
+    # the reducer must stay the outermost annotation for LangGraph to see it
+    site_assets: NotRequired[dict]
+    pages: Annotated[Dict[str, str], merge_pages]
+    site_report: NotRequired[dict]
+
+
+# Which state field each workflow node writes
+NODE_OUTPUT_FIELDS = {
+    "historian": "analysis",
+    "designer": "design_mockup",
+    "copywriter": "copy",
+    "developer": "code",
+}
+
+# Nodes that write several fields at once (WORKFLOW_TOPOLOGY=merged runs one
+# "creative" call in place of the Designer + Copywriter fan-out)
+MERGED_NODE_FIELDS = {
+    "creative": ("design_mockup", "copy"),
+}
+
+
+def node_output_fields(node: str) -> Tuple[str, ...]:
+    """Every text field a node writes (empty for the non-LLM nodes)."""
+    if node in MERGED_NODE_FIELDS:
+        return MERGED_NODE_FIELDS[node]
+    field = NODE_OUTPUT_FIELDS.get(node)
+    return (field,) if field else ()
+
+
+def create_initial_state(brochure_url: str) -> WebDesignState:
+    """Starting state for one run: only the input is filled in."""
+    return {
+        "brochure_url": brochure_url,
+        "analysis": "",
+        "design_mockup": "",
+        "copy": "",
+        "code": ""
+    }
 
 
 # Example of how state evolves:
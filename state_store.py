@@ -0,0 +1,289 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Reference-Based State Store
+
+WebDesignState normally carries full copies of analysis, design_mockup,
+copy and code through every node update and streamed event. Across
+thousands of batch runs, all of those large strings stay resident.
+
+With a blob store enabled, big fields are written ONCE to the store and the
+state carries a lightweight handle instead:
+
+    "blob:sha256:9f2c...e1:18342"     ← content hash + length in characters
+
+- Agents call resolve() when they need the text, store_text() for outputs
+- Stats use text_length(), which reads the length from the handle itself
+- Identical outputs share one blob (content addressing)
+- The disk store reads blobs through mmap, so nothing is kept in memory
+  between uses
+- The memory store counts references: a run stored inside blob_scope()
+  gives its blobs back with release_blobs() when it is done (the service
+  when it forgets a job, the pipeline once a spilled run is dropped)
+
+RunSpiller writes each COMPLETED run to disk (site HTML + one JSONL line)
+as soon as it finishes, so batch memory stays flat regardless of size.
+
+Configuration (.env):
+    STATE_BLOB_STORE=disk:output/blobs   # or "memory", or empty for off
+    STATE_BLOB_MIN_CHARS=1024            # smaller fields stay inline
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Set
+
+HANDLE_PREFIX = "blob:sha256:"
+
+
+def is_handle(value) -> bool:
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+def _make_handle(digest: str, chars: int) -> str:
+    return f"{HANDLE_PREFIX}{digest}:{chars}"
+
+
+def _digest_of(handle: str) -> str:
+    return handle[len(HANDLE_PREFIX):].split(":", 1)[0]
+
+
+# ============================================================================
+# STORES
+# ============================================================================
+
+class MemoryBlobStore:
+    """
+    Deduplicating, reference-counted in-process store.
+
+    Every put() takes one reference to the blob and release() drops one;
+    a blob is freed when its last reference goes. Runs scoped with
+    blob_scope() release theirs when they finish (see release_blobs()).
+    """
+
+    def __init__(self):
+        self._blobs: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._blobs.setdefault(digest, text)
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+        return _make_handle(digest, len(text))
+
+    def get(self, handle: str) -> str:
+        with self._lock:
+            return self._blobs[_digest_of(handle)]
+
+    def release(self, handle: str) -> None:
+        digest = _digest_of(handle)
+        with self._lock:
+            refs = self._refs.get(digest, 0) - 1
+            if refs > 0:
+                self._refs[digest] = refs
+            else:
+                self._refs.pop(digest, None)
+                self._blobs.pop(digest, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._blobs)
+
+
+class DiskBlobStore:
+    """
+    Content-addressed files under `root`: objects/<first 2 hex>/<digest>.
+
+    Writes are atomic (temp file + rename), so concurrent workers writing
+    the same blob are harmless.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return _make_handle(digest, len(text))
+
+    def get(self, handle: str) -> str:
+        with open(self._path(_digest_of(handle)), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[:].decode("utf-8")
+
+    def release(self, handle: str) -> None:
+        # Blobs on disk hold no memory and may be shared with other processes
+        pass
+
+
+# ============================================================================
+# PROCESS-WIDE STORE + HELPERS
+# ============================================================================
+
+_store = None
+_store_configured = False
+_store_lock = threading.Lock()
+
+
+def store_from_spec(spec: str):
+    """Build a store from "memory", "disk:<dir>" or "" (disabled → None)."""
+    spec = (spec or "").strip()
+    if not spec or spec.lower() in ("0", "off", "none"):
+        return None
+    if spec == "memory":
+        return MemoryBlobStore()
+    if spec.startswith("disk:"):
+        return DiskBlobStore(spec[len("disk:"):] or "output/blobs")
+    raise ValueError(f"Unknown STATE_BLOB_STORE: {spec!r} (use 'memory' or 'disk:<dir>')")
+
+
+def configure_blob_store(store) -> None:
+    """Use `store` (or None to disable) for every subsequent store_text()."""
+    global _store, _store_configured
+    with _store_lock:
+        _store = store
+        _store_configured = True
+
+
+def get_blob_store():
+    """The configured store, created from STATE_BLOB_STORE on first use."""
+    global _store, _store_configured
+    with _store_lock:
+        if not _store_configured:
+            _store = store_from_spec(os.getenv("STATE_BLOB_STORE", ""))
+            _store_configured = True
+        return _store
+
+
+# Handles stored by the current run (set by blob_scope), released together
+_scope: ContextVar[Optional[Set[str]]] = ContextVar("blob_scope", default=None)
+
+
+@contextmanager
+def blob_scope(handles: Optional[Set[str]] = None) -> Iterator[Set[str]]:
+    """
+    Collect the handles store_text() creates inside the block into
+    `handles` (a fresh set by default). Pass the same set to every block
+    of one run, then release_blobs() it once the run's state is no longer
+    needed. Without a scope, stored blobs live as long as the store.
+    """
+    handles = set() if handles is None else handles
+    token = _scope.set(handles)
+    try:
+        yield handles
+    finally:
+        _scope.reset(token)
+
+
+def store_text(text: str) -> str:
+    """
+    Return a handle for `text` if blob storage is on and the text is big;
+    otherwise return the text unchanged.
+    """
+    store = get_blob_store()
+    if store is None or is_handle(text) or len(text) < int(os.getenv("STATE_BLOB_MIN_CHARS", "1024")):
+        return text
+    handle = store.put(text)
+    scope = _scope.get()
+    if scope is not None:
+        # One reference per run and blob, however often the run stores it
+        if handle in scope:
+            store.release(handle)
+        else:
+            scope.add(handle)
+    return handle
+
+
+def release_blobs(handles: Set[str]) -> None:
+    """Drop a finished run's references (from blob_scope); frees blobs no other run holds."""
+    store = get_blob_store()
+    if store is not None:
+        for handle in handles:
+            store.release(handle)
+    handles.clear()
+
+
+def resolve(value: str) -> str:
+    """Text for a state field, whether it holds a handle or inline text."""
+    if not is_handle(value):
+        return value
+    store = get_blob_store()
+    if store is None:
+        raise RuntimeError(f"State holds blob handle {value[:40]}... but no blob store is configured")
+    return store.get(value)
+
+
+def text_length(value: Optional[str]) -> int:
+    """Length of a field in characters, without loading blobs."""
+    if not value:
+        return 0
+    if is_handle(value):
+        return int(value.rsplit(":", 1)[1])
+    return len(value)
+
+
+def content_hash(value: Optional[str]) -> Optional[str]:
+    """sha256 of a field's text; read straight from the handle when it is one."""
+    if value is None:
+        return None
+    if is_handle(value):
+        return _digest_of(value)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def resolve_state(state: Dict) -> Dict:
+    """Copy of a state with every handle replaced by its text."""
+    return {k: resolve(v) if isinstance(v, str) else v for k, v in state.items()}
+
+
+# ============================================================================
+# SPILLING COMPLETED RUNS
+# ============================================================================
+
+class RunSpiller:
+    """
+    Writes each finished run to `workdir` and lets the caller forget it.
+
+        workdir/sites/<run_id>.html    the generated website
+        workdir/results.jsonl          one fully-resolved state per line
+
+    Thread-safe: pipeline workers call spill() as runs complete.
+    """
+
+    def __init__(self, workdir: str, append: bool = False):
+        self.workdir = workdir
+        self.sites_dir = os.path.join(workdir, "sites")
+        self.results_path = os.path.join(workdir, "results.jsonl")
+        os.makedirs(self.sites_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.count = 0
+        if not append:
+            open(self.results_path, "w", encoding="utf-8").close()
+
+    def spill(self, run_id: str, state: Dict) -> None:
+        full = resolve_state(state)
+        with open(os.path.join(self.sites_dir, f"{run_id}.html"), "w", encoding="utf-8") as f:
+            f.write(full.get("code", ""))
+        line = json.dumps({"id": run_id, **full}, ensure_ascii=False)
+        with self._lock:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.count += 1
@@ -0,0 +1,671 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Shared Task Queues
+
+Storage for distributed worker mode (see worker.py). Several hosts point
+at the same queue; each pulls tasks, runs them and writes results back.
+
+A TASK is one workflow node for one run ("run-0007 / designer"), or a
+whole workflow when submitted with granularity="run". Intermediate
+WebDesignState lives in the shared store too, so any worker can pick up
+the next node of any run.
+
+Crash safety:
+- Claiming a task gives the worker a LEASE (e.g. 120s), renewed by heartbeats
+- If a worker dies, its lease expires and another worker re-claims the task
+- Each claim counts as an attempt; after `max_attempts` the task fails and
+  its output field gets the same error text the agents would produce
+- Completion is fenced by the attempt number, so a slow worker whose lease
+  was taken over can't overwrite newer results
+
+Backends:
+- SQLiteTaskQueue: one shared SQLite file (local disk or a host-shared volume)
+- RedisTaskQueue: any Redis-protocol server (redis-py client)
+- LocalRedis: in-process stand-in for a Redis server, for tests
+
+Open one from a URL with open_queue():
+    sqlite:///shared/pillar3.db   redis://queue-host:6379/0   local://
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from state import WebDesignState, node_output_fields
+
+# Node name used when a whole workflow is one task
+WHOLE_RUN = "workflow"
+
+
+@dataclass
+class Task:
+    """One claimed unit of work. `attempt` fences completion against stale leases."""
+    task_id: str
+    run_id: str
+    node: str
+    attempt: int
+
+
+def failure_update(node: str, error: str) -> Dict[str, str]:
+    """State update recorded when a task exhausts its retries."""
+    if node == "developer":
+        return {field: f"<!-- Error: {error} -->" for field in node_output_fields(node)}
+    return {field: f"Error: {error}" for field in node_output_fields(node)}
+
+
+# ============================================================================
+# SQLITE BACKEND
+# ============================================================================
+
+class SQLiteTaskQueue:
+    """
+    Task queue + state store in one SQLite file.
+
+    BEGIN IMMEDIATE transactions make claim/complete atomic across every
+    process sharing the file.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # executescript() manages its own transaction; CREATE ... IF NOT EXISTS
+        # keeps this safe when several workers start at once
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                deps TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                created REAL NOT NULL,
+                finished REAL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'ready',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                worker TEXT,
+                error TEXT,
+                created REAL NOT NULL,
+                UNIQUE (run_id, node)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_claimable ON tasks (status, lease_until);
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def create_run(self, run_id: str, state: WebDesignState, dependencies: Dict[str, List[str]]) -> None:
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO runs (run_id, state, deps, created) VALUES (?, ?, ?, ?)",
+                (run_id, json.dumps(state), json.dumps(dependencies), now),
+            )
+            for node, parents in dependencies.items():
+                if not parents:
+                    db.execute(
+                        "INSERT INTO tasks (task_id, run_id, node, created) VALUES (?, ?, ?, ?)",
+                        (uuid.uuid4().hex, run_id, node, now),
+                    )
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Task]:
+        now = time.time()
+        with self._tx() as db:
+            while True:
+                row = db.execute(
+                    "SELECT task_id, run_id, node, attempts, status FROM tasks "
+                    "WHERE status = 'ready' OR (status = 'leased' AND lease_until < ?) "
+                    "ORDER BY created LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                task_id, run_id, node, attempts, status = row
+                if status == "leased" and attempts >= self.max_attempts:
+                    # Its last worker died holding the final attempt
+                    self._fail_locked(db, task_id, run_id, node, "lease expired (worker lost)")
+                    continue
+                db.execute(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, "
+                    "lease_until = ?, worker = ? WHERE task_id = ?",
+                    (now + lease_seconds, worker_id, task_id),
+                )
+                return Task(task_id, run_id, node, attempts + 1)
+
+    def heartbeat(self, task: Task, lease_seconds: float) -> bool:
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE tasks SET lease_until = ? WHERE task_id = ? AND status = 'leased' AND attempts = ?",
+                (time.time() + lease_seconds, task.task_id, task.attempt),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, task: Task, update: Dict) -> bool:
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE tasks SET status = 'done', lease_until = NULL "
+                "WHERE task_id = ? AND status = 'leased' AND attempts = ?",
+                (task.task_id, task.attempt),
+            )
+            if cur.rowcount != 1:
+                return False  # lease lost to another worker
+            self._apply_locked(db, task.run_id, task.node, update)
+            return True
+
+    def fail(self, task: Task, error: str) -> None:
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT attempts FROM tasks WHERE task_id = ? AND status = 'leased' AND attempts = ?",
+                (task.task_id, task.attempt),
+            ).fetchone()
+            if row is None:
+                return
+            if row[0] >= self.max_attempts:
+                self._fail_locked(db, task.task_id, task.run_id, task.node, error)
+            else:
+                db.execute(
+                    "UPDATE tasks SET status = 'ready', lease_until = NULL, error = ? WHERE task_id = ?",
+                    (error, task.task_id),
+                )
+
+    def _fail_locked(self, db, task_id: str, run_id: str, node: str, error: str) -> None:
+        db.execute(
+            "UPDATE tasks SET status = 'failed', lease_until = NULL, error = ? WHERE task_id = ?",
+            (error, task_id),
+        )
+        # Downstream nodes still run, on the error text - like a live run
+        self._apply_locked(db, run_id, node, failure_update(node, error))
+
+    def _apply_locked(self, db, run_id: str, node: str, update: Dict) -> None:
+        state_json, deps_json = db.execute(
+            "SELECT state, deps FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        state = json.loads(state_json)
+        state.update(update)
+        deps = json.loads(deps_json)
+
+        finished = {
+            n for (n,) in db.execute(
+                "SELECT node FROM tasks WHERE run_id = ? AND status IN ('done', 'failed')", (run_id,)
+            )
+        }
+        now = time.time()
+        for child, parents in deps.items():
+            if node in parents and set(parents) <= finished:
+                db.execute(
+                    "INSERT OR IGNORE INTO tasks (task_id, run_id, node, created) VALUES (?, ?, ?, ?)",
+                    (uuid.uuid4().hex, run_id, child, now),
+                )
+
+        status_sql = ""
+        params = [json.dumps(state)]
+        if finished >= set(deps):
+            status_sql = ", status = 'done', finished = ?"
+            params.append(now)
+        db.execute(f"UPDATE runs SET state = ?{status_sql} WHERE run_id = ?", (*params, run_id))
+
+    def get_state(self, run_id: str) -> WebDesignState:
+        row = self._conn().execute("SELECT state FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return json.loads(row[0])
+
+    def run_status(self, run_id: str) -> str:
+        row = self._conn().execute("SELECT status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return row[0]
+
+    def run_created(self, run_id: str) -> float:
+        """When the run was submitted (epoch seconds)."""
+        row = self._conn().execute("SELECT created FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return row[0]
+
+    def finished_runs(self) -> List[str]:
+        return [r for (r,) in self._conn().execute("SELECT run_id FROM runs WHERE status = 'done' ORDER BY created")]
+
+    def stats(self) -> Dict[str, int]:
+        db = self._conn()
+        counts = {f"tasks_{s}": n for s, n in db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")}
+        counts.update({f"runs_{s}": n for s, n in db.execute("SELECT status, COUNT(*) FROM runs GROUP BY status")})
+        return counts
+
+
+# ============================================================================
+# REDIS BACKEND
+# ============================================================================
+
+class RedisTaskQueue:
+    """
+    Task queue + state store on a Redis-protocol server.
+
+    Keys (all under `prefix`):
+        ready               LIST  task ids waiting for a worker
+        leases              ZSET  task id -> lease expiry timestamp
+        task:<id>           HASH  run_id, node, status, attempts, lease_until, error
+        run:<id>            HASH  base state, deps, status
+        run:<id>:outputs    HASH  node -> JSON state update
+        run:<id>:finished   SET   nodes that are done or failed
+        run:<id>:queued:<n> STR   set-once guard so a child is enqueued once
+
+    Every node writes its update into its own hash field, so parallel nodes
+    of one run never race on a read-modify-write of the whole state.
+
+    Every state change is one WATCH/MULTI/EXEC transaction: the checks (is
+    the lease still this attempt's? is the task still at the head of the
+    list?) read watched keys, and the writes only apply if none of those
+    keys changed meanwhile, otherwise the transaction is retried. So a
+    worker crashing mid-claim can't lose a task, and a stale worker can't
+    pass the fencing check and then overwrite the new lease holder.
+    """
+
+    def __init__(self, client, prefix: str = "pillar3", max_attempts: int = 3):
+        self.r = client
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+
+    def _k(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def _transaction(self, fn, *watch_keys: str):
+        """fn(pipe) under WATCH watch_keys; reads before pipe.multi(), writes after."""
+        return self.r.transaction(fn, *watch_keys, value_from_callable=True)
+
+    def _enqueue_writes(self, pipe, run_id: str, node: str) -> None:
+        task_id = uuid.uuid4().hex
+        pipe.set(self._k("run", run_id, "queued", node), "1")
+        pipe.hset(self._k("task", task_id), mapping={
+            "run_id": run_id, "node": node, "status": "ready", "attempts": 0,
+        })
+        pipe.lpush(self._k("ready"), task_id)
+
+    def create_run(self, run_id: str, state: WebDesignState, dependencies: Dict[str, List[str]]) -> None:
+        created = self._k("run", run_id, "created")
+
+        def create(pipe):
+            if pipe.get(created) is not None:
+                raise ValueError(f"Run {run_id!r} already exists")
+            pipe.multi()
+            pipe.set(created, "1")
+            pipe.hset(self._k("run", run_id), mapping={
+                "state": json.dumps(state), "deps": json.dumps(dependencies), "status": "running",
+                "created": time.time(),
+            })
+            pipe.lpush(self._k("runs"), run_id)
+            for node, parents in dependencies.items():
+                if not parents:
+                    self._enqueue_writes(pipe, run_id, node)
+
+        self._transaction(create, created)
+
+    def _reap_expired(self) -> None:
+        now = time.time()
+        for task_id in self.r.zrangebyscore(self._k("leases"), "-inf", now):
+            self._transaction(lambda pipe, task_id=task_id: self._requeue_expired(pipe, task_id, now),
+                              self._k("task", task_id))
+
+    def _requeue_expired(self, pipe, task_id: str, now: float) -> None:
+        task = pipe.hgetall(self._k("task", task_id))
+        # Heartbeats and completions write the task hash, so a renewal or a
+        # finish racing with this check aborts the transaction
+        if task.get("status") != "leased" or float(task.get("lease_until", 0)) > now:
+            return
+        if int(task.get("attempts", 0)) >= self.max_attempts:
+            self._fail_task(pipe, task_id, task, "lease expired (worker lost)")
+            return
+        pipe.multi()
+        pipe.zrem(self._k("leases"), task_id)
+        pipe.hset(self._k("task", task_id), mapping={"status": "ready"})
+        pipe.lpush(self._k("ready"), task_id)
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Task]:
+        self._reap_expired()
+
+        def take(pipe) -> Optional[Task]:
+            task_id = pipe.lindex(self._k("ready"), -1)
+            if task_id is None:
+                return None
+            task = pipe.hgetall(self._k("task", task_id))
+            attempt = int(task.get("attempts", 0)) + 1
+            lease_until = time.time() + lease_seconds
+            # The pop and the lease land together or not at all
+            pipe.multi()
+            pipe.rpop(self._k("ready"))
+            pipe.hset(self._k("task", task_id), mapping={
+                "status": "leased", "worker": worker_id, "attempts": attempt, "lease_until": lease_until,
+            })
+            pipe.zadd(self._k("leases"), {task_id: lease_until})
+            return Task(task_id, task["run_id"], task["node"], attempt)
+
+        return self._transaction(take, self._k("ready"))
+
+    def _holds_lease(self, pipe, task: Task) -> bool:
+        current = pipe.hgetall(self._k("task", task.task_id))
+        return current.get("status") == "leased" and int(current.get("attempts", 0)) == task.attempt
+
+    def heartbeat(self, task: Task, lease_seconds: float) -> bool:
+        def renew(pipe) -> bool:
+            if not self._holds_lease(pipe, task):
+                return False
+            lease_until = time.time() + lease_seconds
+            pipe.multi()
+            pipe.hset(self._k("task", task.task_id), mapping={"lease_until": lease_until})
+            pipe.zadd(self._k("leases"), {task.task_id: lease_until})
+            return True
+
+        return self._transaction(renew, self._k("task", task.task_id))
+
+    def complete(self, task: Task, update: Dict) -> bool:
+        def finish(pipe) -> bool:
+            if not self._holds_lease(pipe, task):
+                return False  # lease lost to another worker
+            plan = self._finish_plan(pipe, task.run_id, task.node)
+            pipe.multi()
+            pipe.zrem(self._k("leases"), task.task_id)
+            pipe.hset(self._k("task", task.task_id), mapping={"status": "done"})
+            self._finish_writes(pipe, task.run_id, task.node, update, plan)
+            return True
+
+        return self._transaction(finish, self._k("task", task.task_id))
+
+    def fail(self, task: Task, error: str) -> None:
+        def record(pipe) -> None:
+            if not self._holds_lease(pipe, task):
+                return
+            if task.attempt >= self.max_attempts:
+                self._fail_task(pipe, task.task_id, {"run_id": task.run_id, "node": task.node}, error)
+                return
+            pipe.multi()
+            pipe.zrem(self._k("leases"), task.task_id)
+            pipe.hset(self._k("task", task.task_id), mapping={"status": "ready", "error": error})
+            pipe.lpush(self._k("ready"), task.task_id)
+
+        self._transaction(record, self._k("task", task.task_id))
+
+    def _fail_task(self, pipe, task_id: str, task: Dict, error: str) -> None:
+        """Reads, then queues the writes that mark a task failed (inside a transaction)."""
+        update = failure_update(task["node"], error)
+        plan = self._finish_plan(pipe, task["run_id"], task["node"])
+        pipe.multi()
+        pipe.zrem(self._k("leases"), task_id)
+        pipe.hset(self._k("task", task_id), mapping={"status": "failed", "error": error})
+        self._finish_writes(pipe, task["run_id"], task["node"], update, plan)
+
+    def _finish_plan(self, pipe, run_id: str, node: str) -> Tuple[List[str], bool]:
+        """Read phase of finishing a node: (children that become ready, run is done)."""
+        finished_key = self._k("run", run_id, "finished")
+        # A sibling finishing concurrently changes this set and forces a retry,
+        # so exactly one of them sees the child's last parent complete
+        pipe.watch(finished_key)
+        deps = json.loads(pipe.hget(self._k("run", run_id), "deps"))
+        finished = set(pipe.smembers(finished_key)) | {node}
+        children = [
+            child for child, parents in deps.items()
+            if node in parents and set(parents) <= finished
+            and pipe.get(self._k("run", run_id, "queued", child)) is None
+        ]
+        return children, finished >= set(deps)
+
+    def _finish_writes(self, pipe, run_id: str, node: str, update: Dict, plan: Tuple[List[str], bool]) -> None:
+        children, run_done = plan
+        pipe.hset(self._k("run", run_id, "outputs"), mapping={node: json.dumps(update)})
+        pipe.sadd(self._k("run", run_id, "finished"), node)
+        for child in children:
+            self._enqueue_writes(pipe, run_id, child)
+        if run_done:
+            pipe.hset(self._k("run", run_id), mapping={"status": "done"})
+
+    def get_state(self, run_id: str) -> WebDesignState:
+        base = self.r.hget(self._k("run", run_id), "state")
+        if base is None:
+            raise KeyError(run_id)
+        state = json.loads(base)
+        deps = json.loads(self.r.hget(self._k("run", run_id), "deps"))
+        outputs = self.r.hgetall(self._k("run", run_id, "outputs"))
+        for node in deps:  # deterministic merge order
+            if node in outputs:
+                state.update(json.loads(outputs[node]))
+        return state
+
+    def run_status(self, run_id: str) -> str:
+        status = self.r.hget(self._k("run", run_id), "status")
+        if status is None:
+            raise KeyError(run_id)
+        return status
+
+    def run_created(self, run_id: str) -> float:
+        """When the run was submitted (epoch seconds)."""
+        created = self.r.hget(self._k("run", run_id), "created")
+        if created is None:
+            raise KeyError(run_id)
+        return float(created)
+
+    def finished_runs(self) -> List[str]:
+        run_ids = list(reversed(self.r.lrange(self._k("runs"), 0, -1)))
+        return [r for r in run_ids if self.r.hget(self._k("run", r), "status") == "done"]
+
+    def stats(self) -> Dict[str, int]:
+        runs = self.r.lrange(self._k("runs"), 0, -1)
+        done = sum(1 for r in runs if self.r.hget(self._k("run", r), "status") == "done")
+        return {
+            "tasks_ready": self.r.llen(self._k("ready")),
+            "tasks_leased": self.r.zcard(self._k("leases")),
+            "runs_done": done,
+            "runs_running": len(runs) - done,
+        }
+
+
+class _LocalPipeline:
+    """
+    redis-py Pipeline stand-in for LocalRedis.transaction(): commands run
+    immediately until multi(), then are queued until execute().
+    """
+
+    def __init__(self, redis: "LocalRedis"):
+        self._redis = redis
+        self._queued: Optional[List] = None
+
+    def watch(self, *keys):
+        # The transaction holds the store's lock throughout, so nothing can change
+        return True
+
+    def multi(self):
+        self._queued = []
+
+    def execute(self):
+        return [command(*args, **kwargs) for command, args, kwargs in self._queued or []]
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+        if self._queued is None:
+            return command
+
+        def queue(*args, **kwargs):
+            self._queued.append((command, args, kwargs))
+            return self
+        return queue
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of Redis commands RedisTaskQueue uses.
+
+    Mirrors redis-py's decode_responses=True behavior (str in, str out).
+    transaction() is all-or-nothing like MULTI/EXEC: if anything raises
+    part-way, the store is rolled back.
+    Only shared between threads of one process - for tests, not production.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data: Dict[str, object] = {}
+
+    def transaction(self, func, *watches, value_from_callable=False):
+        with self._lock:
+            snapshot = copy.deepcopy(self._data)
+            try:
+                pipe = _LocalPipeline(self)
+                value = func(pipe)
+                results = pipe.execute()
+            except BaseException:
+                self._data = snapshot
+                raise
+            return value if value_from_callable else results
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            return value if isinstance(value, str) else None
+
+    def _get(self, key, kind):
+        value = self._data.get(key)
+        if value is None:
+            value = self._data[key] = kind()
+        return value
+
+    def set(self, key, value, nx=False):
+        with self._lock:
+            if nx and key in self._data:
+                return None
+            self._data[key] = str(value)
+            return True
+
+    def lpush(self, key, *values):
+        with self._lock:
+            lst = self._get(key, list)
+            for v in values:
+                lst.insert(0, str(v))
+            return len(lst)
+
+    def rpop(self, key):
+        with self._lock:
+            lst = self._data.get(key)
+            return lst.pop() if lst else None
+
+    def lindex(self, key, index):
+        with self._lock:
+            lst = self._data.get(key) or []
+            return lst[index] if -len(lst) <= index < len(lst) else None
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._data.get(key) or [])
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            lst = list(self._data.get(key) or [])
+            return lst[start:] if end == -1 else lst[start:end + 1]
+
+    def hset(self, key, mapping):
+        with self._lock:
+            h = self._get(key, dict)
+            h.update({k: str(v) for k, v in mapping.items()})
+            return len(mapping)
+
+    def hget(self, key, field):
+        with self._lock:
+            return (self._data.get(key) or {}).get(field)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data.get(key) or {})
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            h = self._get(key, dict)
+            h[field] = str(int(h.get(field, 0)) + amount)
+            return int(h[field])
+
+    def sadd(self, key, *members):
+        with self._lock:
+            s = self._get(key, set)
+            before = len(s)
+            s.update(str(m) for m in members)
+            return len(s) - before
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._data.get(key) or set())
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            self._get(key, dict).update({str(k): float(v) for k, v in mapping.items()})
+            return len(mapping)
+
+    def zrem(self, key, *members):
+        with self._lock:
+            z = self._data.get(key) or {}
+            return sum(1 for m in members if z.pop(str(m), None) is not None)
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._data.get(key) or {})
+
+    def zrangebyscore(self, key, low, high):
+        with self._lock:
+            low = float("-inf") if low == "-inf" else float(low)
+            high = float("inf") if high == "+inf" else float(high)
+            z = self._data.get(key) or {}
+            return [m for m, score in sorted(z.items(), key=lambda kv: kv[1]) if low <= score <= high]
+
+
+# ============================================================================
+# FACTORY
+# ============================================================================
+
+_local_redis = None
+
+
+def open_queue(url: str, max_attempts: int = 3):
+    """
+    Open a task queue from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db, redis://host:port/db, or local://
+        max_attempts: Claims allowed per task before it is marked failed
+    """
+    global _local_redis
+
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskQueue(url[len("sqlite:///"):], max_attempts=max_attempts)
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("Redis queues need the redis package: pip install redis")
+        return RedisTaskQueue(redis.Redis.from_url(url, decode_responses=True), max_attempts=max_attempts)
+    if url.startswith("local://"):
+        if _local_redis is None:
+            _local_redis = LocalRedis()
+        return RedisTaskQueue(_local_redis, max_attempts=max_attempts)
+    raise ValueError(f"Unsupported queue URL: {url!r}")
@@ -0,0 +1,456 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Local Template Renderer
+
+Most of what the Developer LLM writes is the same boilerplate its own
+system prompt spells out: CSS reset, IntersectionObserver fade-ins, smooth
+scrolling, card/button hover effects. This module renders that page
+locally, in milliseconds, from two small JSON blocks:
+
+    Designer  → design tokens   {"colors": {...}, "fonts": {...}, "radius": ..., "hero_gradient": [...]}
+    Copywriter → structured copy {"brand", "hero": {...}, "features": [...], "specs": [...], "cta": {...}, ...}
+
+Both agents append their block as a ```json fence at the end of their
+normal output when DEVELOPER_MODE is not "llm". Missing or malformed fields
+fall back to DEFAULT_TOKENS / DEFAULT_COPY, so the renderer always produces
+a complete page.
+
+Every value is escaped (copy) or validated (colors, fonts, sizes) before it
+reaches the page. The output passes validate_code() and the animation
+linter with no findings.
+
+Configuration (.env):
+    DEVELOPER_MODE=llm               # LLM writes the page (original behaviour)
+    DEVELOPER_MODE=template          # local render only, no Developer LLM call
+    DEVELOPER_MODE=template+refine   # local render, then the LLM polishes it
+"""
+
+import html
+import json
+import re
+from string import Template
+from typing import Dict, List, Optional
+
+DEVELOPER_MODES = ("llm", "template", "template+refine")
+
+DEFAULT_TOKENS: Dict = {
+    "colors": {
+        "primary": "#1d1d1f",
+        "secondary": "#6e6e73",
+        "accent": "#e8762b",
+        "background": "#fbf7f0",
+        "surface": "#ffffff",
+        "text": "#1d1d1f",
+        "muted": "#6e6e73",
+    },
+    "hero_gradient": ["#f5e6d3", "#d4c4a8"],
+    "fonts": {
+        "heading": "-apple-system, BlinkMacSystemFont, 'Helvetica Neue', sans-serif",
+        "body": "-apple-system, BlinkMacSystemFont, 'Helvetica Neue', sans-serif",
+    },
+    "radius": "16px",
+    "max_width": "1200px",
+}
+
+DEFAULT_COPY: Dict = {
+    "brand": "Apple II",
+    "nav": ["Features", "Specs", "Get Started"],
+    "hero": {
+        "headline": "Introducing Apple II.",
+        "subheadline": "The personal computer that's ready to work, play and grow with you.",
+        "cta": "Discover Apple II",
+    },
+    "features": [
+        {"title": "Ready to use", "body": "Plug it in, turn it on and start computing. No kit, no soldering."},
+        {"title": "Color graphics", "body": "Fifteen brilliant colors bring your programs and games to life."},
+        {"title": "Expandable", "body": "Eight expansion slots let Apple II grow as your ideas do."},
+    ],
+    "specs": [
+        {"label": "Processor", "value": "6502 at 1 MHz"},
+        {"label": "Memory", "value": "4K RAM, expandable to 48K"},
+        {"label": "Display", "value": "Color graphics, 280 × 192"},
+        {"label": "Language", "value": "BASIC in ROM"},
+    ],
+    "quote": {"text": "Simplicity is the ultimate sophistication.", "author": "Apple, 1977"},
+    "cta": {
+        "headline": "The home computer that's ready to work.",
+        "body": "Visit your local computer store and see Apple II for yourself.",
+        "button": "Find a Store",
+    },
+    "footer": "© 1977 Apple Computer, Inc. Reimagined in 2025.",
+}
+
+TOKENS_INSTRUCTIONS = """
+
+FINALLY, end your answer with the design tokens as a ```json block:
+{"colors": {"primary": "#hex", "secondary": "#hex", "accent": "#hex", "background": "#hex",
+            "surface": "#hex", "text": "#hex", "muted": "#hex"},
+ "hero_gradient": ["#hex", "#hex"],
+ "fonts": {"heading": "CSS font-family list", "body": "CSS font-family list"},
+ "radius": "e.g. 16px"}"""
+
+COPY_INSTRUCTIONS = """
+
+FINALLY, end your answer with the copy as a ```json block:
+{"brand": "...", "nav": ["...", "..."],
+ "hero": {"headline": "...", "subheadline": "...", "cta": "button text"},
+ "features": [{"title": "...", "body": "..."}],
+ "specs": [{"label": "...", "value": "..."}],
+ "quote": {"text": "...", "author": "..."},
+ "cta": {"headline": "...", "body": "...", "button": "..."},
+ "footer": "..."}"""
+
+
+# ============================================================================
+# PARSING + SANITIZING
+# ============================================================================
+
+_JSON_FENCE = re.compile(r"```json\s*(\{.*?\})\s*```", re.S)
+_COLOR = re.compile(r"^(#[0-9a-fA-F]{3,8}|(rgb|rgba|hsl|hsla)\([\d\s.,%/]+\)|[a-zA-Z]{3,20})$")
+_FONT = re.compile(r"^[\w\s,'\"-]{1,200}$")
+_LENGTH = re.compile(r"^\d{1,4}(\.\d+)?(px|rem|em|%)$")
+
+
+def extract_json_block(text: str) -> Optional[Dict]:
+    """The last ```json {...}``` block in an agent's output (or a bare JSON reply)."""
+    candidates = _JSON_FENCE.findall(text or "")
+    if not candidates and text and text.strip().startswith("{"):
+        candidates = [text.strip()]
+    for candidate in reversed(candidates):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def _merge(defaults, value):
+    """Recursive merge keeping the defaults' shape (types must match)."""
+    if isinstance(defaults, dict):
+        value = value if isinstance(value, dict) else {}
+        return {k: _merge(d, value.get(k)) for k, d in defaults.items()}
+    if isinstance(defaults, list):
+        return value if isinstance(value, list) and value else defaults
+    return value if isinstance(value, type(defaults)) and value else defaults
+
+
+def _safe(value: str, pattern, fallback: str) -> str:
+    return value.strip() if isinstance(value, str) and pattern.match(value.strip()) else fallback
+
+
+def normalize_tokens(raw: Optional[Dict]) -> Dict:
+    tokens = _merge(DEFAULT_TOKENS, raw or {})
+    tokens["colors"] = {
+        name: _safe(value, _COLOR, DEFAULT_TOKENS["colors"][name]) for name, value in tokens["colors"].items()
+    }
+    gradient = [c for c in (_safe(c, _COLOR, "") for c in tokens["hero_gradient"][:4]) if c]
+    tokens["hero_gradient"] = gradient if len(gradient) >= 2 else DEFAULT_TOKENS["hero_gradient"]
+    tokens["fonts"] = {
+        name: _safe(value, _FONT, DEFAULT_TOKENS["fonts"][name]) for name, value in tokens["fonts"].items()
+    }
+    tokens["radius"] = _safe(tokens["radius"], _LENGTH, DEFAULT_TOKENS["radius"])
+    tokens["max_width"] = _safe(tokens["max_width"], _LENGTH, DEFAULT_TOKENS["max_width"])
+    return tokens
+
+
+def normalize_copy(raw: Optional[Dict]) -> Dict:
+    copy = _merge(DEFAULT_COPY, raw or {})
+    copy["features"] = [f for f in copy["features"] if isinstance(f, dict)][:6] or DEFAULT_COPY["features"]
+    copy["specs"] = [s for s in copy["specs"] if isinstance(s, dict)][:10] or DEFAULT_COPY["specs"]
+    copy["nav"] = [n for n in copy["nav"] if isinstance(n, str)][:5] or DEFAULT_COPY["nav"]
+    return copy
+
+
+# ============================================================================
+# TEMPLATE
+# ============================================================================
+
+# Token-driven stylesheet; shared as assets/site.css by multi-page sites (site_builder.py)
+STYLESHEET_TEMPLATE = Template("""        :root {
+            --primary: $primary;
+            --secondary: $secondary;
+            --accent: $accent;
+            --background: $background;
+            --surface: $surface;
+            --text: $text;
+            --muted: $muted;
+            --radius: $radius;
+            --max-width: $max_width;
+            --ease: cubic-bezier(0.4, 0, 0.2, 1);
+        }
+
+        *, *::before, *::after { margin: 0; padding: 0; box-sizing: border-box; }
+        html { scroll-behavior: smooth; }
+        body {
+            font-family: $body_font;
+            color: var(--text);
+            background: var(--background);
+            line-height: 1.6;
+            -webkit-font-smoothing: antialiased;
+        }
+        h1, h2, h3 { font-family: $heading_font; line-height: 1.15; letter-spacing: -0.02em; }
+        .container { max-width: var(--max-width); margin: 0 auto; padding: 0 1.5rem; }
+
+        /* Navigation */
+        .nav {
+            position: sticky; top: 0; z-index: 10;
+            background: var(--background);
+            border-bottom: 1px solid rgba(0, 0, 0, 0.06);
+        }
+        .nav .container { display: flex; align-items: center; justify-content: space-between; height: 4rem; }
+        .brand { font-weight: 700; font-size: 1.25rem; color: var(--primary); text-decoration: none; }
+        .nav-links { display: flex; gap: 2rem; list-style: none; }
+        .nav-links a { color: var(--muted); text-decoration: none; transition: color 0.2s var(--ease); }
+        .nav-links a:hover { color: var(--accent); }
+
+        /* Hero */
+        .hero {
+            background: linear-gradient(135deg, $hero_gradient);
+            padding: 8rem 0 6rem;
+            text-align: center;
+        }
+        .hero h1 { font-size: clamp(2.5rem, 6vw, 4.5rem); color: var(--primary); margin-bottom: 1.5rem; }
+        .hero p { font-size: 1.25rem; color: var(--secondary); max-width: 40rem; margin: 0 auto 2.5rem; }
+
+        .btn {
+            display: inline-block;
+            padding: 0.9rem 2rem;
+            border-radius: 999px;
+            background: var(--accent);
+            color: #fff;
+            font-weight: 600;
+            text-decoration: none;
+            box-shadow: 0 4px 14px rgba(0, 0, 0, 0.12);
+            transition: transform 0.3s var(--ease), opacity 0.3s var(--ease);
+        }
+        .btn:hover { transform: translateY(-2px); opacity: 0.92; }
+
+        /* Sections */
+        section { padding: 6rem 0; }
+        .section-title { font-size: clamp(2rem, 4vw, 3rem); text-align: center; margin-bottom: 3.5rem; }
+
+        .grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+            gap: 2rem;
+        }
+        .card {
+            position: relative;
+            background: var(--surface);
+            border-radius: var(--radius);
+            padding: 2.5rem 2rem;
+            box-shadow: 0 10px 40px rgba(0, 0, 0, 0.06);
+            transition: transform 0.3s var(--ease);
+        }
+        /* Hover shadow fades in on a pseudo-element: opacity animates on the compositor */
+        .card::after {
+            content: "";
+            position: absolute;
+            inset: 0;
+            border-radius: inherit;
+            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.15);
+            opacity: 0;
+            pointer-events: none;
+            transition: opacity 0.3s var(--ease);
+        }
+        .card:hover { transform: translateY(-5px); }
+        .card:hover::after { opacity: 1; }
+        .card h3 { font-size: 1.35rem; margin-bottom: 0.75rem; color: var(--primary); }
+        .card p { color: var(--muted); }
+
+        .specs { background: var(--surface); }
+        .spec-list { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1.5rem; }
+        .spec { border-left: 3px solid var(--accent); padding: 0.5rem 1.25rem; }
+        .spec dt { font-size: 0.85rem; text-transform: uppercase; letter-spacing: 0.08em; color: var(--muted); }
+        .spec dd { font-size: 1.2rem; font-weight: 600; }
+
+        blockquote { text-align: center; font-size: clamp(1.5rem, 3vw, 2.25rem); font-family: $heading_font; }
+        blockquote cite { display: block; margin-top: 1rem; font-size: 1rem; color: var(--muted); font-style: normal; }
+
+        .cta { text-align: center; background: linear-gradient(135deg, $hero_gradient); }
+        .cta h2 { font-size: clamp(2rem, 4vw, 3rem); margin-bottom: 1rem; }
+        .cta p { color: var(--secondary); margin-bottom: 2rem; }
+
+        footer { padding: 2.5rem 0; text-align: center; color: var(--muted); font-size: 0.9rem; }
+
+        /* Scroll-triggered fade-in */
+        .fade-in-up {
+            opacity: 0;
+            transform: translateY(30px);
+            transition: opacity 0.8s var(--ease), transform 0.8s var(--ease);
+        }
+        .fade-in-up.visible { opacity: 1; transform: translateY(0); }
+
+        @media (max-width: 768px) {
+            .nav-links { display: none; }
+            .hero { padding: 6rem 0 4rem; }
+            section { padding: 4rem 0; }
+        }
+
+        @media (prefers-reduced-motion: reduce) {
+            *, *::before, *::after {
+                animation-duration: 0.01ms !important;
+                animation-iteration-count: 1 !important;
+                transition-duration: 0.01ms !important;
+                scroll-behavior: auto !important;
+            }
+            .fade-in-up { opacity: 1; transform: none; }
+        }
+""")
+
+# Scroll reveal + smooth in-page scrolling; assets/site.js for multi-page sites
+SITE_SCRIPT = """        // Reveal elements once as they scroll into view
+        const observer = new IntersectionObserver((entries) => {
+            entries.forEach((entry) => {
+                if (entry.isIntersecting) {
+                    entry.target.classList.add('visible');
+                    observer.unobserve(entry.target);
+                }
+            });
+        }, { threshold: 0.1, rootMargin: '0px 0px -40px 0px' });
+        document.querySelectorAll('.fade-in-up').forEach((el) => observer.observe(el));
+
+        // Smooth scroll for in-page links
+        document.querySelectorAll('a[href^="#"]').forEach((anchor) => {
+            anchor.addEventListener('click', function (e) {
+                const target = document.querySelector(this.getAttribute('href'));
+                if (target) {
+                    e.preventDefault();
+                    target.scrollIntoView({ behavior: 'smooth' });
+                }
+            });
+        });
+"""
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>$title</title>
+    <style>
+$stylesheet    </style>
+</head>
+<body>
+    <nav class="nav">
+        <div class="container">
+            <a class="brand" href="#top">$brand</a>
+            <ul class="nav-links">$nav</ul>
+        </div>
+    </nav>
+
+    <header class="hero" id="top">
+        <div class="container">
+            <h1 class="fade-in-up">$headline</h1>
+            <p class="fade-in-up">$subheadline</p>
+            <a class="btn fade-in-up" href="#section-1">$hero_cta</a>
+        </div>
+    </header>
+
+    <section id="section-1">
+        <div class="container">
+            <h2 class="section-title fade-in-up">$features_title</h2>
+            <div class="grid">$features</div>
+        </div>
+    </section>
+
+    <section class="specs" id="section-2">
+        <div class="container">
+            <h2 class="section-title fade-in-up">$specs_title</h2>
+            <dl class="spec-list">$specs</dl>
+        </div>
+    </section>
+
+    <section>
+        <div class="container">
+            <blockquote class="fade-in-up">“$quote”<cite>— $quote_author</cite></blockquote>
+        </div>
+    </section>
+
+    <section class="cta" id="section-3">
+        <div class="container">
+            <h2 class="fade-in-up">$cta_headline</h2>
+            <p class="fade-in-up">$cta_body</p>
+            <a class="btn fade-in-up" href="#top">$cta_button</a>
+        </div>
+    </section>
+
+    <footer><div class="container">$footer</div></footer>
+
+    <script>
+$script    </script>
+</body>
+</html>
+""")
+
+
+def render_page(tokens: Optional[Dict] = None, copy: Optional[Dict] = None) -> str:
+    """Full single-file page from (possibly partial) design tokens and copy."""
+    t = normalize_tokens(tokens)
+    c = normalize_copy(copy)
+    e = lambda value: html.escape(str(value))  # noqa: E731
+
+    nav_targets = ["#section-1", "#section-2", "#section-3"]
+    nav = "".join(
+        f'<li><a href="{nav_targets[i % len(nav_targets)]}">{e(label)}</a></li>' for i, label in enumerate(c["nav"])
+    )
+    features = "".join(
+        f'\n                <div class="card fade-in-up"><h3>{e(f.get("title", ""))}</h3>'
+        f'<p>{e(f.get("body", ""))}</p></div>'
+        for f in c["features"]
+    )
+    specs = "".join(
+        f'\n                <div class="spec fade-in-up"><dt>{e(s.get("label", ""))}</dt>'
+        f'<dd>{e(s.get("value", ""))}</dd></div>'
+        for s in c["specs"]
+    )
+
+    return PAGE_TEMPLATE.substitute(
+        stylesheet=render_stylesheet(t),
+        script=SITE_SCRIPT,
+        title=e(f"{c['brand']} - {c['hero']['headline']}"),
+        brand=e(c["brand"]),
+        nav=nav,
+        headline=e(c["hero"]["headline"]),
+        subheadline=e(c["hero"]["subheadline"]),
+        hero_cta=e(c["hero"]["cta"]),
+        features_title=e(c["nav"][0]),
+        features=features,
+        specs_title=e(c["nav"][1] if len(c["nav"]) > 1 else "Specs"),
+        specs=specs,
+        quote=e(c["quote"]["text"]),
+        quote_author=e(c["quote"]["author"]),
+        cta_headline=e(c["cta"]["headline"]),
+        cta_body=e(c["cta"]["body"]),
+        cta_button=e(c["cta"]["button"]),
+        footer=e(c["footer"]),
+    )
+
+
+def render_stylesheet(tokens: Optional[Dict] = None) -> str:
+    """The page stylesheet for (possibly partial) design tokens."""
+    t = normalize_tokens(tokens)
+    return STYLESHEET_TEMPLATE.substitute(
+        heading_font=t["fonts"]["heading"],
+        body_font=t["fonts"]["body"],
+        hero_gradient=", ".join(t["hero_gradient"]),
+        radius=t["radius"],
+        max_width=t["max_width"],
+        **t["colors"],
+    )
+
+
+def render_from_outputs(design_mockup: str, copy: str) -> str:
+    """Render from the Designer's and Copywriter's raw outputs."""
+    return render_page(extract_json_block(design_mockup), extract_json_block(copy))
+
+
+def missing_blocks(design_mockup: str, copy: str) -> List[str]:
+    """Which agents' JSON blocks could not be parsed (defaults were used)."""
+    missing = []
+    if extract_json_block(design_mockup) is None:
+        missing.append("designer")
+    if extract_json_block(copy) is None:
+        missing.append("copywriter")
+    return missing
@@ -0,0 +1,11 @@
+"""Shared pytest setup: the project modules live in the repository root."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# agents.py builds its ChatOpenAI clients and output budgets at import time;
+# tests never reach the API and must not write output/run_history.db
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["RUN_HISTORY_DB"] = ""
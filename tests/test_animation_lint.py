@@ -0,0 +1,171 @@
+"""Animation linter: each auto-fix rewrites only what is safe, and leaves the rest as findings."""
+
+from animation_lint import REDUCED_MOTION_CSS, lint_css, lint_js, lint_page
+
+
+def _rules(findings):
+    return {(f["rule"], f["fixed"]) for f in findings}
+
+
+# ============================================================================
+# CSS
+# ============================================================================
+
+CARD_CSS = """
+.card { transition: all 0.3s ease; color: black; }
+.card:hover { transform: translateY(-4px); opacity: 0.9; cursor: pointer; }
+"""
+
+
+def test_transition_all_is_narrowed_to_the_properties_states_change():
+    css, findings = lint_css(CARD_CSS, fix=True, js_sets_styles=False)
+    assert ".card { transition: transform 0.3s ease, opacity 0.3s ease; color: black; }" in css
+    assert ("transition-all", True) in _rules(findings)
+
+
+def test_transition_all_keeps_other_listed_transitions():
+    css, _ = lint_css(
+        ".btn { transition: all .2s, color 1s; }\n.btn.active { background-color: red; }",
+        fix=True, js_sets_styles=False,
+    )
+    assert "transition: background-color .2s, color 1s;" in css
+
+
+def test_transition_all_is_left_alone_when_scripts_set_styles():
+    css, findings = lint_css(CARD_CSS, fix=True, js_sets_styles=True)
+    assert css == CARD_CSS
+    assert ("transition-all", False) in _rules(findings)
+
+
+def test_transition_all_without_state_rules_is_reported_only():
+    css = ".hero { transition: all 1s; }"
+    fixed, findings = lint_css(css, fix=True, js_sets_styles=False)
+    assert fixed == css and ("transition-all", False) in _rules(findings)
+
+
+def test_report_only_mode_never_rewrites():
+    css, findings = lint_css(CARD_CSS, fix=False, js_sets_styles=False)
+    assert css == CARD_CSS and ("transition-all", False) in _rules(findings)
+
+
+def test_layout_and_paint_animations_are_reported():
+    _, findings = lint_css(
+        "@media (min-width: 600px) { .nav { transition: width .3s, box-shadow .3s; } }\n"
+        "@keyframes grow { from { height: 0; } to { height: 10px; } }",
+        fix=True, js_sets_styles=False,
+    )
+    messages = [f["message"] for f in findings]
+    assert any("'width'" in m for m in messages) and any("'height'" in m for m in messages)
+    assert ("paint-animation", False) in _rules(findings)
+
+
+# ============================================================================
+# JAVASCRIPT
+# ============================================================================
+
+def test_passive_is_added_when_the_handler_never_prevents_default():
+    js, findings = lint_js(
+        "window.addEventListener('scroll', () => requestAnimationFrame(update));", fix=True
+    )
+    assert js == "window.addEventListener('scroll', () => requestAnimationFrame(update), { passive: true });"
+    assert ("passive-listener", True) in _rules(findings)
+
+
+def test_false_options_argument_becomes_passive():
+    js, _ = lint_js("el.addEventListener('touchstart', function (e) { start(e); }, false);", fix=True)
+    assert js == "el.addEventListener('touchstart', function (e) { start(e); }, { passive: true });"
+
+
+def test_inline_handler_that_prevents_default_stays_non_passive():
+    source = "el.addEventListener('touchmove', (e) => { e.preventDefault(); drag(e); });"
+    js, findings = lint_js(source, fix=True)
+    assert js == source
+    assert ("passive-listener", False) in _rules(findings)
+
+
+def test_named_handler_stays_non_passive_if_any_code_prevents_default():
+    source = (
+        "function onWheel(e) { e.preventDefault(); zoom(e.deltaY); }\n"
+        "canvas.addEventListener('wheel', onWheel);"
+    )
+    js, findings = lint_js(source, fix=True)
+    assert js == source
+    assert ("passive-listener", False) in _rules(findings)
+
+
+def test_already_passive_listener_is_not_reported():
+    _, findings = lint_js(
+        "window.addEventListener('scroll', () => requestAnimationFrame(update), { passive: true });", fix=True
+    )
+    assert findings == []
+
+
+def test_scroll_handler_without_requestanimationframe_is_reported():
+    _, findings = lint_js("window.addEventListener('scroll', () => nav.update());", fix=True)
+    assert ("scroll-handler", False) in _rules(findings)
+
+
+REVEAL_JS = """const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            entry.target.classList.add('visible');
+        }
+    });
+});"""
+
+
+def test_unobserve_is_injected_after_a_one_shot_reveal():
+    js, findings = lint_js(REVEAL_JS, fix=True)
+    assert (
+        "        if (entry.isIntersecting) {\n"
+        "            observer.unobserve(entry.target);\n"
+        "            entry.target.classList.add('visible');"
+    ) in js
+    assert ("observer-unobserve", True) in _rules(findings)
+    # fixed output is clean
+    assert lint_js(js, fix=True)[1] == []
+
+
+def test_unobserve_uses_the_callback_observer_argument():
+    source = ("new IntersectionObserver((entries, obs) => { entries.forEach(e => "
+              "{ if (e.isIntersecting) { e.target.classList.add('in'); } }); });")
+    js, _ = lint_js(source, fix=True)
+    assert "if (e.isIntersecting) { obs.unobserve(e.target); e.target.classList.add('in');" in js
+
+
+def test_toggling_observer_is_not_unobserved():
+    source = REVEAL_JS.replace("classList.add('visible');", "classList.add('visible');\n"
+                               "        } else { entry.target.classList.remove('visible');")
+    js, findings = lint_js(source, fix=True)
+    assert js == source
+    assert ("observer-unobserve", False) in _rules(findings)
+
+
+# ============================================================================
+# PAGE
+# ============================================================================
+
+PAGE = f"""<html><head>
+<style>{CARD_CSS}</style>
+</head><body>
+<div class="card">Hi</div>
+<script>{REVEAL_JS}</script>
+</body></html>"""
+
+
+def test_reduced_motion_block_is_appended_once():
+    html, findings = lint_page(PAGE)
+    assert html.count("prefers-reduced-motion") == 1
+    assert html.index(REDUCED_MOTION_CSS) < html.index("</style>")
+    assert ("reduced-motion", True) in _rules(findings)
+
+    again, findings = lint_page(html)
+    assert again == html
+    assert findings == []
+
+
+def test_page_with_no_style_block_only_reports_reduced_motion():
+    html = "<div style=\"transition: opacity 1s\"></div>"
+    fixed, findings = lint_page(html)
+    assert fixed == html
+    assert ("reduced-motion", False) in _rules(findings)
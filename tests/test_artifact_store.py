@@ -0,0 +1,126 @@
+"""Artifact store: line deltas, chain capping, dedup, and prune() never losing a surviving version."""
+
+import hashlib
+import os
+import sqlite3
+
+import pytest
+
+from artifact_store import MAX_CHAIN, ArtifactStore, apply_delta, archive_site, make_delta
+
+
+def _site(version: int, lines: int = 300) -> str:
+    """A page whose lines do not compress away, with one line changed per version."""
+    body = [f"<p>{hashlib.sha256(str(i).encode()).hexdigest()}</p>\n" for i in range(lines)]
+    body[version % lines] = f"<p>version {version}</p>\n"
+    return "<html>\n" + "".join(body) + f"<footer>{version}</footer>\n</html>"
+
+
+def _row(store, sha):
+    conn = sqlite3.connect(os.path.join(store.root, "index.db"))
+    try:
+        return conn.execute("SELECT kind, base, depth FROM artifacts WHERE sha256 = ?", (sha,)).fetchone()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "artifacts"))
+
+
+@pytest.mark.parametrize("base, target", [
+    ("a\nb\nc\n", "a\nB\nc\nd\n"),
+    ("a\nb\nc\n", ""),
+    ("", "new\nfile"),
+    ("one\ntwo\nthree", "zero\none\nthree"),
+    ("same\n", "same\n"),
+])
+def test_line_delta_reconstructs_the_target(base, target):
+    assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_second_version_is_a_delta_against_the_first(store):
+    first = store.put("brochure.pdf", _site(0), "run-0")
+    second = store.put("brochure.pdf", _site(1), "run-1")
+    assert first["kind"] == "full"
+    assert second["kind"] == "delta" and second["stored"] < first["stored"] / 4
+    assert _row(store, second["sha256"]) == ("delta", first["sha256"], 1)
+    assert store.get(second["sha256"]) == _site(1)
+
+
+def test_chain_is_stored_in_full_again_after_max_chain_deltas(store):
+    results = [store.put("brochure.pdf", _site(v), f"run-{v}") for v in range(MAX_CHAIN + 3)]
+    kinds = [r["kind"] for r in results]
+    assert kinds[:MAX_CHAIN + 1] == ["full"] + ["delta"] * MAX_CHAIN
+    assert kinds[MAX_CHAIN + 1:] == ["full", "delta"]
+    assert max(_row(store, r["sha256"])[2] for r in results) == MAX_CHAIN
+    for v, r in enumerate(results):
+        assert store.get(r["sha256"]) == _site(v)
+
+
+def test_identical_output_is_stored_once_across_keys(store):
+    first = store.put("a.pdf", _site(0), "run-a")
+    again = store.put("b.pdf", _site(0), "run-b")
+    assert again == {"sha256": first["sha256"], "kind": "dedup", "size": len(_site(0)), "stored": 0}
+    assert store.stats()["versions"] == 2 and store.stats()["artifacts"] == 1
+    # b.pdf's next version deltas against the shared object
+    assert store.put("b.pdf", _site(1), "run-b2")["kind"] == "delta"
+    assert store.resolve_ref("run-b") == first["sha256"]
+
+
+def test_prune_rewrites_a_delta_whose_base_is_deleted(store):
+    base = store.put("brochure.pdf", _site(0), "run-0")
+    delta = store.put("brochure.pdf", _site(1), "run-1")
+    removed = store.prune(keep_last=1)
+    assert removed == {"versions": 1, "artifacts": 1, "rebased": 1}
+    assert _row(store, delta["sha256"]) == ("full", None, 0)
+    assert not os.path.exists(store._path(base["sha256"]))
+    assert store.get(delta["sha256"]) == _site(1)
+
+
+def test_prune_keeps_a_base_another_key_still_uses(store):
+    shared = store.put("a.pdf", _site(0), "run-a")
+    store.put("b.pdf", _site(0), "run-b")
+    store.put("a.pdf", _site(1), "run-a2")
+    removed = store.prune(keep_last=1, key="a.pdf")
+    assert removed == {"versions": 1, "artifacts": 0, "rebased": 0}
+    assert store.get(shared["sha256"]) == _site(0)
+
+
+def test_round_trip_through_prune_is_byte_identical(store):
+    texts = {}
+    for v in range(2 * MAX_CHAIN + 2):
+        key = "a.pdf" if v % 3 else "b.pdf"
+        text = _site(v // 2)  # every other version repeats the previous text
+        texts[store.put(key, text, f"run-{v}")["sha256"]] = text
+    assert store.prune(keep_last=3)["rebased"] >= 1
+
+    survivors = store.versions()
+    assert {v["key"] for v in survivors} == {"a.pdf", "b.pdf"}
+    assert len(survivors) <= 6
+    for version in survivors:
+        assert store.get(version["sha256"]).encode("utf-8") == texts[version["sha256"]].encode("utf-8")
+    # every object left on disk is one a surviving version needs
+    assert store.stats()["artifacts"] == len({v["sha256"] for v in survivors})
+
+
+def test_archive_site_applies_keep_versions_to_that_key_only(store, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_KEEP_VERSIONS", "2")
+    store.put("other.pdf", _site(100), "other-0")
+    store.put("other.pdf", _site(101), "other-1")
+    store.put("other.pdf", _site(102), "other-2")
+    for v in range(4):
+        archive_site(store, "brochure.pdf", _site(v), f"run-{v}")
+
+    assert [v["run_id"] for v in store.versions("brochure.pdf")] == ["run-2", "run-3"]
+    assert len(store.versions("other.pdf")) == 3
+    assert store.get(store.resolve_ref("run-2")) == _site(2)
+    assert store.get(store.resolve_ref("run-3")) == _site(3)
+
+
+def test_archive_site_keeps_everything_when_retention_is_off(store, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_KEEP_VERSIONS", "0")
+    for v in range(4):
+        archive_site(store, "brochure.pdf", _site(v), f"run-{v}")
+    assert len(store.versions("brochure.pdf")) == 4
@@ -0,0 +1,134 @@
+"""Batch mode: JSONL round trip through the local backend, and batches that don't complete."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from batch_mode import (
+    LocalBatchBackend,
+    build_batch_requests,
+    continue_truncated,
+    make_custom_id,
+    parse_batch_output,
+    run_batch,
+    wait_for_batch,
+    write_jsonl,
+)
+
+
+def _prompt(state):
+    return [
+        SimpleNamespace(type="system", content="You are the historian."),
+        SimpleNamespace(type="human", content=f"Analyze {state['brochure_url']}"),
+    ]
+
+
+def test_local_backend_round_trip(tmp_path):
+    states = {"apple-ii": {"brochure_url": "a.pdf"}, "mac": {"brochure_url": "b.pdf"}}
+    requests = build_batch_requests("historian", states, _prompt, "gpt-4o-mini", 0.2, {"max_tokens": 500})
+    assert requests[0]["body"]["messages"][1] == {"role": "user", "content": "Analyze a.pdf"}
+    assert requests[0]["body"]["max_tokens"] == 500
+
+    def responder(custom_id, body):
+        if custom_id.startswith("mac"):
+            raise RuntimeError("model overloaded")
+        return f"analysis of {body['messages'][1]['content']}"
+
+    backend = LocalBatchBackend(str(tmp_path / "endpoint"), responder)
+    batch_id = backend.submit(write_jsonl(requests, str(tmp_path / "input.jsonl")))
+    assert wait_for_batch(backend, batch_id, poll_interval=0, timeout=5) == "completed"
+
+    results = parse_batch_output(backend.download(batch_id, str(tmp_path / "output.jsonl")))
+    assert results[make_custom_id("apple-ii", "historian")] == ("analysis of Analyze a.pdf", None, False)
+    assert results[make_custom_id("mac", "historian")] == (None, "model overloaded", False)
+
+
+def test_parse_batch_output_reports_http_errors(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(json.dumps({"custom_id": "r::developer", "response": {"status_code": 429}, "error": None}) + "\n")
+    assert parse_batch_output(str(path)) == {"r::developer": (None, "HTTP 429", False)}
+
+
+class _StuckBackend:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def status(self, batch_id):
+        return self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+
+
+@pytest.mark.parametrize("final", ["failed", "expired", "cancelled"])
+def test_wait_returns_unsuccessful_terminal_statuses(final):
+    backend = _StuckBackend(["validating", "in_progress", final])
+    assert wait_for_batch(backend, "b1", poll_interval=0, timeout=5) == final
+
+
+def test_wait_times_out():
+    with pytest.raises(TimeoutError, match="in_progress"):
+        wait_for_batch(_StuckBackend(["in_progress"]), "b1", poll_interval=0.01, timeout=0.05)
+
+
+def test_cancelled_local_batch_downloads_empty(tmp_path):
+    backend = LocalBatchBackend(str(tmp_path / "endpoint"))
+    batch_id = backend.submit(write_jsonl([], str(tmp_path / "input.jsonl")))
+    backend.cancel(batch_id)
+    assert backend.status(batch_id) == "cancelled"
+    assert parse_batch_output(backend.download(batch_id, str(tmp_path / "out.jsonl"))) == {}
+
+
+def _requests(node, params=None):
+    return build_batch_requests(node, {"r1": {"brochure_url": "a.pdf"}}, _prompt, "gpt-4o-mini", 0.2, params)
+
+
+def test_cut_off_text_is_continued_in_a_follow_up_batch(tmp_path):
+    def responder(custom_id, body):
+        if body["messages"][-1]["content"] == "CONTINUE":
+            assert body["messages"][-2] == {"role": "assistant", "content": "<html><body>"}
+            return "</body></html>"
+        return "<html><body>", "length"
+
+    backend = LocalBatchBackend(str(tmp_path / "endpoint"), responder)
+    requests = _requests("developer", {"max_tokens": 3})
+    results, _ = run_batch(backend, requests, str(tmp_path / "stage"), 0, 5)
+    assert results["r1::developer"] == ("<html><body>", None, True)
+    results = continue_truncated(backend, requests, results, str(tmp_path / "stage"), 0, 5, 2, "CONTINUE")
+    assert results["r1::developer"] == ("<html><body></body></html>", None, False)
+
+
+def test_reply_still_cut_off_after_the_last_round_fails(tmp_path):
+    backend = LocalBatchBackend(str(tmp_path / "endpoint"), lambda cid, body: ("part ", "length"))
+    requests = _requests("developer", {"max_tokens": 3})
+    results, _ = run_batch(backend, requests, str(tmp_path / "stage"), 0, 5)
+    results = continue_truncated(backend, requests, results, str(tmp_path / "stage"), 0, 5, 2, "CONTINUE")
+    content, error, _ = results["r1::developer"]
+    assert content is None and "finish_reason=length" in error
+
+
+def test_cut_off_structured_reply_is_retried_without_the_limit(tmp_path):
+    seen = []
+
+    def responder(custom_id, body):
+        seen.append(body.get("max_tokens"))
+        return ('{"design": "x"}', "stop") if "max_tokens" not in body else ('{"des', "length")
+
+    backend = LocalBatchBackend(str(tmp_path / "endpoint"), responder)
+    requests = _requests("creative", {"response_format": {"type": "json_object"}, "max_tokens": 3})
+    results, _ = run_batch(backend, requests, str(tmp_path / "stage"), 0, 5)
+    results = continue_truncated(backend, requests, results, str(tmp_path / "stage"), 0, 5, 2, "CONTINUE")
+    assert results["r1::creative"] == ('{"design": "x"}', None, False)
+    assert seen == [3, None]
+
+
+def test_batch_bodies_carry_the_live_output_budget(monkeypatch):
+    import agents
+
+    class Budgets:
+        def max_tokens(self, node):
+            return {"developer": 1234}.get(node)
+
+    monkeypatch.setattr(agents, "output_budgets", Budgets())
+    (request,) = _requests("developer", agents.request_params("developer"))
+    assert request["body"]["max_tokens"] == 1234
+    (request,) = _requests("creative", agents.request_params("creative"))
+    assert "response_format" in request["body"] and "max_tokens" not in request["body"]
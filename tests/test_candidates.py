@@ -0,0 +1,76 @@
+"""Best-of-N candidates: a request with n choices is recorded as n completions."""
+
+import pytest
+
+from output_budgets import OutputBudgets
+from run_history import RunHistory, recording
+
+COMPLETION_TOKENS = 900
+
+
+class _Message:
+    def __init__(self, content, output_tokens):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 1200, "output_tokens": output_tokens}
+        self.response_metadata = {"finish_reason": "stop"}
+
+
+class _Generation:
+    def __init__(self, message):
+        self.message = message
+        self.generation_info = {"finish_reason": "stop"}
+
+
+class _Result:
+    def __init__(self, generations):
+        self.generations = [generations]
+
+
+class _FakeModel:
+    """Each completion is COMPLETION_TOKENS long; usage covers the whole request."""
+    model_name = "gpt-4o"
+    temperature = 0.7
+    n = 1
+
+    def model_copy(self, update):
+        model = _FakeModel()
+        model.n = update.get("n", 1)
+        return model
+
+    def invoke(self, messages, **params):
+        return _Message("<html></html>", COMPLETION_TOKENS)
+
+    def generate(self, batch, **params):
+        usage = COMPLETION_TOKENS * self.n
+        return _Result([_Generation(_Message(f"<html>{i}</html>", usage)) for i in range(self.n)])
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    import agents
+    monkeypatch.setattr(agents, "_llm", lambda: _FakeModel())
+    monkeypatch.setattr(agents, "output_budgets", None)
+    return agents
+
+
+def _learned_budget(agents, tmp_path, n):
+    history = RunHistory(str(tmp_path / f"history-{n}.db"))
+    for i in range(5):
+        with recording() as recorder:
+            candidates = agents.call_llm_candidates("developer", [f"prompt {i}"], n=n)
+        assert len(candidates) == n
+        history.append({"brochure_url": "x"}, recorder, [], 1.0, True)
+    return OutputBudgets(history, pct=95, headroom=1.25, min_samples=5).max_tokens("developer")
+
+
+def test_learned_budget_does_not_grow_with_n(agents, tmp_path):
+    single, sampled = _learned_budget(agents, tmp_path, 1), _learned_budget(agents, tmp_path, 3)
+    assert single == sampled == int(COMPLETION_TOKENS * 1.25)
+
+
+def test_n_choices_count_as_n_calls(agents):
+    with recording() as recorder:
+        agents.call_llm_candidates("developer", ["prompt"], n=3)
+    entry = recorder.nodes["developer"]
+    assert entry["calls"] == 3
+    assert entry["output_tokens"] == 3 * COMPLETION_TOKENS
@@ -0,0 +1,94 @@
+"""The AIMD concurrency limiter."""
+
+import pytest
+
+from concurrency import AIMDLimiter, is_throttle_error
+from metrics import MetricsRegistry
+
+
+def _limiter(**kwargs) -> AIMDLimiter:
+    return AIMDLimiter(registry=MetricsRegistry(), **kwargs)
+
+
+def test_limit_grows_additively_when_saturated():
+    limiter = _limiter(initial_limit=2, max_limit=8)
+    limits = []
+    for _ in range(20):
+        held = 0
+        while limiter.try_acquire():
+            held += 1
+        assert held == limiter.limit
+        for _ in range(held):
+            limiter.release("historian", 1.0)
+        limits.append(limiter.limit)
+    # About +1 per window of calls: 20 windows end well short of the max
+    assert limits == sorted(limits)
+    assert 4 <= limits[-1] < 8
+
+
+def test_idle_limiter_does_not_grow():
+    limiter = _limiter(initial_limit=4)
+    for _ in range(50):
+        limiter.try_acquire()
+        limiter.release("historian", 1.0)
+    assert limiter.limit == 4
+
+
+def test_throttling_halves_the_limit_once_per_cooldown():
+    limiter = _limiter(initial_limit=16, cooldown_seconds=60)
+    for _ in range(3):
+        limiter.try_acquire()
+        limiter.release("developer", 1.0, throttled=True)
+    assert limiter.limit == 8
+    assert limiter.metrics.counter("llm.concurrency.decrease_suppressed") == 2
+
+
+def test_latency_spike_is_judged_per_agent():
+    limiter = _limiter(initial_limit=8, warmup_samples=3, cooldown_seconds=0)
+    for _ in range(3):
+        limiter.try_acquire()
+        limiter.release("historian", 2.0)
+        limiter.try_acquire()
+        limiter.release("developer", 40.0)
+    limiter.try_acquire()
+    limiter.release("developer", 41.0)  # normal for the Developer
+    assert limiter.limit == 8
+    limiter.try_acquire()
+    limiter.release("historian", 40.0)  # a spike for the Historian
+    assert limiter.limit == 4
+
+
+class _StatusError(Exception):
+    def __init__(self, message, status_code=None, response_status=None):
+        super().__init__(message)
+        self.status_code = status_code
+        if response_status is not None:
+            self.response = type("Response", (), {"status_code": response_status})()
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error", [
+    _StatusError("slow down", status_code=429),
+    _StatusError("slow down", response_status=429),
+    RateLimitError("quota"),
+    RuntimeError("Error code: 429 - {'error': {'message': 'Rate limit reached'}}"),
+    RuntimeError("HTTP 429 Too Many Requests"),
+    RuntimeError("upstream returned status=429"),
+    RuntimeError("Rate limit exceeded, retry in 2s"),
+])
+def test_throttle_errors_are_recognized(error):
+    assert is_throttle_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    _StatusError("bad request", status_code=400),
+    RuntimeError("This model's maximum context length is 128000 tokens, you requested 130429 tokens"),
+    RuntimeError("Could not fetch https://archive.org/details/apple-429-brochure"),
+    RuntimeError("Error code: 4290"),
+    RuntimeError("timed out after 429 seconds"),
+])
+def test_a_stray_429_in_the_message_is_not_a_throttle(error):
+    assert not is_throttle_error(error)
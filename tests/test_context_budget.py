@@ -0,0 +1,53 @@
+"""context_budget.compress: results stay within budget and keep the trailing JSON block."""
+
+import json
+
+from context_budget import compress, estimate_tokens
+
+
+def _design(css_rules: int, sections: int) -> str:
+    css = "\n".join(f".rule-{i} {{ color: #{i:06x}; padding: {i % 40}px; }}" for i in range(css_rules))
+    prose = "\n".join(
+        f"## Section {i}\nThe Apple II section {i} uses a {i * 2}px grid and warm beige #f5e6c8 panels."
+        for i in range(sections)
+    )
+    tokens = json.dumps({"colors": {"primary": "#1d1d1f", "accent": "#e8a33d"}, "font": "Helvetica"})
+    return f"# Design\n{prose}\n```css\n{css}\n```\nClosing notes on layout.\n```json\n{tokens}\n```\n"
+
+
+def test_text_within_budget_is_untouched():
+    text = "A short design note with #fff and 12px type."
+    assert compress(text, 500) == text
+
+
+def test_oversized_fences_count_against_the_budget():
+    text = _design(css_rules=800, sections=60)
+    assert estimate_tokens(text) > 9000
+    out = compress(text, 2500)
+    assert estimate_tokens(out) <= 2500
+    assert "```css" not in out  # larger than the whole budget, so dropped
+
+
+def test_trailing_json_block_is_kept_whole():
+    text = _design(css_rules=20, sections=200)
+    out = compress(text, 600)
+    assert estimate_tokens(out) <= 600
+    block = out[out.index("```json"):]
+    assert json.loads(block[len("```json"):-len("```")])["font"] == "Helvetica"
+
+
+def test_only_the_last_json_block_is_protected():
+    early = "```json\n" + json.dumps({"notes": ["x" * 12] * 400}) + "\n```"
+    lines = "\n".join(f"Line {i} about the Apple II keyboard and {i}K RAM." for i in range(300))
+    text = f"{early}\n{lines}\n```json\n{{\"font\": \"Helvetica\"}}\n```"
+    out = compress(text, 400)
+    assert estimate_tokens(out) <= 400
+    assert '"notes"' not in out
+    assert out.endswith('```json\n{"font": "Helvetica"}\n```')
+
+
+def test_single_oversized_unit_is_cut_at_a_word():
+    text = " ".join(f"word{i}" for i in range(2000))
+    out = compress(text, 50)
+    assert 0 < estimate_tokens(out) <= 50
+    assert text.startswith(out)
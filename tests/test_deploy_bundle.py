@@ -0,0 +1,150 @@
+"""Deploy bundles: the minifier only drops what cannot change behaviour, and bundles are reproducible."""
+
+import gzip
+import json
+import os
+
+from deploy_bundle import build_bundle, minify_css, minify_html, minify_js
+
+
+# ============================================================================
+# JAVASCRIPT
+# ============================================================================
+
+def test_js_strips_comments_and_indentation_but_keeps_line_breaks():
+    src = """
+    // set up
+    const a = 1;   /* inline */ const b = 2;
+        function f(x) {
+            return x + a;
+        }
+    """
+    assert minify_js(src) == "const a=1;const b=2;\nfunction f(x){\nreturn x+a;\n}"
+
+
+def test_js_string_and_template_literals_are_copied_verbatim():
+    src = (
+        "const s = 'a  // not a comment';\n"
+        'const d = "b /* nor this */  c";\n'
+        "const t = `line one\n    indented ${ obj[ 'k' ] + `inner  ${ x }` }  // kept`;"
+    )
+    out = minify_js(src)
+    assert "'a  // not a comment'" in out
+    assert '"b /* nor this */  c"' in out
+    assert "`line one\n    indented ${ obj[ 'k' ] + `inner  ${ x }` }  // kept`" in out
+
+
+def test_js_regex_literals_are_copied_verbatim():
+    src = (
+        "const re = /\\/\\/ [a-z/]+ \\s*/g;\n"
+        "if (ok) return /  x  /.test(s);\n"
+        "const half = total / 2 / count; // division, not a regex"
+    )
+    out = minify_js(src)
+    assert "/\\/\\/ [a-z/]+ \\s*/g" in out
+    assert "return/  x  /.test(s);" in out
+    assert out.endswith("const half=total/2/count;")
+
+
+def test_js_keeps_spaces_that_separate_tokens():
+    assert minify_js("let  x = a +  +b;\nreturn  typeof  y") == "let x=a+ +b;\nreturn typeof y"
+
+
+# ============================================================================
+# CSS
+# ============================================================================
+
+def test_css_strips_comments_whitespace_and_last_semicolon():
+    # ":" stays spaced: "a :hover" and "a:hover" are different selectors
+    src = """
+    /* header */
+    .nav > a ,  .nav b {
+        color : red;
+        margin: 0 auto;
+    }
+    """
+    assert minify_css(src) == ".nav>a,.nav b{color : red;margin: 0 auto}"
+
+
+def test_css_keeps_strings_and_calc_spaces():
+    src = '.a::before { content: "  two  spaces ; } "; width: calc(100% - 2rem); }'
+    assert minify_css(src) == '.a::before{content: "  two  spaces ; } ";width: calc(100% - 2rem)}'
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <!-- build info -->
+    <!--[if IE]><p>old browser</p><![endif]-->
+    <style>
+      body { margin: 0; }
+    </style>
+  </head>
+  <body>
+    <p class="lead"   data-x="a  b">Hello,      world</p>
+    <pre>
+  keep   this
+    exactly</pre>
+    <textarea name="note">  spaced
+      text  </textarea>
+    <script type="application/ld+json">{ "name":   "Apple II" }</script>
+    <script src="app.js"></script>
+    <script>
+      // greet
+      const msg = `Hi   ${name}`;
+    </script>
+  </body>
+</html>
+"""
+
+
+def test_html_preserves_pre_textarea_and_tags():
+    out = minify_html(PAGE)
+    assert "<pre>\n  keep   this\n    exactly</pre>" in out
+    assert '<textarea name="note">  spaced\n      text  </textarea>' in out
+    assert '<p class="lead"   data-x="a  b">Hello, world</p>' in out
+
+
+def test_html_drops_comments_but_keeps_conditional_ones():
+    out = minify_html(PAGE)
+    assert "build info" not in out
+    assert "<!--[if IE]><p>old browser</p><![endif]-->" in out
+
+
+def test_html_minifies_only_inline_css_and_js():
+    out = minify_html(PAGE)
+    assert "<style>body{margin: 0}</style>" in out
+    assert "<script>const msg=`Hi   ${name}`;</script>" in out
+    assert '<script type="application/ld+json">{ "name":   "Apple II" }</script>' in out
+
+
+def test_minifying_twice_changes_nothing():
+    once = minify_html(PAGE)
+    assert minify_html(once) == once
+
+
+# ============================================================================
+# BUNDLES
+# ============================================================================
+
+def test_bundle_is_reproducible_and_manifest_matches_files(tmp_path):
+    first = build_bundle(PAGE, str(tmp_path / "a"))
+    second = build_bundle(PAGE, str(tmp_path / "b"))
+    assert first == second
+
+    with open(tmp_path / "a" / "manifest.json", encoding="utf-8") as f:
+        assert json.load(f) == first
+    with open(tmp_path / "a" / "index.html.gz", "rb") as f:
+        assert gzip.decompress(f.read()).decode("utf-8") == minify_html(PAGE)
+
+    files = first["files"]
+    for name, entry in files.items():
+        assert os.path.getsize(tmp_path / "a" / name) == entry["bytes"]
+    assert files["index.html.gz"]["content_encoding"] == "gzip"
+    assert files["index.html"]["etag"] != files["index.html.gz"]["etag"]
+    report = first["report"]
+    assert report["gzip_bytes"] < report["minified_bytes"] < report["raw_bytes"]
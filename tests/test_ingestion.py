@@ -0,0 +1,49 @@
+"""Brochure ingestion: paths are confined to INGEST_ROOT and failures don't abort the run."""
+
+import os
+
+import pytest
+
+from ingestion import IngestCache, ingest, ingest_node, local_path
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    brochures = tmp_path / "root" / "brochures"
+    brochures.mkdir(parents=True)
+    (brochures / "apple.txt").write_text("The Apple II personal computer, 1977.\n")
+    (tmp_path / "secret.txt").write_text("do not read")
+    monkeypatch.setenv("INGEST_ROOT", str(tmp_path / "root"))
+    monkeypatch.setenv("INGEST_LOCAL", "on")
+    return tmp_path
+
+
+def test_relative_path_under_root_is_ingested(root):
+    result = ingest("brochures/apple.txt", cache=IngestCache(str(root / "cache")))
+    assert result["files"] == 1
+    assert "Apple II" in result["text"]
+
+
+@pytest.mark.parametrize("url", ["../secret.txt", "brochures/../../secret.txt", "{secret}", "file://{secret}"])
+def test_paths_outside_root_are_refused(root, url):
+    assert local_path(url.format(secret=root / "secret.txt")) is None
+
+
+def test_symlinks_out_of_root_are_refused(root):
+    link = root / "root" / "brochures" / "link.txt"
+    os.symlink(root / "secret.txt", link)
+    assert local_path("brochures/link.txt") is None
+    result = ingest("brochures", cache=IngestCache(str(root / "cache")))
+    assert result["files"] == 1
+    assert "do not read" not in result["text"]
+
+
+def test_local_ingestion_can_be_turned_off(root, monkeypatch):
+    monkeypatch.setenv("INGEST_LOCAL", "off")
+    assert local_path("brochures/apple.txt") is None
+
+
+def test_ingest_node_survives_a_corrupt_pdf(root, monkeypatch):
+    (root / "root" / "brochures" / "broken.pdf").write_bytes(b"not a pdf")
+    monkeypatch.setenv("INGEST_CACHE_DIR", str(root / "cache"))
+    assert ingest_node({"brochure_url": "brochures/broken.pdf"}) == {"brochure_text": ""}
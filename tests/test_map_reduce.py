@@ -0,0 +1,94 @@
+"""Historian map-reduce: chunks fan out in parallel in the caller's context, failures are skipped."""
+
+import threading
+
+import pytest
+from langchain.schema import AIMessage
+
+import agents
+from ingestion import PAGE_BREAK
+from scheduler import current_context, run_context
+
+PAGES = [f"Page {i}: " + "Apple II " * 40 for i in range(4)]
+TEXT = PAGE_BREAK.join(PAGES)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """call_llm stand-in recording (node, prompt, run context, thread) per call."""
+    calls = []
+    lock = threading.Lock()
+    monkeypatch.setattr(agents, "HISTORIAN_MAP_WORKERS", 4)
+    monkeypatch.setattr(agents, "HISTORIAN_CHUNK_CHARS", len(PAGES[0]) + 10)
+    monkeypatch.setattr(agents, "historian_cache", None)
+
+    def install(respond):
+        def call_llm(node, messages, **kwargs):
+            prompt = messages[-1].content
+            with lock:
+                calls.append({"node": node, "prompt": prompt, "context": current_context(),
+                              "thread": threading.get_ident()})
+            return AIMessage(content=respond(node, prompt))
+        monkeypatch.setattr(agents, "call_llm", call_llm)
+        return calls
+    return install
+
+
+def _part(prompt: str) -> str:
+    return next(f"notes {i}" for i, page in enumerate(PAGES) if page.strip() in prompt)
+
+
+def test_chunks_run_concurrently_with_the_callers_context(fake_llm):
+    barrier = threading.Barrier(4, timeout=5)
+
+    def respond(node, prompt):
+        if node == "historian_map":
+            barrier.wait()  # only passes if all four chunk calls are in flight together
+            return _part(prompt)
+        return "merged"
+
+    calls = fake_llm(respond)
+    with run_context(priority="bulk", job="tenant-a", weight=2.0):
+        assert agents.map_reduce_analysis({"brochure_url": "a.pdf"}, TEXT) == "merged"
+
+    maps = [c for c in calls if c["node"] == "historian_map"]
+    assert len(maps) == 4 and len({c["thread"] for c in maps}) == 4
+    assert {(c["context"].priority, c["context"].job, c["context"].weight) for c in calls} == {("bulk", "tenant-a", 2.0)}
+    (reduce_call,) = [c for c in calls if c["node"] == "historian"]
+    # notes are merged in document order, whatever order the chunks finished in
+    positions = [reduce_call["prompt"].index(f"notes {i}") for i in range(4)]
+    assert positions == sorted(positions)
+
+
+def test_failed_chunk_is_skipped(fake_llm):
+    def respond(node, prompt):
+        if node == "historian_map" and PAGES[2].strip() in prompt:
+            raise RuntimeError("model overloaded")
+        return _part(prompt) if node == "historian_map" else "merged"
+
+    calls = fake_llm(respond)
+    assert agents.map_reduce_analysis({"brochure_url": "a.pdf"}, TEXT) == "merged"
+    reduce_prompt = calls[-1]["prompt"]
+    assert "notes 1" in reduce_prompt and "notes 3" in reduce_prompt and "notes 2" not in reduce_prompt
+
+
+def test_every_chunk_failing_fails_the_historian(fake_llm, monkeypatch):
+    def respond(node, prompt):
+        raise RuntimeError("model overloaded")
+
+    calls = fake_llm(respond)
+    with pytest.raises(RuntimeError, match="all 4 brochure chunks failed"):
+        agents.map_reduce_analysis({"brochure_url": "a.pdf"}, TEXT)
+    assert all(c["node"] == "historian_map" for c in calls)
+
+    monkeypatch.setattr(agents, "HISTORIAN_MAP_THRESHOLD", 100)
+    update = agents.historian_agent({"brochure_url": "a.pdf", "brochure_text": TEXT})
+    assert update["analysis"].startswith("Error: all 4 brochure chunks failed")
+
+
+def test_short_brochures_take_a_single_call(fake_llm, monkeypatch):
+    monkeypatch.setattr(agents, "HISTORIAN_MAP_THRESHOLD", len(TEXT) + 1)
+    calls = fake_llm(lambda node, prompt: "whole analysis")
+    update = agents.historian_agent({"brochure_url": "a.pdf", "brochure_text": TEXT})
+    assert agents.resolve(update["analysis"]) == "whole analysis"
+    assert [c["node"] for c in calls] == ["historian"]
@@ -0,0 +1,72 @@
+"""Output budgets: per-node history windows and truncation handling in call_llm."""
+
+import pytest
+
+from output_budgets import MIN_BUDGET, OutputBudgets
+from run_history import RunHistory
+
+
+def _add_runs(history, node_tokens, runs, first=1):
+    db = history._conn()
+    for run in range(first, first + runs):
+        db.execute(
+            "INSERT INTO runs (id, run_id, started_at, duration_s, model, ok, checks_passed, checks_total,"
+            " total_tokens, cost_usd, payload) VALUES (?, ?, ?, 1, 'm', 1, 1, 1, 0, 0, x'')",
+            (run, f"run-{run}", float(run)),
+        )
+        for node, tokens in node_tokens(run).items():
+            db.execute(
+                "INSERT INTO node_runs (run, node, model, started_at, latency_ms, calls, input_tokens,"
+                " output_tokens, cost_usd, output_chars) VALUES (?, ?, 'm', ?, 10, 1, 0, ?, 0, 0)",
+                (run, node, float(run), tokens),
+            )
+
+
+def test_completion_tokens_keeps_each_nodes_newest_runs(tmp_path):
+    history = RunHistory(str(tmp_path / "h.db"))
+    # Old runs are long, the last 5 are short; the designer only ran in the first 3
+    _add_runs(history, lambda run: {"developer": 5000 if run <= 20 else 1000,
+                                    **({"designer": 700} if run <= 3 else {})}, runs=25)
+    samples = history.completion_tokens(window=5)
+    assert samples["developer"] == [1000.0] * 5
+    assert samples["designer"] == [700.0] * 3
+
+
+def test_budget_needs_min_samples_and_follows_new_runs(tmp_path):
+    history = RunHistory(str(tmp_path / "h.db"))
+    budgets = OutputBudgets(history, pct=95, headroom=1.0, min_samples=5, window=10)
+    _add_runs(history, lambda run: {"developer": 2000, "historian": 10}, runs=4)
+    assert budgets.max_tokens("developer") is None
+    _add_runs(history, lambda run: {"developer": 2000, "historian": 10}, runs=1, first=5)
+    assert budgets.max_tokens("developer") == 2000
+    assert budgets.max_tokens("historian") == MIN_BUDGET
+
+
+class _Reply:
+    def __init__(self, content, finish_reason):
+        self.content = content
+        self.response_metadata = {"finish_reason": finish_reason}
+
+    def model_copy(self, update):
+        return _Reply(update.get("content", self.content), self.response_metadata["finish_reason"])
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    import agents
+    monkeypatch.setattr(agents, "output_budgets", None)
+    return agents
+
+
+def test_truncated_structured_reply_without_a_cap_is_returned(agents, monkeypatch):
+    calls = []
+    monkeypatch.setattr(agents, "_invoke", lambda node, messages, params: calls.append(params) or _Reply("{", "length"))
+    response = agents.call_llm("creative", [], response_format={"type": "json_object"})
+    assert response.content == "{"
+    assert len(calls) == 1
+
+
+def test_truncated_reply_without_a_cap_is_continued(agents, monkeypatch):
+    replies = iter([_Reply("part one, ", "length"), _Reply("part two", "stop")])
+    monkeypatch.setattr(agents, "_invoke", lambda node, messages, params: next(replies))
+    assert agents.call_llm("designer", []).content == "part one, part two"
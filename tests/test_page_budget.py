@@ -0,0 +1,132 @@
+"""Page budget: offline metrics, budget overrides, and the critical-CSS split."""
+
+import pytest
+
+from page_budget import (
+    DEFAULT_BUDGETS,
+    analyze_page,
+    budgets_from_env,
+    check_budgets,
+    inline_critical_css,
+    page_budget_node,
+    split_css,
+)
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter">
+<link rel="stylesheet" href="print.css" media="print">
+<script src="analytics.js"></script>
+<script src="app.js" defer></script>
+<style>
+@import url("reset.css");
+@font-face { font-family: Brand; src: url(brand.woff2); }
+:root { --accent: #c00; }
+body { margin: 0; }
+.hero h1 { font-size: 3rem; }
+.hero .cta:hover { color: var(--accent); }
+#gallery img { width: 100%; }
+.footer, .hero { padding: 1rem; }
+@media (max-width: 600px) { .hero { padding: 0; } .footer { display: none; } }
+@keyframes fade { from { opacity: 0; } to { opacity: 1; } }
+</style>
+</head>
+<body>
+<section class="hero"><h1>Apple II</h1><a class="cta" href="#">Read</a></section>
+<div id="gallery"><img src="a.png" width="10" height="10"><img src="b.png"></div>
+<footer class="footer"><p>1977</p></footer>
+</body>
+</html>
+"""
+
+
+def test_metrics_count_nodes_blocking_resources_fonts_and_images():
+    metrics = analyze_page(PAGE)
+    assert metrics["dom_nodes"] == 16
+    assert metrics["dom_depth"] == 4  # html > body > section > h1
+    # the print stylesheet and the deferred script don't block rendering
+    assert metrics["render_blocking_urls"] == ["https://fonts.googleapis.com/css2?family=Inter", "analytics.js"]
+    assert metrics["font_urls"] == ["brand.woff2", "https://fonts.googleapis.com/css2?family=Inter"]
+    assert metrics["images_without_dimensions"] == 1
+    assert metrics["total_bytes"] == len(PAGE.encode("utf-8"))
+
+
+def test_fold_limits_which_selectors_count_as_above_it():
+    assert {".hero", "h1", ".cta"} <= set(analyze_page(PAGE, fold_nodes=3)["above_fold_selectors"])
+    assert "#gallery" not in analyze_page(PAGE, fold_nodes=3)["above_fold_selectors"]
+    assert "#gallery" in analyze_page(PAGE, fold_nodes=60)["above_fold_selectors"]
+
+
+def test_violations_list_only_metrics_over_budget():
+    violations = check_budgets(analyze_page(PAGE), dict(DEFAULT_BUDGETS, dom_nodes=10))
+    assert {"metric": "dom_nodes", "value": 16, "budget": 10} in violations
+    assert {v["metric"] for v in violations} == {"dom_nodes", "render_blocking", "images_without_dimensions"}
+
+
+def test_budget_overrides_and_unknown_names(monkeypatch):
+    monkeypatch.setenv("PAGE_BUDGETS", "total_bytes=1000, dom_nodes=5")
+    budgets = budgets_from_env()
+    assert budgets["total_bytes"] == 1000 and budgets["dom_nodes"] == 5
+    assert budgets["dom_depth"] == DEFAULT_BUDGETS["dom_depth"]
+    monkeypatch.setenv("PAGE_BUDGETS", "dom_node=5")
+    with pytest.raises(ValueError, match="dom_node"):
+        budgets_from_env()
+
+
+# ============================================================================
+# CRITICAL CSS
+# ============================================================================
+
+def test_split_keeps_above_the_fold_rules_and_defers_the_rest():
+    css = PAGE.split("<style>")[1].split("</style>")[0]
+    critical, deferred = split_css(css, {"html", "body", ":root", "*", ".hero", "h1", ".cta"})
+    assert critical == (
+        '@import url("reset.css");:root{--accent: #c00}body{margin: 0}.hero h1{font-size: 3rem}'
+        ".hero .cta:hover{color: var(--accent)}.footer,.hero{padding: 1rem}"
+        "@media (max-width: 600px){.hero{padding: 0}}"
+    )
+    assert deferred == (
+        "@font-face{font-family: Brand;src: url(brand.woff2)}#gallery img{width: 100%}"
+        "@media (max-width: 600px){.footer{display: none}}"
+        "@keyframes fade{from{opacity: 0}to{opacity: 1}}"
+    )
+
+
+def test_split_does_not_break_on_braces_inside_strings():
+    critical, deferred = split_css('.hero::before { content: "}{"; } .late { color: red; }', {".hero"})
+    assert critical == '.hero::before{content: "}{"}'
+    assert deferred == ".late{color: red}"
+
+
+def test_inline_critical_css_moves_deferred_rules_before_body_end():
+    html, sizes = inline_critical_css(PAGE, set(analyze_page(PAGE, fold_nodes=3)["above_fold_selectors"]))
+    head, body = html.split("</head>")
+    assert "#gallery img" not in head and ".hero h1{font-size: 3rem}" in head
+    assert body.rstrip().endswith("</footer>\n<style>" + body.split("<style>")[1].split("</style>")[0]
+                                  + "</style>\n</body>\n</html>")
+    assert "#gallery img{width: 100%}" in body
+    assert sizes["critical_css_bytes"] > 0 and sizes["deferred_css_bytes"] > 0
+
+
+def test_pages_without_inline_style_are_unchanged():
+    html = "<html><head></head><body><p>hi</p></body></html>"
+    assert inline_critical_css(html, {"p"}) == (html, {"critical_css_bytes": 0, "deferred_css_bytes": 0})
+
+
+# ============================================================================
+# WORKFLOW NODE
+# ============================================================================
+
+def test_node_reports_and_only_rewrites_code_when_enabled(monkeypatch):
+    monkeypatch.delenv("PAGE_BUDGETS", raising=False)
+    monkeypatch.setenv("PAGE_CRITICAL_CSS", "0")
+    update = page_budget_node({"code": PAGE})
+    assert "code" not in update
+    assert update["page_report"]["passed"] is False
+
+    monkeypatch.setenv("PAGE_CRITICAL_CSS", "1")
+    monkeypatch.setenv("PAGE_FOLD_NODES", "3")
+    update = page_budget_node({"code": PAGE})
+    assert update["code"] != PAGE
+    assert update["page_report"]["critical_css"]["deferred_css_bytes"] > 0
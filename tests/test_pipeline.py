@@ -0,0 +1,58 @@
+"""Stage pipeline: every run is reported, even when on_complete fails."""
+
+import threading
+
+from metrics import MetricsRegistry
+from pipeline import StagePipeline, parse_worker_counts
+
+DEPENDENCIES = {"historian": [], "designer": ["historian"], "copywriter": ["historian"],
+                "developer": ["designer", "copywriter"]}
+
+
+def _nodes():
+    return {
+        "historian": lambda s: {"analysis": f"analysis of {s['brochure_url']}"},
+        "designer": lambda s: {"design_mockup": f"design from {s['analysis']}"},
+        "copywriter": lambda s: {"copy": f"copy from {s['analysis']}"},
+        "developer": lambda s: {"code": f"<html>{s['design_mockup']} + {s['copy']}</html>"},
+    }
+
+
+def _run(pipeline, count):
+    pipeline.start()
+    for i in range(count):
+        pipeline.submit(f"run-{i}", {"brochure_url": f"url-{i}"})
+    results = dict(pipeline.results(count))
+    pipeline.stop()
+    return results
+
+
+def test_runs_flow_through_every_stage():
+    pipeline = StagePipeline(_nodes(), DEPENDENCIES, workers={"developer": 2}, queue_size=2,
+                             registry=MetricsRegistry())
+    results = _run(pipeline, 5)
+    assert results["run-3"]["code"] == "<html>design from analysis of url-3 + copy from analysis of url-3</html>"
+    assert pipeline.stage_stats()["developer"]["processed"] == 5
+
+
+def test_failing_on_complete_does_not_hang_results():
+    def spill(run_id, state):
+        if run_id == "run-1":
+            raise OSError("No space left on device")
+
+    registry = MetricsRegistry()
+    pipeline = StagePipeline(_nodes(), DEPENDENCIES, on_complete=spill, registry=registry)
+    finished = {}
+    collector = threading.Thread(target=lambda: finished.update(_run(pipeline, 3)))
+    collector.start()
+    collector.join(10)
+    assert not collector.is_alive()
+    assert sorted(finished) == ["run-0", "run-1", "run-2"]
+    assert pipeline.completion_errors == {"run-1": "No space left on device"}
+    assert registry.counter("pipeline.on_complete_errors") == 1
+
+
+def test_parse_worker_counts():
+    assert parse_worker_counts(["developer=6", "historian=2,designer=3", ""]) == {
+        "developer": 6, "historian": 2, "designer": 3,
+    }
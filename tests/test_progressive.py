@@ -0,0 +1,71 @@
+"""Draft-then-refine: the draft is published first, then replaced by the full run in the background."""
+
+import os
+import threading
+
+import pytest
+
+import agents
+import run_creative_team as cli
+
+
+@pytest.fixture
+def passes(monkeypatch):
+    """Fake draft (run_workflow) and refine (run_creative_team) passes; refine waits for `release`."""
+    seen = {"release": threading.Event(), "refine_started": threading.Event()}
+
+    def run_workflow(brochure_url):
+        seen["draft_drafting"] = agents._drafting.get()
+        if seen.get("draft_error"):
+            raise RuntimeError(seen["draft_error"])
+        return {"code": "<html>draft</html>"}
+
+    def run_creative_team(brochure_url, output_dir, publish_path=None, show_header=True):
+        seen["refine_drafting"] = agents._drafting.get()
+        seen["refine_thread"] = threading.current_thread().name
+        seen["refine_started"].set()
+        assert seen["release"].wait(5)
+        cli.write_atomic(publish_path, "<html>refined</html>")
+        return {"code": "<html>refined</html>"}
+
+    monkeypatch.setattr(cli, "run_workflow", run_workflow)
+    monkeypatch.setattr(cli, "run_creative_team", run_creative_team)
+    return seen
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_draft_is_on_disk_before_refine_finishes_then_replaced(passes, tmp_path):
+    latest = os.path.join(tmp_path, "apple_ii_website_latest.html")
+    published, refined = cli.run_progressive("a.pdf", str(tmp_path))
+
+    assert published is True
+    assert passes["refine_started"].wait(5)
+    # run_progressive returned while the refine pass is still running
+    assert not refined.done()
+    assert _read(latest) == "<html>draft</html>"
+
+    passes["release"].set()
+    assert refined.result(timeout=5) == {"code": "<html>refined</html>"}
+    assert _read(latest) == "<html>refined</html>"
+    assert passes["refine_thread"].startswith("refine")
+
+
+def test_only_the_draft_pass_runs_in_drafting_mode(passes, tmp_path):
+    passes["release"].set()
+    _, refined = cli.run_progressive("a.pdf", str(tmp_path))
+    refined.result(timeout=5)
+    assert passes["draft_drafting"] is True
+    assert passes["refine_drafting"] is False
+
+
+def test_failed_draft_publishes_nothing_but_still_refines(passes, tmp_path):
+    passes["draft_error"] = "model overloaded"
+    passes["release"].set()
+    published, refined = cli.run_progressive("a.pdf", str(tmp_path))
+    assert published is False
+    assert refined.result(timeout=5)["code"] == "<html>refined</html>"
+    assert _read(os.path.join(tmp_path, "apple_ii_website_latest.html")) == "<html>refined</html>"
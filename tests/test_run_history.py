@@ -0,0 +1,140 @@
+"""Run history: every entry point records its runs, distributed runs one task at a time."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import MetricsRegistry
+from pipeline import StagePipeline
+from run_history import RunHistory, RunRecorder, record_llm_call, record_run, recording
+from task_queue import LocalRedis, RedisTaskQueue, SQLiteTaskQueue
+from worker import work
+
+DEPENDENCIES = {"historian": [], "designer": ["historian"], "copywriter": ["historian"],
+                "developer": ["designer", "copywriter"]}
+FIELDS = {"historian": "analysis", "designer": "design_mockup", "copywriter": "copy", "developer": "code"}
+
+
+def _agent(node):
+    def run(state):
+        record_llm_call(node, "gpt-4o-mini", time.time(),
+                        SimpleNamespace(usage_metadata={"input_tokens": 100, "output_tokens": 10}))
+        return {FIELDS[node]: f"<html>{node} output</html>"}
+    return run
+
+
+def _outcome(state):
+    return all(state.get(f) for f in FIELDS.values()), [(bool(state.get("code")), "page written")]
+
+
+def _broken_outcome(state):
+    raise RuntimeError("validator crashed")
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.db")
+    monkeypatch.setenv("RUN_HISTORY_DB", path)
+    return path
+
+
+def _recorder(*nodes):
+    recorder = RunRecorder()
+    with recording(recorder):
+        for node in nodes:
+            _agent(node)({})
+    return recorder
+
+
+def test_record_run_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_DB", "")
+    assert record_run({"brochure_url": "x"}, RunRecorder(), duration_s=1.0, outcome=_outcome) is None
+
+
+def test_record_run_never_raises(history_db):
+    assert record_run({"brochure_url": "x"}, RunRecorder(), duration_s=1.0, outcome=_broken_outcome) is None
+    assert RunHistory(history_db).recent() == []
+
+
+def test_appending_to_a_run_adds_its_nodes(history_db):
+    state = {"brochure_url": "x", "analysis": "a", "design_mockup": "", "copy": "", "code": ""}
+    record_run(state, _recorder("historian"), duration_s=1.0, outcome=_outcome, run_id="r1")
+    done = {**state, "design_mockup": "d", "copy": "c", "code": "<html></html>"}
+    record_run(done, _recorder("designer", "copywriter", "developer"), duration_s=2.0, outcome=_outcome,
+               run_id="r1")
+    # A late, less complete piece doesn't overwrite the outcome
+    record_run(state, RunRecorder(), duration_s=0.5, outcome=_outcome, run_id="r1")
+
+    history = RunHistory(history_db)
+    (run,) = history.recent()
+    assert run["run_id"] == "r1" and run["ok"] is True
+    assert run["duration_s"] == pytest.approx(3.5)
+    assert run["total_tokens"] == 4 * 110
+    assert run["outputs"]["developer"]["chars"] == len("<html></html>")
+    assert sorted(row["group"] for row in history.node_stats()) == sorted(DEPENDENCIES)
+
+
+def _pipeline(outcome, count):
+    pipeline = StagePipeline({n: _agent(n) for n in DEPENDENCIES}, DEPENDENCIES, queue_size=2,
+                             registry=MetricsRegistry(), outcome=outcome)
+    pipeline.start()
+    for i in range(count):
+        pipeline.submit(f"run-{i}", {"brochure_url": f"url-{i}"})
+    results = dict(pipeline.results(count))
+    pipeline.stop()
+    return results
+
+
+def test_pipeline_runs_are_recorded(history_db):
+    _pipeline(_outcome, 3)
+
+    runs = RunHistory(history_db).recent()
+    assert sorted(r["run_id"].rsplit("-", 1)[0] for r in runs) == ["run-0", "run-1", "run-2"]
+    assert all(r["total_tokens"] == 4 * 110 and r["ok"] for r in runs)
+
+
+def test_pipeline_reports_runs_whose_history_fails(history_db):
+    results = _pipeline(_broken_outcome, 3)
+    assert sorted(results) == ["run-0", "run-1", "run-2"]
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_worker_tasks_add_up_to_one_run(history_db, tmp_path, backend):
+    queue = (SQLiteTaskQueue(str(tmp_path / "queue.db")) if backend == "sqlite"
+             else RedisTaskQueue(LocalRedis()))
+    queue.create_run("r1", {"brochure_url": "x", "analysis": "", "design_mockup": "", "copy": "", "code": ""},
+                     DEPENDENCIES)
+    assert work(queue, {n: _agent(n) for n in DEPENDENCIES}, "w1", 60, max_idle_seconds=0, outcome=_outcome) == 4
+
+    history = RunHistory(history_db)
+    (run,) = history.recent()
+    assert run["run_id"].startswith("r1-") and run["ok"] is True
+    assert run["total_tokens"] == 4 * 110
+    assert {row["group"]: row["count"] for row in history.node_stats()} == {n: 1 for n in DEPENDENCIES}
+
+
+def test_worker_keeps_going_when_history_fails(history_db, tmp_path):
+    queue = SQLiteTaskQueue(str(tmp_path / "queue.db"))
+    queue.create_run("r1", {"brochure_url": "x"}, DEPENDENCIES)
+    assert work(queue, {n: _agent(n) for n in DEPENDENCIES}, "w1", 60, max_idle_seconds=0,
+                outcome=_broken_outcome) == 4
+    assert queue.run_status("r1") == "done"
+
+
+def test_service_job_is_finished_even_when_history_fails(history_db, monkeypatch):
+    import asyncio
+
+    import workflow
+    from service import Job, JobManager
+
+    def stream(url):
+        yield "historian", {"analysis": "a"}
+
+    monkeypatch.setattr(workflow, "run_workflow_streaming", stream)
+    monkeypatch.setattr(workflow, "run_outcome", _broken_outcome)
+    loop = asyncio.new_event_loop()
+    job = Job("x", "interactive")
+    JobManager(loop, max_concurrent_jobs=1)._run(job)
+    loop.close()
+    assert job.status == "done" and job.finished is not None
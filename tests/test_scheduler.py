@@ -0,0 +1,100 @@
+"""The priority-aware fair scheduler."""
+
+import threading
+import time
+
+from concurrency import AIMDLimiter
+from metrics import MetricsRegistry
+from scheduler import BULK, INTERACTIVE, FairScheduler, run_context
+
+
+def _limiter(**kwargs) -> AIMDLimiter:
+    return AIMDLimiter(registry=MetricsRegistry(), **kwargs)
+
+
+# ============================================================================
+# FAIR SCHEDULER
+# ============================================================================
+
+class _Harness:
+    """One limiter slot, held by a blocker until release(); records dispatch order."""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.scheduler = FairScheduler(_limiter(initial_limit=1, max_limit=1), registry=self.registry)
+        self.order = []
+        self._gate = threading.Event()
+        self._threads = []
+        self.submit(INTERACTIVE, "blocker", "blocker", wait=lambda: self._gate.wait())
+
+    def _queued(self) -> int:
+        return sum(self.registry.gauge(f"scheduler.queued.{p}") or 0 for p in (INTERACTIVE, BULK))
+
+    def submit(self, priority, job, label, wait=None, share_key=None, weight=1.0):
+        before = self._queued()
+
+        def call():
+            with run_context(priority=priority, job=job, weight=weight):
+                self.scheduler.run("agent", lambda: (wait and wait(), self.order.append(label)), share_key=share_key)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        self._threads.append(thread)
+        # Wait until it is queued (or, for the blocker, running)
+        deadline = time.monotonic() + 5
+        while label != "blocker" and self._queued() == before and time.monotonic() < deadline:
+            time.sleep(0.001)
+        while label == "blocker" and self.scheduler.limiter.in_flight == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def release(self):
+        self._gate.set()
+        for thread in self._threads:
+            thread.join(5)
+        return [label for label in self.order if label != "blocker"]
+
+
+def test_interactive_goes_first_and_bulk_jobs_share_fairly():
+    h = _Harness()
+    for label in ("a1", "a2", "a3"):
+        h.submit(BULK, "job-a", label)
+    h.submit(BULK, "job-b", "b1")
+    h.submit(INTERACTIVE, "demo", "i1")
+    assert h.release() == ["i1", "a1", "b1", "a2", "a3"]
+
+
+def test_weights_share_capacity_proportionally():
+    h = _Harness()
+    for i in range(4):
+        h.submit(BULK, "heavy", f"h{i}", weight=2.0)
+    for i in range(2):
+        h.submit(BULK, "light", f"l{i}")
+    assert h.release() == ["h0", "h1", "l0", "h2", "h3", "l1"]
+
+
+def test_starved_bulk_call_jumps_the_line():
+    h = _Harness()
+    h.scheduler.max_wait_seconds = 0.05
+    h.submit(BULK, "nightly", "old")
+    time.sleep(0.1)
+    h.submit(INTERACTIVE, "demo", "new")
+    assert h.release() == ["old", "new"]
+
+
+def test_interactive_follower_promotes_a_queued_bulk_leader():
+    h = _Harness()
+    h.submit(BULK, "nightly", "other")
+    h.submit(BULK, "nightly", "shared", share_key="k")
+    with run_context(priority=INTERACTIVE, job="demo") as ctx:
+        h.scheduler.promote("k", ctx)
+    assert h.release() == ["shared", "other"]
+    assert h.registry.counter("scheduler.shared_promotions") == 1
+
+
+def test_promotion_before_the_leader_is_queued_still_applies():
+    h = _Harness()
+    h.submit(BULK, "nightly", "other")
+    with run_context(priority=INTERACTIVE, job="demo") as ctx:
+        h.scheduler.promote("k", ctx)
+    h.submit(BULK, "nightly", "shared", share_key="k")
+    assert h.release() == ["shared", "other"]
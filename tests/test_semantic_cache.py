@@ -0,0 +1,85 @@
+"""Semantic Historian cache: URL normalization, the similarity threshold, and model/prompt namespaces."""
+
+import pytest
+
+import agents
+from metrics import MetricsRegistry
+from semantic_cache import SemanticCache, embed, normalize_text
+
+URL = "https://archive.org/details/apple-ii-1977-brochure"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(str(tmp_path / "semantic.db"), threshold=0.92, metrics=MetricsRegistry())
+
+
+def _similarity(a: str, b: str) -> float:
+    return float(embed(a) @ embed(b))
+
+
+def test_mirrors_of_the_same_url_normalize_alike():
+    for variant in (
+        "http://www.archive.org/details/apple-ii-1977-brochure",
+        "https://web.archive.org/web/2020/https://archive.org/details/apple-ii-1977-brochure",
+        "archive.org/details/Apple_II_1977_Brochure",
+    ):
+        assert normalize_text(variant) == normalize_text(URL)
+        assert _similarity(variant, URL) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_whole_words_keep_near_identical_models_apart():
+    assert _similarity(URL.replace("apple-ii", "apple-iii"), URL) < 0.92
+    assert _similarity("https://archive.org/details/commodore-pet-brochure", URL) < 0.7
+
+
+def test_hit_at_or_above_threshold_and_miss_below(cache):
+    cache.add(URL, "Apple II analysis", "gpt-4o-mini:abc")
+    hit = cache.lookup("http://www.archive.org/details/apple-ii-1977-brochure", "gpt-4o-mini:abc")
+    assert hit["analysis"] == "Apple II analysis" and hit["input"] == URL
+    assert cache.lookup(URL.replace("apple-ii", "apple-iii"), "gpt-4o-mini:abc") is None
+
+    similarity = _similarity(URL.replace("apple-ii", "apple-iii"), URL)
+    cache.threshold = similarity
+    assert cache.lookup(URL.replace("apple-ii", "apple-iii"), "gpt-4o-mini:abc") is not None
+
+
+def test_lookups_never_cross_namespaces(cache):
+    cache.add(URL, "mini analysis", "gpt-4o-mini:abc")
+    assert cache.lookup(URL, "gpt-4o:abc") is None
+    assert cache.lookup(URL, "gpt-4o-mini:def") is None
+    cache.add(URL, "4o analysis", "gpt-4o:abc")
+    assert cache.lookup(URL, "gpt-4o:abc")["analysis"] == "4o analysis"
+    assert cache.lookup(URL, "gpt-4o-mini:abc")["analysis"] == "mini analysis"
+
+
+def test_counters_persist_and_reach_the_metrics(cache, tmp_path):
+    cache.add(URL, "analysis", "ns")
+    cache.lookup(URL, "ns")
+    cache.lookup("https://archive.org/details/commodore-pet-brochure", "ns")
+    assert cache.metrics.counter("semantic_cache.hits") == 1
+    assert cache.metrics.counter("semantic_cache.misses") == 1
+    assert cache.metrics.gauge("semantic_cache.hit_rate") == 0.5
+
+    reopened = SemanticCache(str(tmp_path / "semantic.db"), metrics=MetricsRegistry())
+    stats = reopened.stats()
+    assert (stats["entries"], stats["lookups"], stats["hits"]) == (1, 2, 1)
+    assert stats["top"] == [{"input": URL, "hits": 1}]
+    # a fresh process reads the stored vectors back
+    assert reopened.lookup(URL, "ns")["analysis"] == "analysis"
+
+
+def test_historian_reuse_is_scoped_to_the_live_model(cache, monkeypatch):
+    monkeypatch.setattr(agents, "historian_cache", cache)
+    state = {"brochure_url": URL}
+    agents.remember_analysis(state, "cached analysis")
+    assert agents.cached_analysis({"brochure_url": URL.replace("https://", "http://www.")}) is not None
+
+    monkeypatch.setattr(agents.llm, "model_name", "some-other-model")
+    assert agents.cached_analysis(state) is None
+
+
+def test_error_analyses_are_not_cached(cache, monkeypatch):
+    monkeypatch.setattr(agents, "historian_cache", cache)
+    agents.remember_analysis({"brochure_url": URL}, "Error: model overloaded")
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,96 @@
+"""HTTP service: request parsing and job validation reject bad input with 4xx, not a crash."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from service import MAX_BODY_BYTES, MAX_URL_CHARS, HttpError, Request, Service, read_request
+
+
+def _read(raw: bytes):
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(go())
+
+
+def test_reads_a_post_body():
+    request = _read(b'POST /jobs?x=1 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}')
+    assert (request.method, request.path, request.body) == ("POST", "/jobs", b"{}")
+
+
+@pytest.mark.parametrize("length", [b"abc", b"12x", b"-5"])
+def test_malformed_content_length_is_400(length):
+    with pytest.raises(HttpError) as e:
+        _read(b"POST /jobs HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert e.value.status == 400
+
+
+def test_oversized_body_is_413():
+    with pytest.raises(HttpError) as e:
+        _read(f"POST /jobs HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+    assert e.value.status == 413
+
+
+class _Jobs:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, brochure_url, priority):
+        self.submitted.append((brochure_url, priority))
+        return SimpleNamespace(id="job1")
+
+
+def _create(body: bytes):
+    jobs = _Jobs()
+    response = Service(jobs).create_job(Request("POST", "/jobs", {}, body))
+    return response, jobs.submitted
+
+
+def test_create_job_accepts_a_url():
+    response, submitted = _create(json.dumps({"brochure_url": "https://example.com/b.pdf"}).encode())
+    assert response.startswith(b"HTTP/1.1 202")
+    assert submitted == [("https://example.com/b.pdf", "interactive")]
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b"\xff\xfe",
+    b"[1, 2]",
+    b"{}",
+    json.dumps({"brochure_url": ["https://a", "https://b"]}).encode(),
+    json.dumps({"brochure_url": 42}).encode(),
+    json.dumps({"brochure_url": "https://e.com/" + "a" * MAX_URL_CHARS}).encode(),
+    json.dumps({"brochure_url": "https://e.com", "priority": ["bulk"]}).encode(),
+])
+def test_create_job_rejects_bad_input_before_creating_a_job(body):
+    with pytest.raises(HttpError) as e:
+        _create(body)
+    assert e.value.status == 400
+
+
+def test_evicted_jobs_release_their_blobs(monkeypatch):
+    from service import Job, JobManager
+    from state_store import MemoryBlobStore, blob_scope, configure_blob_store, store_text
+
+    monkeypatch.setenv("STATE_BLOB_MIN_CHARS", "1")
+    store = MemoryBlobStore()
+    configure_blob_store(store)
+    try:
+        loop = asyncio.new_event_loop()
+        manager = JobManager(loop, max_concurrent_jobs=1, max_stored_jobs=1)
+        for i in range(3):
+            job = Job(f"url-{i}", "bulk")
+            with blob_scope(job.blobs):
+                job.state["code"] = store_text(f"<html>{i}</html>")
+            job.status, job.finished = "done", float(i)
+            manager.jobs[job.id] = job
+        manager._evict()
+        loop.close()
+        assert len(manager.jobs) == 1 and len(store) == 1
+    finally:
+        configure_blob_store(None)
@@ -0,0 +1,124 @@
+"""Single-flight: identical in-flight calls share one upstream request, billed once."""
+
+import threading
+import time
+
+import pytest
+
+from metrics import MetricsRegistry
+from run_history import recording
+from scheduler import BULK, INTERACTIVE, run_context
+from singleflight import SingleFlight, prompt_key
+
+
+def _together(n, target):
+    results = [None] * n
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target(i))) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight(registry=MetricsRegistry())
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "analysis"
+
+    assert _together(5, lambda i: flight.do("k", slow)) == ["analysis"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["upstream"] == 1 and flight.stats()["saved"] == 4
+
+
+def test_followers_get_the_leaders_error():
+    flight = SingleFlight(registry=MetricsRegistry())
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    def call(i):
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            return str(e)
+
+    assert _together(3, call) == ["upstream down"] * 3
+
+
+def test_calls_after_completion_go_upstream_again():
+    flight = SingleFlight(registry=MetricsRegistry())
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_prompt_key_covers_params_and_messages():
+    class Msg:
+        def __init__(self, type, content):
+            self.type, self.content = type, content
+
+    base = prompt_key("gpt-4o", [Msg("human", "hi")], temperature=0.7)
+    assert base == prompt_key("gpt-4o", [Msg("human", "hi")], temperature=0.7)
+    assert base != prompt_key("gpt-4o", [Msg("human", "hi!")], temperature=0.7)
+    assert base != prompt_key("gpt-4o", [Msg("human", "hi")], temperature=0.2)
+
+
+# ============================================================================
+# AGENT CALLS
+# ============================================================================
+
+class _Reply:
+    content = "analysis"
+    usage_metadata = {"input_tokens": 1000, "output_tokens": 500}
+    response_metadata = {"finish_reason": "stop"}
+
+
+class _SlowModel:
+    model_name = "gpt-4o"
+    temperature = 0.7
+
+    def invoke(self, messages, **params):
+        time.sleep(0.3)
+        return _Reply()
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    import agents
+    monkeypatch.setattr(agents, "_llm", lambda: _SlowModel())
+    monkeypatch.setattr(agents, "output_budgets", None)
+    return agents
+
+
+def test_only_the_leader_records_usage(agents):
+    recorders = [None, None]
+
+    def run(i):
+        with recording() as recorder, run_context(priority=BULK, job=f"job-{i}"):
+            recorders[i] = recorder
+            time.sleep(0.05 * i)  # the first caller leads
+            return agents.call_llm("historian", ["same prompt"]).content
+
+    assert _together(2, run) == ["analysis", "analysis"]
+    leader, follower = recorders
+    assert leader.nodes["historian"]["calls"] == 1
+    assert "historian" not in follower.nodes
+
+
+def test_interactive_follower_promotes_a_bulk_leader(agents, monkeypatch):
+    promoted = []
+    monkeypatch.setattr(agents.llm_scheduler, "promote", lambda key, ctx: promoted.append(ctx.priority))
+
+    def run(i):
+        priority = BULK if i == 0 else INTERACTIVE
+        with run_context(priority=priority, job=f"job-{i}"):
+            time.sleep(0.05 * i)
+            return agents.call_llm("historian", ["same prompt"]).content
+
+    _together(2, run)
+    assert promoted == [INTERACTIVE]
@@ -0,0 +1,68 @@
+"""Multi-page sites: the pages reducer, shared-asset linking, and the graph's final state."""
+
+import pytest
+
+from state import create_initial_state, merge_pages
+
+
+def test_merge_pages_adds_each_page():
+    pages = merge_pages({}, {"index.html": "a"})
+    pages = merge_pages(pages, {"specs.html": "b"})
+    assert pages == {"index.html": "a", "specs.html": "b"}
+    assert merge_pages(None, {"order.html": "c"}) == {"order.html": "c"}
+    assert merge_pages(pages, None) == pages
+
+
+def test_merge_pages_does_not_mutate_its_inputs():
+    current = {"index.html": "a"}
+    merge_pages(current, {"index.html": "new"})
+    assert current == {"index.html": "a"}
+
+
+@pytest.fixture(scope="module")
+def site_builder():
+    import site_builder
+    return site_builder
+
+
+def test_link_shared_assets_strips_inline_css_and_js(site_builder):
+    page = (
+        "<!DOCTYPE html><html><head><title>Specs</title>"
+        "<style>body { color: red; }</style>"
+        '<link rel="stylesheet" href="assets/site.css">'
+        "</head><body><h1>Specs</h1><script>console.log('x')</script>"
+        '<script src="https://cdn.example/analytics.js"></script></body></html>'
+    )
+    html, removed = site_builder.link_shared_assets(page)
+    assert "<style" not in html and "console.log" not in html
+    assert removed == len("<style>body { color: red; }</style>") + len("<script>console.log('x')</script>")
+    assert html.count('href="assets/site.css"') == 1
+    assert html.count('src="assets/site.js"') == 1
+    assert html.index("assets/site.js") < html.index("</head>")
+    assert "cdn.example/analytics.js" in html  # external scripts stay
+
+
+def test_link_shared_assets_adds_a_head_when_missing(site_builder):
+    html, removed = site_builder.link_shared_assets("<html><body><p>Order</p></body></html>")
+    assert removed == 0
+    assert html.index("<head>") < html.index("assets/site.css") < html.index("<body")
+
+
+def test_graph_final_state_has_every_page(site_builder, monkeypatch):
+    class Reply:
+        def __init__(self, content):
+            self.content = content
+
+    for node, field in (("ingest", "brochure_text"), ("historian", "analysis"),
+                        ("designer", "design_mockup"), ("copywriter", "copy")):
+        monkeypatch.setitem(site_builder.AGENT_NODES, node, lambda state, field=field: {field: f"{field} text"})
+    monkeypatch.setattr(site_builder, "call_llm", lambda node, messages: Reply(
+        f"<!DOCTYPE html><html><head><title>{node}</title><style>p {{}}</style></head><body></body></html>"
+    ))
+
+    pages = ["home", "specs", "order"]
+    app = site_builder.create_site_workflow("fanout", pages).compile()
+    state = app.invoke(create_initial_state("https://example.com/brochure"))
+    assert sorted(state["pages"]) == ["index.html", "order.html", "specs.html"]
+    assert state["site_report"]["errors"] == []
+    assert state["site_report"]["duplicated_css_bytes"] == 0
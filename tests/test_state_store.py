@@ -0,0 +1,72 @@
+"""Blob store: content addressing, and the memory store frees a run's blobs once released."""
+
+import pytest
+
+from metrics import MetricsRegistry
+from pipeline import StagePipeline
+from state_store import (
+    MemoryBlobStore,
+    blob_scope,
+    configure_blob_store,
+    is_handle,
+    release_blobs,
+    resolve,
+    store_text,
+    text_length,
+)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setenv("STATE_BLOB_MIN_CHARS", "1")
+    store = MemoryBlobStore()
+    configure_blob_store(store)
+    yield store
+    configure_blob_store(None)
+
+
+def test_handles_round_trip(store):
+    handle = store_text("hello world")
+    assert is_handle(handle) and text_length(handle) == 11
+    assert resolve(handle) == "hello world"
+    assert store_text("hello world") == handle and len(store) == 1
+
+
+def test_released_run_frees_only_blobs_no_one_else_holds(store):
+    with blob_scope() as run_a:
+        shared = store_text("same page")
+        store_text("draft A")
+        store_text("draft A")  # stored twice, still one reference for the run
+    with blob_scope() as run_b:
+        store_text("same page")
+    assert len(store) == 2
+
+    release_blobs(run_a)
+    assert len(store) == 1 and resolve(shared) == "same page"
+    release_blobs(run_b)
+    assert len(store) == 0 and not run_b
+
+
+def test_unscoped_blobs_stay(store):
+    handle = store_text("kept")
+    release_blobs(set())
+    assert resolve(handle) == "kept"
+
+
+def test_pipeline_releases_spilled_runs(store):
+    deps = {"historian": [], "developer": ["historian"]}
+    nodes = {
+        "historian": lambda s: {"analysis": store_text(f"analysis of {s['brochure_url']}")},
+        "developer": lambda s: {"code": store_text(f"<html>{resolve(s['analysis'])}</html>")},
+    }
+    spilled = {}
+    pipeline = StagePipeline(nodes, deps, registry=MetricsRegistry(), release_finished=True,
+                             on_complete=lambda run_id, state: spilled.update({run_id: resolve(state["code"])}))
+    pipeline.start()
+    for i in range(4):
+        pipeline.submit(f"run-{i}", {"brochure_url": f"url-{i}"})
+    list(pipeline.results(4))
+    pipeline.stop()
+
+    assert spilled["run-2"] == "<html>analysis of url-2</html>"
+    assert len(store) == 0
@@ -0,0 +1,114 @@
+"""Task queues: leases, fencing and crash safety, on SQLite and on the bundled LocalRedis."""
+
+import threading
+
+import pytest
+
+from task_queue import LocalRedis, RedisTaskQueue, SQLiteTaskQueue
+
+DEPENDENCIES = {"historian": [], "designer": ["historian"], "copywriter": ["historian"],
+                "developer": ["designer", "copywriter"]}
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteTaskQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    return RedisTaskQueue(LocalRedis(), max_attempts=2)
+
+
+def _run_all(queue, worker="w"):
+    while True:
+        task = queue.claim(worker, 60)
+        if task is None:
+            return
+        assert queue.complete(task, {f"{task.node}_out": f"{task.node} by {worker}"})
+
+
+def test_dependencies_run_in_order(queue):
+    queue.create_run("r1", {"brochure_url": "x"}, DEPENDENCIES)
+    order = []
+    while True:
+        task = queue.claim("w", 60)
+        if task is None:
+            break
+        order.append(task.node)
+        queue.complete(task, {f"{task.node}_out": "ok"})
+    assert order[0] == "historian" and order[-1] == "developer"
+    assert sorted(order) == sorted(DEPENDENCIES)
+    assert queue.run_status("r1") == "done"
+    assert queue.get_state("r1")["developer_out"] == "ok"
+
+
+def test_stale_worker_cannot_overwrite_new_lease_holder(queue):
+    queue.create_run("r1", {"brochure_url": "x"}, {"historian": []})
+    stale = queue.claim("slow", -1)  # lease already expired
+    fresh = queue.claim("fast", 60)
+    assert fresh.task_id == stale.task_id and fresh.attempt == stale.attempt + 1
+
+    assert not queue.heartbeat(stale, 60)
+    assert queue.complete(fresh, {"historian_out": "fresh"})
+    assert not queue.complete(stale, {"historian_out": "stale"})
+    queue.fail(stale, "late failure")
+    assert queue.get_state("r1")["historian_out"] == "fresh"
+    assert queue.run_status("r1") == "done"
+
+
+def test_expired_final_attempt_fails_the_task(queue):
+    queue.create_run("r1", {"brochure_url": "x"}, {"historian": [], "designer": ["historian"]})
+    queue.claim("a", -1)
+    queue.claim("b", -1)
+    task = queue.claim("c", 60)  # historian exhausted; the designer runs on the error text
+    assert task.node == "designer"
+    assert queue.get_state("r1")["analysis"].startswith("Error: lease expired")
+
+
+def test_each_task_is_claimed_once_under_contention(queue):
+    for i in range(5):
+        queue.create_run(f"r{i}", {"brochure_url": "x"}, {"historian": []})
+    claimed, lock = [], threading.Lock()
+
+    def worker():
+        while True:
+            task = queue.claim(threading.current_thread().name, 60)
+            if task is None:
+                return
+            with lock:
+                claimed.append(task.task_id)
+            queue.complete(task, {})
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(claimed) == len(set(claimed)) == 5
+
+
+def test_crash_during_claim_keeps_the_task_queued(monkeypatch):
+    redis = LocalRedis()
+    queue = RedisTaskQueue(redis)
+    queue.create_run("r1", {"brochure_url": "x"}, {"historian": []})
+
+    def crash(*args, **kwargs):
+        raise ConnectionError("worker died mid-claim")
+
+    monkeypatch.setattr(redis, "zadd", crash)
+    with pytest.raises(ConnectionError):
+        queue.claim("w", 60)
+    monkeypatch.undo()
+
+    assert queue.stats()["tasks_ready"] == 1
+    task = queue.claim("w", 60)
+    assert task.node == "historian" and task.attempt == 1
+
+
+def test_sibling_completions_enqueue_the_child_once():
+    queue = RedisTaskQueue(LocalRedis())
+    queue.create_run("r1", {"brochure_url": "x"}, DEPENDENCIES)
+    queue.complete(queue.claim("w", 60), {})
+    designer, copywriter = queue.claim("w", 60), queue.claim("w", 60)
+    queue.complete(designer, {})
+    queue.complete(copywriter, {})
+    assert queue.claim("w", 60).node == "developer"
+    assert queue.claim("w", 60) is None
@@ -0,0 +1,74 @@
+"""Template renderer: agent-written JSON is escaped or validated before it reaches the page."""
+
+from template_renderer import (
+    DEFAULT_COPY,
+    DEFAULT_TOKENS,
+    extract_json_block,
+    missing_blocks,
+    normalize_tokens,
+    render_page,
+    render_stylesheet,
+)
+
+ATTACK = '<script>alert("x")</script>'
+
+
+def test_copy_is_html_escaped_everywhere():
+    copy = {
+        "brand": ATTACK,
+        "nav": [ATTACK, "Specs"],
+        "hero": {"headline": ATTACK, "subheadline": "a & b", "cta": ATTACK},
+        "features": [{"title": ATTACK, "body": ATTACK}],
+        "specs": [{"label": ATTACK, "value": '"><img src=x onerror=alert(1)>'}],
+        "quote": {"text": ATTACK, "author": ATTACK},
+        "cta": {"headline": ATTACK, "body": ATTACK, "button": ATTACK},
+        "footer": ATTACK,
+    }
+    page = render_page(None, copy)
+    assert 'alert("x")' not in page and "<img" not in page
+    assert "&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt;" in page
+    assert "a &amp; b" in page
+    # The only scripts are the page's own
+    assert page.count("<script") == 1
+
+
+def test_tokens_that_could_break_out_of_css_fall_back():
+    tokens = normalize_tokens({
+        "colors": {"primary": "red; } body { display: none", "accent": "#E8762B", "text": "rgb(10, 20, 30)"},
+        "hero_gradient": ["#fff", "</style><script>"],
+        "fonts": {"heading": "Georgia; } </style>", "body": "'Helvetica Neue', sans-serif"},
+        "radius": "expression(alert(1))",
+        "max_width": "960px",
+    })
+    assert tokens["colors"]["primary"] == DEFAULT_TOKENS["colors"]["primary"]
+    assert tokens["colors"]["accent"] == "#E8762B"
+    assert tokens["colors"]["text"] == "rgb(10, 20, 30)"
+    assert tokens["hero_gradient"] == DEFAULT_TOKENS["hero_gradient"]
+    assert tokens["fonts"]["heading"] == DEFAULT_TOKENS["fonts"]["heading"]
+    assert tokens["fonts"]["body"] == "'Helvetica Neue', sans-serif"
+    assert tokens["radius"] == DEFAULT_TOKENS["radius"]
+    assert tokens["max_width"] == "960px"
+    css = render_stylesheet(tokens)
+    assert "</style>" not in css and "expression(" not in css
+
+
+def test_malformed_copy_falls_back_to_defaults():
+    page = render_page(None, {"features": ["not a card", 3], "specs": "oops", "nav": [1, 2], "hero": "x"})
+    assert DEFAULT_COPY["features"][0]["title"] in page
+    assert DEFAULT_COPY["specs"][0]["label"] in page
+    assert DEFAULT_COPY["hero"]["headline"] in page
+
+
+def test_the_last_json_block_wins():
+    text = 'Notes\n```json\n{"brand": "Draft"}\n```\nMore\n```json\n{"brand": "Final"}\n```'
+    assert extract_json_block(text) == {"brand": "Final"}
+    assert extract_json_block('```json\n["not", "an object"]\n```') is None
+    assert extract_json_block('{"brand": "Bare"}') == {"brand": "Bare"}
+    assert missing_blocks("no tokens here", text) == ["designer"]
+
+
+def test_rendered_page_passes_validation():
+    from agents import validate_code
+
+    checks = validate_code(render_page())
+    assert all(passed for passed, _ in checks), [m for passed, m in checks if not passed]
@@ -0,0 +1,56 @@
+"""Distributed workers: updates on the shared queue never depend on one host's blob store."""
+
+import threading
+
+import pytest
+
+from state_store import MemoryBlobStore, configure_blob_store, is_handle, resolve, store_text
+from task_queue import LocalRedis, RedisTaskQueue, SQLiteTaskQueue
+from worker import work
+
+DEPENDENCIES = {"historian": [], "designer": ["historian"], "copywriter": ["historian"],
+                "developer": ["designer", "copywriter"]}
+
+
+@pytest.fixture(autouse=True)
+def small_blobs(monkeypatch):
+    monkeypatch.setenv("STATE_BLOB_MIN_CHARS", "1")
+    yield
+    configure_blob_store(None)
+
+
+def _nodes(after_historian=None):
+    def historian(state):
+        if after_historian:
+            after_historian.set()
+        return {"analysis": store_text(f"analysis of {state['brochure_url']}")}
+
+    return {
+        "historian": historian,
+        "designer": lambda s: {"design_mockup": store_text(f"design from {resolve(s['analysis'])}")},
+        "copywriter": lambda s: {"copy": store_text(f"copy from {resolve(s['analysis'])}")},
+        "developer": lambda s: {"code": store_text(f"<html>{resolve(s['design_mockup'])}</html>")},
+    }
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "redis"])
+def test_two_hosts_with_separate_blob_stores(tmp_path, backend):
+    queue = (SQLiteTaskQueue(str(tmp_path / "queue.db")) if backend == "sqlite"
+             else RedisTaskQueue(LocalRedis()))
+    queue.create_run("r1", {"brochure_url": "x"}, DEPENDENCIES)
+
+    # Host A: runs the Historian, then stops
+    host_a = MemoryBlobStore()
+    configure_blob_store(host_a)
+    stop = threading.Event()
+    assert work(queue, _nodes(after_historian=stop), "host-a", 60, stop=stop) == 1
+    assert len(host_a) == 0  # its blobs were given back
+
+    # Host B: its own, empty store, picks up the rest of the run
+    configure_blob_store(MemoryBlobStore())
+    assert work(queue, _nodes(), "host-b", 60, max_idle_seconds=0) == 3
+
+    assert queue.run_status("r1") == "done"
+    state = queue.get_state("r1")
+    assert not any(is_handle(v) for v in state.values())
+    assert state["code"] == "<html>design from analysis of x</html>"
@@ -0,0 +1,247 @@
+"""
+Pillar 3: Multi-Agent Creative Team - Distributed Worker Mode
+
+One machine running run_creative_team.py is a ceiling. Worker mode lets any
+number of hosts share the work through a queue (see task_queue.py):
+
+    # Anywhere: put brochures on the queue
+    python3 worker.py submit manifest.txt --queue sqlite:///shared/pillar3.db
+
+    # On every worker host (as many as you like)
+    python3 worker.py work --queue sqlite:///shared/pillar3.db --concurrency 4
+
+    # Check progress / collect finished sites
+    python3 worker.py status  --queue sqlite:///shared/pillar3.db
+    python3 worker.py collect --queue sqlite:///shared/pillar3.db
+
+Granularity:
+- node (default): each agent is its own task, so a run's Designer and
+  Copywriter can execute on different hosts at the same time
+- run: each task is a whole workflow (fewer round-trips to the queue)
+
+Workers renew their lease with heartbeats while an agent is running; if a
+host crashes, its tasks are re-claimed by others once the lease expires.
+
+The queue URL can also come from TASK_QUEUE_URL in .env. Anyone who can
+write to the queue picks brochure_url, so workers do not read local
+brochure files unless INGEST_LOCAL=on (see ingestion.py).
+
+Blob handles (STATE_BLOB_STORE) only resolve on the host that stored them,
+so a worker writes every update to the queue as plain text and gives its
+local blobs back once the task is done.
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from run_history import RunRecorder, record_run, recording
+from scheduler import BULK, run_context
+from state import create_initial_state
+from state_store import blob_scope, release_blobs, resolve, resolve_state
+from task_queue import WHOLE_RUN, Task, open_queue
+
+DEFAULT_QUEUE_URL = os.getenv("TASK_QUEUE_URL", "sqlite:///output/queue/pillar3.db")
+
+
+def submit_runs(queue, manifest, granularity: str = "node") -> int:
+    """Put every manifest entry on the queue. Returns the number submitted."""
+    from workflow import get_node_dependencies
+
+    dependencies = get_node_dependencies() if granularity == "node" else {WHOLE_RUN: []}
+    for entry in manifest:
+        queue.create_run(entry["id"], create_initial_state(entry["brochure_url"]), dependencies)
+    return len(manifest)
+
+
+def node_functions() -> Dict[str, Callable]:
+    """Task name -> function(state) -> update, for both granularities."""
+    from workflow import AGENT_NODES, get_compiled_workflow
+
+    return {**AGENT_NODES, WHOLE_RUN: get_compiled_workflow().invoke}
+
+
+class _Heartbeat:
+    """Renews a task's lease in the background while the agent runs."""
+
+    def __init__(self, queue, task: Task, lease_seconds: float):
+        self.queue = queue
+        self.task = task
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(self.task, self.lease_seconds):
+                return  # lease lost; completion will be rejected
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def work(
+    queue,
+    functions: Dict[str, Callable],
+    worker_id: str,
+    lease_seconds: float = 120.0,
+    poll_interval: float = 1.0,
+    stop: Optional[threading.Event] = None,
+    max_idle_seconds: Optional[float] = None,
+    outcome: Optional[Callable] = None,
+) -> int:
+    """
+    Claim and execute tasks until `stop` is set (or the queue stays empty
+    for `max_idle_seconds`).
+
+    With `outcome` (fn(state) -> (ok, validation), e.g.
+    workflow.run_outcome) every task is added to its run's history record.
+
+    Returns:
+        Number of tasks this worker completed
+    """
+    stop = stop or threading.Event()
+    completed = 0
+    idle_since = time.monotonic()
+
+    while not stop.is_set():
+        task = queue.claim(worker_id, lease_seconds)
+        if task is None:
+            if max_idle_seconds is not None and time.monotonic() - idle_since > max_idle_seconds:
+                break
+            stop.wait(poll_interval)
+            continue
+        idle_since = time.monotonic()
+
+        print(f"⚙️  {worker_id}: {task.run_id} / {task.node} (attempt {task.attempt})")
+        started = time.monotonic()
+        recorder, blobs = RunRecorder(), set()
+        try:
+            state = queue.get_state(task.run_id)
+            with _Heartbeat(queue, task, lease_seconds), run_context(priority=BULK, job=task.run_id), \
+                    recording(recorder), blob_scope(blobs):
+                update = functions[task.node](state) or {}
+            # Other hosts can't read this host's blob store
+            update = resolve_state(dict(update))
+        except Exception as e:
+            print(f"❌ {worker_id}: {task.run_id} / {task.node} failed - {e}")
+            queue.fail(task, str(e))
+            failed = True
+        else:
+            failed = not queue.complete(task, update)
+            if failed:
+                print(f"⚠️  {worker_id}: lease on {task.run_id} / {task.node} was lost; result discarded")
+            else:
+                completed += 1
+        release_blobs(blobs)
+
+        if outcome is None:
+            continue
+        # Each task adds its nodes to the run's history record; the submit time
+        # keeps a resubmitted run id from adding to an older record
+        try:
+            history_id = f"{task.run_id}-{int(queue.run_created(task.run_id))}"
+            record_run(queue.get_state(task.run_id), recorder, duration_s=time.monotonic() - started,
+                       outcome=outcome, failed=failed, run_id=history_id)
+        except Exception as e:
+            print(f"⚠️  {worker_id}: {task.run_id} not recorded in the run history - {e}")
+
+    return completed
+
+
+def run_workers(queue_url: str, concurrency: int, lease_seconds: float, max_idle_seconds: Optional[float]) -> int:
+    """Run `concurrency` worker threads in this process until interrupted."""
+    from workflow import run_outcome
+
+    functions = node_functions()
+    host = f"{socket.gethostname()}-{os.getpid()}"
+    stop = threading.Event()
+    totals = []
+
+    def loop(i: int):
+        # One queue handle per thread (SQLite connections are per-thread anyway)
+        queue = open_queue(queue_url)
+        totals.append(work(queue, functions, f"{host}-{i}", lease_seconds,
+                           stop=stop, max_idle_seconds=max_idle_seconds, outcome=run_outcome))
+
+    threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping workers (current tasks will be re-leased elsewhere)...")
+        stop.set()
+    return sum(totals)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed workers for the creative team")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_submit = sub.add_parser("submit", help="Queue brochures from a manifest")
+    p_submit.add_argument("manifest")
+    p_submit.add_argument("--granularity", choices=["node", "run"], default="node")
+
+    p_work = sub.add_parser("work", help="Pull and execute tasks")
+    p_work.add_argument("--concurrency", type=int, default=4)
+    p_work.add_argument("--lease", type=float, default=120.0, help="Lease length in seconds")
+    p_work.add_argument("--exit-when-idle", type=float, default=None,
+                        help="Exit after this many seconds with an empty queue")
+
+    sub.add_parser("status", help="Show queue counts")
+
+    p_collect = sub.add_parser("collect", help="Write finished sites to disk")
+    p_collect.add_argument("--out", default="output/distributed")
+
+    for p in (p_submit, p_work, sub.choices["status"], p_collect):
+        p.add_argument("--queue", default=DEFAULT_QUEUE_URL, help="sqlite:///path, redis://host:port/db")
+
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        from batch_mode import load_manifest
+        count = submit_runs(open_queue(args.queue), load_manifest(args.manifest), args.granularity)
+        print(f"📤 Submitted {count} runs to {args.queue} ({args.granularity} tasks)")
+
+    elif args.command == "work":
+        os.environ.setdefault("INGEST_LOCAL", "off")
+        print(f"👷 Worker starting: {args.concurrency} threads on {args.queue}")
+        done = run_workers(args.queue, args.concurrency, args.lease, args.exit_when_idle)
+        print(f"✅ Completed {done} tasks")
+
+    elif args.command == "status":
+        for key, value in sorted(open_queue(args.queue).stats().items()):
+            print(f"   {key:<16} {value}")
+
+    elif args.command == "collect":
+        queue = open_queue(args.queue)
+        sites_dir = os.path.join(args.out, "sites")
+        os.makedirs(sites_dir, exist_ok=True)
+        run_ids = queue.finished_runs()
+        for run_id in run_ids:
+            with open(os.path.join(sites_dir, f"{run_id}.html"), "w", encoding="utf-8") as f:
+                f.write(resolve(queue.get_state(run_id)["code"]))
+        print(f"💾 Collected {len(run_ids)} sites into {sites_dir}/")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,27 +12,72 @@ The workflow uses:
 - Type-safe state management
 - Error handling at each node
 
+Topologies (WORKFLOW_TOPOLOGY):
+- fanout (default): Designer and Copywriter as two parallel calls
+- merged: one Creative call returns both as structured JSON, so the
+  Historian's analysis is sent once instead of twice
+  (compare them with: python benchmark_topology.py)
+
 This is the CORE of the multi-agent architecture!
 """
 
-from typing import Dict, TypedDict, Literal
-from langgraph.graph import StateGraph, END
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TypedDict, Literal
+from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage
 
-from state import WebDesignState
+from state import WebDesignState, create_initial_state
+from ingestion import ingest_node
+from animation_lint import animation_lint_node
+from page_budget import page_budget_node
+from state_store import resolve, text_length
 from agents import (
     historian_agent,
     designer_agent,
     copywriter_agent,
-    developer_agent
+    creative_agent,
+    developer_agent,
+    validate_code,
 )
 
 
+# Node name -> node function, in workflow order (ingest and the last two need
+# no LLM); "creative" replaces designer + copywriter in the merged topology
+AGENT_NODES = {
+    "ingest": ingest_node,
+    "historian": historian_agent,
+    "designer": designer_agent,
+    "copywriter": copywriter_agent,
+    "creative": creative_agent,
+    "developer": developer_agent,
+    "animation_lint": animation_lint_node,
+    "page_budget": page_budget_node,
+}
+
+
+TOPOLOGIES = ("fanout", "merged")
+
+# Nodes that only exist in one topology
+_TOPOLOGY_NODES = {
+    "fanout": ("designer", "copywriter"),
+    "merged": ("creative",),
+}
+
+
+def default_topology() -> str:
+    """WORKFLOW_TOPOLOGY from the environment ("fanout" if unset)."""
+    topology = os.getenv("WORKFLOW_TOPOLOGY", "fanout").strip().lower()
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"WORKFLOW_TOPOLOGY must be one of {', '.join(TOPOLOGIES)}, not {topology!r}")
+    return topology
+
+
 # ============================================================================
 # WORKFLOW GRAPH DEFINITION
 # ============================================================================
 
-def create_workflow() -> StateGraph:
+def create_workflow(topology: Optional[str] = None) -> StateGraph:
     """
     Create the LangGraph workflow for the creative team.
     
@@ -40,6 +85,8 @@ def create_workflow() -> StateGraph:
     
         START
           ↓
+       [INGEST]  ← Extracts text from local brochure files
+          ↓
       [HISTORIAN]
           ↓
       ┌───┴───┐
@@ -50,50 +97,136 @@ def create_workflow() -> StateGraph:
           ↓
      [DEVELOPER]
           ↓
+  [ANIMATION LINT]  ← Flags/fixes janky animations
+          ↓
+    [PAGE BUDGET]  ← Offline page-weight check
+          ↓
          END
     
+    With topology="merged" the middle is a single [CREATIVE] node that
+    writes both design_mockup and copy.
+    
+    Args:
+        topology: "fanout" or "merged" (defaults to WORKFLOW_TOPOLOGY)
+    
     Returns:
         StateGraph configured with all agents and edges
     """
+    topology = topology or default_topology()
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {topology!r} (known: {', '.join(TOPOLOGIES)})")
+    excluded = {node for name, nodes in _TOPOLOGY_NODES.items() if name != topology for node in nodes}
     
     # Create the graph
     workflow = StateGraph(WebDesignState)
     
     # Add all agent nodes
-    workflow.add_node("historian", historian_agent)
-    workflow.add_node("designer", designer_agent)
-    workflow.add_node("copywriter", copywriter_agent)
-    workflow.add_node("developer", developer_agent)
+    for name, agent in AGENT_NODES.items():
+        if name not in excluded:
+            workflow.add_node(name, agent)
     
     # Define the flow
-    # 1. Start with Historian
-    workflow.set_entry_point("historian")
+    # 1. Start with ingestion (a no-op for URLs), then the Historian
+    workflow.set_entry_point("ingest")
+    workflow.add_edge("ingest", "historian")
+    
+    if topology == "merged":
+        # 2-3. One Creative call produces both the design spec and the copy
+        workflow.add_edge("historian", "creative")
+        workflow.add_edge("creative", "developer")
+    else:
+        # 2. After Historian, both Designer and Copywriter can run
+        #    They don't depend on each other, only on Historian
+        workflow.add_edge("historian", "designer")
+        workflow.add_edge("historian", "copywriter")
+        
+        # 3. After Designer AND Copywriter complete, run Developer
+        workflow.add_edge("designer", "developer")
+        workflow.add_edge("copywriter", "developer")
     
-    # 2. After Historian, both Designer and Copywriter can run
-    #    They don't depend on each other, only on Historian
-    workflow.add_edge("historian", "designer")
-    workflow.add_edge("historian", "copywriter")
+    # 4. Lint (and fix) animation performance problems in the page
+    workflow.add_edge("developer", "animation_lint")
     
-    # 3. After Designer AND Copywriter complete, run Developer
-    workflow.add_edge("designer", "developer")
-    workflow.add_edge("copywriter", "developer")
+    # 5. Measure the generated page against the performance budgets
+    workflow.add_edge("animation_lint", "page_budget")
     
-    # 4. After Developer, we're done
-    workflow.add_edge("developer", END)
+    # 6. After the budget check, we're done
+    workflow.add_edge("page_budget", END)
     
     return workflow
 
 
+def get_compiled_workflow(topology: Optional[str] = None):
+    """
+    Build and compile the workflow once per process (and topology).
+    
+    Compiling is pure setup work; long-running processes (the HTTP service,
+    workers) reuse the same compiled graph for every run.
+    """
+    return _compile_workflow(topology or default_topology())
+
+
+@lru_cache(maxsize=None)
+def _compile_workflow(topology: str):
+    return create_workflow(topology).compile()
+
+
+def get_node_dependencies(workflow: StateGraph = None) -> Dict[str, List[str]]:
+    """
+    Read the graph's edges back out as {node: [nodes it waits for]}.
+    
+    Execution modes that don't use LangGraph's runtime (batch, pipelined)
+    follow the same DAG through this, so they never drift from
+    create_workflow().
+    """
+    workflow = workflow or create_workflow()
+    deps = {name: [] for name in workflow.nodes}
+    
+    edges = list(workflow.edges)
+    for starts, end in getattr(workflow, "waiting_edges", ()):
+        edges.extend((start, end) for start in starts)
+    
+    for start, end in edges:
+        if start in (START, END) or end in (START, END):
+            continue
+        if start not in deps[end]:
+            deps[end].append(start)
+    
+    return {name: sorted(parents) for name, parents in deps.items()}
+
+
+def get_workflow_stages(workflow: StateGraph = None) -> List[List[str]]:
+    """
+    Group nodes into stages that can run together.
+    
+    Every node in a stage only depends on nodes from earlier stages:
+        [["historian"], ["copywriter", "designer"], ["developer"]]
+    """
+    deps = get_node_dependencies(workflow)
+    done = set()
+    stages = []
+    
+    while len(done) < len(deps):
+        stage = sorted(n for n, parents in deps.items() if n not in done and set(parents) <= done)
+        if not stage:
+            raise ValueError(f"Workflow graph has a cycle among: {sorted(set(deps) - done)}")
+        stages.append(stage)
+        done.update(stage)
+    
+    return stages
+
+
 # ============================================================================
 # WORKFLOW EXECUTION
 # ============================================================================
 
-def run_workflow(brochure_url: str) -> WebDesignState:
+def run_workflow(brochure_url: str, topology: Optional[str] = None) -> WebDesignState:
     """
     Execute the complete creative team workflow.
     
     Args:
         brochure_url: URL or description of the brochure to analyze
+        topology: "fanout" or "merged" (defaults to WORKFLOW_TOPOLOGY)
         
     Returns:
         Final state with all fields populated
@@ -104,17 +237,10 @@ def run_workflow(brochure_url: str) -> WebDesignState:
     """
     
     # Create initial state
-    initial_state: WebDesignState = {
-        "brochure_url": brochure_url,
-        "analysis": "",
-        "design_mockup": "",
-        "copy": "",
-        "code": ""
-    }
+    initial_state = create_initial_state(brochure_url)
     
-    # Build and compile the workflow
-    workflow = create_workflow()
-    app = workflow.compile()
+    # Build and compile the workflow (cached after the first run)
+    app = get_compiled_workflow(topology)
     
     # Execute the workflow
     # LangGraph will handle the parallel execution automatically
@@ -139,6 +265,10 @@ def visualize_workflow():
     
     print("     START")
     print("       ↓")
+    print("   ┌──────┐")
+    print("   │INGEST│  ← Extracts local brochure text (no LLM)")
+    print("   └──┬───┘")
+    print("       ↓")
     print("  ┌─────────┐")
     print("  │HISTORIAN│  ← Analyzes 1977 Apple II brochure")
     print("  └────┬────┘")
@@ -155,6 +285,14 @@ def visualize_workflow():
     print("   │DEVELOPER │  ← Synthesizes everything")
     print("   └────┬─────┘")
     print("        ↓")
+    print(" ┌──────────────┐")
+    print(" │ANIMATION LINT│  ← Fixes janky animations (no LLM)")
+    print(" └──────┬───────┘")
+    print("        ↓")
+    print("  ┌───────────┐")
+    print("  │PAGE BUDGET│  ← Checks page weight (no LLM)")
+    print("  └─────┬─────┘")
+    print("        ↓")
     print("       END")
     print("\n" + "="*60)
     print("Key Insights:")
@@ -170,27 +308,24 @@ def visualize_workflow():
 # STREAMING EXECUTION (For live progress updates)
 # ============================================================================
 
-def run_workflow_streaming(brochure_url: str):
+def run_workflow_streaming(brochure_url: str, topology: Optional[str] = None):
     """
     Execute workflow with streaming updates.
     
     This version yields progress updates as each agent completes,
     perfect for showing live progress in the CLI.
     
+    Args:
+        brochure_url: URL or description of the brochure to analyze
+        topology: "fanout" or "merged" (defaults to WORKFLOW_TOPOLOGY)
+    
     Yields:
         Tuples of (agent_name, state) as each agent completes
     """
     
-    initial_state: WebDesignState = {
-        "brochure_url": brochure_url,
-        "analysis": "",
-        "design_mockup": "",
-        "copy": "",
-        "code": ""
-    }
+    initial_state = create_initial_state(brochure_url)
     
-    workflow = create_workflow()
-    app = workflow.compile()
+    app = get_compiled_workflow(topology)
     
     # Stream the execution
     for output in app.stream(initial_state):
@@ -208,15 +343,33 @@ def get_workflow_stats(state: WebDesignState) -> Dict[str, int]:
     Calculate statistics about the generated content.
     
     Returns:
-        Dictionary with character counts for each field
+        Dictionary with character counts for each field, plus the page
+        budget results once that node has run
     """
-    return {
-        "analysis_chars": len(state["analysis"]),
-        "design_chars": len(state["design_mockup"]),
-        "copy_chars": len(state["copy"]),
-        "code_chars": len(state["code"]),
-        "code_lines": state["code"].count('\n') if state["code"] else 0
+    stats = {
+        "brochure_chars": text_length(state.get("brochure_text")),
+        "analysis_chars": text_length(state["analysis"]),
+        "design_chars": text_length(state["design_mockup"]),
+        "copy_chars": text_length(state["copy"]),
+        "code_chars": text_length(state["code"]),
+        "code_lines": resolve(state["code"]).count('\n') if state["code"] else 0
     }
+    lint = state.get("lint_report")
+    if lint:
+        stats.update({
+            "lint_findings": lint["counts"]["total"],
+            "lint_fixed": lint["counts"]["fixed"],
+        })
+    report = state.get("page_report")
+    if report:
+        metrics = report["metrics"]
+        stats.update({
+            "page_bytes": metrics["total_bytes"],
+            "page_dom_nodes": metrics["dom_nodes"],
+            "page_render_blocking": metrics["render_blocking"],
+            "page_budget_violations": len(report["violations"]),
+        })
+    return stats
 
 
 def validate_state(state: WebDesignState) -> bool:
@@ -227,7 +380,12 @@ def validate_state(state: WebDesignState) -> bool:
         True if all fields have content, False otherwise
     """
     required_fields = ["analysis", "design_mockup", "copy", "code"]
-    return all(state.get(field) and len(state[field]) > 0 for field in required_fields)
+    return all(text_length(state.get(field)) > 0 for field in required_fields)
+
+
+def run_outcome(state: WebDesignState) -> Tuple[bool, List[Tuple[bool, str]]]:
+    """(validate_state, validate_code of the page) - how the run history judges a run."""
+    return validate_state(state), validate_code(resolve(state.get("code") or ""))
 
 
 # ============================================================================
@@ -276,7 +434,7 @@ if __name__ == "__main__":
             
             filepath = os.path.join(output_dir, "apple_ii_website.html")
             with open(filepath, "w", encoding="utf-8") as f:
-                f.write(final_state["code"])
+                f.write(resolve(final_state["code"]))
             
             print(f"\n💾 Website saved to: {filepath}")
             print("🌐 Open this file in your browser to see the result!\n")